@@ -2,17 +2,35 @@
 
 import os
 import sys
+import time
 import argparse
+import multiprocessing
 import yaml
-from typing import Dict, Any, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional
 
 from src.components.input_handler import InputHandler
+from src.components.site_crawler import SiteCrawler
 from src.components.webpage_renderer import WebpageRenderer
 from src.components.ocr_extractor import OCRExtractor
 from src.components.gui_analyzer import GUIAnalyzer
 from src.components.layout_to_text_converter import LayoutToTextConverter
 from src.components.llm_integration import LLMIntegration
 from src.components.output_handler import OutputHandler
+from src.components.change_detector import ChangeDetector
+from src.components.template_clusterer import TemplateClusterer
+from src.components.results_store import create_results_store
+from src.components.columnar_exporter import ColumnarExporter
+from src.components.output_writer import OutputWriter, AsyncOutputWriter
+from src.components.analysis_service import AnalysisService
+from src.components.pixel_buffer import PixelBufferCache
+from src.components.visual_diff import VisualDiff
+from src.components.serialization import dumps_json_bytes
+from src.components.pipeline import Pipeline, Stage, StageCache
+from src.components.batch_journal import BatchJournal
+from src.components.work_queue import QueueWorker, create_work_queue
+from src.components.service_recorder import create_service_recorder
 
 def load_config(config_path: str) -> Dict[str, Any]:
     """Load configuration from a YAML file."""
@@ -24,106 +42,1037 @@ def load_config(config_path: str) -> Dict[str, Any]:
         print(f"Error loading config file: {e}")
         return {}
 
-def process_webpage(url: str, 
-                   config: Dict[str, Any], 
-                   output_dir: Optional[str] = None,
-                   use_llm: bool = False,
-                   analysis_type: str = "general",
-                   custom_prompt: Optional[str] = None) -> Dict[str, Any]:
+def create_output_writer(output_config: Dict[str, Any]) -> OutputWriter:
+    """Create the output file writer described by the `output` config section."""
+    compression = output_config.get('compression')
+    if not output_config.get('async_writes', True):
+        return OutputWriter(compression=compression, fsync=output_config.get('fsync', False))
+    
+    return AsyncOutputWriter(
+        compression=compression,
+        fsync=output_config.get('fsync', False),
+        max_queue_size=output_config.get('queue_size', 64),
+        batch_size=output_config.get('batch_size', 16)
+    )
+
+def create_columnar_exporter(export_config: Dict[str, Any]) -> Optional[ColumnarExporter]:
+    """Create the columnar exporter described by the `columnar_export` config section."""
+    if not export_config.get('enabled', False):
+        return None
+    
+    return ColumnarExporter(
+        export_dir=export_config.get('directory'),
+        format=export_config.get('format', 'parquet'),
+        row_group_size=export_config.get('row_group_size', 100000)
+    )
+
+def create_output_handler(config: Dict[str, Any], output_dir: Optional[str] = None) -> OutputHandler:
     """
-    Process a webpage and convert it to textual description.
+    Create the output handler of a run, with the results store, columnar exporter
+    and file writer described by the config.
+    
+    One handler is shared by every page of a run, so its pages end up in one
+    stored run and one export, and the store and writer batch across pages.
+    The caller closes it once the run is over.
+    """
+    store_config = config.get('results_store', {})
+    output_config = config.get('output', {})
+    return OutputHandler(
+        output_dir=output_dir,
+        results_store=create_results_store(store_config),
+        write_files=store_config.get('write_files', True),
+        columnar_exporter=create_columnar_exporter(config.get('columnar_export', {})),
+        writer=create_output_writer(output_config),
+        pretty_json=output_config.get('pretty_json', False)
+    )
+
+def gui_analyzer_options(ui_config: Dict[str, Any]) -> Dict[str, Any]:
+    """GUIAnalyzer keyword arguments from the `ui_analysis` config section."""
+    return {
+        'palette_max_pixels': ui_config.get('palette_max_pixels', 262144),
+        'keep_full_resolution': ui_config.get('keep_full_resolution', False),
+        'max_colors': ui_config.get('max_colors', 5),
+        'min_confidence': ui_config.get('min_confidence', 0.0)
+    }
+
+def create_analysis_service(ui_config: Dict[str, Any]) -> Optional[AnalysisService]:
+    """Create the GUI analysis worker pool described by the `ui_analysis` config section."""
+    workers = ui_config.get('workers', 0)
+    if not workers:
+        return None
+    
+    service = AnalysisService(
+        workers=None if workers == 'auto' else workers,
+        max_tasks_per_worker=ui_config.get('max_tasks_per_worker', 100),
+        memory_limit_mb=ui_config.get('memory_limit_mb'),
+        analyzer_options=gui_analyzer_options(ui_config)
+    )
+    # Start the workers while the first page renders, not when its screenshot is submitted
+    print(f"Started {len(service.warm_up())} GUI analysis workers")
+    return service
+
+def page_concurrency(config: Dict[str, Any], analysis_service: Optional[AnalysisService]) -> int:
+    """
+    Number of pages a crawl or batch processes at the same time.
+    
+    Defaults to one page per GUI analysis worker, so every worker has a screenshot
+    to analyze while other pages render and run OCR.
+    """
+    if ordered_services(config):
+        # Service calls of concurrent pages would interleave in any order
+        return 1
+    default = analysis_service.workers if analysis_service is not None else 1
+    return max(1, config.get('pipeline', {}).get('concurrent_pages', default))
+
+def ordered_services(config: Dict[str, Any]) -> bool:
+    """
+    Whether service calls are recorded or replayed by order (`services.match: order`).
+    
+    Recordings are then matched by position, so the calls must be made in the same
+    order every run: tiles and pages are processed one at a time.
+    """
+    services_config = config.get('services', {})
+    return services_config.get('mode', 'live') != 'live' and services_config.get('match', 'request') == 'order'
+
+def map_pages(process: Callable[[Any], Any], items: Iterable[Any], concurrency: int) -> Iterator[Any]:
+    """
+    Process items on up to `concurrency` threads, yielding the results in order.
+    
+    Items are taken from the iterable only as threads free up, so a crawl that
+    produces pages lazily keeps its backpressure.
+    """
+    if concurrency <= 1:
+        for item in items:
+            yield process(item)
+        return
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        running = deque()
+        for item in items:
+            running.append(executor.submit(process, item))
+            if len(running) >= concurrency:
+                yield running.popleft().result()
+        while running:
+            yield running.popleft().result()
+
+def create_pixel_buffers(ui_config: Dict[str, Any],
+                         analysis_service: Optional[AnalysisService]) -> Optional[PixelBufferCache]:
+    """
+    Create the shared screenshot buffers of a page described by the `ui_analysis` config section.
+    
+    Buffers are only worth it when worker processes attach to them, so there are
+    none without an analysis service.
+    """
+    backend = ui_config.get('pixel_buffer', 'memmap')
+    if analysis_service is None or not backend:
+        return None
+    
+    return PixelBufferCache(backend=backend, directory=ui_config.get('pixel_buffer_dir'))
+
+def create_site_crawler(crawl_config: Dict[str, Any]) -> SiteCrawler:
+    """Create the site crawler described by the `crawl` config section."""
+    return SiteCrawler(
+        max_depth=crawl_config.get('max_depth', 2),
+        max_pages=crawl_config.get('max_pages', 50),
+        concurrency=crawl_config.get('concurrency', 4),
+        delay=crawl_config.get('delay', 1.0),
+        respect_robots=crawl_config.get('respect_robots', True),
+        user_agent=crawl_config.get('user_agent', 'WebpageDesignToText'),
+        queue_size=crawl_config.get('queue_size', 8),
+        timeout=crawl_config.get('timeout', 10),
+        allowed_hosts=crawl_config.get('allowed_hosts')
+    )
+
+def create_template_clusterer(template_config: Dict[str, Any]) -> Optional[TemplateClusterer]:
+    """Create the template clusterer described by the `templates` config section."""
+    if not template_config.get('enabled', False):
+        return None
+    
+    return TemplateClusterer(
+        image_threshold=template_config.get('image_threshold', 12),
+        dom_threshold=template_config.get('dom_threshold', 6),
+        top_height=template_config.get('top_height', 1080)
+    )
+
+def create_change_detector(change_config: Dict[str, Any]) -> Optional[ChangeDetector]:
+    """Create the change detector described by the `change_detection` config section."""
+    if not change_config.get('enabled', False):
+        return None
+    
+    return ChangeDetector(
+        store_dir=change_config.get('store_dir'),
+        hash_threshold=change_config.get('hash_threshold', 4),
+        band_height=change_config.get('band_height', 512),
+        max_changed_fraction=change_config.get('max_changed_fraction', 0.5)
+    )
+
+def create_stage_cache(pipeline_config: Dict[str, Any]) -> Optional[StageCache]:
+    """
+    Create the stage output cache described by the `pipeline` config section.
+    
+    Caching is opt-in (`pipeline.cache: true`): without it every run renders and
+    analyzes the page afresh.
+    """
+    if not pipeline_config.get('cache', False):
+        return None
+    return StageCache(pipeline_config.get('cache_dir'))
+
+def build_webpage_pipeline(config: Dict[str, Any],
+                           output_handler: OutputHandler,
+                           use_llm: bool = False,
+                           analysis_type: str = "general",
+                           custom_prompt: Optional[str] = None,
+                           analysis_service: Optional[AnalysisService] = None,
+                           template_clusterer: Optional[TemplateClusterer] = None,
+                           pixel_buffers: Optional[PixelBufferCache] = None) -> Pipeline:
+    """
+    Describe the processing of a webpage as a pipeline of stages.
+    
+    render → change, template, ocr, gui; ocr → contrast; gui, contrast, ocr → convert
+    → llm; everything → save. OCR and GUI analysis run at the same time. With
+    `pipeline.cache` on, the render, ocr, gui, contrast and llm stages are cached,
+    so re-running a page after a fix further down (in the converter, say) neither
+    renders nor runs OCR again; the `pipeline.stages` config section sets
+    `enabled`, `cache` and `max_age` per stage.
     
     Args:
-        url: The URL of the webpage to process
         config: Configuration dictionary
-        output_dir: Directory to save output files
+        output_handler: Saves the results
         use_llm: Whether to use LLM for analysis
         analysis_type: Type of LLM analysis to perform
         custom_prompt: Custom prompt for LLM analysis
+        analysis_service: Worker pool for GUI analysis
+        template_clusterer: Clusters the pages of a crawl by template
+        pixel_buffers: Decodes the screenshot once into a shared buffer for the GUI
+            analysis, contrast audit and region OCR; the caller releases it after
+            the run. Each stage decodes the screenshot itself when not given.
     
     Returns:
-        Dictionary containing processing results
+        The pipeline; run it with the page's 'url' as input
     """
-    try:
-        # Initialize components
-        input_handler = InputHandler()
-        webpage_renderer = WebpageRenderer()
-        
-        # Get OCR credentials from config
-        ocr_credentials = config.get('google_cloud_credentials', None)
-        ocr_extractor = OCRExtractor(credentials_path=ocr_credentials)
-        
-        gui_analyzer = GUIAnalyzer()
-        layout_converter = LayoutToTextConverter()
-        output_handler = OutputHandler(output_dir=output_dir)
-        
-        # Process URL
-        processed_url = input_handler.process_url(url)
+    # Initialize components
+    webpage_renderer = WebpageRenderer()
+    recorder = create_service_recorder(config.get('services', {}))
+    ocr_config = config.get('ocr', {})
+    ocr_extractor = OCRExtractor(
+        credentials_path=config.get('google_cloud_credentials', None),
+        languages=ocr_config.get('languages'),
+        features=ocr_config.get('features'),
+        recorder=recorder
+    )
+    ui_config = config.get('ui_analysis', {})
+    gui_analyzer = GUIAnalyzer(**gui_analyzer_options(ui_config))
+    layout_converter = LayoutToTextConverter()
+    change_detector = create_change_detector(config.get('change_detection', {}))
+    
+    screenshot_config = config.get('screenshot', {})
+    pipeline_config = config.get('pipeline', {})
+    stage_settings = pipeline_config.get('stages', {})
+    
+    def stage(name: str, run, inputs, outputs, optional: bool = False, enabled: bool = True,
+              cache: bool = False, max_age: Optional[float] = None, **kwargs) -> Stage:
+        settings = stage_settings.get(name, {})
+        return Stage(
+            name, run, inputs, outputs,
+            enabled=enabled and (settings.get('enabled', True) if optional else True),
+            cache=settings.get('cache', cache),
+            max_age=settings.get('max_age', max_age),
+            **kwargs
+        )
+    
+    run_ocr = stage_settings.get('ocr', {}).get('enabled', True)
+    # Replayed responses need no API key
+    has_llm = 'anthropic_api_key' in config or (recorder is not None and recorder.mode == 'replay')
+    if use_llm and not has_llm:
+        print("Warning: Anthropic API key not found in config, skipping LLM analysis")
+    
+    # In tiled capture mode, OCR starts on each tile while the rest is still captured.
+    # With change detection, OCR waits until we know which parts of the page changed.
+    stream_tiles = (screenshot_config.get('capture_mode', 'full') == 'tiled' and
+                    change_detector is None and run_ocr)
+    
+    def pixels(screenshot: str):
+        # The screenshot's shared buffer, created by the first stage that reads it
+        return pixel_buffers.get(screenshot) if pixel_buffers is not None else screenshot
+    
+    def render(inputs):
+        tile_ocr = []
+        ocr_executor = None
+        on_tile = None
+        if stream_tiles:
+            # Recordings matched by order need the tiles' OCR calls in capture order
+            tile_workers = 1 if ordered_services(config) else screenshot_config.get('tile_workers', 4)
+            ocr_executor = ThreadPoolExecutor(max_workers=tile_workers)
+            on_tile = lambda tile: tile_ocr.append(
+                (tile, ocr_executor.submit(ocr_extractor.extract_text, tile['path'])))
         
         # Render webpage and capture screenshot
-        print(f"Rendering webpage: {url}")
-        render_results = webpage_renderer.render_webpage(processed_url)
-        screenshot_path = render_results['screenshot_path']
-        print(f"Screenshot captured: {screenshot_path}")
+        print(f"Rendering webpage: {inputs['url']}")
+        try:
+            render_results = webpage_renderer.render_webpage(
+                inputs['url'], config=screenshot_config, on_tile=on_tile
+            )
+            tile_results = [[tile, future.result()] for tile, future in tile_ocr] if stream_tiles else None
+        finally:
+            if ocr_executor is not None:
+                ocr_executor.shutdown(wait=False)
         
-        # Extract text with OCR
+        screenshot_path = render_results['screenshot_path']
+        readiness = render_results.get('readiness', {})
+        captured = screenshot_path or f"{len(render_results.get('tiles', []))} tiles"
+        print(f"Screenshot captured: {captured} "
+              f"(ready after {readiness.get('elapsed', 0)} ms, signal: {readiness.get('signal', 'unknown')})")
+        return {
+            'page': render_results,
+            'screenshot': screenshot_path,
+            # Only unstitched pages are analyzed tile by tile
+            'tiles': None if screenshot_path else render_results.get('tiles'),
+            'tile_ocr': tile_results
+        }
+    
+    def detect_change(inputs):
+        # Change detection against the previous run of the same URL
+        if not inputs['screenshot']:
+            return {'change': {'status': 'new', 'changed_regions': []}, 'previous': None, 'fingerprint': None}
+        fingerprint = change_detector.fingerprint(inputs['screenshot'], inputs['page'].get('dom_signature', ''),
+                                                  inputs['page'].get('text_layout'))
+        change = change_detector.compare(inputs['url'], fingerprint)
+        print(f"Change detection: {change['status']}")
+        # The previous record is its own artifact, left out of the cache keys of the
+        # stages reusing it: their outputs follow from the screenshot and changed bands
+        previous = change.pop('previous')
+        return {'change': change, 'previous': previous, 'fingerprint': fingerprint}
+    
+    def assign_template(inputs):
+        # Pages of an already analyzed template reuse its analysis
+        if not inputs['screenshot']:
+            return {'template': None}
+        fingerprint = template_clusterer.fingerprint(inputs['screenshot'], inputs['page'].get('dom_signature', ''))
+        return {'template': template_clusterer.assign(inputs['url'], fingerprint)}
+    
+    def extract_text(inputs):
         print("Extracting text using OCR...")
-        ocr_results = ocr_extractor.extract_text(screenshot_path)
+        change = inputs['change'] or {}
+        previous = inputs['previous'] or {}
+        if inputs['tile_ocr'] is not None:
+            ocr_results = ocr_extractor.merge_tile_results([(tile, result) for tile, result in inputs['tile_ocr']])
+        elif change.get('status') == 'unchanged' and 'ocr_results' in previous:
+            print("Reusing OCR results of the previous run")
+            ocr_results = previous['ocr_results']
+        elif change.get('status') == 'partial':
+            regions = change['changed_regions']
+            print(f"Re-running OCR on {len(regions)} changed region(s)")
+            ocr_results = change_detector.merge_ocr_results(
+                previous.get('ocr_results', {}),
+                ocr_extractor.extract_text_regions(pixels(inputs['screenshot']), regions),
+                regions
+            )
+        elif inputs['screenshot']:
+            ocr_results = ocr_extractor.extract_text(inputs['screenshot'])
+        else:
+            ocr_results = ocr_extractor.merge_tile_results(
+                [(tile, ocr_extractor.extract_text(tile['path'])) for tile in inputs['tiles']])
         print(f"Extracted {len(ocr_results.get('text_blocks', []))} text blocks")
-        
-        # Analyze GUI elements
+        return {'ocr': ocr_results}
+    
+    def analyze_gui(inputs):
         print("Analyzing GUI elements...")
-        gui_results = gui_analyzer.analyze_screenshot(screenshot_path)
+        template = inputs['template']
+        change = inputs['change'] or {}
+        previous = inputs['previous'] or {}
+        if template is not None and template['results'] is not None:
+            print(f"Reusing GUI analysis of template {template['cluster']} ({template['representative']})")
+            gui_results = gui_analyzer.reuse_analysis(template['results']['gui_results'], inputs['screenshot'])
+        elif change.get('status') == 'unchanged' and previous.get('gui_results'):
+            print("Reusing GUI analysis of the previous run")
+            gui_results = previous['gui_results']
+        elif change.get('status') == 'partial' and previous.get('gui_results'):
+            regions = change['changed_regions']
+            print(f"Re-running GUI analysis on {len(regions)} changed region(s)")
+            buffer = pixels(inputs['screenshot']) if pixel_buffers is not None else None
+            gui_results = gui_analyzer.analyze_regions(previous['gui_results'], regions,
+                                                       image_path=inputs['screenshot'], buffer=buffer)
+        elif analysis_service is not None and inputs['screenshot']:
+            # Workers attach to the shared buffer by its descriptor
+            gui_results = analysis_service.submit(pixels(inputs['screenshot'])).result()
+        elif inputs['screenshot']:
+            # Only the pyramid's reduced levels are kept once it is built
+            gui_results = gui_analyzer.analyze_screenshot(inputs['screenshot'])
+        else:
+            gui_results = gui_analyzer.analyze_tiles(inputs['tiles'])
         print(f"Detected {len(gui_results.get('ui_elements', []))} UI elements")
-        
-        # Convert layout to text
+        return {'gui': gui_results}
+    
+    def audit_contrast(inputs):
+        # The contrast of the OCR text is measured from the screenshot pixels
+        text_blocks = (inputs['ocr'] or {}).get('text_blocks', [])
+        change = inputs['change'] or {}
+        previous = inputs['previous'] or {}
+        previous_contrast = (previous.get('gui_results') or {}).get('contrast') or {}
+        previous_blocks = (previous.get('ocr_results') or {}).get('text_blocks', [])
+        buffer = pixels(inputs['screenshot']) if inputs['screenshot'] and pixel_buffers is not None else None
+        if change.get('status') == 'unchanged' and len(previous_contrast.get('ratios') or []) == len(previous_blocks):
+            print("Reusing contrast audit of the previous run")
+            contrast = previous_contrast
+        elif change.get('status') == 'partial' and len(previous_contrast.get('ratios') or []) == len(previous_blocks):
+            contrast = gui_analyzer.audit_contrast_regions(text_blocks, change['changed_regions'], previous_blocks,
+                                                           previous_contrast, image_path=inputs['screenshot'],
+                                                           buffer=buffer)
+        else:
+            # The ratios of every block let the next run re-audit only what changed
+            contrast = gui_analyzer.audit_contrast(text_blocks, image_path=inputs['screenshot'], tiles=inputs['tiles'],
+                                                   buffer=buffer, keep_ratios=change_detector is not None)
+        print(f"Contrast: {len(contrast['failing'])} of {contrast['checked']} text blocks below WCAG AA")
+        return {'contrast': contrast}
+    
+    def convert(inputs):
         print("Converting layout to textual description...")
         conversion_results = layout_converter.convert_to_text(
-            ui_analysis=gui_results,
-            ocr_results=ocr_results,
-            page_info=render_results
+            ui_analysis=with_contrast(inputs['gui'], inputs['contrast']),
+            ocr_results=inputs['ocr'] or {},
+            page_info=inputs['page']
         )
+        return {
+            'description': conversion_results['textual_description'],
+            'structure': conversion_results['structured_description']
+        }
+    
+    def analyze_llm(inputs):
+        template = inputs['template']
+        previous = inputs['previous'] or {}
+        if template is not None and template['results'] is not None and template['results'].get('llm_analysis'):
+            print(f"Reusing LLM analysis of template {template['cluster']}")
+            return {'llm': template['results']['llm_analysis']}
+        if previous.get('llm_analysis') and previous.get('textual_description') == inputs['description']:
+            # The description the LLM would see is identical to the last run
+            print("Reusing LLM analysis of the previous run")
+            return {'llm': previous['llm_analysis']}
+        
+        llm_integration = LLMIntegration(api_key=config.get('anthropic_api_key'), recorder=recorder)
+        print(f"Analyzing textual description with Claude ({analysis_type} analysis)...")
+        return {'llm': llm_integration.analyze_webpage_description(
+            textual_description=inputs['description'],
+            analysis_type=analysis_type,
+            custom_prompt=custom_prompt
+        )}
+    
+    def save(inputs):
+        url = inputs['url']
+        template = inputs['template']
+        gui_results = with_contrast(inputs['gui'], inputs['contrast'])
+        llm_results = inputs['llm']
         
-        # Analyze with LLM if requested
-        llm_results = None
-        if use_llm:
-            if 'anthropic_api_key' in config:
-                llm_integration = LLMIntegration(api_key=config['anthropic_api_key'])
-                print(f"Analyzing textual description with Claude ({analysis_type} analysis)...")
-                llm_results = llm_integration.analyze_webpage_description(
-                    textual_description=conversion_results['textual_description'],
-                    analysis_type=analysis_type,
-                    custom_prompt=custom_prompt
-                )
-            else:
-                print("Warning: Anthropic API key not found in config, skipping LLM analysis")
+        if template is not None:
+            template_clusterer.remember(template['cluster'], {
+                'gui_results': gui_results,
+                'llm_analysis': llm_results
+            })
+        
+        # Remember this run for change detection
+        if inputs['fingerprint'] is not None:
+            change_detector.save(url, inputs['fingerprint'], {
+                'ocr_results': inputs['ocr'],
+                'gui_results': gui_results,
+                'textual_description': inputs['description'],
+                'structured_description': inputs['structure'],
+                'llm_analysis': llm_results
+            })
         
         # Prepare final results
         results = {
             'url': url,
-            'screenshot_path': screenshot_path,
-            'textual_description': conversion_results['textual_description'],
-            'structured_description': conversion_results['structured_description'],
-            'json_output': conversion_results['json_output']
+            'screenshot_path': inputs['screenshot'],
+            'textual_description': inputs['description'],
+            'structured_description': inputs['structure']
         }
-        
+        if inputs['change'] is not None:
+            results['change_status'] = inputs['change']['status']
+        if template is not None:
+            results['template'] = {
+                'cluster': template['cluster'],
+                'representative': template['representative'],
+                'reused': template['results'] is not None
+            }
         if llm_results:
             results['llm_analysis'] = llm_results
         
-        # Save results
+        # Save and display results
         saved_files = output_handler.save_results(results, url)
         results['saved_files'] = saved_files
-        
-        # Display results
         output_handler.display_results(results)
+        return {'results': results}
+    
+    return Pipeline([
+        stage('render', render, ['url'], ['page', 'screenshot', 'tiles', 'tile_ocr'],
+              config={'screenshot': screenshot_config, 'ocr': ocr_config if stream_tiles else None},
+              cache=True, max_age=3600, file_outputs=['screenshot'], main_thread=True, version='2'),
+        stage('change', detect_change, ['url', 'page', 'screenshot'], ['change', 'previous', 'fingerprint'],
+              enabled=change_detector is not None),
+        stage('template', assign_template, ['url', 'page', 'screenshot'], ['template'],
+              enabled=template_clusterer is not None),
+        stage('ocr', extract_text, ['screenshot', 'tiles', 'tile_ocr', 'change', 'previous'], ['ocr'],
+              optional=True, config=ocr_config, cache=True,
+              key_inputs=['screenshot', 'tiles', 'tile_ocr', 'change']),
+        stage('gui', analyze_gui, ['screenshot', 'tiles', 'change', 'previous', 'template'], ['gui'],
+              optional=True, config=gui_analyzer_options(ui_config), cache=True,
+              key_inputs=['screenshot', 'tiles', 'change', 'template']),
+        stage('contrast', audit_contrast, ['screenshot', 'tiles', 'ocr', 'change', 'previous'], ['contrast'],
+              optional=True, config={'keep_ratios': change_detector is not None}, cache=True,
+              key_inputs=['screenshot', 'tiles', 'ocr', 'change']),
+        stage('convert', convert, ['page', 'gui', 'contrast', 'ocr'], ['description', 'structure']),
+        stage('llm', analyze_llm, ['description', 'previous', 'template'], ['llm'],
+              optional=True, enabled=use_llm and has_llm,
+              config={'analysis_type': analysis_type, 'custom_prompt': custom_prompt}, cache=True,
+              key_inputs=['description', 'template']),
+        stage('save', save,
+              ['url', 'screenshot', 'ocr', 'gui', 'contrast', 'description', 'structure', 'llm',
+               'change', 'fingerprint', 'template'],
+              ['results'], main_thread=True),
+    ], cache=create_stage_cache(pipeline_config), parallelism=pipeline_config.get('parallelism', 4))
+
+def with_contrast(gui_results: Optional[Dict[str, Any]], contrast: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the GUI analysis results with the contrast audit."""
+    combined = dict(gui_results or {})
+    if contrast is not None:
+        combined['contrast'] = contrast
+    return combined
+
+def process_webpage(url: str, 
+                   config: Dict[str, Any], 
+                   output_dir: Optional[str] = None,
+                   use_llm: bool = False,
+                   analysis_type: str = "general",
+                   custom_prompt: Optional[str] = None,
+                   analysis_service: Optional[AnalysisService] = None,
+                   template_clusterer: Optional[TemplateClusterer] = None,
+                   rerun: Optional[List[str]] = None,
+                   on_stage: Optional[Callable[[str, str, Dict[str, str]], None]] = None,
+                   output_handler: Optional[OutputHandler] = None) -> Dict[str, Any]:
+    """
+    Process a webpage and convert it to textual description.
+    
+    Args:
+        url: The URL of the webpage to process
+        config: Configuration dictionary
+        output_dir: Directory to save output files
+        use_llm: Whether to use LLM for analysis
+        analysis_type: Type of LLM analysis to perform
+        custom_prompt: Custom prompt for LLM analysis
+        analysis_service: Worker pool for GUI analysis; analysis runs in this
+            process when not given
+        template_clusterer: Clusters the pages of a crawl by template; pages of an
+            already analyzed template reuse its GUI and LLM analysis
+        rerun: Pipeline stages to recompute even when their cached outputs are valid
+        on_stage: Called as each pipeline stage ends (see Pipeline.run)
+        output_handler: Handler shared by the pages of a run (see
+            create_output_handler); the caller closes it. When not given, the
+            page is saved as a run of its own.
+    
+    Returns:
+        Dictionary containing processing results
+    """
+    owns_handler = output_handler is None
+    pixel_buffers = create_pixel_buffers(config.get('ui_analysis', {}), analysis_service)
+    status = 'failed'
+    try:
+        # Process URL
+        processed_url = InputHandler().process_url(url)
+        
+        if owns_handler:
+            output_handler = create_output_handler(config, output_dir)
         
-        return results
+        pipeline = build_webpage_pipeline(
+            config, output_handler,
+            use_llm=use_llm,
+            analysis_type=analysis_type,
+            custom_prompt=custom_prompt,
+            analysis_service=analysis_service,
+            template_clusterer=template_clusterer,
+            pixel_buffers=pixel_buffers
+        )
+        run = pipeline.run({'url': processed_url}, rerun=rerun or (), on_stage=on_stage)
+        print("Stages: " + ", ".join(f"{name} {stage_status}" for name, stage_status in run['stages'].items()))
+        
+        status = 'completed'
+        return run['artifacts']['results']
     
     except Exception as e:
         print(f"Error processing webpage: {e}")
         return {'error': str(e)}
+    
+    finally:
+        if pixel_buffers is not None:
+            pixel_buffers.release()
+        if owns_handler and output_handler is not None:
+            # A failure to flush the outputs must not hide the page's own result
+            try:
+                output_handler.close(status)
+            except Exception as e:
+                print(f"Error closing outputs of {url}: {e}")
+
+def diff_runs(run_a: str,
+              run_b: str,
+              config: Dict[str, Any],
+              output_dir: Optional[str] = None,
+              url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Diff the pages two stored runs have in common.
+    
+    Args:
+        run_a: ID of the earlier run in the results store
+        run_b: ID of the later run
+        config: Configuration dictionary
+        output_dir: Directory to save the report in
+        url: Only diff this URL
+    
+    Returns:
+        The change report, with one entry per URL under 'pages'
+    """
+    # Diffing reads an existing store, whether or not new runs write to it
+    store = create_results_store(dict(config.get('results_store', {}), enabled=True))
+    visual_diff = VisualDiff()
+    
+    try:
+        before_pages = {page['url']: page['id'] for page in store.pages_for_run(run_a)}
+        after_pages = {page['url']: page['id'] for page in store.pages_for_run(run_b)}
+        urls = [page_url for page_url in after_pages if page_url in before_pages and (url is None or page_url == url)]
+        
+        pages = []
+        for page_url in urls:
+            before = store.get_page(before_pages[page_url])
+            after = store.get_page(after_pages[page_url])
+            screenshots = (before.get('screenshot_path'), after.get('screenshot_path'))
+            if not all(path and os.path.exists(path) for path in screenshots):
+                pages.append({'url': page_url, 'error': 'Screenshot of a capture is missing'})
+                print(f"{page_url}: screenshot missing, skipped")
+                continue
+            
+            report = visual_diff.diff(
+                screenshots[0], screenshots[1],
+                before['structured_description'].get('ui_elements', []),
+                after['structured_description'].get('ui_elements', [])
+            )
+            report['url'] = page_url
+            pages.append(report)
+            print(f"{page_url}: {report['summary']}")
+    finally:
+        store.close()
+    
+    results = {
+        'before_run': run_a,
+        'after_run': run_b,
+        'pages': pages,
+        'only_before': sorted(set(before_pages) - set(after_pages)),
+        'only_after': sorted(set(after_pages) - set(before_pages))
+    }
+    
+    output_dir = output_dir or config.get('output_dir', 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    writer = create_output_writer(config.get('output', {}))
+    try:
+        report_path = writer.write(os.path.join(output_dir, f"diff_{run_a}_{run_b}.json"),
+                                   dumps_json_bytes(results, pretty=True))
+    finally:
+        writer.close()
+    print(f"Diff report saved to {report_path}")
+    
+    return results
+
+def diff_main(argv) -> None:
+    """Entry point of `main.py diff <runA> <runB>`."""
+    parser = argparse.ArgumentParser(prog="main.py diff", description="Diff the captures of two stored runs")
+    parser.add_argument("run_a", help="ID of the earlier run")
+    parser.add_argument("run_b", help="ID of the later run")
+    parser.add_argument("-c", "--config", default="config.yaml", help="Path to configuration file")
+    parser.add_argument("-o", "--output", help="Output directory for the report")
+    parser.add_argument("-u", "--url", help="Only diff this URL")
+    
+    args = parser.parse_args(argv)
+    config = load_config(args.config) if os.path.exists(args.config) else {}
+    diff_runs(args.run_a, args.run_b, config, output_dir=args.output, url=args.url)
+
+def crawl_site(seeds,
+               config: Dict[str, Any],
+               sitemap: Optional[str] = None,
+               output_dir: Optional[str] = None,
+               use_llm: bool = False,
+               analysis_type: str = "general",
+               custom_prompt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Crawl a site and process every page found.
+    
+    Args:
+        seeds: URLs to start crawling from
+        config: Configuration dictionary
+        sitemap: URL of a sitemap whose pages are added to the seeds
+        output_dir: Directory to save output files
+        use_llm: Whether to use LLM for analysis
+        analysis_type: Type of LLM analysis to perform
+        custom_prompt: Custom prompt for LLM analysis
+    
+    Returns:
+        The results of process_webpage for every page, in crawl order
+    """
+    crawler = create_site_crawler(config.get('crawl', {}))
+    analysis_service = create_analysis_service(config.get('ui_analysis', {}))
+    template_clusterer = create_template_clusterer(config.get('templates', {}))
+    # Every page of the crawl is saved in one run
+    output_handler = create_output_handler(config, output_dir)
+    status = 'failed'
+    
+    def crawled():
+        # The crawl runs ahead of rendering by at most crawl.queue_size pages
+        for count, page in enumerate(crawler.pages(seeds, sitemap=sitemap), 1):
+            print(f"Crawled {page['url']} (depth {page['depth']}, page {count})")
+            yield page
+    
+    def process(page):
+        return process_webpage(
+            url=page['url'],
+            config=config,
+            output_dir=output_dir,
+            use_llm=use_llm,
+            analysis_type=analysis_type,
+            custom_prompt=custom_prompt,
+            analysis_service=analysis_service,
+            template_clusterer=template_clusterer,
+            output_handler=output_handler
+        )
+    
+    results = []
+    try:
+        results.extend(map_pages(process, crawled(), page_concurrency(config, analysis_service)))
+        status = 'completed'
+    finally:
+        if analysis_service is not None:
+            analysis_service.shutdown()
+        output_handler.close(status)
+    
+    failed = sum(1 for result in results if 'error' in result)
+    print(f"Crawl finished: {len(results)} pages processed, {failed} failed, "
+          f"{len(crawler.errors)} crawl errors")
+    for error in crawler.errors:
+        print(f"  {error['url']}: {error['error']}")
+    if template_clusterer is not None:
+        summary = template_clusterer.summary()
+        print(f"Templates: {summary['clusters']} for {summary['pages']} pages, "
+              f"{summary['reused']} pages reused the analysis of their template")
+    return results
+
+def crawl_main(argv) -> None:
+    """Entry point of `main.py crawl <url>...`."""
+    parser = argparse.ArgumentParser(prog="main.py crawl", description="Crawl a site and analyze every page")
+    parser.add_argument("seeds", nargs="*", help="URLs to start crawling from")
+    parser.add_argument("-s", "--sitemap", help="URL of a sitemap.xml to take pages from")
+    parser.add_argument("-c", "--config", default="config.yaml", help="Path to configuration file")
+    parser.add_argument("-o", "--output", help="Output directory")
+    parser.add_argument("-d", "--max-depth", type=int, help="Links followed from a seed page")
+    parser.add_argument("-n", "--max-pages", type=int, help="Maximum number of pages to analyze")
+    parser.add_argument("-l", "--llm", action="store_true", help="Use LLM for analysis")
+    parser.add_argument("-a", "--analysis", default="general",
+                        choices=["general", "ux", "accessibility", "structure"],
+                        help="Type of LLM analysis to perform")
+    parser.add_argument("-p", "--prompt", help="Custom prompt for LLM")
+    
+    args = parser.parse_args(argv)
+    if not args.seeds and not args.sitemap:
+        parser.error("give at least one seed URL or --sitemap")
+    
+    config = load_config(args.config) if os.path.exists(args.config) else {}
+    crawl_config = config.setdefault('crawl', {})
+    if args.max_depth is not None:
+        crawl_config['max_depth'] = args.max_depth
+    if args.max_pages is not None:
+        crawl_config['max_pages'] = args.max_pages
+    
+    crawl_site(args.seeds, config, sitemap=args.sitemap, output_dir=args.output,
+               use_llm=args.llm, analysis_type=args.analysis, custom_prompt=args.prompt)
+
+def read_url_list(path: str) -> List[str]:
+    """Read the URLs of a batch, one per line; blank lines, comments and repeats are skipped."""
+    urls = []
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            url = line.strip()
+            if url and not url.startswith('#') and url not in seen:
+                seen.add(url)
+                urls.append(url)
+    return urls
+
+def run_batch(urls: List[str],
+              config: Dict[str, Any],
+              journal_path: Optional[str] = None,
+              output_dir: Optional[str] = None,
+              use_llm: bool = False,
+              analysis_type: str = "general",
+              custom_prompt: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Process a list of URLs, keeping progress in a journal so an interrupted batch resumes.
+    
+    URLs the journal records as done are skipped. The others are attempted up to
+    `batch.max_attempts` times in total, across restarts: after a pass over the
+    batch, the URLs that failed are tried again. With the stage cache on
+    (`pipeline.cache`), a retry only recomputes the stages whose outputs are not
+    cached, so it resumes after the last cached stage of the failed attempt. The pages of the batch are saved as one
+    run, so two batches over the same URLs can be compared with `main.py diff`.
+    
+    Args:
+        urls: The URLs of the batch
+        config: Configuration dictionary
+        journal_path: Path to the batch journal (defaults to `batch.journal`)
+        output_dir: Directory to save output files
+        use_llm: Whether to use LLM for analysis
+        analysis_type: Type of LLM analysis to perform
+        custom_prompt: Custom prompt for LLM analysis
+    
+    Returns:
+        The manifest of the batch (see BatchJournal.manifest)
+    """
+    batch_config = config.get('batch', {})
+    max_attempts = batch_config.get('max_attempts', 3)
+    output_dir = output_dir or config.get('output_dir', 'output')
+    journal = BatchJournal(
+        journal_path or batch_config.get('journal', os.path.join(output_dir, 'batch_journal.jsonl')),
+        artifact_dir=batch_config.get('artifact_dir'),
+        sync=batch_config.get('sync', True)
+    )
+    analysis_service = create_analysis_service(config.get('ui_analysis', {}))
+    # Every page of the batch is saved in one run
+    output_handler = create_output_handler(config, output_dir)
+    status = 'failed'
+    
+    def process(url: str) -> None:
+        attempt = journal.start(url)
+        print(f"Processing {url} (attempt {attempt} of {max_attempts})")
+        failed_stage = []
+        
+        def on_stage(name: str, status: str, artifacts: Dict[str, str]) -> None:
+            if status == 'failed':
+                failed_stage.append(name)
+            journal.stage(url, name, status, artifacts)
+        
+        result = process_webpage(
+            url=url,
+            config=config,
+            output_dir=output_dir,
+            use_llm=use_llm,
+            analysis_type=analysis_type,
+            custom_prompt=custom_prompt,
+            analysis_service=analysis_service,
+            on_stage=on_stage,
+            output_handler=output_handler
+        )
+        if 'error' in result:
+            journal.fail(url, result['error'], stage=failed_stage[0] if failed_stage else None)
+        else:
+            journal.complete(url, result)
+    
+    try:
+        done = sum(1 for url in urls if journal.page(url)['status'] == 'done')
+        if done:
+            print(f"Resuming batch: {done} of {len(urls)} URLs already done")
+        
+        concurrency = page_concurrency(config, analysis_service)
+        for _ in range(max_attempts):
+            todo = [url for url in urls
+                    if journal.page(url)['status'] != 'done' and journal.page(url)['attempts'] < max_attempts]
+            if not todo:
+                break
+            list(map_pages(process, todo, concurrency))
+        
+        manifest = journal.manifest(urls)
+        status = 'completed'
+    finally:
+        journal.close()
+        if analysis_service is not None:
+            analysis_service.shutdown()
+        output_handler.close(status)
+    
+    os.makedirs(output_dir, exist_ok=True)
+    writer = create_output_writer(config.get('output', {}))
+    try:
+        manifest_path = writer.write(os.path.join(output_dir, 'batch_manifest.json'),
+                                     dumps_json_bytes(manifest, pretty=True))
+    finally:
+        writer.close()
+    print(f"Batch finished: {len(manifest['succeeded'])} succeeded, {len(manifest['failed'])} failed, "
+          f"{len(manifest['pending'])} pending; manifest saved to {manifest_path}")
+    
+    return manifest
+
+def batch_main(argv) -> None:
+    """Entry point of `main.py batch <url-file>`."""
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Analyze a list of URLs, resumably")
+    parser.add_argument("url_file", help="File with one URL per line")
+    parser.add_argument("-j", "--journal", help="Path to the batch journal (resumed if it exists)")
+    parser.add_argument("-m", "--max-attempts", type=int, help="Attempts per URL, across restarts")
+    parser.add_argument("-c", "--config", default="config.yaml", help="Path to configuration file")
+    parser.add_argument("-o", "--output", help="Output directory")
+    parser.add_argument("-l", "--llm", action="store_true", help="Use LLM for analysis")
+    parser.add_argument("-a", "--analysis", default="general",
+                        choices=["general", "ux", "accessibility", "structure"],
+                        help="Type of LLM analysis to perform")
+    parser.add_argument("-p", "--prompt", help="Custom prompt for LLM")
+    
+    args = parser.parse_args(argv)
+    config = load_config(args.config) if os.path.exists(args.config) else {}
+    if args.max_attempts is not None:
+        config.setdefault('batch', {})['max_attempts'] = args.max_attempts
+    
+    run_batch(read_url_list(args.url_file), config, journal_path=args.journal, output_dir=args.output,
+              use_llm=args.llm, analysis_type=args.analysis, custom_prompt=args.prompt)
+
+def run_worker(config: Dict[str, Any],
+               output_dir: Optional[str] = None,
+               max_jobs: Optional[int] = None,
+               idle_timeout: Optional[float] = None) -> Dict[str, int]:
+    """
+    Process jobs from the work queue until stopped.
+    
+    Any number of workers, on any host that reaches the queue, can run at once.
+    For a worker that dies mid-page, the page is claimed again once its lease
+    expires; with the stage cache on and `pipeline.cache_dir` and the results
+    store on shared storage, the next worker resumes from the stages that were
+    cached and all results end up in one store. The pages a worker processes are saved as one run of its own.
+    
+    Args:
+        config: Configuration dictionary
+        output_dir: Directory to save output files
+        max_jobs: Stop after this many jobs
+        idle_timeout: Stop after the queue has been empty this many seconds
+    
+    Returns:
+        Number of jobs 'completed', 'failed' and 'lost'
+    """
+    queue_config = config.get('queue', {})
+    queue = create_work_queue(queue_config)
+    analysis_service = create_analysis_service(config.get('ui_analysis', {}))
+    # The jobs of this worker are saved as one run
+    output_handler = create_output_handler(config, output_dir)
+    status = 'failed'
+    
+    def process(job):
+        print(f"Job {job['id']}: {job['url']} (attempt {job['attempt']})")
+        payload = job['payload']
+        results = process_webpage(
+            url=job['url'],
+            config=config,
+            output_dir=output_dir,
+            use_llm=payload.get('use_llm', False),
+            analysis_type=payload.get('analysis_type', 'general'),
+            custom_prompt=payload.get('custom_prompt'),
+            analysis_service=analysis_service,
+            output_handler=output_handler
+        )
+        if 'error' in results:
+            return results
+        # Commit the page before the job is marked done, so a worker that dies
+        # later does not lose it
+        if output_handler.results_store is not None:
+            output_handler.results_store.flush()
+        # The full results are in the results store and output files
+        return {
+            'screenshot_path': results.get('screenshot_path'),
+            'change_status': results.get('change_status'),
+            'saved_files': results.get('saved_files')
+        }
+    
+    worker = QueueWorker(
+        queue, process,
+        lease_seconds=queue_config.get('lease_seconds', 300),
+        heartbeat_interval=queue_config.get('heartbeat_interval'),
+        poll_interval=queue_config.get('poll_interval', 1.0)
+    )
+    try:
+        counts = worker.run(max_jobs=max_jobs, idle_timeout=idle_timeout)
+        status = 'completed'
+    finally:
+        queue.close()
+        if analysis_service is not None:
+            analysis_service.shutdown()
+        output_handler.close(status)
+    
+    print(f"Worker {worker.worker_id} stopped: {counts['completed']} completed, "
+          f"{counts['failed']} failed, {counts['lost']} lost")
+    return counts
+
+def queue_main(argv) -> None:
+    """Entry point of `main.py queue enqueue|work|status`."""
+    parser = argparse.ArgumentParser(prog="main.py queue", description="Distribute pages over worker processes")
+    parser.add_argument("-c", "--config", default="config.yaml", help="Path to configuration file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    enqueue = commands.add_parser("enqueue", help="Add the URLs of a file to the queue")
+    enqueue.add_argument("url_file", help="File with one URL per line")
+    enqueue.add_argument("-w", "--wait", action="store_true", help="Report progress until the queue is drained")
+    enqueue.add_argument("-l", "--llm", action="store_true", help="Use LLM for analysis")
+    enqueue.add_argument("-a", "--analysis", default="general",
+                         choices=["general", "ux", "accessibility", "structure"],
+                         help="Type of LLM analysis to perform")
+    enqueue.add_argument("-p", "--prompt", help="Custom prompt for LLM")
+    
+    work = commands.add_parser("work", help="Process jobs from the queue")
+    work.add_argument("-o", "--output", help="Output directory")
+    work.add_argument("-n", "--processes", type=int, default=1, help="Worker processes to run on this host")
+    work.add_argument("-m", "--max-jobs", type=int, help="Jobs per worker before it stops")
+    work.add_argument("-t", "--idle-timeout", type=float, help="Stop after the queue has been empty this many seconds")
+    
+    commands.add_parser("status", help="Show job counts and failed jobs")
+    
+    args = parser.parse_args(argv)
+    config = load_config(args.config) if os.path.exists(args.config) else {}
+    queue_config = config.get('queue', {})
+    
+    if args.command == 'work':
+        if args.processes <= 1:
+            run_worker(config, output_dir=args.output, max_jobs=args.max_jobs, idle_timeout=args.idle_timeout)
+            return
+        # One renderer per process; each worker claims its own jobs
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=run_worker, args=(config, args.output, args.max_jobs, args.idle_timeout))
+                   for _ in range(args.processes)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        return
+    
+    queue = create_work_queue(queue_config)
+    try:
+        if args.command == 'enqueue':
+            payload = {'use_llm': args.llm, 'analysis_type': args.analysis, 'custom_prompt': args.prompt}
+            added = queue.enqueue(read_url_list(args.url_file), payload)
+            print(f"Enqueued {added} URLs")
+            while args.wait:
+                counts = queue.stats()
+                print(f"Queued {counts['queued']}, leased {counts['leased']}, done {counts['done']}, "
+                      f"failed {counts['failed']}")
+                if not counts['queued'] and not counts['leased']:
+                    break
+                time.sleep(queue_config.get('poll_interval', 1.0) * 5)
+        else:
+            counts = queue.stats()
+            print(", ".join(f"{status} {count}" for status, count in counts.items()))
+            for job in queue.jobs('failed'):
+                print(f"Failed: {job['url']} after {job['attempts']} attempts: {job['error']}")
+    finally:
+        queue.close()
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'diff':
+        diff_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'crawl':
+        crawl_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        batch_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'queue':
+        queue_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(description="Convert webpage designs to textual descriptions")
     parser.add_argument("url", help="URL of the webpage to analyze")
     parser.add_argument("-c", "--config", default="config.yaml", help="Path to configuration file")
@@ -133,6 +1082,11 @@ def main():
                         choices=["general", "ux", "accessibility", "structure"],
                         help="Type of LLM analysis to perform")
     parser.add_argument("-p", "--prompt", help="Custom prompt for LLM")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="Reuse results of the previous run for unchanged pages")
+    parser.add_argument("-r", "--rerun", action="append", default=[], metavar="STAGE",
+                        help="Recompute a pipeline stage even if its cached outputs are valid "
+                             "(render, ocr, gui, contrast, llm; repeatable)")
     
     args = parser.parse_args()
     
@@ -144,15 +1098,26 @@ def main():
     else:
         config = load_config(config_path)
     
+    if args.incremental:
+        config.setdefault('change_detection', {})['enabled'] = True
+    
+    analysis_service = create_analysis_service(config.get('ui_analysis', {}))
+    
     # Process webpage
-    process_webpage(
-        url=args.url,
-        config=config,
-        output_dir=args.output,
-        use_llm=args.llm,
-        analysis_type=args.analysis,
-        custom_prompt=args.prompt
-    )
+    try:
+        process_webpage(
+            url=args.url,
+            config=config,
+            output_dir=args.output,
+            use_llm=args.llm,
+            analysis_type=args.analysis,
+            custom_prompt=args.prompt,
+            analysis_service=analysis_service,
+            rerun=args.rerun
+        )
+    finally:
+        if analysis_service is not None:
+            analysis_service.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,17 +1,68 @@
 from .input_handler import InputHandler
+from .site_crawler import SiteCrawler
+from .models import UIElement, TextBlock, TextBlockArray
 from .webpage_renderer import WebpageRenderer
+from .request_interceptor import RequestInterceptor
+from .asset_cache import AssetCache
 from .ocr_extractor import OCRExtractor
+from .text_grouping import TextGrouper
+from .image_pyramid import ImagePyramid
+from .pixel_buffer import SharedPixelBuffer, PixelBufferCache
 from .gui_analyzer import GUIAnalyzer
+from .analysis_service import AnalysisService
+from .layout_analysis import LayoutAnalyzer
+from .element_tree import ElementTreeBuilder
+from .contrast_audit import ContrastAuditor
 from .layout_to_text_converter import LayoutToTextConverter
 from .llm_integration import LLMIntegration
 from .output_handler import OutputHandler
+from .output_writer import OutputWriter, AsyncOutputWriter
+from .change_detector import ChangeDetector
+from .template_clusterer import TemplateClusterer
+from .visual_diff import VisualDiff
+from .results_store import ResultsStore, SQLiteResultsStore
+from .pipeline import Pipeline, Stage, StageCache
+from .batch_journal import BatchJournal
+from .work_queue import WorkQueue, SQLiteWorkQueue, QueueWorker
+from .service_recorder import ServiceRecorder
+from .columnar_exporter import ColumnarExporter
 
 __all__ = [
     'InputHandler',
+    'SiteCrawler',
+    'UIElement',
+    'TextBlock',
+    'TextBlockArray',
     'WebpageRenderer',
+    'RequestInterceptor',
+    'AssetCache',
     'OCRExtractor',
+    'TextGrouper',
+    'ImagePyramid',
+    'SharedPixelBuffer',
+    'PixelBufferCache',
     'GUIAnalyzer',
+    'AnalysisService',
+    'LayoutAnalyzer',
+    'ElementTreeBuilder',
+    'ContrastAuditor',
     'LayoutToTextConverter',
     'LLMIntegration',
-    'OutputHandler'
+    'OutputHandler',
+    'OutputWriter',
+    'AsyncOutputWriter',
+    'ChangeDetector',
+    'TemplateClusterer',
+    'VisualDiff',
+    'ResultsStore',
+    'SQLiteResultsStore',
+    'Pipeline',
+    'Stage',
+    'StageCache',
+    'BatchJournal',
+    'WorkQueue',
+    'SQLiteWorkQueue',
+    'QueueWorker',
+    'ServiceRecorder',
+    'ColumnarExporter'
 ]
\ No newline at end of file
@@ -0,0 +1,172 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; memory limits are then not enforced
+    resource = None
+
+from .pixel_buffer import SharedPixelBuffer
+
+# Seconds a worker holds a warm-up task, so that a worker that started first
+# does not answer for the ones still starting
+WARM_UP_HOLD = 0.05
+
+# The analyzer of the current worker process, created by _init_worker
+_analyzer = None
+
+def _init_worker(analyzer_options: Dict[str, Any], memory_limit_mb: Optional[int]) -> None:
+    """Warm up a worker: import the analysis stack, build the analyzer and cap its memory."""
+    global _analyzer
+
+    # Importing here preloads NumPy, Pillow and colormath before the first task arrives
+    from .gui_analyzer import GUIAnalyzer
+    _analyzer = GUIAnalyzer(**analyzer_options)
+
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _analyze(source: Union[str, Dict[str, Any]], text_blocks: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Run in a worker: analyze a screenshot path or a shared pixel buffer descriptor."""
+    if isinstance(source, dict):
+        return _analyzer.analyze_buffer(source, text_blocks=text_blocks)
+    return _analyzer.analyze_screenshot(source, text_blocks=text_blocks)
+
+def _worker_pid(hold: float) -> int:
+    """Report the worker's PID, staying busy so the idle workers take the other tasks."""
+    time.sleep(hold)
+    return os.getpid()
+
+class AnalysisService:
+    """
+    Runs GUI analysis of screenshots in a pool of worker processes.
+
+    Image analysis is CPU-bound Python and NumPy code that holds the GIL, so it
+    does not overlap with itself on threads; worker processes let each core
+    analyze a different page while the main process renders and runs OCR.
+
+    Workers are started with 'spawn' by default, so they do not inherit the
+    browser, threads or open files of the main process. Each worker imports the
+    analysis stack and builds its GUIAnalyzer once when it starts. Its address
+    space can be capped, so a pathological screenshot fails its own task with a
+    MemoryError instead of exhausting the machine. To bound the growth of
+    long-lived workers, the pool is replaced once it has been given
+    `max_tasks_per_worker` tasks per worker; the old pool finishes the tasks it
+    already has and then exits.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 max_tasks_per_worker: Optional[int] = 100,
+                 memory_limit_mb: Optional[int] = None,
+                 analyzer_options: Optional[Dict[str, Any]] = None,
+                 start_method: str = 'spawn'):
+        """
+        Args:
+            workers: Number of worker processes (defaults to the number of CPUs)
+            max_tasks_per_worker: Tasks per worker before the pool is recycled (None to
+                never recycle)
+            memory_limit_mb: Address space limit of each worker in megabytes (None for
+                no limit; ignored where the `resource` module is unavailable)
+            analyzer_options: Keyword arguments for the GUIAnalyzer of each worker
+            start_method: multiprocessing start method of the workers
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("An analysis service needs at least one worker")
+
+        self.workers = workers or os.cpu_count() or 1
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.memory_limit_mb = memory_limit_mb
+        self.analyzer_options = dict(analyzer_options or {})
+        self._context = multiprocessing.get_context(start_method)
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._submitted = 0
+        self._closed = False
+
+    def submit(self,
+               source: Union[str, SharedPixelBuffer, Dict[str, Any]],
+               text_blocks: Optional[List[Dict[str, Any]]] = None) -> Future:
+        """
+        Queue a screenshot for analysis.
+
+        Args:
+            source: Path to the screenshot, a SharedPixelBuffer or its descriptor; the
+                owner must keep a buffer alive until the future is done
+            text_blocks: OCR words to audit for contrast
+
+        Returns:
+            Future of the GUIAnalyzer results
+        """
+        if isinstance(source, SharedPixelBuffer):
+            source = source.descriptor()
+        return self._submit(_analyze, source, text_blocks)
+
+    def map(self, sources: Iterable[Union[str, SharedPixelBuffer, Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+        """Analyze several screenshots in parallel, yielding the results in order."""
+        futures = [self.submit(source) for source in sources]
+        for future in futures:
+            yield future.result()
+
+    def warm_up(self) -> List[int]:
+        """
+        Start the workers now instead of on the first submitted screenshot.
+
+        A worker that is ready early can take several warm-up tasks, so tasks are
+        submitted until every worker has answered. They do not count towards
+        `max_tasks_per_worker`, which keeps the pool from being recycled halfway.
+
+        Returns:
+            Process IDs of the workers
+        """
+        pids = set()
+        while len(pids) < self.workers:
+            futures = [self._submit(_worker_pid, WARM_UP_HOLD, count=False)
+                       for _ in range(self.workers - len(pids))]
+            pids.update(future.result() for future in futures)
+        return sorted(pids)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting screenshots and shut the workers down."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _submit(self, fn, *args, count: bool = True) -> Future:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The analysis service has been shut down")
+
+            if (self._executor is not None and self.max_tasks_per_worker and
+                    self._submitted >= self.max_tasks_per_worker * self.workers):
+                # Recycle: the old pool drains its queue in the background
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._context,
+                    initializer=_init_worker,
+                    initargs=(self.analyzer_options, self.memory_limit_mb)
+                )
+                self._submitted = 0
+
+            if count:
+                self._submitted += 1
+            return self._executor.submit(fn, *args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
@@ -0,0 +1,237 @@
+import os
+import re
+import json
+import time
+import struct
+import hashlib
+import tempfile
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple, List
+
+# Resource types whose responses are shared between pages of the same site
+DEFAULT_CACHEABLE_TYPES = ['stylesheet', 'script', 'font', 'image']
+
+# Response headers replayed when an asset is served from the cache
+REPLAYED_HEADERS = ['content-type', 'access-control-allow-origin', 'timing-allow-origin']
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    """Parse an HTTP date header into a timestamp, or None when missing or invalid."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+def freshness_lifetime(headers: Dict[str, str], default_ttl: float, now: Optional[float] = None) -> float:
+    """
+    Seconds a response may be served from a shared cache.
+
+    s-maxage takes precedence over max-age, which takes precedence over Expires;
+    no-store, private and no-cache responses get 0. Without any of these, 10% of
+    the time since Last-Modified is used, as browsers do, up to `default_ttl`, and
+    `default_ttl` when that is missing too.
+    """
+    headers = {key.lower(): value for key, value in (headers or {}).items()}
+    now = time.time() if now is None else now
+    cache_control = headers.get('cache-control', '').lower()
+    if any(directive in cache_control for directive in ('no-store', 'private', 'no-cache')):
+        return 0.0
+
+    for directive in ('s-maxage', 'max-age'):
+        match = re.search(directive + r'\s*=\s*"?(\d+)', cache_control)
+        if match:
+            return float(match.group(1))
+
+    date = _http_date(headers.get('date')) or now
+    if 'expires' in headers:
+        expires = _http_date(headers['expires'])
+        # An invalid Expires value means already expired
+        return max(0.0, expires - date) if expires is not None else 0.0
+
+    last_modified = _http_date(headers.get('last-modified'))
+    if last_modified is not None:
+        return min(default_ttl, max(0.0, date - last_modified) * 0.1)
+    return float(default_ttl)
+
+class AssetCache:
+    """
+    Size-capped on-disk cache of static assets shared by all renderers.
+
+    Every entry is a single file holding a length-prefixed JSON header followed by
+    the response body. Entries are written to a temporary file and renamed into
+    place, so several browsers or processes can share one directory without locks:
+    readers only ever see complete entries, and a concurrent eviction simply turns
+    a lookup into a miss.
+
+    Each entry expires after the freshness lifetime of its response headers
+    (Cache-Control, Expires or Last-Modified). Expired entries are evicted on
+    lookup, so the asset is fetched and stored again.
+    """
+
+    def __init__(self,
+                cache_dir: str = None,
+                max_size_mb: float = 512,
+                max_entry_size_mb: float = 16,
+                cacheable_types: List[str] = None,
+                default_ttl: float = 3600):
+        if cache_dir is None:
+            cache_dir = os.path.join(os.getcwd(), '.cache', 'assets')
+
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.max_entry_size = int(max_entry_size_mb * 1024 * 1024)
+        self.cacheable_types = set(cacheable_types or DEFAULT_CACHEABLE_TYPES)
+        # Lifetime of responses whose headers give no freshness information
+        self.default_ttl = default_ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Approximate size of the directory; re-synchronised on every eviction pass
+        self._approx_size = sum(size for _, size, _ in self._scan())
+
+    def is_cacheable(self, resource_type: str, status: int = 200, headers: Dict[str, str] = None) -> bool:
+        """Check whether a response may be stored in the shared cache."""
+        if resource_type not in self.cacheable_types or status != 200:
+            return False
+
+        return freshness_lifetime(headers, self.default_ttl) > 0
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached asset.
+
+        Args:
+            url: The URL of the asset
+
+        Returns:
+            Dictionary with status, headers and body, or None on a miss or when
+            the entry has expired
+        """
+        path = self._entry_path(url)
+        try:
+            with open(path, 'rb') as f:
+                header_length = struct.unpack('>I', f.read(4))[0]
+                header = json.loads(f.read(header_length).decode('utf-8'))
+                body = f.read()
+            # Record the access for least-recently-used eviction
+            os.utime(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+        if header.get('url') != url or len(body) != header.get('size'):
+            return None
+
+        # Entries without an expiry predate expiry tracking and are treated as expired
+        if time.time() >= header.get('expires_at', 0):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        return {
+            'status': header.get('status', 200),
+            'headers': header.get('headers', {}),
+            'body': body
+        }
+
+    def store(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        """
+        Store an asset in the cache.
+
+        Args:
+            url: The URL of the asset
+            status: HTTP status of the response
+            headers: Response headers
+            body: Raw response body
+
+        Returns:
+            True if the asset was written; responses that must not be kept by a
+            shared cache or are already stale are not
+        """
+        if len(body) > self.max_entry_size:
+            return False
+
+        lifetime = freshness_lifetime(headers, self.default_ttl)
+        if lifetime <= 0:
+            return False
+
+        header = json.dumps({
+            'url': url,
+            'status': status,
+            'headers': {k: v for k, v in (headers or {}).items() if k.lower() in REPLAYED_HEADERS},
+            'size': len(body),
+            'expires_at': time.time() + lifetime
+        }).encode('utf-8')
+
+        path = self._entry_path(url)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(struct.pack('>I', len(header)))
+                f.write(header)
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+        self._approx_size += len(body) + len(header) + 4
+        if self._approx_size > self.max_size:
+            self.evict()
+
+        return True
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache is below 90% of its cap.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_size * 0.9)
+        removed = 0
+
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Already evicted by another process
+                pass
+            total -= size
+            removed += 1
+
+        self._approx_size = total
+        return removed
+
+    def size(self) -> int:
+        """Return the current size of the cache in bytes."""
+        return sum(size for _, size, _ in self._scan())
+
+    def _entry_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _scan(self) -> List[Tuple[str, int, float]]:
+        """List (path, size, mtime) for every entry in the cache."""
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+from .serialization import dumps_json_bytes
+
+class BatchJournal:
+    """
+    Append-only log of the progress of a batch run, one JSON record per line.
+
+    Every attempt at a URL appends a 'start' record, each pipeline stage that ends
+    appends a 'stage' record with the SHA-256 digests of its outputs, and the
+    attempt ends with a 'done' record referencing the page results by content hash
+    or a 'failed' record with the failing stage and error. The results themselves
+    are kept once per hash in the artifact directory.
+
+    Records are flushed and synced as they are written, so after a crash the
+    journal holds everything up to the last completed stage; a torn last line is
+    ignored when the journal is read back. Replaying the records gives the state
+    of every URL, which a restarted batch uses to skip completed pages and retry
+    failed or interrupted ones while their attempts last.
+    """
+
+    def __init__(self, journal_path: str, artifact_dir: Optional[str] = None, sync: bool = True):
+        """
+        Args:
+            journal_path: Path to the journal file; an existing journal is resumed
+            artifact_dir: Where artifacts are stored by content hash (defaults to an
+                'artifacts' directory next to the journal)
+            sync: fsync every record, so no completed stage is lost on a crash
+        """
+        if artifact_dir is None:
+            artifact_dir = os.path.join(os.path.dirname(os.path.abspath(journal_path)), 'artifacts')
+
+        self.journal_path = journal_path
+        self.artifact_dir = artifact_dir
+        self.sync = sync
+        os.makedirs(os.path.dirname(os.path.abspath(journal_path)), exist_ok=True)
+        os.makedirs(artifact_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pages = {}
+        for record in self.records():
+            self._apply(record)
+
+        self._file = open(journal_path, 'ab')
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            # Close off a line torn by a crash so the next record starts cleanly
+            self._file.write(b'\n')
+
+    def records(self) -> Iterable[Dict[str, Any]]:
+        """Yield the records of the journal in order, skipping lines that do not parse."""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and 'event' in record:
+                    yield record
+
+    def page(self, url: str) -> Dict[str, Any]:
+        """
+        Return the state of a URL.
+
+        Returns:
+            Dictionary with the 'status' ('pending', 'running', 'done' or 'failed';
+            'running' means an attempt was interrupted), the number of 'attempts',
+            the digests of the completed 'stages', the 'results' hash once done, and
+            the failing 'stage' and 'error' of the last failed attempt
+        """
+        state = self._pages.get(url)
+        if state is None:
+            return {'status': 'pending', 'attempts': 0, 'stages': {}, 'results': None, 'stage': None, 'error': None}
+        return dict(state, stages=dict(state['stages']))
+
+    def start(self, url: str) -> int:
+        """Record the start of an attempt at a URL and return its number (from 1)."""
+        attempt = self.page(url)['attempts'] + 1
+        self._append({'event': 'start', 'url': url, 'attempt': attempt})
+        return attempt
+
+    def stage(self, url: str, stage: str, status: str, artifacts: Dict[str, str]) -> None:
+        """Record the end of a pipeline stage with the digests of its outputs."""
+        self._append({'event': 'stage', 'url': url, 'stage': stage, 'status': status, 'artifacts': artifacts})
+
+    def complete(self, url: str, results: Dict[str, Any]) -> str:
+        """Store the results of a URL and record it as done; returns the results hash."""
+        digest = self.put_artifact(results)
+        self._append({'event': 'done', 'url': url, 'results': digest})
+        return digest
+
+    def fail(self, url: str, error: str, stage: Optional[str] = None) -> None:
+        """Record a failed attempt at a URL."""
+        self._append({'event': 'failed', 'url': url, 'stage': stage, 'error': error})
+
+    def put_artifact(self, value: Any) -> str:
+        """
+        Store a JSON-serializable value under the SHA-256 of its encoding and return the hash.
+
+        The hash is the pipeline's digest of the same value, so the 'results' digest
+        of the save stage names the stored results.
+        """
+        encoded = dumps_json_bytes(value, sort_keys=True)
+        digest = hashlib.sha256(encoded).hexdigest()
+        path = self._artifact_path(digest)
+        if os.path.exists(path):
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encoded)
+                if self.sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def get_artifact(self, digest: str) -> Any:
+        """Load a stored artifact by its hash."""
+        with open(self._artifact_path(digest), 'rb') as f:
+            return json.loads(f.read())
+
+    def manifest(self, urls: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Summarize the outcome of the batch.
+
+        Args:
+            urls: The URLs of the batch (defaults to every URL in the journal)
+
+        Returns:
+            Dictionary with the 'total' number of URLs and lists of the 'succeeded'
+            (with their results hash), 'failed' (with the failing stage and error)
+            and 'pending' URLs (never attempted or interrupted)
+        """
+        if urls is None:
+            urls = list(self._pages)
+
+        manifest = {'total': len(urls), 'succeeded': [], 'failed': [], 'pending': []}
+        for url in urls:
+            state = self.page(url)
+            if state['status'] == 'done':
+                manifest['succeeded'].append({'url': url, 'results': state['results'], 'attempts': state['attempts']})
+            elif state['status'] == 'failed':
+                manifest['failed'].append({'url': url, 'stage': state['stage'], 'error': state['error'],
+                                           'attempts': state['attempts']})
+            else:
+                manifest['pending'].append({'url': url, 'attempts': state['attempts']})
+        return manifest
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            self._file.close()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record = dict(record, time=time.time())
+        line = json.dumps(record, sort_keys=True).encode('utf-8') + b'\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.sync:
+                os.fsync(self._file.fileno())
+            self._apply(record)
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        url = record.get('url')
+        state = self._pages.setdefault(url, {
+            'status': 'pending', 'attempts': 0, 'stages': {}, 'results': None, 'stage': None, 'error': None
+        })
+        event = record['event']
+        if event == 'start':
+            state.update(status='running', attempts=record.get('attempt', state['attempts'] + 1),
+                         stages={}, stage=None, error=None)
+        elif event == 'stage' and record.get('status') != 'failed':
+            state['stages'][record['stage']] = record.get('artifacts', {})
+        elif event == 'done':
+            state.update(status='done', results=record['results'])
+        elif event == 'failed':
+            state.update(status='failed', stage=record.get('stage'), error=record.get('error'))
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.journal_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _artifact_path(self, digest: str) -> str:
+        return os.path.join(self.artifact_dir, digest[:2], f'{digest}.json')
@@ -0,0 +1,242 @@
+import os
+import json
+import hashlib
+import tempfile
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+from .serialization import dumps_json_bytes
+from .text_grouping import TextGrouper
+
+def difference_hash(img: Image.Image, hash_size: int = 8) -> int:
+    """Compute the difference hash (dHash) of an image as an integer."""
+    small = np.asarray(img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+class ChangeDetector:
+    """
+    Detects whether a page changed since its previous run.
+
+    A page is fingerprinted by a difference hash (dHash) of the whole screenshot, a
+    dHash per horizontal band of the screenshot and a hash of the DOM structure.
+    A dHash tolerates small visual differences, so an edited price or date can
+    leave every band within the threshold; when the renderer reports the layout
+    of the page text, each band also gets a hash of the text inside it, and a
+    band counts as changed when either hash differs. The
+    fingerprint and the results of the last run are kept in a local store with one
+    JSON file per URL, so unchanged pages can reuse their previous results and pages
+    that changed in a few bands only need those bands re-analyzed.
+    """
+
+    def __init__(self,
+                store_dir: str = None,
+                hash_threshold: int = 4,
+                band_height: int = 512,
+                max_changed_fraction: float = 0.5):
+        if store_dir is None:
+            store_dir = os.path.join(os.getcwd(), '.cache', 'changes')
+
+        self.store_dir = store_dir
+        self.hash_threshold = hash_threshold
+        self.band_height = band_height
+        self.max_changed_fraction = max_changed_fraction
+        os.makedirs(store_dir, exist_ok=True)
+
+    def fingerprint(self,
+                    image_path: str,
+                    dom_signature: str = '',
+                    text_layout: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Compute the fingerprint of a rendered page.
+
+        Args:
+            image_path: Path to the screenshot
+            dom_signature: Structural signature of the DOM reported by the renderer
+            text_layout: Text nodes of the page reported by the renderer, as the
+                document 'height' and [top, bottom, text] 'nodes'
+
+        Returns:
+            Dictionary with the page hash, per-band image and text hashes (the
+            latter None without a text layout), DOM hash and image size
+        """
+        with Image.open(image_path) as img:
+            gray = img.convert('L')
+
+        band_hashes = []
+        for top in range(0, gray.height, self.band_height):
+            band = gray.crop((0, top, gray.width, min(top + self.band_height, gray.height)))
+            band_hashes.append(self.perceptual_hash(band))
+
+        return {
+            'phash': self.perceptual_hash(gray),
+            'band_hashes': band_hashes,
+            'band_text_hashes': self.band_text_hashes(text_layout, gray.height, len(band_hashes)),
+            'band_height': self.band_height,
+            'dom_hash': self.dom_hash(dom_signature),
+            'width': gray.width,
+            'height': gray.height
+        }
+
+    def perceptual_hash(self, img: Image.Image, hash_size: int = 8) -> str:
+        """Compute a 64-bit difference hash of an image as a hex string."""
+        return f'{difference_hash(img, hash_size):0{hash_size * hash_size // 4}x}'
+
+    def band_text_hashes(self,
+                         text_layout: Optional[Dict[str, Any]],
+                         image_height: int,
+                         band_count: int) -> Optional[List[str]]:
+        """Hash the text of each band; nodes belong to the band holding their vertical center."""
+        if text_layout is None:
+            return None
+
+        # Document coordinates are CSS pixels; the screenshot may be scaled
+        scale = image_height / max(1, text_layout.get('height') or image_height)
+        band_texts = [[] for _ in range(band_count)]
+        for top, bottom, text in text_layout.get('nodes', []):
+            band = int((top + bottom) / 2 * scale) // self.band_height
+            band_texts[min(max(band, 0), band_count - 1)].append(text)
+        return [hashlib.sha1('\n'.join(texts).encode('utf-8')).hexdigest()[:16] for texts in band_texts]
+
+    def dom_hash(self, dom_signature: str) -> str:
+        """Hash the structural signature of the DOM."""
+        return hashlib.sha1((dom_signature or '').encode('utf-8')).hexdigest()
+
+    def hamming_distance(self, hash1: str, hash2: str) -> int:
+        """Count the differing bits of two hex hashes."""
+        return bin(int(hash1, 16) ^ int(hash2, 16)).count('1')
+
+    def compare(self, url: str, fingerprint: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compare a fingerprint against the stored result of the previous run.
+
+        Args:
+            url: The URL of the page
+            fingerprint: Fingerprint of the current render
+
+        Returns:
+            Dictionary with 'status' ('new', 'unchanged', 'partial' or 'changed'), the
+            changed regions as (top, bottom) pixel ranges and the previous record
+        """
+        previous = self.load(url)
+        if previous is None:
+            return {'status': 'new', 'changed_regions': [], 'previous': None}
+
+        old = previous.get('fingerprint', {})
+        same_size = (old.get('width') == fingerprint['width'] and
+                     old.get('height') == fingerprint['height'] and
+                     old.get('band_height') == fingerprint['band_height'])
+        # Text that cannot be compared (a record without text hashes) may have changed
+        old_text = old.get('band_text_hashes')
+        new_text = fingerprint.get('band_text_hashes')
+        if not same_size or (old_text is None) != (new_text is None):
+            return {'status': 'changed', 'changed_regions': [], 'previous': previous}
+
+        changed_bands = [
+            index for index, (old_hash, new_hash)
+            in enumerate(zip(old.get('band_hashes', []), fingerprint['band_hashes']))
+            if self.hamming_distance(old_hash, new_hash) > self.hash_threshold or
+            (new_text is not None and old_text[index] != new_text[index])
+        ]
+
+        if not changed_bands and old.get('dom_hash') == fingerprint['dom_hash']:
+            return {'status': 'unchanged', 'changed_regions': [], 'previous': previous}
+
+        # A structural change without a visible one still needs a full re-analysis
+        if not changed_bands or len(changed_bands) > self.max_changed_fraction * len(fingerprint['band_hashes']):
+            return {'status': 'changed', 'changed_regions': [], 'previous': previous}
+
+        return {
+            'status': 'partial',
+            'changed_regions': self._bands_to_regions(changed_bands, fingerprint['height']),
+            'previous': previous
+        }
+
+    def merge_ocr_results(self,
+                          previous_ocr: Dict[str, Any],
+                          region_ocr: Dict[str, Any],
+                          regions: List[Tuple[int, int]]) -> Dict[str, Any]:
+        """
+        Combine the previous OCR results with OCR of the changed regions.
+
+        Text blocks from the previous run are kept when their center lies outside every
+        changed region; blocks inside a changed region are replaced by the new ones.
+
+        Args:
+            previous_ocr: OCR results stored with the previous run
+            region_ocr: OCR results of the changed regions, in page coordinates
+            regions: Changed (top, bottom) pixel ranges
+
+        Returns:
+            OCR results for the whole page, ordered top to bottom
+        """
+        def center_y(block):
+            ys = [y for _, y in block['bounding_box']]
+            return (min(ys) + max(ys)) / 2
+
+        kept = [
+            block for block in previous_ocr.get('text_blocks', [])
+            if block.get('bounding_box') and
+            not any(top <= center_y(block) < bottom for top, bottom in regions)
+        ]
+        text_blocks = sorted(kept + list(region_ocr.get('text_blocks', [])), key=center_y)
+
+        results = {
+            'full_text': ' '.join(block['text'] for block in text_blocks),
+            'text_blocks': text_blocks
+        }
+        # Lines and paragraphs may span the changed regions, so rebuild them
+        results.update(TextGrouper().group(text_blocks))
+        return results
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """Load the stored record of the previous run for a URL."""
+        try:
+            with open(self._record_path(url), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, url: str, fingerprint: Dict[str, Any], results: Dict[str, Any]) -> str:
+        """
+        Store the fingerprint and reusable results of the current run.
+
+        Args:
+            url: The URL of the page
+            fingerprint: Fingerprint of the current render
+            results: Results to reuse next time (OCR results, descriptions, LLM analysis)
+
+        Returns:
+            Path of the stored record
+        """
+        record = {
+            'url': url,
+            'updated_at': datetime.now().isoformat(),
+            'fingerprint': fingerprint
+        }
+        record.update(results)
+
+        path = self._record_path(url)
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dumps_json_bytes(record))
+        os.replace(tmp_path, path)
+
+        return path
+
+    def _bands_to_regions(self, bands: List[int], height: int) -> List[Tuple[int, int]]:
+        """Merge consecutive band indices into (top, bottom) pixel ranges."""
+        regions = []
+        for band in bands:
+            top = band * self.band_height
+            bottom = min(top + self.band_height, height)
+            if regions and regions[-1][1] == top:
+                regions[-1] = (regions[-1][0], bottom)
+            else:
+                regions.append((top, bottom))
+        return regions
+
+    def _record_path(self, url: str) -> str:
+        return os.path.join(self.store_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
@@ -0,0 +1,203 @@
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+def _element_schema():
+    return pa.schema([
+        ('run_id', pa.dictionary(pa.int32(), pa.string())),
+        ('url', pa.dictionary(pa.int32(), pa.string())),
+        ('captured_at', pa.timestamp('ms')),
+        ('layout_pattern', pa.dictionary(pa.int32(), pa.string())),
+        ('element_index', pa.int32()),
+        ('element_type', pa.dictionary(pa.int32(), pa.string())),
+        ('horizontal', pa.dictionary(pa.int8(), pa.string())),
+        ('vertical', pa.dictionary(pa.int8(), pa.string())),
+        ('left', pa.int32()),
+        ('top', pa.int32()),
+        ('right', pa.int32()),
+        ('bottom', pa.int32()),
+        ('width_percentage', pa.float32()),
+        ('height_percentage', pa.float32()),
+        ('text_content', pa.string())
+    ])
+
+def _palette_schema():
+    return pa.schema([
+        ('run_id', pa.dictionary(pa.int32(), pa.string())),
+        ('url', pa.dictionary(pa.int32(), pa.string())),
+        ('captured_at', pa.timestamp('ms')),
+        ('rank', pa.int16()),
+        ('hex', pa.dictionary(pa.int32(), pa.string())),
+        ('red', pa.uint8()),
+        ('green', pa.uint8()),
+        ('blue', pa.uint8()),
+        ('percentage', pa.float32())
+    ])
+
+class ColumnarExporter:
+    """
+    Exports element-level results and palettes as Parquet or Arrow datasets.
+
+    Rows are accumulated column by column and written as one row group per run
+    (or per `row_group_size` rows for very large runs) into one file per run and
+    table, e.g. `elements/<run_id>.parquet`. Each table directory can be read at
+    once with `pyarrow.dataset` or any Parquet-aware engine.
+    """
+
+    FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+    def __init__(self, export_dir: str = None, format: str = 'parquet', row_group_size: int = 100000):
+        if pa is None:
+            raise ImportError("pyarrow is required for columnar export (pip install pyarrow)")
+        if format not in self.FORMATS:
+            raise ValueError(f"Unsupported columnar format: {format}")
+
+        if export_dir is None:
+            export_dir = os.path.join(os.getcwd(), 'output', 'columnar')
+
+        self.export_dir = export_dir
+        self.format = format
+        self.row_group_size = row_group_size
+
+        self._tables = {
+            'elements': _element_schema(),
+            'palette': _palette_schema()
+        }
+        self._columns = {name: self._empty_columns(schema) for name, schema in self._tables.items()}
+        self._writers = {}
+        self._run_id = None
+
+    def add_page(self, run_id: str, url: str, results: Dict[str, Any]) -> None:
+        """
+        Append the elements and palette of one page to the current run.
+
+        Args:
+            run_id: Identifier of the run the page belongs to
+            url: The URL of the page
+            results: Pipeline results containing 'structured_description'
+        """
+        if self._run_id is not None and run_id != self._run_id:
+            self.finish_run()
+        self._run_id = run_id
+
+        structured = results.get('structured_description', {}) or {}
+        captured_at = datetime.now()
+        layout_pattern = structured.get('layout_pattern')
+
+        elements = self._columns['elements']
+        for index, element in enumerate(structured.get('ui_elements', [])):
+            position = element.get('position') or {}
+            bbox = element.get('bounding_box') or {}
+            size = element.get('size_percentage') or {}
+            elements['run_id'].append(run_id)
+            elements['url'].append(url)
+            elements['captured_at'].append(captured_at)
+            elements['layout_pattern'].append(layout_pattern)
+            elements['element_index'].append(index)
+            elements['element_type'].append(element.get('type', 'unknown'))
+            elements['horizontal'].append(position.get('horizontal'))
+            elements['vertical'].append(position.get('vertical'))
+            elements['left'].append(bbox.get('left'))
+            elements['top'].append(bbox.get('top'))
+            elements['right'].append(bbox.get('right'))
+            elements['bottom'].append(bbox.get('bottom'))
+            elements['width_percentage'].append(size.get('width'))
+            elements['height_percentage'].append(size.get('height'))
+            elements['text_content'].append(element.get('text_content'))
+
+        palette = self._columns['palette']
+        for rank, color in enumerate((structured.get('color_palette') or {}).get('primary_colors', [])):
+            hex_color = color.get('hex', '#000000')
+            red, green, blue = self._hex_to_rgb(hex_color)
+            palette['run_id'].append(run_id)
+            palette['url'].append(url)
+            palette['captured_at'].append(captured_at)
+            palette['rank'].append(rank)
+            palette['hex'].append(hex_color)
+            palette['red'].append(red)
+            palette['green'].append(green)
+            palette['blue'].append(blue)
+            palette['percentage'].append(color.get('percentage'))
+
+        for name in self._tables:
+            if len(self._columns[name]['run_id']) >= self.row_group_size:
+                self._write_row_group(name)
+
+    def finish_run(self) -> List[str]:
+        """
+        Write the buffered rows of the current run and close its files.
+
+        Returns:
+            Paths of the files written for the run
+        """
+        paths = []
+        for name in self._tables:
+            self._write_row_group(name)
+            writer_info = self._writers.pop(name, None)
+            if writer_info is not None:
+                writer_info['writer'].close()
+                if writer_info.get('sink') is not None:
+                    writer_info['sink'].close()
+                paths.append(writer_info['path'])
+
+        self._run_id = None
+        return paths
+
+    def close(self) -> List[str]:
+        """Flush and close the current run."""
+        return self.finish_run()
+
+    def _write_row_group(self, name: str) -> None:
+        columns = self._columns[name]
+        if not columns['run_id']:
+            return
+
+        schema = self._tables[name]
+        table = pa.Table.from_pydict(
+            {field.name: self._to_array(columns[field.name], field.type) for field in schema},
+            schema=schema
+        )
+        # Each call writes one Parquet row group or one Arrow record batch
+        self._writer(name, schema).write_table(table)
+        self._columns[name] = self._empty_columns(schema)
+
+    def _writer(self, name: str, schema):
+        """Return the open writer for a table of the current run, creating it if needed."""
+        if name in self._writers:
+            return self._writers[name]['writer']
+
+        directory = os.path.join(self.export_dir, name)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self._run_id}.{self.FORMATS[self.format]}')
+
+        if self.format == 'parquet':
+            writer = pq.ParquetWriter(path, schema, compression='zstd', use_dictionary=True)
+            self._writers[name] = {'writer': writer, 'path': path}
+        else:
+            sink = pa.OSFile(path, 'wb')
+            writer = pa.ipc.new_file(sink, schema)
+            self._writers[name] = {'writer': writer, 'sink': sink, 'path': path}
+
+        return writer
+
+    def _to_array(self, values: List[Any], arrow_type):
+        if pa.types.is_dictionary(arrow_type):
+            return pa.array(values, type=arrow_type.value_type).dictionary_encode().cast(arrow_type)
+        return pa.array(values, type=arrow_type)
+
+    def _empty_columns(self, schema) -> Dict[str, List[Any]]:
+        return {field.name: [] for field in schema}
+
+    def _hex_to_rgb(self, hex_color: str) -> Tuple:
+        value = hex_color.lstrip('#')
+        try:
+            return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+        except ValueError:
+            return (None, None, None)
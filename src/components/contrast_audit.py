@@ -0,0 +1,229 @@
+from typing import Dict, Any, List, Tuple, Union
+import numpy as np
+
+from .models import TextBlockArray, as_text_block_array
+
+def _linear_channel_table() -> np.ndarray:
+    """Linear-light value of every 8-bit sRGB channel value, as defined by WCAG."""
+    values = np.arange(256) / 255.0
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+# Relative luminance weights of the linear R, G and B channels
+LUMINANCE_WEIGHTS = np.array([0.2126, 0.7152, 0.0722])
+# Contribution of every 8-bit value of each channel to the relative luminance
+CHANNEL_LUMINANCE = LUMINANCE_WEIGHTS[:, None] * _linear_channel_table()[None, :]
+
+def contrast_ratio(luminance1: np.ndarray, luminance2: np.ndarray) -> np.ndarray:
+    """WCAG contrast ratio between relative luminances, from 1 to 21."""
+    lighter = np.maximum(luminance1, luminance2)
+    darker = np.minimum(luminance1, luminance2)
+    return (lighter + 0.05) / (darker + 0.05)
+
+class ContrastAuditor:
+    """
+    Measures the WCAG contrast of text against its background from screenshot pixels.
+
+    The background of a word is the mean color of a thin ring of pixels around its
+    box. The text color is taken from the dark or the bright end of the luminance
+    inside the box, whichever lies farther from the background: glyph cores carry
+    the full text color, while anti-aliased edges fall between the two and would
+    pull any average towards the background. A low percentile of that end rather
+    than its single extreme pixel is used, so a few stray pixels (noise, the edge
+    of a neighbouring icon) do not decide the text color.
+
+    The pixels of all boxes are gathered into flat arrays, box after box, and the
+    per-box statistics are segmented reductions (reduceat) over them, so a page is
+    measured in a few vectorized passes whose cost is proportional to the area of
+    its text rather than the area of the page. Boxes are processed in chunks to
+    bound the size of the gathered arrays.
+    """
+
+    def __init__(self,
+                 min_ratio: float = 4.5,
+                 large_text_ratio: float = 3.0,
+                 large_text_height: int = 24,
+                 max_pixels: int = 2000000,
+                 text_percentile: float = 2.0):
+        """
+        Args:
+            min_ratio: Minimum contrast of normal text (WCAG 1.4.3, level AA)
+            large_text_ratio: Minimum contrast of large text
+            large_text_height: Box height in pixels from which text counts as large
+                (roughly 18pt text)
+            max_pixels: Pixels gathered per chunk of boxes (a chunk always holds at
+                least one box)
+            text_percentile: Percentile of the luminance inside a box, counted from
+                the dark or the bright end, taken as the text color; glyph cores
+                cover more than this share of a word's box
+        """
+        self.min_ratio = min_ratio
+        self.large_text_ratio = large_text_ratio
+        self.large_text_height = large_text_height
+        self.max_pixels = max_pixels
+        self.text_percentile = text_percentile
+
+    def audit(self,
+              pixels: np.ndarray,
+              text_blocks: Union[TextBlockArray, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Check the contrast of every text block on a page.
+
+        Args:
+            pixels: H×W×3 uint8 RGB pixels of the screenshot
+            text_blocks: Words as a TextBlockArray or in the dict format of extract_text
+
+        Returns:
+            The contrast report, see report()
+        """
+        blocks = as_text_block_array(text_blocks)
+        ratios, foregrounds, backgrounds = self.measure(pixels, blocks.boxes)
+        return self.report(blocks, ratios, foregrounds, backgrounds)
+
+    def measure(self, pixels: np.ndarray, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Estimate the text and background colors of boxes and their contrast.
+
+        Args:
+            pixels: H×W×3 uint8 RGB pixels
+            boxes: N×4 array of boxes (left, top, right, bottom)
+
+        Returns:
+            (ratios, foregrounds, backgrounds): the contrast of each box (NaN for boxes
+            outside the image) and the estimated N×3 RGB colors
+        """
+        height, width = pixels.shape[:2]
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+
+        ratios = np.full(len(boxes), np.nan)
+        foregrounds = np.zeros((len(boxes), 3))
+        backgrounds = np.zeros((len(boxes), 3))
+
+        inner = np.stack([
+            np.clip(boxes[:, 0], 0, width), np.clip(boxes[:, 1], 0, height),
+            np.clip(boxes[:, 2], 0, width), np.clip(boxes[:, 3], 0, height)
+        ], axis=1)
+        valid = np.flatnonzero((inner[:, 2] > inner[:, 0]) & (inner[:, 3] > inner[:, 1]))
+        if not len(valid):
+            return ratios, foregrounds, backgrounds
+
+        # The background ring is a quarter of the text height wide, 2 to 8 pixels
+        margins = np.clip((inner[:, 3] - inner[:, 1]) // 4, 2, 8)
+        outer = np.stack([
+            np.maximum(inner[:, 0] - margins, 0), np.maximum(inner[:, 1] - margins, 0),
+            np.minimum(inner[:, 2] + margins, width), np.minimum(inner[:, 3] + margins, height)
+        ], axis=1)
+
+        # Top to bottom, so each chunk reads a band of the page
+        valid = valid[np.argsort(outer[valid, 1], kind='stable')]
+        for chunk in self._chunks(self._areas(outer[valid]), valid):
+            ratios[chunk], foregrounds[chunk], backgrounds[chunk] = self._measure_chunk(
+                pixels, inner[chunk], outer[chunk])
+
+        return ratios, foregrounds, backgrounds
+
+    def report(self,
+               blocks: TextBlockArray,
+               ratios: np.ndarray,
+               foregrounds: np.ndarray,
+               backgrounds: np.ndarray) -> Dict[str, Any]:
+        """
+        Summarize measured contrast against the WCAG thresholds.
+
+        Returns:
+            Dictionary with the number of text blocks 'checked', the 'failing' ones
+            (lowest contrast first, each with its text, pixel 'bounding_box', measured
+            'contrast_ratio', 'required_ratio' and estimated 'foreground' and
+            'background' colors) and the 'min_contrast_ratio' found
+        """
+        measured = ~np.isnan(ratios)
+        heights = blocks.boxes[:, 3] - blocks.boxes[:, 1]
+        required = np.where(heights >= self.large_text_height, self.large_text_ratio, self.min_ratio)
+
+        # Compare the ratios as they are reported
+        rounded = np.round(ratios, 2)
+        failing = np.flatnonzero(measured & (rounded < required))
+        failing = failing[np.argsort(rounded[failing], kind='stable')]
+
+        return {
+            'checked': int(measured.sum()),
+            'failing': [{
+                'text': blocks.texts[index],
+                'bounding_box': dict(zip(('left', 'top', 'right', 'bottom'), blocks.boxes[index].tolist())),
+                'contrast_ratio': float(rounded[index]),
+                'required_ratio': float(required[index]),
+                'foreground': self._hex(foregrounds[index]),
+                'background': self._hex(backgrounds[index])
+            } for index in failing.tolist()],
+            'min_contrast_ratio': float(rounded[measured].min()) if measured.any() else None
+        }
+
+    def _chunks(self, areas: np.ndarray, indices: np.ndarray) -> List[np.ndarray]:
+        """Split boxes into consecutive chunks of at most max_pixels pixels (or one box)."""
+        chunks = []
+        start, total = 0, 0
+        for position, area in enumerate(areas.tolist()):
+            if position > start and total + area > self.max_pixels:
+                chunks.append(indices[start:position])
+                start, total = position, 0
+            total += area
+        chunks.append(indices[start:])
+        return chunks
+
+    def _measure_chunk(self, pixels: np.ndarray, inner: np.ndarray, outer: np.ndarray):
+        """Measure a chunk of boxes from the gathered pixels of their outer boxes."""
+        areas = self._areas(outer)
+        starts = np.concatenate(([0], np.cumsum(areas)[:-1]))
+
+        # Row-major positions of every pixel of every outer box, box after box
+        owner = np.repeat(np.arange(len(outer)), areas)
+        within = np.arange(int(areas.sum())) - starts[owner]
+        rows, columns = np.divmod(within, (outer[:, 2] - outer[:, 0])[owner])
+        rows += outer[:, 1][owner]
+        columns += outer[:, 0][owner]
+
+        rgb = pixels[rows, columns, :3]
+        luminance = CHANNEL_LUMINANCE[0][rgb[:, 0]]
+        luminance += CHANNEL_LUMINANCE[1][rgb[:, 1]]
+        luminance += CHANNEL_LUMINANCE[2][rgb[:, 2]]
+        inside = ((columns >= inner[:, 0][owner]) & (columns < inner[:, 2][owner]) &
+                  (rows >= inner[:, 1][owner]) & (rows < inner[:, 3][owner]))
+
+        # Background: mean of the ring, or of the box itself when it has no ring
+        ring_count = areas - self._areas(inner)
+        in_background = ~inside | (ring_count == 0)[owner]
+        background_count = np.where(ring_count > 0, ring_count, areas)[:, None]
+        background = np.add.reduceat(
+            np.column_stack((luminance, rgb)) * in_background[:, None], starts) / background_count
+        background_luminance = background[:, 0]
+
+        # Text: a dark or bright percentile of the box, whichever is farther from the background
+        darkest, brightest = self._segment_percentiles(luminance, inside, owner, len(outer))
+        use_brightest = luminance[brightest] - background_luminance > background_luminance - luminance[darkest]
+        text = np.where(use_brightest, brightest, darkest)
+
+        return contrast_ratio(luminance[text], background_luminance), rgb[text], background[:, 1:]
+
+    def _segment_percentiles(self,
+                             luminance: np.ndarray,
+                             inside: np.ndarray,
+                             owner: np.ndarray,
+                             count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Indices of the pixels at the dark and bright `text_percentile` of every box.
+
+        The pixels inside the boxes are sorted once by box and luminance, so both
+        ranks of every box are read from one sorted array.
+        """
+        pixels = np.flatnonzero(inside)
+        order = pixels[np.lexsort((luminance[pixels], owner[pixels]))]
+        counts = np.bincount(owner[pixels], minlength=count)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        offsets = np.floor((counts - 1) * self.text_percentile / 100).astype(np.int64)
+        return order[starts + offsets], order[starts + counts - 1 - offsets]
+
+    def _areas(self, boxes: np.ndarray) -> np.ndarray:
+        return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+    def _hex(self, rgb: np.ndarray) -> str:
+        red, green, blue = (int(round(channel)) for channel in rgb)
+        return f'#{red:02x}{green:02x}{blue:02x}'
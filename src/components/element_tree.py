@@ -0,0 +1,120 @@
+import heapq
+from typing import Dict, Any, List
+import numpy as np
+
+class ElementTreeBuilder:
+    """
+    Nests UI elements by containment.
+
+    The parent of an element is the smallest element that contains it. Elements
+    are swept top to bottom (larger ones first at equal tops), so every possible
+    container has already been seen when an element is reached. The elements that
+    are still open at the current sweep line are kept in a segment tree over their
+    left edges, each node holding the largest right edge below it, and are dropped
+    once the sweep passes their bottom edge. A query only descends into nodes
+    holding an open element that starts left of the current one and ends right of
+    it, so siblings side by side are never compared with each other: the cost per
+    element grows with the number of open elements spanning it (its ancestors, in
+    a nested layout), not with the number of open elements.
+    """
+
+    def parents(self, boxes: np.ndarray) -> np.ndarray:
+        """
+        Find the parent of every element.
+
+        Args:
+            boxes: N×4 array of element boxes (left, top, right, bottom)
+
+        Returns:
+            Array with the index of each element's parent, or -1 for top-level elements
+        """
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        parents = np.full(len(boxes), -1, dtype=np.int64)
+        if len(boxes) < 2:
+            return parents
+
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        order = np.lexsort((-areas, boxes[:, 1]))
+        box_list = boxes.tolist()
+        area_list = areas.tolist()
+
+        # Segment tree over the distinct left edges; leaves hold the open elements
+        lefts = np.unique(boxes[:, 0])
+        ranks = np.searchsorted(lefts, boxes[:, 0]).tolist()
+        size = 1
+        while size < len(lefts):
+            size *= 2
+        empty = int(boxes[:, 2].min()) - 1
+        max_right = [empty] * (2 * size)
+        leaves = [{} for _ in range(size)]
+
+        def update(rank: int) -> None:
+            node = size + rank
+            max_right[node] = max(leaves[rank].values(), default=empty)
+            node //= 2
+            while node:
+                max_right[node] = max(max_right[2 * node], max_right[2 * node + 1])
+                node //= 2
+
+        # Heap of (bottom, index) for expiry
+        closing = []
+
+        for index in order.tolist():
+            left, top, right, bottom = box_list[index]
+            rank = ranks[index]
+
+            # Drop elements that end above this one
+            while closing and closing[0][0] < top:
+                _, old_index = heapq.heappop(closing)
+                del leaves[ranks[old_index]][old_index]
+                update(ranks[old_index])
+
+            # Smallest open element that starts left of this one and contains it
+            best, best_area = -1, None
+            stack = [(1, 0, size - 1)]
+            while stack:
+                node, low, high = stack.pop()
+                if low > rank or max_right[node] < right:
+                    continue
+                if node >= size:
+                    for candidate, c_right in leaves[low].items():
+                        if (c_right >= right and box_list[candidate][3] >= bottom and
+                                (best_area is None or area_list[candidate] < best_area)):
+                            best, best_area = candidate, area_list[candidate]
+                    continue
+                middle = (low + high) // 2
+                stack.append((2 * node, low, middle))
+                stack.append((2 * node + 1, middle + 1, high))
+            parents[index] = best
+
+            leaves[rank][index] = right
+            update(rank)
+            heapq.heappush(closing, (bottom, index))
+
+        return parents
+
+    def build(self, boxes: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Build the containment tree of elements.
+
+        Args:
+            boxes: N×4 array of element boxes (left, top, right, bottom)
+
+        Returns:
+            Top-level nodes as {'element': index, 'children': [...]}, with siblings in
+            reading order (top to bottom, then left to right); 'children' is left out
+            of leaf nodes
+        """
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        parents = self.parents(boxes)
+
+        nodes = [{'element': index} for index in range(len(boxes))]
+        roots = []
+        for index in np.lexsort((boxes[:, 0], boxes[:, 1])).tolist():
+            parent = int(parents[index])
+            if parent < 0:
+                roots.append(nodes[index])
+            else:
+                nodes[parent].setdefault('children', []).append(nodes[index])
+
+        return roots
@@ -1,68 +1,432 @@
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Union
 import numpy as np
 from PIL import Image
-from collections import Counter
 from colormath.color_objects import sRGBColor, LabColor
 from colormath.color_conversions import convert_color
 from colormath.color_diff import delta_e_cie2000
 
+from .image_pyramid import ImagePyramid
+from .pixel_buffer import SharedPixelBuffer
+from .models import UIElement, TextBlockArray, as_ui_elements, as_text_block_array
+from .layout_analysis import LayoutAnalyzer
+from .contrast_audit import ContrastAuditor
+
+def _rgb(hex_color: str) -> Tuple[int, int, int]:
+    """Parse a '#rrggbb' color."""
+    return tuple(int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+
 class GUIAnalyzer:
-    def __init__(self):
+    def __init__(self,
+                 palette_max_pixels: int = 262144,
+                 keep_full_resolution: bool = False,
+                 max_colors: int = 5,
+                 min_confidence: float = 0.0):
+        """
+        Args:
+            palette_max_pixels: Pixel budget of the pyramid level the palette is read from
+            keep_full_resolution: Keep the full-resolution image in memory after the
+                pyramid is built (only needed by stages that read exact pixels)
+            max_colors: Number of colors in the palette
+            min_confidence: UI elements detected with a lower confidence are dropped
+        """
+        self.palette_max_pixels = palette_max_pixels
+        self.keep_full_resolution = keep_full_resolution
+        self.max_colors = max_colors
+        self.min_confidence = min_confidence
+        
         # UI element types that we can detect
         self.ui_element_types = [
             'button', 'text_field', 'checkbox', 'radio_button', 
             'dropdown', 'image', 'navigation_bar', 'footer', 
             'header', 'menu', 'search_box', 'card', 'form'
         ]
+        self.layout_analyzer = LayoutAnalyzer()
+        self.contrast_auditor = ContrastAuditor()
     
-    def analyze_screenshot(self, image_path: str) -> Dict[str, Any]:
-        # Open the image
-        img = Image.open(image_path)
+    def analyze_screenshot(self, image_path: str, text_blocks: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Analyze a screenshot.
+        
+        Args:
+            image_path: Path to the screenshot
+            text_blocks: OCR words; when given, their contrast against the background is
+                audited from the full-resolution pixels
         
-        # Extract color palette
-        color_palette = self._extract_color_palette(img)
+        Returns:
+            Dictionary with the 'ui_elements', 'color_palette', 'layout' and
+            'image_dimensions', plus the 'contrast' audit when text blocks are given
+        """
+        # Decode the image once into a multi-resolution pyramid
+        audit_contrast = text_blocks is not None
+        pyramid = ImagePyramid.open(image_path, keep_full_resolution=self.keep_full_resolution or audit_contrast)
+        
+        # Extract color palette from a low-resolution level
+        color_palette = self._palette_from_pixels(pyramid.pixels(self.palette_max_pixels), self.max_colors)
         
         # In a real implementation, we would use a pre-trained model to detect UI elements
         # This is a placeholder implementation
         # Simulating detected UI elements with bounding boxes
-        ui_elements = self._simulate_ui_elements(img)
+        ui_elements = self._simulate_ui_elements_for_size(pyramid.width, pyramid.height)
+        
+        contrast = None
+        if audit_contrast:
+            contrast = self.contrast_auditor.audit(np.asarray(pyramid.level(0)), text_blocks)
+        
+        return self._build_results(ui_elements, color_palette, pyramid.width, pyramid.height, contrast)
+    
+    def analyze_buffer(self,
+                       buffer: Union[SharedPixelBuffer, Dict[str, Any]],
+                       text_blocks: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Analyze a screenshot that was decoded into a shared pixel buffer.
+        
+        Only a strided view of the buffer is read for the palette, so the pixels are
+        neither decoded again nor copied in full.
+        
+        Args:
+            buffer: The buffer, or its descriptor when called from another process
+            text_blocks: OCR words whose contrast is audited
+        
+        Returns:
+            The same structure as analyze_screenshot
+        """
+        attached = not isinstance(buffer, SharedPixelBuffer)
+        if attached:
+            buffer = SharedPixelBuffer.attach(buffer)
+        
+        try:
+            color_palette = self._palette_from_pixels(buffer.level(self.palette_max_pixels).reshape(-1, 3), self.max_colors)
+            width, height = buffer.width, buffer.height
+            contrast = None
+            if text_blocks is not None:
+                contrast = self.contrast_auditor.audit(buffer.array, text_blocks)
+        finally:
+            if attached:
+                buffer.close()
+        
+        ui_elements = self._simulate_ui_elements_for_size(width, height)
+        
+        return self._build_results(ui_elements, color_palette, width, height, contrast)
+    
+    def reuse_analysis(self,
+                       results: Dict[str, Any],
+                       image_path: str,
+                       text_blocks: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Adapt the analysis of another page of the same template to a screenshot.
+        
+        The UI elements, palette and layout are taken over; the image dimensions are
+        those of this screenshot, and the contrast of its own text is audited from
+        its own pixels.
+        
+        Args:
+            results: Analysis results of the template's representative page
+            image_path: Path to this page's screenshot
+            text_blocks: OCR words of this page whose contrast is audited
+        
+        Returns:
+            The same structure as analyze_screenshot
+        """
+        reused = {key: value for key, value in results.items() if key != 'contrast'}
+        with Image.open(image_path) as img:
+            reused['image_dimensions'] = {'width': img.width, 'height': img.height}
+        if text_blocks is not None:
+            reused['contrast'] = self.audit_contrast(text_blocks, image_path=image_path)
+        
+        return reused
+    
+    def analyze_regions(self,
+                        previous: Dict[str, Any],
+                        regions: List[Tuple[int, int]],
+                        image_path: str = None,
+                        buffer: SharedPixelBuffer = None) -> Dict[str, Any]:
+        """
+        Re-analyze the changed horizontal regions of a page analyzed before.
+        
+        Elements of the previous analysis are kept when their vertical center lies
+        outside every changed region; each region is analyzed as an image of its own
+        and its elements moved to page coordinates. The palette mixes the previous
+        one with those of the regions in proportion to the rows they cover.
+        
+        Args:
+            previous: Analysis results of the previous run of the page
+            regions: Changed (top, bottom) pixel ranges
+            image_path: Path to the screenshot
+            buffer: Shared pixel buffer already holding the screenshot, read instead
+                of decoding image_path
+        
+        Returns:
+            The same structure as analyze_screenshot, without the contrast audit
+        """
+        def outside(element: UIElement) -> bool:
+            center = (element.top + element.bottom) / 2
+            return not any(top <= center < bottom for top, bottom in regions)
+        
+        if buffer is not None:
+            width, height = buffer.width, buffer.height
+            crops = [buffer.crop((0, top, width, bottom)) for top, bottom in regions]
+        else:
+            with Image.open(image_path) as img:
+                width, height = img.size
+                crops = [img.crop((0, top, width, bottom)) for top, bottom in regions]
+        
+        ui_elements = [element for element in as_ui_elements(previous.get('ui_elements', [])) if outside(element)]
+        changed_share = sum(bottom - top for top, bottom in regions) / max(1, height)
+        weights = {}
+        for color in previous.get('color_palette', []):
+            weights[color['hex']] = weights.get(color['hex'], 0) + color['percentage'] * (1 - changed_share)
+        
+        for (top, bottom), crop in zip(regions, crops):
+            share = (bottom - top) / max(1, height)
+            pyramid = ImagePyramid(crop, keep_full_resolution=False)
+            for color in self._palette_from_pixels(pyramid.pixels(max(1, int(self.palette_max_pixels * share))),
+                                                   self.max_colors):
+                weights[color['hex']] = weights.get(color['hex'], 0) + color['percentage'] * share
+            for element in self._simulate_ui_elements_for_size(width, bottom - top):
+                ui_elements.append(UIElement(element.type, element.left, element.top + top,
+                                             element.right, element.bottom + top, confidence=element.confidence))
+        
+        top_colors = sorted(weights.items(), key=lambda item: -item[1])[:self.max_colors]
+        total = sum(weight for _, weight in top_colors) or 1
+        color_palette = [{
+            'hex': hex_color,
+            'rgb': _rgb(hex_color),
+            'percentage': weight / total * 100
+        } for hex_color, weight in top_colors]
+        
+        ui_elements.sort(key=lambda element: (element.top, element.left))
+        return self._build_results(ui_elements, color_palette, width, height)
+    
+    def audit_contrast(self,
+                       text_blocks: List[Dict[str, Any]],
+                       image_path: str = None,
+                       tiles: List[Dict[str, Any]] = None,
+                       buffer: SharedPixelBuffer = None,
+                       keep_ratios: bool = False) -> Dict[str, Any]:
+        """
+        Audit the text contrast of a screenshot without analyzing its UI elements.
+        
+        Args:
+            text_blocks: OCR words in page coordinates
+            image_path: Path to the screenshot
+            tiles: Unstitched tiles of the page, when there is no screenshot; each word
+                is measured in the tile holding its vertical center
+            buffer: Shared pixel buffer already holding the screenshot, read instead
+                of decoding image_path
+            keep_ratios: Add the measured 'ratios' of every text block (None when not
+                measured), for audit_contrast_regions of the next run
         
-        # Infer layout pattern
-        layout_pattern = self._infer_layout_pattern(ui_elements)
+        Returns:
+            The contrast report, as under 'contrast' in analyze_screenshot
+        """
+        blocks = as_text_block_array(text_blocks)
+        ratios, foregrounds, backgrounds = self._measure_contrast(blocks.boxes, image_path, tiles, buffer)
+        return self._contrast_report(blocks, ratios, foregrounds, backgrounds, keep_ratios)
+    
+    def audit_contrast_regions(self,
+                               text_blocks: List[Dict[str, Any]],
+                               regions: List[Tuple[int, int]],
+                               previous_blocks: List[Dict[str, Any]],
+                               previous: Dict[str, Any],
+                               image_path: str = None,
+                               buffer: SharedPixelBuffer = None) -> Dict[str, Any]:
+        """
+        Audit the text contrast of the changed regions of a page audited before.
+        
+        Text blocks outside every changed region that were audited in the previous
+        run, with the same text and box, keep their measurement; only the others are
+        measured.
+        
+        Args:
+            text_blocks: OCR words in page coordinates
+            regions: Changed (top, bottom) pixel ranges
+            previous_blocks: OCR words of the previous run
+            previous: Contrast report of the previous run, made with keep_ratios
+            image_path: Path to the screenshot
+            buffer: Shared pixel buffer already holding the screenshot, read instead
+                of decoding image_path
+        
+        Returns:
+            The contrast report for the whole page, with its 'ratios'
+        """
+        blocks = as_text_block_array(text_blocks)
+        previous_blocks = as_text_block_array(previous_blocks)
+        known = {(text, tuple(box)): ratio
+                 for text, box, ratio in zip(previous_blocks.texts, previous_blocks.boxes.tolist(), previous['ratios'])}
+        sides = ('left', 'top', 'right', 'bottom')
+        failing = {(finding['text'], tuple(finding['bounding_box'][side] for side in sides)): finding
+                   for finding in previous.get('failing', [])}
+        
+        ratios = np.full(len(blocks), np.nan)
+        foregrounds = np.zeros((len(blocks), 3))
+        backgrounds = np.zeros((len(blocks), 3))
+        stale = []
+        for index, (text, box) in enumerate(zip(blocks.texts, blocks.boxes.tolist())):
+            key = (text, tuple(box))
+            center = (box[1] + box[3]) / 2
+            if key not in known or any(top <= center < bottom for top, bottom in regions):
+                stale.append(index)
+            elif known[key] is not None:
+                ratios[index] = known[key]
+                if key in failing:
+                    foregrounds[index] = _rgb(failing[key]['foreground'])
+                    backgrounds[index] = _rgb(failing[key]['background'])
+        
+        stale = np.array(stale, dtype=np.int64)
+        if len(stale):
+            ratios[stale], foregrounds[stale], backgrounds[stale] = self._measure_contrast(
+                blocks.boxes[stale], image_path, None, buffer)
+        return self._contrast_report(blocks, ratios, foregrounds, backgrounds, keep_ratios=True)
+    
+    def _measure_contrast(self,
+                          boxes: np.ndarray,
+                          image_path: str = None,
+                          tiles: List[Dict[str, Any]] = None,
+                          buffer: SharedPixelBuffer = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if buffer is not None:
+            return self.contrast_auditor.measure(buffer.array, boxes)
+        if image_path is not None:
+            with Image.open(image_path) as img:
+                return self.contrast_auditor.measure(np.asarray(img.convert('RGB')), boxes)
+        if not tiles:
+            raise ValueError("No screenshot or tiles to audit")
+        
+        centers = (boxes[:, 1] + boxes[:, 3]) // 2
+        ratios = np.full(len(boxes), np.nan)
+        foregrounds = np.zeros((len(boxes), 3))
+        backgrounds = np.zeros((len(boxes), 3))
+        
+        for tile in tiles:
+            inside = np.flatnonzero((centers >= tile['top']) & (centers < tile['top'] + tile['height']))
+            if not len(inside):
+                continue
+            with Image.open(tile['path']) as img:
+                pixels = np.asarray(img.convert('RGB'))
+            offset = np.array([0, tile['top'], 0, tile['top']])
+            ratios[inside], foregrounds[inside], backgrounds[inside] = self.contrast_auditor.measure(
+                pixels, boxes[inside] - offset)
+        
+        return ratios, foregrounds, backgrounds
+    
+    def _contrast_report(self,
+                         blocks: TextBlockArray,
+                         ratios: np.ndarray,
+                         foregrounds: np.ndarray,
+                         backgrounds: np.ndarray,
+                         keep_ratios: bool) -> Dict[str, Any]:
+        report = self.contrast_auditor.report(blocks, ratios, foregrounds, backgrounds)
+        if keep_ratios:
+            report['ratios'] = [None if np.isnan(ratio) else float(ratio) for ratio in ratios.tolist()]
+        return report
+    
+    def analyze_tiles(self, tiles: List[Dict[str, Any]], text_blocks: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Analyze a page captured as a sequence of tiles without stitching them.
+        
+        Each tile is decoded on its own and contributes pixels of a reduced level to the
+        palette in proportion to its height, so memory use is bounded by the size of
+        one tile.
+        
+        Args:
+            tiles: Tiles as produced by the tiled capture of WebpageRenderer
+            text_blocks: OCR words in page coordinates whose contrast is audited, each in
+                the tile holding its vertical center
+        
+        Returns:
+            The same structure as analyze_screenshot
+        """
+        if not tiles:
+            raise ValueError("No tiles to analyze")
         
-        return {
-            'ui_elements': ui_elements,
+        total_height = sum(tile['height'] for tile in tiles)
+        samples = []
+        width = 0
+        
+        if text_blocks is not None:
+            blocks = as_text_block_array(text_blocks)
+            centers = (blocks.boxes[:, 1] + blocks.boxes[:, 3]) // 2
+            ratios = np.full(len(blocks), np.nan)
+            foregrounds = np.zeros((len(blocks), 3))
+            backgrounds = np.zeros((len(blocks), 3))
+        
+        for tile in tiles:
+            share = tile['height'] / total_height
+            pyramid = ImagePyramid.open(tile['path'], keep_full_resolution=text_blocks is not None)
+            width = pyramid.width
+            pixels = pyramid.pixels(max(1, int(self.palette_max_pixels * share)))
+            
+            if text_blocks is not None:
+                inside = np.flatnonzero((centers >= tile['top']) & (centers < tile['top'] + tile['height']))
+                offset = np.array([0, tile['top'], 0, tile['top']])
+                ratios[inside], foregrounds[inside], backgrounds[inside] = self.contrast_auditor.measure(
+                    np.asarray(pyramid.level(0)), blocks.boxes[inside] - offset)
+            
+            sample_size = min(len(pixels), max(1, round(10000 * tile['height'] / total_height)))
+            samples.append(pixels[np.random.choice(len(pixels), sample_size, replace=False)])
+        
+        color_palette = self._palette_from_pixels(np.concatenate(samples), self.max_colors)
+        height = tiles[-1]['top'] + tiles[-1]['height']
+        ui_elements = self._simulate_ui_elements_for_size(width, height)
+        
+        contrast = None
+        if text_blocks is not None:
+            contrast = self.contrast_auditor.report(blocks, ratios, foregrounds, backgrounds)
+        
+        return self._build_results(ui_elements, color_palette, width, height, contrast)
+    
+    def _build_results(self,
+                       ui_elements: List[UIElement],
+                       color_palette: List[Dict[str, Any]],
+                       width: int,
+                       height: int,
+                       contrast: Dict[str, Any] = None) -> Dict[str, Any]:
+        ui_elements = [element for element in ui_elements
+                       if element.confidence is None or element.confidence >= self.min_confidence]
+        
+        # Infer the layout structure; the pattern label is kept for existing consumers
+        layout = self.layout_analyzer.analyze(ui_elements, width, height)
+        
+        results = {
+            'ui_elements': [element.to_dict() for element in ui_elements],
             'color_palette': color_palette,
-            'layout_pattern': layout_pattern,
+            'layout_pattern': layout['pattern'],
+            'layout': layout,
             'image_dimensions': {
-                'width': img.width,
-                'height': img.height
+                'width': width,
+                'height': height
             }
         }
+        if contrast is not None:
+            results['contrast'] = contrast
+        
+        return results
     
     def _extract_color_palette(self, img: Image.Image, num_colors: int = 5) -> List[Dict[str, Any]]:
-        # Convert image to numpy array
-        img_array = np.array(img.convert('RGB'))
-        
-        # Reshape to a list of pixels
-        pixels = img_array.reshape(-1, 3)
+        # Read the pixels of a reduced level rather than the full image
+        pixels = ImagePyramid(img).pixels(self.palette_max_pixels)
         
+        return self._palette_from_pixels(pixels, num_colors)
+    
+    def _palette_from_pixels(self, pixels: np.ndarray, num_colors: int = 5) -> List[Dict[str, Any]]:
         # Downsample to reduce processing time
         sample_size = min(10000, len(pixels))
         sampled_pixels = pixels[np.random.choice(len(pixels), sample_size, replace=False)]
         
-        # Count unique colors
-        colors = [tuple(pixel) for pixel in sampled_pixels]
-        color_counts = Counter(colors)
+        # Count unique colors, packed into one integer per pixel
+        packed = sampled_pixels.astype(np.uint32)
+        packed = (packed[:, 0] << 16) | (packed[:, 1] << 8) | packed[:, 2]
+        colors, counts = np.unique(packed, return_counts=True)
         
         # Get most common colors
-        most_common = color_counts.most_common(num_colors)
+        top = np.argsort(-counts, kind='stable')[:num_colors]
+        most_common = [(int(colors[i]), int(counts[i])) for i in top]
         
         # Convert to RGB hex and calculate percentage
         total_pixels = sum(count for _, count in most_common)
         color_palette = []
         
-        for (r, g, b), count in most_common:
+        for color, count in most_common:
+            r, g, b = (color >> 16) & 0xff, (color >> 8) & 0xff, color & 0xff
             hex_color = f'#{r:02x}{g:02x}{b:02x}'
             percentage = (count / total_pixels) * 100
             color_palette.append({
@@ -86,86 +450,24 @@ class GUIAnalyzer:
         return delta_e < threshold
     
     def _simulate_ui_elements(self, img: Image.Image) -> List[Dict[str, Any]]:
+        return [element.to_dict() for element in self._simulate_ui_elements_for_size(img.width, img.height)]
+    
+    def _simulate_ui_elements_for_size(self, width: int, height: int) -> List[UIElement]:
         # In a real implementation, we would use a computer vision model to detect UI elements
         # This is a placeholder method that simulates detection results
-        width, height = img.width, img.height
         
         # Simulate some detected UI elements with reasonable positions
         ui_elements = [
-            {
-                'type': 'header',
-                'bounding_box': [(0, 0), (width, 100), (width, 100), (0, 0)],
-                'confidence': 0.95,
-            },
-            {
-                'type': 'navigation_bar',
-                'bounding_box': [(0, 100), (width, 150), (width, 150), (0, 100)],
-                'confidence': 0.92,
-            },
-            {
-                'type': 'button',
-                'bounding_box': [(width - 120, 20), (width - 20, 60), (width - 20, 60), (width - 120, 20)],
-                'confidence': 0.88,
-            },
-            {
-                'type': 'search_box',
-                'bounding_box': [(width // 2 - 150, 20), (width // 2 + 150, 60), (width // 2 + 150, 60), (width // 2 - 150, 20)],
-                'confidence': 0.85,
-            },
-            {
-                'type': 'image',
-                'bounding_box': [(50, 200), (width - 50, 500), (width - 50, 500), (50, 200)],
-                'confidence': 0.96,
-            },
-            {
-                'type': 'text_field',
-                'bounding_box': [(width // 4, 550), (width * 3 // 4, 650), (width * 3 // 4, 650), (width // 4, 550)],
-                'confidence': 0.87,
-            },
-            {
-                'type': 'footer',
-                'bounding_box': [(0, height - 100), (width, height), (width, height), (0, height - 100)],
-                'confidence': 0.94,
-            }
+            UIElement('header', 0, 0, width, 100, confidence=0.95),
+            UIElement('navigation_bar', 0, 100, width, 150, confidence=0.92),
+            UIElement('button', width - 120, 20, width - 20, 60, confidence=0.88),
+            UIElement('search_box', width // 2 - 150, 20, width // 2 + 150, 60, confidence=0.85),
+            UIElement('image', 50, 200, width - 50, 500, confidence=0.96),
+            UIElement('text_field', width // 4, 550, width * 3 // 4, 650, confidence=0.87),
+            UIElement('footer', 0, height - 100, width, height, confidence=0.94)
         ]
         
         return ui_elements
     
-    def _infer_layout_pattern(self, ui_elements: List[Dict[str, Any]]) -> str:
-        # This is a placeholder method to infer the layout pattern
-        # In a real implementation, we would use more sophisticated analysis
-        
-        # Check if elements are aligned in columns
-        x_positions = []
-        for elem in ui_elements:
-            # Get x-coordinates of the left edges of elements
-            x_positions.append(elem['bounding_box'][0][0])
-        
-        # Count unique x-positions (with some tolerance)
-        unique_x = set()
-        for x in x_positions:
-            found = False
-            for ux in unique_x:
-                if abs(x - ux) < 20:  # 20px tolerance
-                    found = True
-                    break
-            if not found:
-                unique_x.add(x)
-        
-        # If most elements align to few x positions, it's likely a column layout
-        if len(unique_x) <= 2 and len(ui_elements) > 3:
-            return 'single-column'
-        elif len(unique_x) <= 4 and len(ui_elements) > 5:
-            return 'multi-column'
-        
-        # Check for grid pattern
-        # This would require more sophisticated analysis in a real implementation
-        # For now, we'll use a simplistic approach
-        header_exists = any(elem['type'] == 'header' for elem in ui_elements)
-        footer_exists = any(elem['type'] == 'footer' for elem in ui_elements)
-        nav_exists = any(elem['type'] == 'navigation_bar' for elem in ui_elements)
-        
-        if header_exists and footer_exists and nav_exists:
-            return 'standard-layout'
-        
-        return 'complex-layout'
\ No newline at end of file
+    def _infer_layout_pattern(self, ui_elements: List[Union[UIElement, Dict[str, Any]]]) -> str:
+        return self.layout_analyzer.analyze(ui_elements)['pattern']
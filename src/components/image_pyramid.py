@@ -0,0 +1,104 @@
+from typing import Sequence
+import numpy as np
+from PIL import Image
+
+class ImagePyramid:
+    """
+    Multi-resolution pyramid of a screenshot.
+
+    Each level halves the previous one, so the levels together cost a third of the
+    full-resolution image. By default a level keeps every other pixel of the one
+    above it, so every pixel is an actual color of the screenshot and the color
+    statistics of coarse levels match those of a uniform sample; 'box' averages
+    2×2 blocks instead, for smoother levels. Coarse stages such as the color
+    palette read a low-resolution level; the full-resolution level can be dropped
+    once the pyramid is built when nothing needs exact pixels, in which case only
+    the reduced levels stay in memory.
+    """
+
+    def __init__(self,
+                 image: Image.Image,
+                 min_side: int = 64,
+                 max_levels: int = 8,
+                 keep_full_resolution: bool = True,
+                 resample: str = 'nearest'):
+        """
+        Args:
+            image: The full-resolution image
+            min_side: Stop reducing before the shorter side falls below this size
+            max_levels: Maximum number of levels, including the full resolution
+            keep_full_resolution: Whether to keep level 0 after building the pyramid
+            resample: How levels are reduced, 'nearest' or 'box'
+        """
+        if resample not in ('nearest', 'box'):
+            raise ValueError(f"Unsupported resampling: {resample}")
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        self.width, self.height = image.size
+        levels = [image]
+        while len(levels) < max_levels and min(levels[-1].size) // 2 >= min_side:
+            levels.append(self._reduce(levels[-1], resample))
+
+        self.sizes = [level.size for level in levels]
+        if not keep_full_resolution and len(levels) > 1:
+            levels[0] = None
+        self._levels = levels
+
+    @classmethod
+    def open(cls, image_path: str, **kwargs) -> 'ImagePyramid':
+        """Decode an image file and build its pyramid."""
+        img = Image.open(image_path)
+        # Single-frame images release their file once loaded
+        img.load()
+        return cls(img, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def level(self, index: int) -> Image.Image:
+        """Return a level; level 0 is the full resolution."""
+        image = self._levels[index]
+        if image is None:
+            raise ValueError("The full-resolution level was not kept")
+        return image
+
+    def scale(self, index: int) -> float:
+        """Return the factor from level coordinates to full-resolution coordinates."""
+        return self.width / self.sizes[index][0]
+
+    def level_for(self, max_pixels: int) -> int:
+        """Return the finest available level with at most `max_pixels` pixels (or the coarsest)."""
+        for index in range(len(self._levels)):
+            width, height = self.sizes[index]
+            if self._levels[index] is not None and width * height <= max_pixels:
+                return index
+        return len(self._levels) - 1
+
+    def pixels(self, max_pixels: int) -> np.ndarray:
+        """Return the pixels of the finest level within `max_pixels` as an N×3 uint8 array."""
+        return np.asarray(self.level(self.level_for(max_pixels))).reshape(-1, 3)
+
+    def crop(self, box: Sequence[int], index: int = 0) -> Image.Image:
+        """
+        Crop a region given in full-resolution coordinates from a level.
+
+        Args:
+            box: (left, top, right, bottom) in full-resolution pixels
+            index: Level to crop from
+
+        Returns:
+            The region at the resolution of the level
+        """
+        scale = self.scale(index)
+        left, top, right, bottom = box
+        return self.level(index).crop((
+            int(left // scale), int(top // scale),
+            max(int(left // scale) + 1, int(-(-right // scale))),
+            max(int(top // scale) + 1, int(-(-bottom // scale)))
+        ))
+
+    def _reduce(self, image: Image.Image, resample: str) -> Image.Image:
+        if resample == 'box':
+            return image.reduce(2)
+        return image.resize((image.width // 2, image.height // 2), Image.NEAREST)
@@ -0,0 +1,237 @@
+from typing import Dict, Any, List, Tuple, Union
+import numpy as np
+
+from .models import UIElement, as_ui_elements, element_boxes
+
+class LayoutAnalyzer:
+    """
+    Infers the layout structure of a page from its UI element boxes.
+
+    Both axes are analyzed the same way: element extents are accumulated into a
+    1-D coverage histogram and runs of empty bins become gaps. Vertical gaps
+    between elements are gutters, and the content between them forms columns;
+    horizontal gaps separate rows. Element edges are clustered by sweeping the
+    sorted edge positions, which gives the alignment lines used to detect grids.
+    Apart from the sorts, every step is linear in the number of elements or bins.
+    """
+
+    def __init__(self,
+                 bin_size: int = 8,
+                 min_gutter: int = 16,
+                 min_row_gap: int = 16,
+                 align_tolerance: int = 20,
+                 full_width_ratio: float = 0.9,
+                 sidebar_max_ratio: float = 0.3,
+                 sidebar_min_height_ratio: float = 0.25):
+        """
+        Args:
+            bin_size: Width of a histogram bin in pixels
+            min_gutter: Minimum width of an empty vertical strip between columns
+            min_row_gap: Minimum height of an empty horizontal strip between rows
+            align_tolerance: Maximum distance between edges on the same alignment line
+            full_width_ratio: Elements at least this fraction of the page wide (headers,
+                footers, banners) are left out of the column analysis
+            sidebar_max_ratio: Maximum width of a side column, relative to the content
+                width, for it to count as a sidebar
+            sidebar_min_height_ratio: Minimum height spanned by the elements of a side
+                column, relative to the page height, for it to count as a sidebar
+        """
+        self.bin_size = bin_size
+        self.min_gutter = min_gutter
+        self.min_row_gap = min_row_gap
+        self.align_tolerance = align_tolerance
+        self.full_width_ratio = full_width_ratio
+        self.sidebar_max_ratio = sidebar_max_ratio
+        self.sidebar_min_height_ratio = sidebar_min_height_ratio
+
+    def analyze(self,
+                ui_elements: List[Union[UIElement, Dict[str, Any]]],
+                width: int = None,
+                height: int = None) -> Dict[str, Any]:
+        """
+        Describe the layout of a page.
+
+        Args:
+            ui_elements: Detected UI elements
+            width: Page width; defaults to the right edge of the rightmost element
+            height: Page height; defaults to the bottom edge of the lowest element
+
+        Returns:
+            Dictionary with the layout 'pattern' label, the 'columns', 'gutters', 'rows'
+            and 'sidebars' found, the 'grid' size if elements form a grid, the
+            'alignment' lines of left and top edges and the page 'regions' present
+        """
+        elements = as_ui_elements(ui_elements)
+        boxes = element_boxes(elements).astype(np.int64)
+        types = [element.type for element in elements]
+
+        if not len(boxes):
+            return self._empty_layout()
+
+        width = int(width or boxes[:, 2].max())
+        height = int(height or boxes[:, 3].max())
+
+        # Columns: only elements narrower than the page take part
+        narrow = (boxes[:, 2] - boxes[:, 0]) < self.full_width_ratio * width
+        column_boxes = boxes[narrow] if narrow.any() else boxes
+        columns, gutters = self._bands(column_boxes[:, 0], column_boxes[:, 2], self.min_gutter)
+        rows, _ = self._bands(boxes[:, 1], boxes[:, 3], self.min_row_gap)
+
+        x_lines, x_labels = self._alignment_lines(boxes[:, 0])
+        y_lines, y_labels = self._alignment_lines(boxes[:, 1])
+
+        regions = {
+            'header': 'header' in types,
+            'navigation': 'navigation_bar' in types,
+            'footer': 'footer' in types
+        }
+
+        return {
+            'pattern': self._pattern(len(x_lines), len(elements), regions),
+            'columns': [self._span(left, right, 'left', 'right', 'width') for left, right in columns],
+            'gutters': [self._span(left, right, 'left', 'right', 'width') for left, right in gutters],
+            'rows': [self._span(top, bottom, 'top', 'bottom', 'height') for top, bottom in rows],
+            'sidebars': self._sidebars(columns, column_boxes, height),
+            'grid': self._grid(x_labels, y_labels),
+            'alignment': {
+                'left_edges': [line for line, count in x_lines],
+                'top_edges': [line for line, count in y_lines]
+            },
+            'regions': regions
+        }
+
+    def _bands(self, starts: np.ndarray, ends: np.ndarray, min_gap: int) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        """
+        Find occupied bands and the gaps between them along one axis.
+
+        Element extents are added to a coverage histogram through a difference array,
+        so the cost is linear in the number of elements plus the number of bins.
+
+        Returns:
+            (bands, gaps) as lists of (start, end) pixel ranges
+        """
+        origin = int(starts.min())
+        first_bins = (starts - origin) // self.bin_size
+        last_bins = np.maximum(first_bins, (ends - origin - 1) // self.bin_size)
+
+        delta = np.zeros(int(last_bins.max()) + 2, dtype=np.int64)
+        np.add.at(delta, first_bins, 1)
+        np.add.at(delta, last_bins + 1, -1)
+        occupied = np.cumsum(delta)[:-1] > 0
+
+        # Edges of the runs of occupied bins
+        change = np.diff(np.concatenate(([0], occupied.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(change == 1)
+        run_ends = np.flatnonzero(change == -1)
+
+        bands = []
+        gaps = []
+        min_gap_bins = max(1, -(-min_gap // self.bin_size))
+        for run_start, run_end in zip(run_starts, run_ends):
+            if bands and run_start - bands[-1][1] < min_gap_bins:
+                bands[-1] = (bands[-1][0], run_end)
+            else:
+                if bands:
+                    gaps.append((bands[-1][1], run_start))
+                bands.append((run_start, run_end))
+
+        to_pixels = lambda start, end: (origin + int(start) * self.bin_size, origin + int(end) * self.bin_size)
+        return [to_pixels(*band) for band in bands], [to_pixels(*gap) for gap in gaps]
+
+    def _alignment_lines(self, edges: np.ndarray) -> Tuple[List[Tuple[int, int]], np.ndarray]:
+        """
+        Cluster edge positions into alignment lines with a sweep over the sorted edges.
+
+        An edge joins the current line while it is within the tolerance of the line's
+        first edge, which makes the result independent of the element order.
+
+        Returns:
+            (lines, labels): (position, element count) per line and the line of each edge
+        """
+        order = np.argsort(edges, kind='stable')
+        sorted_edges = edges[order]
+
+        labels_sorted = np.empty(len(edges), dtype=np.int64)
+        lines = []
+        line_start = None
+        for position, edge in enumerate(sorted_edges):
+            if line_start is None or edge - line_start >= self.align_tolerance:
+                line_start = edge
+                lines.append([int(edge), 0])
+            lines[-1][1] += 1
+            labels_sorted[position] = len(lines) - 1
+
+        labels = np.empty(len(edges), dtype=np.int64)
+        labels[order] = labels_sorted
+        return [tuple(line) for line in lines], labels
+
+    def _sidebars(self, columns: List[Tuple[int, int]], boxes: np.ndarray, height: int) -> List[Dict[str, Any]]:
+        """Report narrow, tall outer columns next to a wider main column as sidebars."""
+        if len(columns) < 2:
+            return []
+
+        centers = (boxes[:, 0] + boxes[:, 2]) / 2
+
+        content_width = columns[-1][1] - columns[0][0]
+        widest = max(right - left for left, right in columns)
+        sidebars = []
+        for side, (left, right) in (('left', columns[0]), ('right', columns[-1])):
+            column_width = right - left
+            inside = boxes[(centers >= left) & (centers < right)]
+            column_height = inside[:, 3].max() - inside[:, 1].min() if len(inside) else 0
+            if (column_width < widest and column_width <= self.sidebar_max_ratio * content_width and
+                    column_height >= self.sidebar_min_height_ratio * height):
+                sidebar = {'side': side}
+                sidebar.update(self._span(left, right, 'left', 'right', 'width'))
+                sidebars.append(sidebar)
+        return sidebars
+
+    def _grid(self, x_labels: np.ndarray, y_labels: np.ndarray) -> Dict[str, int]:
+        """
+        Detect a grid of elements from their left and top alignment lines.
+
+        A top line is a grid row when at least two of its left lines are shared with
+        another row; a grid needs at least two such rows.
+
+        Returns:
+            Dictionary with the number of grid 'columns' and 'rows', or None
+        """
+        # Distinct (left line, top line) pairs, and the number of top lines per left line
+        pairs = np.unique(np.stack([x_labels, y_labels], axis=1), axis=0)
+        lines, rows_per_line = np.unique(pairs[:, 0], return_counts=True)
+        shared = np.isin(pairs[:, 0], lines[rows_per_line >= 2])
+
+        rows, shared_per_row = np.unique(pairs[shared, 1], return_counts=True)
+        grid_rows = rows[shared_per_row >= 2]
+        if len(grid_rows) < 2:
+            return None
+
+        columns = np.unique(pairs[shared & np.isin(pairs[:, 1], grid_rows), 0])
+        return {'columns': int(len(columns)), 'rows': int(len(grid_rows))}
+
+    def _pattern(self, alignment_lines: int, element_count: int, regions: Dict[str, bool]) -> str:
+        # If most elements align to few x positions, it's likely a column layout
+        if alignment_lines <= 2 and element_count > 3:
+            return 'single-column'
+        elif alignment_lines <= 4 and element_count > 5:
+            return 'multi-column'
+
+        if regions['header'] and regions['footer'] and regions['navigation']:
+            return 'standard-layout'
+
+        return 'complex-layout'
+
+    def _span(self, start: int, end: int, start_key: str, end_key: str, size_key: str) -> Dict[str, int]:
+        return {start_key: int(start), end_key: int(end), size_key: int(end - start)}
+
+    def _empty_layout(self) -> Dict[str, Any]:
+        return {
+            'pattern': 'complex-layout',
+            'columns': [],
+            'gutters': [],
+            'rows': [],
+            'sidebars': [],
+            'grid': None,
+            'alignment': {'left_edges': [], 'top_edges': []},
+            'regions': {'header': False, 'navigation': False, 'footer': False}
+        }
@@ -1,9 +1,82 @@
-from typing import Dict, Any, List
-import json
+from collections.abc import ItemsView, KeysView, ValuesView
+from typing import Dict, Any, List, Union
+import numpy as np
+
+from .models import Box, TextBlockArray, as_text_block_array, as_ui_elements, box_from_polygon, element_boxes
+from .element_tree import ElementTreeBuilder
+from .serialization import dumps_json
+from .text_grouping import TextGrouper
+
+class ConversionResult(dict):
+    """
+    Result of convert_to_text.
+    
+    The 'json_output' entry is only serialized from 'structured_description' the first
+    time its value is read, and then cached. It is a key from the start: `in`,
+    keys(), iteration and len() report it whether or not it has been serialized,
+    so copying the result or encoding it as JSON serializes it too.
+    """
+    
+    LAZY_KEY = 'json_output'
+    
+    def __missing__(self, key):
+        if key != self.LAZY_KEY:
+            raise KeyError(key)
+        
+        value = dumps_json(self['structured_description'])
+        self[key] = value
+        return value
+    
+    def __contains__(self, key) -> bool:
+        return key == self.LAZY_KEY or super().__contains__(key)
+    
+    def __iter__(self):
+        yield from super().__iter__()
+        if not super().__contains__(self.LAZY_KEY):
+            yield self.LAZY_KEY
+    
+    def __len__(self) -> int:
+        return super().__len__() + (not super().__contains__(self.LAZY_KEY))
+    
+    def keys(self):
+        return KeysView(self)
+    
+    def items(self):
+        return ItemsView(self)
+    
+    def values(self):
+        return ValuesView(self)
+    
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
 
 class LayoutToTextConverter:
-    def __init__(self):
-        pass
+    def __init__(self,
+                 min_text_overlap: float = 1.0,
+                 max_matrix_cells: int = 4000000,
+                 text_grouper: TextGrouper = None,
+                 collapse_repeats: int = 3,
+                 max_contrast_findings: int = 10):
+        """
+        Args:
+            min_text_overlap: Fraction of a text block's area that must lie inside an
+                element for the text to be assigned to it (1.0 means fully contained)
+            max_matrix_cells: Upper bound on the element × text block cells computed at
+                once, which caps the memory used by text assignment
+            text_grouper: Puts the OCR words in reading order for text assignment
+            collapse_repeats: Number of identical consecutive siblings from which the
+                textual description lists them once with a count
+            max_contrast_findings: Number of low-contrast text blocks the textual
+                description lists (the structured description keeps all of them)
+        """
+        self.min_text_overlap = min_text_overlap
+        self.max_matrix_cells = max_matrix_cells
+        self.text_grouper = text_grouper or TextGrouper()
+        self.tree_builder = ElementTreeBuilder()
+        self.collapse_repeats = collapse_repeats
+        self.max_contrast_findings = max_contrast_findings
     
     def convert_to_text(self, 
                        ui_analysis: Dict[str, Any], 
@@ -14,31 +87,46 @@ class LayoutToTextConverter:
         ui_elements = ui_analysis.get('ui_elements', [])
         color_palette = ui_analysis.get('color_palette', [])
         layout_pattern = ui_analysis.get('layout_pattern', 'unknown')
+        layout = ui_analysis.get('layout')
         image_dimensions = ui_analysis.get('image_dimensions', {'width': 0, 'height': 0})
         
         full_ocr_text = ocr_results.get('full_text', '')
         text_blocks = ocr_results.get('text_blocks', [])
         
+        # Match words, not lines, against elements: a line often spans several
+        # elements, such as a row of buttons. Lines are only used when there are no words.
+        if len(text_blocks):
+            element_text, ordered = text_blocks, False
+        else:
+            element_text, ordered = ocr_results.get('lines') or [], True
+        
         page_title = page_info.get('page_title', '')
         page_metadata = page_info.get('page_metadata', {})
         
+        described_elements = self._describe_ui_elements(ui_elements, element_text, image_dimensions, ordered=ordered)
+        
         # Create structured description
         structured_description = {
             'page_title': page_title,
             'layout_pattern': layout_pattern,
+            'layout': self._describe_layout(layout),
             'color_palette': self._describe_color_palette(color_palette),
-            'ui_elements': self._describe_ui_elements(ui_elements, text_blocks, image_dimensions),
+            'ui_elements': described_elements,
+            'element_tree': self._build_element_tree(described_elements),
             'metadata': self._describe_metadata(page_metadata)
         }
+        contrast = ui_analysis.get('contrast')
+        if contrast is not None:
+            structured_description['accessibility'] = {'contrast': self._describe_contrast(contrast)}
         
         # Generate human-readable textual description
         textual_description = self._generate_textual_description(structured_description)
         
-        return {
-            'structured_description': structured_description,
-            'textual_description': textual_description,
-            'json_output': json.dumps(structured_description, indent=2)
-        }
+        # 'json_output' is serialized lazily, only if a caller reads it
+        return ConversionResult(
+            structured_description=structured_description,
+            textual_description=textual_description
+        )
     
     def _describe_color_palette(self, color_palette: List[Dict[str, Any]]) -> Dict[str, Any]:
         if not color_palette:
@@ -58,10 +146,58 @@ class LayoutToTextConverter:
                           ', '.join([f"{color['hex']} ({color['percentage']}%)" for color in primary_colors[:3]])
         }
     
+    def _describe_layout(self, layout: Dict[str, Any]) -> Dict[str, Any]:
+        if not layout:
+            return {'description': 'No layout structure available'}
+        
+        columns = layout.get('columns', [])
+        rows = layout.get('rows', [])
+        sidebars = layout.get('sidebars', [])
+        grid = layout.get('grid')
+        
+        parts = [f"The content is arranged in {len(columns)} column{'s' if len(columns) != 1 else ''}"]
+        gutters = layout.get('gutters', [])
+        if gutters:
+            parts.append(f" separated by {len(gutters)} gutter{'s' if len(gutters) != 1 else ''}")
+        parts.append(f" and {len(rows)} row{'s' if len(rows) != 1 else ''}")
+        if sidebars:
+            parts.append(" with a " + " and a ".join(f"{sidebar['side']} sidebar" for sidebar in sidebars))
+        description = ''.join(parts) + '.'
+        if grid:
+            description += f" Elements form a grid of {grid['columns']} columns by {grid['rows']} rows."
+        
+        return {
+            'columns': len(columns),
+            'rows': len(rows),
+            'sidebars': [sidebar['side'] for sidebar in sidebars],
+            'grid': grid,
+            'description': description
+        }
+    
+    def _describe_contrast(self, contrast: Dict[str, Any]) -> Dict[str, Any]:
+        checked = contrast.get('checked', 0)
+        failing = contrast.get('failing', [])
+        
+        if not checked:
+            description = 'No text contrast could be measured'
+        elif not failing:
+            description = f"All {checked} text blocks meet the WCAG AA contrast minimum"
+        else:
+            description = (f"{len(failing)} of {checked} text blocks fall below the WCAG AA contrast minimum "
+                           f"(lowest ratio {failing[0]['contrast_ratio']}:1)")
+        
+        return {
+            'checked': checked,
+            'failing': failing,
+            'min_contrast_ratio': contrast.get('min_contrast_ratio'),
+            'description': description
+        }
+    
     def _describe_ui_elements(self, 
                              ui_elements: List[Dict[str, Any]], 
                              text_blocks: List[Dict[str, Any]], 
-                             image_dimensions: Dict[str, int]) -> List[Dict[str, Any]]:
+                             image_dimensions: Dict[str, int],
+                             ordered: bool = False) -> List[Dict[str, Any]]:
         
         if not ui_elements:
             return [{'type': 'unknown', 'description': 'No UI elements detected'}]
@@ -69,72 +205,146 @@ class LayoutToTextConverter:
         width, height = image_dimensions.get('width', 0), image_dimensions.get('height', 0)
         described_elements = []
         
-        for element in ui_elements:
-            element_type = element.get('type', 'unknown')
-            bbox = element.get('bounding_box', [])
-            
-            # Skip if bounding box is invalid
-            if not bbox or len(bbox) < 4:
-                continue
-            
+        # Convert once to the compact model; elements without a valid bounding box are skipped
+        elements = as_ui_elements(ui_elements)
+        blocks = as_text_block_array(text_blocks)
+        
+        # Assign text to every element in one batched pass
+        element_texts = self._assign_text_to_elements(element_boxes(elements), blocks, ordered=ordered)
+        
+        for element, element_text in zip(elements, element_texts):
             # Calculate relative position
-            left, top = bbox[0]
-            right, bottom = bbox[2]
-            
-            rel_left = left / width if width else 0
-            rel_top = top / height if height else 0
-            rel_right = right / width if width else 0
-            rel_bottom = bottom / height if height else 0
+            rel_left = element.left / width if width else 0
+            rel_top = element.top / height if height else 0
+            rel_right = element.right / width if width else 0
+            rel_bottom = element.bottom / height if height else 0
             
             # Determine position description
             position = self._get_position_description(rel_left, rel_top, rel_right, rel_bottom)
             
-            # Find text within this UI element
-            element_text = self._find_text_in_element(bbox, text_blocks)
-            
             described_elements.append({
-                'type': element_type,
+                'type': element.type,
                 'position': position,
+                'bounding_box': {
+                    'left': element.left,
+                    'top': element.top,
+                    'right': element.right,
+                    'bottom': element.bottom
+                },
                 'size_percentage': {
                     'width': round((rel_right - rel_left) * 100, 1),
                     'height': round((rel_bottom - rel_top) * 100, 1)
                 },
                 'text_content': element_text,
-                'description': self._generate_element_description(element_type, position, element_text)
+                'description': self._generate_element_description(element.type, position, element_text)
             })
         
         return described_elements
     
+    def _build_element_tree(self, described_elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Nest the described elements by containment.
+        
+        Returns:
+            Top-level nodes as {'element': index into ui_elements, 'children': [...]};
+            elements without a bounding box are listed as top-level leaves
+        """
+        with_box = [index for index, element in enumerate(described_elements) if 'bounding_box' in element]
+        boxes = np.array([
+            [described_elements[index]['bounding_box'][key] for key in ('left', 'top', 'right', 'bottom')]
+            for index in with_box
+        ], dtype=np.int64).reshape(-1, 4)
+        
+        # The builder numbers elements by position in `boxes`; map back to ui_elements
+        def renumber(node):
+            renumbered = {'element': with_box[node['element']]}
+            if 'children' in node:
+                renumbered['children'] = [renumber(child) for child in node['children']]
+            return renumbered
+        
+        tree = [renumber(node) for node in self.tree_builder.build(boxes)]
+        tree.extend({'element': index} for index, element in enumerate(described_elements)
+                    if 'bounding_box' not in element)
+        return tree
+    
     def _find_text_in_element(self, 
-                             element_bbox: List[tuple], 
-                             text_blocks: List[Dict[str, Any]]) -> str:
-        
-        if not element_bbox or not text_blocks:
+                             element_bbox: Union[Box, List[tuple]], 
+                             text_blocks: Union[TextBlockArray, List[Dict[str, Any]]]) -> str:
+        """
+        Join the text of the blocks that lie inside a single element.
+        
+        Args:
+            element_bbox: Element box as (left, top, right, bottom) or as corner points
+            text_blocks: Text blocks as a TextBlockArray or in the dict format
+        
+        Returns:
+            The contained text in reading order, separated by spaces
+        """
+        if element_bbox is None or len(element_bbox) < 4:
             return ""
         
         # Extract element coordinates
-        e_left, e_top = element_bbox[0]
-        e_right, e_bottom = element_bbox[2]
-        
-        contained_text = []
+        if isinstance(element_bbox[0], (int, np.integer)):
+            box = tuple(element_bbox[:4])
+        else:
+            box = box_from_polygon(element_bbox)
         
-        for block in text_blocks:
-            text = block.get('text', '')
-            block_bbox = block.get('bounding_box', [])
-            
-            if not block_bbox or len(block_bbox) < 4:
-                continue
+        return self._assign_text_to_elements(np.array([box], dtype=np.int32), as_text_block_array(text_blocks))[0]
+    
+    def _assign_text_to_elements(self,
+                                 element_boxes: np.ndarray,
+                                 blocks: TextBlockArray,
+                                 ordered: bool = False) -> List[str]:
+        """
+        Assign text blocks to elements for all elements at once.
+        
+        Containment and overlap are computed as element × text block matrices by
+        broadcasting the box arrays. Elements are processed in chunks so that at most
+        `max_matrix_cells` cells are materialized at a time.
+        
+        Args:
+            element_boxes: N×4 array of element boxes (left, top, right, bottom)
+            blocks: Text blocks of the page
+            ordered: Whether the blocks are already in reading order
+        
+        Returns:
+            For each element, the text of its blocks joined in reading order
+        """
+        if not len(element_boxes):
+            return []
+        if not len(blocks):
+            return [""] * len(element_boxes)
+        
+        # Put the text columns in reading order so matches come out already ordered
+        order = np.arange(len(blocks)) if ordered else self.text_grouper.reading_order(blocks.boxes)
+        text_boxes = blocks.boxes[order].astype(np.int64)
+        texts = [blocks.texts[index] for index in order]
+        
+        t_left, t_top, t_right, t_bottom = (text_boxes[:, i][np.newaxis, :] for i in range(4))
+        text_area = (t_right - t_left) * (t_bottom - t_top)
+        
+        chunk_size = max(1, self.max_matrix_cells // len(text_boxes))
+        element_texts = []
+        
+        for start in range(0, len(element_boxes), chunk_size):
+            chunk = element_boxes[start:start + chunk_size].astype(np.int64)
+            e_left, e_top, e_right, e_bottom = (chunk[:, i][:, np.newaxis] for i in range(4))
             
-            # Extract text block coordinates
-            t_left, t_top = block_bbox[0]
-            t_right, t_bottom = block_bbox[2]
+            # Text blocks completely inside the element
+            assigned = ((t_left >= e_left) & (t_right <= e_right) &
+                        (t_top >= e_top) & (t_bottom <= e_bottom))
             
-            # Check if text block is mostly inside the element
-            if (e_left <= t_left and t_right <= e_right and 
-                e_top <= t_top and t_bottom <= e_bottom):
-                contained_text.append(text)
+            # Text blocks mostly inside the element: intersection over the text block's area
+            if self.min_text_overlap < 1.0:
+                overlap_x = np.clip(np.minimum(t_right, e_right) - np.maximum(t_left, e_left), 0, None)
+                overlap_y = np.clip(np.minimum(t_bottom, e_bottom) - np.maximum(t_top, e_top), 0, None)
+                intersection = overlap_x * overlap_y
+                assigned |= (text_area > 0) & (intersection >= self.min_text_overlap * text_area)
             
-        return " ".join(contained_text)
+            for row in assigned:
+                element_texts.append(" ".join(texts[index] for index in np.flatnonzero(row)))
+        
+        return element_texts
     
     def _get_position_description(self, 
                                  rel_left: float, 
@@ -224,6 +434,9 @@ class LayoutToTextConverter:
         lines.append(f"# {page_title}")
         lines.append("")
         lines.append(f"This webpage uses a {layout_pattern} design.")
+        layout = structured_description.get('layout', {})
+        if 'columns' in layout:
+            lines.append(layout['description'])
         lines.append("")
         
         # Color palette
@@ -235,22 +448,69 @@ class LayoutToTextConverter:
         # UI Elements
         lines.append("## UI Elements")
         
-        # Group elements by type
+        # Element counts by type, then the element hierarchy
         element_types = {}
         for element in ui_elements:
             elem_type = element.get('type', 'unknown')
-            if elem_type not in element_types:
-                element_types[elem_type] = []
-            element_types[elem_type].append(element)
+            element_types[elem_type] = element_types.get(elem_type, 0) + 1
+        lines.append("The page contains " + ", ".join(
+            f"{count} {elem_type.replace('_', ' ')}" for elem_type, count in element_types.items()) + ".")
+        lines.append("")
         
-        # Describe each type of element
-        for elem_type, elements in element_types.items():
-            lines.append(f"### {elem_type.replace('_', ' ').title()} ({len(elements)})")
-            
-            for i, element in enumerate(elements):
-                desc = element.get('description', '')
-                lines.append(f"- {desc}")
-            
+        element_tree = structured_description.get('element_tree')
+        if element_tree is None:
+            element_tree = [{'element': index} for index in range(len(ui_elements))]
+        self._append_element_tree(lines, element_tree, ui_elements, depth=0)
+        lines.append("")
+        
+        # Measured text contrast
+        contrast = structured_description.get('accessibility', {}).get('contrast')
+        if contrast is not None:
+            lines.append("## Accessibility")
+            lines.append(contrast['description'] + ".")
+            for finding in contrast['failing'][:self.max_contrast_findings]:
+                box = finding['bounding_box']
+                lines.append(f"- \"{finding['text']}\" at ({box['left']}, {box['top']}): "
+                             f"{finding['contrast_ratio']}:1, needs {finding['required_ratio']}:1 "
+                             f"({finding['foreground']} on {finding['background']})")
+            if len(contrast['failing']) > self.max_contrast_findings:
+                lines.append(f"- and {len(contrast['failing']) - self.max_contrast_findings} more")
             lines.append("")
         
-        return "\n".join(lines)
\ No newline at end of file
+        return "\n".join(lines)
+    
+    def _append_element_tree(self,
+                             lines: List[str],
+                             nodes: List[Dict[str, Any]],
+                             ui_elements: List[Dict[str, Any]],
+                             depth: int) -> None:
+        """Append nested element descriptions, listing runs of identical siblings once."""
+        indent = "  " * depth
+        signatures = [self._subtree_signature(node, ui_elements) for node in nodes]
+        
+        start = 0
+        while start < len(nodes):
+            end = start + 1
+            while end < len(nodes) and signatures[end] == signatures[start]:
+                end += 1
+            
+            if end - start >= self.collapse_repeats:
+                # A run of identical siblings is listed once, represented by its first element
+                node = nodes[start]
+                element = ui_elements[node['element']]
+                elem_type = element.get('type', 'unknown').replace('_', ' ')
+                lines.append(f"{indent}- {end - start} similar {elem_type} elements, such as: {element.get('description', '')}")
+                self._append_element_tree(lines, node.get('children', []), ui_elements, depth + 1)
+            else:
+                for node in nodes[start:end]:
+                    lines.append(f"{indent}- {ui_elements[node['element']].get('description', '')}")
+                    self._append_element_tree(lines, node.get('children', []), ui_elements, depth + 1)
+            
+            start = end
+    
+    def _subtree_signature(self, node: Dict[str, Any], ui_elements: List[Dict[str, Any]]) -> tuple:
+        """Element types of a subtree, used to recognize repeated siblings."""
+        return (
+            ui_elements[node['element']].get('type', 'unknown'),
+            tuple(self._subtree_signature(child, ui_elements) for child in node.get('children', []))
+        )
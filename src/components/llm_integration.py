@@ -1,9 +1,18 @@
 from typing import Dict, Any, Optional
 import anthropic
 
+from .service_recorder import ServiceRecorder, RecordedAnthropicClient
+
 class LLMIntegration:
-    def __init__(self, api_key: str):
-        self.client = anthropic.Client(api_key=api_key)
+    def __init__(self, api_key: str, recorder: Optional[ServiceRecorder] = None):
+        """
+        Args:
+            api_key: Anthropic API key
+            recorder: Records the Claude responses, or replays them without
+                contacting the API
+        """
+        make_client = lambda: anthropic.Client(api_key=api_key)
+        self.client = make_client() if recorder is None else RecordedAnthropicClient(make_client, recorder)
     
     def analyze_webpage_description(self, 
                                   textual_description: str, 
@@ -66,9 +75,9 @@ class LLMIntegration:
 3. Suggestions for improvement based on UX best practices
 4. Assessment of information hierarchy and content organization""",
             
-            "accessibility": """Analyze this textual description of a webpage from an accessibility perspective and provide:
-1. Potential accessibility concerns based on the description
-2. Suggestions for improving accessibility
+            "accessibility": """Analyze this textual description of a webpage from an accessibility perspective. Text contrast has already been measured from the screenshot: treat the ratios in the Accessibility section as facts rather than estimating contrast from colors. Provide:
+1. Accessibility concerns based on the structure, content and measured contrast
+2. Specific fixes for the low-contrast text listed, if any
 3. Areas that should be prioritized for a detailed accessibility audit
 4. WCAG guidelines that might be relevant to consider""",
             
@@ -0,0 +1,160 @@
+from typing import Dict, Any, List, Iterable, Iterator, Sequence, Tuple, Union
+import numpy as np
+
+# Axis-aligned box as (left, top, right, bottom) in pixels
+Box = Tuple[int, int, int, int]
+
+def box_from_polygon(vertices: Sequence[Sequence[float]]) -> Box:
+    """
+    Convert a bounding polygon in the dict format to an axis-aligned box.
+
+    Args:
+        vertices: Corner points as (x, y) pairs, as found under 'bounding_box'
+
+    Returns:
+        (left, top, right, bottom) enclosing every vertex
+    """
+    xs = [int(vertex[0] or 0) for vertex in vertices]
+    ys = [int(vertex[1] or 0) for vertex in vertices]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def polygon_from_box(box: Sequence[int]) -> List[Tuple[int, int]]:
+    """Convert a (left, top, right, bottom) box to the four corners used in dicts."""
+    left, top, right, bottom = (int(value) for value in box)
+    return [(left, top), (right, top), (right, bottom), (left, bottom)]
+
+def _has_polygon(item: Dict[str, Any]) -> bool:
+    bbox = item.get('bounding_box')
+    return bool(bbox) and len(bbox) >= 4
+
+class UIElement:
+    """A detected UI element with an axis-aligned bounding box."""
+
+    __slots__ = ('type', 'left', 'top', 'right', 'bottom', 'confidence')
+
+    def __init__(self,
+                 type: str,
+                 left: int,
+                 top: int,
+                 right: int,
+                 bottom: int,
+                 confidence: float = None):
+        self.type = type
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.confidence = confidence
+
+    @property
+    def box(self) -> Box:
+        return (self.left, self.top, self.right, self.bottom)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'UIElement':
+        left, top, right, bottom = box_from_polygon(data['bounding_box'])
+        return cls(data.get('type', 'unknown'), left, top, right, bottom, data.get('confidence'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'type': self.type,
+            'bounding_box': polygon_from_box(self.box)
+        }
+        if self.confidence is not None:
+            data['confidence'] = self.confidence
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, UIElement):
+            return NotImplemented
+        return (self.type, self.box, self.confidence) == (other.type, other.box, other.confidence)
+
+    def __repr__(self) -> str:
+        return f"UIElement({self.type!r}, {self.left}, {self.top}, {self.right}, {self.bottom})"
+
+class TextBlock:
+    """A single OCR text block with an axis-aligned bounding box."""
+
+    __slots__ = ('text', 'left', 'top', 'right', 'bottom')
+
+    def __init__(self, text: str, left: int, top: int, right: int, bottom: int):
+        self.text = text
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+    @property
+    def box(self) -> Box:
+        return (self.left, self.top, self.right, self.bottom)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'text': self.text, 'bounding_box': polygon_from_box(self.box)}
+
+    def __repr__(self) -> str:
+        return f"TextBlock({self.text!r}, {self.left}, {self.top}, {self.right}, {self.bottom})"
+
+class TextBlockArray:
+    """
+    Struct-of-arrays storage for the text blocks of a page.
+
+    Texts are kept in a list and boxes in one N×4 int32 array of (left, top, right,
+    bottom), so pages with tens of thousands of OCR words cost one small array
+    instead of a dict and a list of tuples per word, and geometry can be computed
+    for all blocks at once.
+    """
+
+    __slots__ = ('texts', 'boxes')
+
+    def __init__(self, texts: List[str] = None, boxes: np.ndarray = None):
+        self.texts = list(texts or [])
+        if boxes is None:
+            boxes = np.empty((0, 4), dtype=np.int32)
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+
+        if len(self.texts) != len(self.boxes):
+            raise ValueError(f"Got {len(self.texts)} texts for {len(self.boxes)} boxes")
+
+    @classmethod
+    def from_dicts(cls, blocks: Iterable[Dict[str, Any]]) -> 'TextBlockArray':
+        """Build the array from text blocks in the dict format, skipping blocks without a box."""
+        texts = []
+        boxes = []
+        for block in blocks:
+            if not _has_polygon(block):
+                continue
+            texts.append(block.get('text', ''))
+            boxes.append(box_from_polygon(block['bounding_box']))
+        return cls(texts, np.array(boxes, dtype=np.int32).reshape(-1, 4))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [block.to_dict() for block in self]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, index: int) -> TextBlock:
+        left, top, right, bottom = (int(value) for value in self.boxes[index])
+        return TextBlock(self.texts[index], left, top, right, bottom)
+
+    def __iter__(self) -> Iterator[TextBlock]:
+        for index in range(len(self)):
+            yield self[index]
+
+def as_ui_elements(elements: Iterable[Union[UIElement, Dict[str, Any]]]) -> List[UIElement]:
+    """Convert UI elements in the dict format to UIElement, skipping those without a box."""
+    return [
+        element if isinstance(element, UIElement) else UIElement.from_dict(element)
+        for element in elements
+        if isinstance(element, UIElement) or _has_polygon(element)
+    ]
+
+def as_text_block_array(blocks: Union[TextBlockArray, Iterable[Dict[str, Any]]]) -> TextBlockArray:
+    """Return text blocks as a TextBlockArray, converting from the dict format if needed."""
+    if isinstance(blocks, TextBlockArray):
+        return blocks
+    return TextBlockArray.from_dicts(blocks or [])
+
+def element_boxes(elements: Sequence[UIElement]) -> np.ndarray:
+    """Stack the boxes of UI elements into an N×4 int32 array."""
+    return np.array([element.box for element in elements], dtype=np.int32).reshape(-1, 4)
@@ -1,11 +1,38 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, Union
 from google.cloud import vision
+from PIL import Image
 import io
+import os
+import tempfile
+
+from .pixel_buffer import SharedPixelBuffer
+from .text_grouping import TextGrouper
+from .service_recorder import ServiceRecorder, RecordedVisionClient
 
 class OCRExtractor:
-    def __init__(self, credentials_path: str = None):
-        self.client = vision.ImageAnnotatorClient.from_service_account_json(
+    def __init__(self,
+                 credentials_path: str = None,
+                 text_grouper: TextGrouper = None,
+                 languages: List[str] = None,
+                 features: List[str] = None,
+                 recorder: ServiceRecorder = None):
+        """
+        Args:
+            credentials_path: Google Cloud service account key file
+            text_grouper: Groups the words into lines, paragraphs and columns
+            languages: Language hints (ISO 639-1 codes) for the OCR
+            features: Vision features to request; DOCUMENT_TEXT_DETECTION, when
+                listed, takes precedence over TEXT_DETECTION (the default), as it
+                returns the same word annotations tuned for dense text
+            recorder: Records the Vision responses, or replays them without
+                contacting the service
+        """
+        make_client = lambda: vision.ImageAnnotatorClient.from_service_account_json(
             credentials_path) if credentials_path else vision.ImageAnnotatorClient()
+        self.client = make_client() if recorder is None else RecordedVisionClient(make_client, recorder)
+        self.text_grouper = text_grouper or TextGrouper()
+        self.languages = list(languages or [])
+        self.features = list(features or ['TEXT_DETECTION'])
     
     def extract_text(self, image_path: str) -> Dict[str, Any]:
         with io.open(image_path, 'rb') as image_file:
@@ -13,7 +40,11 @@ class OCRExtractor:
         
         image = vision.Image(content=content)
         
-        response = self.client.text_detection(image=image)
+        kwargs = {'image_context': {'language_hints': self.languages}} if self.languages else {}
+        if 'DOCUMENT_TEXT_DETECTION' in self.features:
+            response = self.client.document_text_detection(image=image, **kwargs)
+        else:
+            response = self.client.text_detection(image=image, **kwargs)
         
         if response.error.message:
             raise Exception(f"Error in OCR text extraction: {response.error.message}")
@@ -32,10 +63,72 @@ class OCRExtractor:
                 'bounding_box': vertices
             })
         
-        return {
+        return self._build_results(full_text, text_blocks)
+    
+    def merge_tile_results(self, tile_results: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Merge OCR results of individual tiles into page coordinates.
+        
+        Args:
+            tile_results: (tile, ocr_result) pairs, where each tile has a 'top' offset
+        
+        Returns:
+            OCR results in the same format as extract_text, for the whole page
+        """
+        full_text = []
+        text_blocks = []
+        
+        for tile, result in sorted(tile_results, key=lambda pair: pair[0]['top']):
+            offset = tile['top']
+            if result.get('full_text'):
+                full_text.append(result['full_text'])
+            for block in result.get('text_blocks', []):
+                text_blocks.append({
+                    'text': block['text'],
+                    'bounding_box': [(x, y + offset) for x, y in block['bounding_box']]
+                })
+        
+        return self._build_results('\n'.join(full_text), text_blocks)
+    
+    def extract_text_regions(self,
+                             image: Union[str, SharedPixelBuffer],
+                             regions: List[Tuple[int, int]]) -> Dict[str, Any]:
+        """
+        Extract text from horizontal regions of an image only.
+        
+        Args:
+            image: Path to the image, or a shared pixel buffer already holding it
+            regions: (top, bottom) pixel ranges to run OCR on
+        
+        Returns:
+            OCR results for the regions, in the coordinates of the full image
+        """
+        img = image if isinstance(image, SharedPixelBuffer) else Image.open(image)
+        
+        tile_results = []
+        try:
+            for top, bottom in regions:
+                fd, region_path = tempfile.mkstemp(suffix='.png')
+                os.close(fd)
+                try:
+                    img.crop((0, top, img.width, bottom)).save(region_path)
+                    tile_results.append(({'top': top}, self.extract_text(region_path)))
+                finally:
+                    os.remove(region_path)
+        finally:
+            if img is not image:
+                img.close()
+        
+        return self.merge_tile_results(tile_results)
+    
+    def _build_results(self, full_text: str, text_blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Word-level blocks plus their lines, paragraphs and columns in reading order
+        results = {
             'full_text': full_text,
             'text_blocks': text_blocks
         }
+        results.update(self.text_grouper.group(text_blocks))
+        return results
     
     def detect_labels(self, image_path: str) -> List[str]:
         with io.open(image_path, 'rb') as image_file:
@@ -1,15 +1,41 @@
 import os
-import json
-from typing import Dict, Any
+import uuid
+import threading
+from typing import Dict, Any, Optional
 from datetime import datetime
 
+from .results_store import ResultsStore
+from .output_writer import OutputWriter
+from .serialization import dumps_json_bytes
+
 class OutputHandler:
-    def __init__(self, output_dir: str = None):
+    def __init__(self,
+                 output_dir: str = None,
+                 results_store: Optional[ResultsStore] = None,
+                 write_files: bool = True,
+                 columnar_exporter=None,
+                 writer: Optional[OutputWriter] = None,
+                 pretty_json: bool = False):
         if output_dir is None:
             output_dir = os.path.join(os.getcwd(), 'output')
         
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
+        
+        # Optional indexed store; a run is started on the first saved page
+        self.results_store = results_store
+        self.write_files = write_files
+        self.run_id = None
+        
+        # Optional ColumnarExporter for element-level analytics
+        self.columnar_exporter = columnar_exporter
+        
+        # Files are written synchronously unless an AsyncOutputWriter is given
+        self.writer = writer if writer is not None else OutputWriter()
+        self.pretty_json = pretty_json
+        
+        # Pages processed at the same time save through one handler
+        self._lock = threading.Lock()
     
     def save_results(self, 
                     results: Dict[str, Any], 
@@ -26,17 +52,36 @@ class OutputHandler:
         Returns:
             Dictionary of file paths for each saved file
         """
+        with self._lock:
+            return self._save_results(results, url, include_timestamp)
+    
+    def _save_results(self, results: Dict[str, Any], url: str, include_timestamp: bool) -> Dict[str, str]:
+        saved_files = {}
+        
+        if self.run_id is None:
+            self.run_id = self.results_store.start_run() if self.results_store is not None else uuid.uuid4().hex
+        
+        if self.results_store is not None:
+            self.results_store.save_page(self.run_id, url, results)
+            saved_files['results_store'] = f"{getattr(self.results_store, 'db_path', 'store')} (run {self.run_id})"
+        
+        if self.columnar_exporter is not None:
+            self.columnar_exporter.add_page(self.run_id, url, results)
+            saved_files['columnar_export'] = self.columnar_exporter.export_dir
+        
+        if not self.write_files:
+            return saved_files
+        
         # Create a safe filename from the URL
         safe_name = self._url_to_safe_filename(url)
         
         if include_timestamp:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Microseconds keep names unique when runs of the same URL overlap
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
             base_filename = f"{safe_name}_{timestamp}"
         else:
             base_filename = safe_name
         
-        saved_files = {}
-        
         # Extract components to save
         textual_description = results.get('textual_description', '')
         structured_description = results.get('structured_description', {})
@@ -45,33 +90,45 @@ class OutputHandler:
         # Save textual description
         if textual_description:
             text_path = os.path.join(self.output_dir, f"{base_filename}.md")
-            with open(text_path, 'w') as f:
-                f.write(textual_description)
-            saved_files['textual_description'] = text_path
+            saved_files['textual_description'] = self.writer.write(text_path, textual_description)
         
-        # Save structured description as JSON
+        # Save structured description as JSON (compact unless pretty_json is set)
         if structured_description:
             json_path = os.path.join(self.output_dir, f"{base_filename}.json")
-            with open(json_path, 'w') as f:
-                json.dump(structured_description, f, indent=2)
-            saved_files['structured_description'] = json_path
+            json_bytes = dumps_json_bytes(structured_description, pretty=self.pretty_json)
+            saved_files['structured_description'] = self.writer.write(json_path, json_bytes)
         
         # Save LLM analysis if available
         if llm_analysis:
             analysis_path = os.path.join(self.output_dir, f"{base_filename}_analysis.md")
-            with open(analysis_path, 'w') as f:
-                f.write(f"# Analysis of {url}\n\n")
-                
-                analysis_type = llm_analysis.get('analysis_type', 'general')
-                f.write(f"## {analysis_type.capitalize()} Analysis\n\n")
-                
-                response = llm_analysis.get('response', '')
-                f.write(response)
-            
-            saved_files['llm_analysis'] = analysis_path
+            analysis_type = llm_analysis.get('analysis_type', 'general')
+            response = llm_analysis.get('response', '')
+            content = (f"# Analysis of {url}\n\n"
+                       f"## {analysis_type.capitalize()} Analysis\n\n"
+                       f"{response}")
+            saved_files['llm_analysis'] = self.writer.write(analysis_path, content)
         
         return saved_files
     
+    def close(self, status: str = 'completed') -> None:
+        """
+        Finish the current run and flush any buffered results.
+        
+        The run is finished in the results store even when writing the files or
+        the export fails; the first error is raised afterwards.
+        """
+        try:
+            self.writer.close()
+        finally:
+            try:
+                if self.columnar_exporter is not None:
+                    self.columnar_exporter.close()
+            finally:
+                if self.results_store is not None:
+                    if self.run_id is not None:
+                        self.results_store.finish_run(self.run_id, status)
+                    self.results_store.close()
+    
     def display_results(self, results: Dict[str, Any]) -> None:
         """
         Display the results to stdout.
@@ -0,0 +1,168 @@
+import os
+import gzip
+import queue
+import threading
+from typing import List, Tuple, Union, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# File suffix added for each compression method
+COMPRESSION_SUFFIXES = {
+    None: '',
+    'gzip': '.gz',
+    'zstd': '.zst'
+}
+
+class OutputWriter:
+    """Writes output files, optionally compressed, on the calling thread."""
+
+    def __init__(self, compression: Optional[str] = None, fsync: bool = False, compression_level: int = 3):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError("zstandard is required for zstd compression (pip install zstandard)")
+
+        self.compression = compression
+        self.compression_level = compression_level
+        self.fsync = fsync
+
+    def target_path(self, path: str) -> str:
+        """Return the path a file will actually be written to."""
+        return path + COMPRESSION_SUFFIXES[self.compression]
+
+    def write(self, path: str, data: Union[str, bytes]) -> str:
+        """
+        Write a file.
+
+        Args:
+            path: Destination path, without the compression suffix
+            data: File contents
+
+        Returns:
+            The path written to
+        """
+        target = self.target_path(path)
+        self._write_batch([(target, data)])
+        return target
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def _encode(self, data: Union[str, bytes]) -> bytes:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        if self.compression == 'gzip':
+            return gzip.compress(data, compresslevel=self.compression_level)
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+        return data
+
+    def _write_batch(self, batch: List[Tuple[str, Union[str, bytes]]]) -> None:
+        """Write a batch of files and, if enabled, sync them to disk together."""
+        handles = []
+        try:
+            for target, data in batch:
+                f = open(target, 'wb')
+                handles.append(f)
+                f.write(self._encode(data))
+                f.flush()
+
+            if self.fsync:
+                for f in handles:
+                    os.fsync(f.fileno())
+        finally:
+            for f in handles:
+                f.close()
+
+        if self.fsync:
+            # Make the new directory entries durable as well, once per directory
+            for directory in {os.path.dirname(os.path.abspath(target)) for target, _ in batch}:
+                fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+class AsyncOutputWriter(OutputWriter):
+    """
+    Writes output files on a background thread.
+
+    Writes are queued and picked up in batches; each batch is synced to disk in one
+    pass when fsync is enabled. Callers only block when the bounded queue is full,
+    or when they call flush()/close() to wait for pending writes. Errors raised by
+    the background thread are re-raised by the next flush().
+    """
+
+    def __init__(self,
+                compression: Optional[str] = None,
+                fsync: bool = False,
+                compression_level: int = 3,
+                max_queue_size: int = 64,
+                batch_size: int = 16):
+        super().__init__(compression=compression, fsync=fsync, compression_level=compression_level)
+
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._errors = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='output-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, path: str, data: Union[str, bytes]) -> str:
+        if self._closed:
+            raise RuntimeError("Output writer is closed")
+
+        target = self.target_path(path)
+        self._queue.put((target, data))
+        return target
+
+    def flush(self) -> None:
+        """Block until every queued write is on disk."""
+        self._queue.join()
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise IOError(f"Failed to write {len(errors)} output file(s): {errors[0]}")
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item] if item is not None else []
+            stop = item is None
+
+            # Gather whatever else is already waiting, up to the batch size
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            try:
+                if batch:
+                    self._write_batch(batch)
+            except Exception as e:
+                self._errors.append(e)
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+
+            if stop:
+                return
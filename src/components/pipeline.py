@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+from .serialization import dumps_json_bytes
+
+class Stage:
+    """
+    One step of a pipeline: a function from named input artifacts to named outputs.
+
+    The function is called with a dictionary holding the declared inputs and must
+    return a dictionary holding the declared outputs.
+    """
+
+    def __init__(self,
+                 name: str,
+                 run: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 inputs: Iterable[str] = (),
+                 outputs: Iterable[str] = (),
+                 config: Optional[Dict[str, Any]] = None,
+                 enabled: bool = True,
+                 cache: bool = False,
+                 max_age: Optional[float] = None,
+                 file_outputs: Iterable[str] = (),
+                 main_thread: bool = False,
+                 version: str = '1',
+                 key_inputs: Optional[Iterable[str]] = None):
+        """
+        Args:
+            name: Unique name of the stage
+            run: The stage function
+            inputs: Artifacts the stage reads
+            outputs: Artifacts the stage produces
+            config: Settings of the stage; part of its cache key
+            enabled: A disabled stage is not run and produces None for every output
+            cache: Keep the outputs on disk and reuse them while the cache key (stage,
+                version, config and input digests) is unchanged
+            max_age: Seconds after which cached outputs are recomputed (None to keep
+                them indefinitely)
+            file_outputs: Outputs holding file paths; they are digested by the file
+                contents, and cached outputs whose files are gone are recomputed
+            main_thread: Run on the thread that runs the pipeline instead of the pool
+            version: Bump to invalidate cached outputs after changing the stage
+            key_inputs: Inputs whose digests make up the cache key (defaults to all
+                of them); leave out inputs the outputs only depend on through the others
+        """
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.config = dict(config or {})
+        self.enabled = enabled
+        self.cache = cache
+        self.max_age = max_age
+        self.file_outputs = set(file_outputs)
+        self.main_thread = main_thread
+        self.version = version
+        self.key_inputs = list(self.inputs if key_inputs is None else key_inputs)
+        if not set(self.key_inputs) <= set(self.inputs):
+            raise ValueError(f"Cache key of stage '{name}' uses artifacts it does not read")
+
+class StageCache:
+    """Stage outputs on disk, one JSON file per stage and cache key."""
+
+    def __init__(self, cache_dir: str = None):
+        if cache_dir is None:
+            cache_dir = os.path.join(os.getcwd(), '.cache', 'pipeline')
+
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def load(self, stage: str, key: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached outputs of a stage, or None when missing or older than max_age."""
+        path = self._path(stage, key)
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                return None
+            with open(path, 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def save(self, stage: str, key: str, outputs: Dict[str, Any]) -> None:
+        """Store the outputs of a stage atomically."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dumps_json_bytes(outputs))
+            os.replace(tmp_path, self._path(stage, key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{stage}-{key}.json')
+
+class Pipeline:
+    """
+    Runs stages as a directed acyclic graph of their inputs and outputs.
+
+    A stage starts as soon as every stage producing one of its inputs is done, so
+    stages that do not depend on each other run at the same time on a thread pool.
+    Each artifact gets a digest: the SHA-256 of its JSON encoding, or of the file
+    contents for file outputs. The cache key of a stage combines its name,
+    version, config and the digests of its inputs, so a cached stage is skipped
+    exactly when nothing it reads has changed, and a change anywhere only re-runs
+    the stages downstream of it whose inputs actually differ. Cached outputs are
+    written as each stage finishes, so a run that fails part-way resumes from the
+    last completed stages.
+    """
+
+    def __init__(self, stages: List[Stage], cache: Optional[StageCache] = None, parallelism: int = 4):
+        """
+        Args:
+            stages: The stages; their order only breaks ties between ready stages
+            cache: Where cacheable stages keep their outputs (None disables caching)
+            parallelism: Maximum number of stages running at the same time
+        """
+        if parallelism < 1:
+            raise ValueError("A pipeline needs to run at least one stage at a time")
+
+        self.stages = list(stages)
+        self.cache = cache
+        self.parallelism = parallelism
+
+        names = [stage.name for stage in self.stages]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate stage names: {', '.join(duplicates)}")
+
+        self._producers = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                if output in self._producers:
+                    raise ValueError(f"Artifact '{output}' is produced by both "
+                                     f"'{self._producers[output]}' and '{stage.name}'")
+                self._producers[output] = stage.name
+
+        self._dependencies = {
+            stage.name: {self._producers[name] for name in stage.inputs if name in self._producers}
+            for stage in self.stages
+        }
+        self._check_acyclic()
+
+    def run(self,
+            inputs: Dict[str, Any],
+            rerun: Iterable[str] = (),
+            on_stage: Optional[Callable[[str, str, Dict[str, str]], None]] = None) -> Dict[str, Any]:
+        """
+        Run the pipeline.
+
+        Args:
+            inputs: Artifacts that no stage produces (such as the URL)
+            rerun: Names of stages to recompute even when their cached outputs are valid
+            on_stage: Called on the thread running the pipeline as each stage ends, with
+                its name, status ('ran', 'cached', 'disabled' or 'failed') and the
+                digests of its outputs (empty when it failed)
+
+        Returns:
+            Dictionary with every 'artifacts' value and the 'stages' status of each
+            stage: 'ran', 'cached' or 'disabled'
+        """
+        rerun = set(rerun)
+        unknown = rerun - {stage.name for stage in self.stages}
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+        for stage in self.stages:
+            missing = [name for name in stage.inputs if name not in self._producers and name not in inputs]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs inputs nobody provides: {', '.join(missing)}")
+
+        artifacts = dict(inputs)
+        digests = {name: self._digest(value) for name, value in inputs.items()}
+        statuses = {}
+
+        def done(stage: Stage, status: str) -> None:
+            statuses[stage.name] = status
+            if on_stage is not None:
+                on_stage(stage.name, status, {name: digests[name] for name in stage.outputs} if status != 'failed' else {})
+        pending = list(self.stages)
+        running = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.parallelism)
+        try:
+            while pending or running:
+                ready = [stage for stage in pending if self._dependencies[stage.name] <= statuses.keys()]
+                for stage in ready:
+                    pending.remove(stage)
+                    if not stage.enabled:
+                        self._store(stage, {name: None for name in stage.outputs}, artifacts, digests)
+                        done(stage, 'disabled')
+                        continue
+
+                    stage_inputs = {name: artifacts[name] for name in stage.inputs}
+                    key = self._key(stage, digests)
+                    cached = None
+                    if self.cache is not None and stage.cache and stage.name not in rerun:
+                        cached = self._load(stage, key)
+                    if cached is not None:
+                        self._store(stage, cached, artifacts, digests)
+                        done(stage, 'cached')
+                    elif stage.main_thread:
+                        try:
+                            self._finish(stage, key, stage.run(stage_inputs), artifacts, digests)
+                        except Exception:
+                            done(stage, 'failed')
+                            raise
+                        done(stage, 'ran')
+                    else:
+                        running[executor.submit(stage.run, stage_inputs)] = (stage, key)
+
+                if ready or not running:
+                    # Finishing a stage inline or from the cache may have made others ready
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, key = running.pop(future)
+                    try:
+                        self._finish(stage, key, future.result(), artifacts, digests)
+                    except Exception:
+                        done(stage, 'failed')
+                        raise
+                    done(stage, 'ran')
+        finally:
+            # A failed stage leaves the others to finish; their outputs are still cached
+            executor.shutdown(wait=True)
+
+        return {'artifacts': artifacts, 'stages': statuses}
+
+    def _finish(self,
+                stage: Stage,
+                key: str,
+                outputs: Dict[str, Any],
+                artifacts: Dict[str, Any],
+                digests: Dict[str, str]) -> None:
+        missing = [name for name in stage.outputs if name not in (outputs or {})]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' did not produce: {', '.join(missing)}")
+
+        outputs = {name: outputs[name] for name in stage.outputs}
+        if self.cache is not None and stage.cache:
+            self.cache.save(stage.name, key, outputs)
+        self._store(stage, outputs, artifacts, digests)
+
+    def _store(self, stage: Stage, outputs: Dict[str, Any], artifacts: Dict[str, Any], digests: Dict[str, str]) -> None:
+        for name in stage.outputs:
+            artifacts[name] = outputs[name]
+            digests[name] = self._file_digest(outputs[name]) if name in stage.file_outputs else self._digest(outputs[name])
+
+    def _load(self, stage: Stage, key: str) -> Optional[Dict[str, Any]]:
+        cached = self.cache.load(stage.name, key, stage.max_age)
+        if cached is None or any(name not in cached for name in stage.outputs):
+            return None
+        for name in stage.file_outputs:
+            if cached.get(name) is not None and not os.path.exists(cached[name]):
+                return None
+        return cached
+
+    def _key(self, stage: Stage, digests: Dict[str, str]) -> str:
+        key = {
+            'stage': stage.name,
+            'version': stage.version,
+            'config': stage.config,
+            'inputs': {name: digests[name] for name in stage.key_inputs}
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:32]
+
+    def _digest(self, value: Any) -> str:
+        try:
+            # Equal outputs get the same digest whatever order their keys were built in
+            encoded = dumps_json_bytes(value, sort_keys=True)
+        except TypeError:
+            encoded = repr(value).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _file_digest(self, path: Optional[str]) -> str:
+        if path is None:
+            return self._digest(None)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _check_acyclic(self) -> None:
+        remaining = {name: set(dependencies) for name, dependencies in self._dependencies.items()}
+        while remaining:
+            free = [name for name, dependencies in remaining.items() if not dependencies & remaining.keys()]
+            if not free:
+                raise ValueError(f"Stages depend on each other in a cycle: {', '.join(sorted(remaining))}")
+            for name in free:
+                del remaining[name]
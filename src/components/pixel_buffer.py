@@ -0,0 +1,235 @@
+import os
+import uuid
+import tempfile
+import threading
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Any
+import numpy as np
+from PIL import Image
+
+# Rows copied into the buffer at a time, to bound the temporary copies
+COPY_ROWS = 512
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a shared memory block without registering it with the resource tracker.
+
+    A registered block is unlinked by the tracker when the attaching process exits,
+    which would free the pixels under the owner and the other workers.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no `track` argument
+        pass
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+class SharedPixelBuffer:
+    """
+    Raw RGB pixels of a screenshot in memory that other processes can map.
+
+    The screenshot is decoded once into either a `multiprocessing.shared_memory`
+    block ('shm') or a file mapped with `np.memmap` ('memmap'). The small
+    descriptor returned by descriptor() is all a worker needs to attach to the same
+    pixels as a NumPy array, without the image being pickled or copied.
+
+    The creating process owns the buffer and must unlink() it when every worker is
+    done; attached buffers only close() their mapping.
+    """
+
+    BACKENDS = ('shm', 'memmap')
+
+    def __init__(self, array: np.ndarray, backend: str, location: str, owner: bool, handle=None):
+        self.array = array
+        self.backend = backend
+        self.location = location
+        self.owner = owner
+        self._handle = handle
+
+    @classmethod
+    def from_image(cls, image_path: str, backend: str = 'shm', directory: str = None) -> 'SharedPixelBuffer':
+        """
+        Decode an image into a new shared buffer.
+
+        Args:
+            image_path: Path to the screenshot
+            backend: 'shm' for shared memory or 'memmap' for a memory-mapped file
+            directory: Directory of the memory-mapped file (defaults to the temporary
+                directory)
+
+        Returns:
+            The buffer, owned by the caller
+        """
+        if backend not in cls.BACKENDS:
+            raise ValueError(f"Unsupported pixel buffer backend: {backend}")
+
+        with Image.open(image_path) as img:
+            # PNG cannot be decoded a band at a time, so the decoded image and the
+            # buffer are both held until this returns
+            img.load()
+            buffer = cls.allocate(img.width, img.height, backend=backend, directory=directory)
+            try:
+                # Copy in bands so converting to RGB adds no third full-size frame
+                for top in range(0, img.height, COPY_ROWS):
+                    band = img.crop((0, top, img.width, min(top + COPY_ROWS, img.height)))
+                    buffer.array[top:top + band.height] = np.asarray(band.convert('RGB'))
+            except Exception:
+                buffer.close()
+                buffer.unlink()
+                raise
+
+        return buffer
+
+    @classmethod
+    def allocate(cls, width: int, height: int, backend: str = 'shm', directory: str = None) -> 'SharedPixelBuffer':
+        """Allocate an uninitialized height × width × 3 buffer, owned by the caller."""
+        shape = (height, width, 3)
+        size = height * width * 3
+
+        if backend == 'shm':
+            handle = shared_memory.SharedMemory(create=True, size=max(1, size))
+            array = np.ndarray(shape, dtype=np.uint8, buffer=handle.buf)
+            return cls(array, backend, handle.name, owner=True, handle=handle)
+
+        if directory is None:
+            # Not /dev/shm, which is only 64 MB in a default container
+            directory = tempfile.gettempdir()
+        path = os.path.join(directory, f'pixels-{uuid.uuid4().hex}.rgb')
+        array = np.memmap(path, dtype=np.uint8, mode='w+', shape=shape)
+        return cls(array, backend, path, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor: Dict[str, Any]) -> 'SharedPixelBuffer':
+        """
+        Attach to a buffer created by another process.
+
+        Args:
+            descriptor: The result of descriptor() in the owning process
+
+        Returns:
+            A read-only view of the same pixels
+        """
+        shape = tuple(descriptor['shape'])
+        backend = descriptor['backend']
+
+        if backend == 'shm':
+            handle = _attach_shared_memory(descriptor['location'])
+            array = np.ndarray(shape, dtype=np.uint8, buffer=handle.buf)
+            array.flags.writeable = False
+            return cls(array, backend, descriptor['location'], owner=False, handle=handle)
+
+        if backend == 'memmap':
+            array = np.memmap(descriptor['location'], dtype=np.uint8, mode='r', shape=shape)
+            return cls(array, backend, descriptor['location'], owner=False)
+
+        raise ValueError(f"Unsupported pixel buffer backend: {backend}")
+
+    def descriptor(self) -> Dict[str, Any]:
+        """Return the picklable description workers attach with."""
+        return {
+            'backend': self.backend,
+            'location': self.location,
+            'shape': list(self.array.shape)
+        }
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+    def level(self, max_pixels: int) -> np.ndarray:
+        """
+        Return a strided view with at most `max_pixels` pixels, without copying.
+
+        Every 2**k-th row and column is kept, which matches the nearest-neighbour
+        levels of ImagePyramid.
+        """
+        step = 1
+        while (-(-self.height // step)) * (-(-self.width // step)) > max_pixels and step < max(self.height, self.width):
+            step *= 2
+        return self.array[::step, ::step]
+
+    def crop(self, box) -> Image.Image:
+        """Copy a (left, top, right, bottom) region into a PIL image."""
+        left, top, right, bottom = box
+        return Image.fromarray(np.ascontiguousarray(self.array[top:bottom, left:right]))
+
+    def close(self) -> None:
+        """Release this process's mapping of the buffer."""
+        if self.array is None:
+            return
+        # Memory maps are unmapped once the last view of them is collected
+        self.array = None
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except BufferError:
+                # Views handed out by level() are still alive; they keep the mapping
+                pass
+
+    def unlink(self) -> None:
+        """Free the buffer for every process; only the owner may do this."""
+        if not self.owner:
+            raise RuntimeError("Only the process that created a pixel buffer can unlink it")
+
+        if self.backend == 'shm':
+            if self._handle is not None:
+                try:
+                    self._handle.unlink()
+                except FileNotFoundError:
+                    pass
+        elif os.path.exists(self.location):
+            os.remove(self.location)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+class PixelBufferCache:
+    """
+    Decodes each screenshot of a page once into a SharedPixelBuffer, on first use.
+
+    The stages that read the pixels of a page (GUI analysis, the contrast audit and
+    OCR of changed regions) share the buffer instead of each decoding the
+    screenshot, and worker processes attach to it by its descriptor. The buffers
+    are owned by the cache and freed by release() once the page is done.
+    """
+
+    def __init__(self, backend: str = 'shm', directory: str = None):
+        if backend not in SharedPixelBuffer.BACKENDS:
+            raise ValueError(f"Unsupported pixel buffer backend: {backend}")
+
+        self.backend = backend
+        self.directory = directory
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def get(self, image_path: str) -> SharedPixelBuffer:
+        """Return the buffer of a screenshot, decoding it the first time it is asked for."""
+        with self._lock:
+            buffer = self._buffers.get(image_path)
+            if buffer is None:
+                buffer = SharedPixelBuffer.from_image(image_path, backend=self.backend, directory=self.directory)
+                self._buffers[image_path] = buffer
+            return buffer
+
+    def release(self) -> None:
+        """Free every buffer; workers must be done with them."""
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+        for buffer in buffers.values():
+            buffer.close()
+            buffer.unlink()
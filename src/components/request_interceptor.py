@@ -0,0 +1,214 @@
+import asyncio
+import urllib.parse
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from .asset_cache import AssetCache
+
+# Resource types that never influence the rendered layout
+DEFAULT_BLOCKED_RESOURCE_TYPES = ['media', 'websocket', 'eventsource', 'ping', 'texttrack']
+
+# Common advertising, tracking and analytics hosts (subdomains are matched too)
+DEFAULT_BLOCKED_DOMAINS = [
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googletagservices.com',
+    'adservice.google.com',
+    'connect.facebook.net',
+    'amazon-adsystem.com',
+    'adnxs.com',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'hotjar.com',
+    'mixpanel.com',
+    'segment.io',
+    'nr-data.net',
+    'moatads.com',
+    'pubmatic.com',
+    'rubiconproject.com',
+    'casalemedia.com',
+    'adsrvr.org'
+]
+
+# Content types used when answering stubbed media requests
+STUB_CONTENT_TYPES = {
+    'media': 'video/mp4',
+    'texttrack': 'text/vtt'
+}
+
+class RequestInterceptor:
+    """Decides which requests a page may make while it is being rendered."""
+
+    def __init__(self, config: Dict[str, Any] = None, asset_cache: AssetCache = None):
+        if config is None:
+            config = {}
+        
+        # Optional shared cache used to answer requests for static assets
+        self.asset_cache = asset_cache
+
+        self.enabled = config.get('enabled', True)
+        self.stub_media = config.get('stub_media', True)
+        self.blocked_resource_types = set(
+            config.get('block_resource_types', DEFAULT_BLOCKED_RESOURCE_TYPES))
+        self.blocked_domains = [
+            d.lower().lstrip('.') for d in config.get('block_domains', DEFAULT_BLOCKED_DOMAINS)]
+        self.allowed_domains = [
+            d.lower().lstrip('.') for d in config.get('allow_domains', [])]
+
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Clear the per-page statistics."""
+        self._blocked_by_type = Counter()
+        self._blocked_by_domain = Counter()
+        self._allowed_requests = 0
+        self._blocked_requests = 0
+        self._stubbed_requests = 0
+        self._transferred_bytes = 0
+        self._cached_responses = 0
+        self._cache_hits = 0
+        self._cache_stores = 0
+        self._served_from_cache = set()
+
+    def classify(self, url: str, resource_type: str) -> str:
+        """
+        Classify a request.
+
+        Args:
+            url: The requested URL
+            resource_type: The Chromium resource type (document, script, media, ...)
+
+        Returns:
+            'allow', 'block' or 'stub'
+        """
+        if not self.enabled or resource_type == 'document':
+            return 'allow'
+
+        host = self._host(url)
+        if self._matches(host, self.allowed_domains):
+            return 'allow'
+
+        if self._matches(host, self.blocked_domains):
+            return 'block'
+
+        if resource_type in self.blocked_resource_types:
+            # Stubbing keeps media elements in place without downloading them
+            if self.stub_media and resource_type in STUB_CONTENT_TYPES:
+                return 'stub'
+            return 'block'
+
+        return 'allow'
+
+    async def handle_request(self, request) -> None:
+        """Abort, stub or continue an intercepted pyppeteer request."""
+        url = request.url
+        resource_type = request.resourceType
+        action = self.classify(url, resource_type)
+
+        if action == 'allow':
+            self._allowed_requests += 1
+            cached = self._lookup_cached(url, resource_type)
+            if cached is not None:
+                self._cache_hits += 1
+                self._served_from_cache.add(url)
+                await request.respond(cached)
+            else:
+                await request.continue_()
+            return
+
+        self._blocked_requests += 1
+        self._blocked_by_type[resource_type] += 1
+        self._blocked_by_domain[self._host(url)] += 1
+
+        if action == 'stub':
+            self._stubbed_requests += 1
+            await request.respond({
+                'status': 200,
+                'contentType': STUB_CONTENT_TYPES[resource_type],
+                'body': ''
+            })
+        else:
+            await request.abort('blockedbyclient')
+
+    def handle_response(self, response) -> None:
+        """Account for the bytes of a response that was allowed through."""
+        if getattr(response, 'fromCache', False) or response.url in self._served_from_cache:
+            self._cached_responses += 1
+            return
+
+        content_length = response.headers.get('content-length')
+        if content_length and content_length.isdigit():
+            self._transferred_bytes += int(content_length)
+
+        if self.asset_cache is not None:
+            resource_type = response.request.resourceType
+            if self.asset_cache.is_cacheable(resource_type, response.status, response.headers):
+                asyncio.ensure_future(self._store_response(response))
+
+    async def _store_response(self, response) -> None:
+        """Copy a fetched asset into the shared cache."""
+        try:
+            body = await response.buffer()
+        except Exception:
+            # The body is unavailable for redirects and responses evicted by the browser
+            return
+
+        if self.asset_cache.store(response.url, response.status, response.headers, body):
+            self._cache_stores += 1
+
+    def _lookup_cached(self, url: str, resource_type: str) -> Optional[Dict[str, Any]]:
+        """Return a pyppeteer respond() payload for a cached asset, if any."""
+        if self.asset_cache is None or resource_type not in self.asset_cache.cacheable_types:
+            return None
+
+        entry = self.asset_cache.lookup(url)
+        if entry is None:
+            return None
+
+        return {
+            'status': entry['status'],
+            'headers': entry['headers'],
+            'body': entry['body']
+        }
+
+    async def attach(self, page) -> None:
+        """Enable interception on a page and route its requests through this policy."""
+        self.reset_stats()
+        if not self.enabled and self.asset_cache is None:
+            return
+
+        await page.setRequestInterception(True)
+        # pyppeteer emits events synchronously, so the async handlers are scheduled
+        page.on('request', lambda request: asyncio.ensure_future(self.handle_request(request)))
+        page.on('response', self.handle_response)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the request statistics collected for the current page."""
+        return {
+            'enabled': self.enabled,
+            'allowed_requests': self._allowed_requests,
+            'blocked_requests': self._blocked_requests,
+            'stubbed_requests': self._stubbed_requests,
+            'transferred_bytes': self._transferred_bytes,
+            'cached_responses': self._cached_responses,
+            'asset_cache_hits': self._cache_hits,
+            'asset_cache_stores': self._cache_stores,
+            'blocked_by_type': dict(self._blocked_by_type),
+            'blocked_by_domain': dict(self._blocked_by_domain.most_common(20))
+        }
+
+    def _host(self, url: str) -> str:
+        try:
+            return (urllib.parse.urlparse(url).hostname or '').lower()
+        except ValueError:
+            return ''
+
+    def _matches(self, host: str, domains: List[str]) -> bool:
+        return any(host == d or host.endswith('.' + d) for d in domains)
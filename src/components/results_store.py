@@ -0,0 +1,319 @@
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from .serialization import dumps_json
+
+class ResultsStore(ABC):
+    """
+    Interface for persisting analysis results.
+
+    A run groups the pages processed by one invocation of the pipeline. Backends
+    may buffer writes; flush() makes them durable and queries always see them.
+    """
+
+    @abstractmethod
+    def start_run(self, metadata: Dict[str, Any] = None) -> str:
+        ...
+
+    @abstractmethod
+    def finish_run(self, run_id: str, status: str = 'completed') -> None:
+        ...
+
+    @abstractmethod
+    def save_page(self, run_id: str, url: str, results: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def latest_run_for_url(self, url: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def pages_with_layout(self, layout_pattern: str, limit: int = 100) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def pages_for_run(self, run_id: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_page(self, page_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL,
+    metadata TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(id),
+    url TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    page_title TEXT,
+    layout_pattern TEXT,
+    screenshot_path TEXT,
+    change_status TEXT,
+    textual_description TEXT,
+    structured_description TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pages_url_captured ON pages(url, captured_at);
+CREATE INDEX IF NOT EXISTS idx_pages_layout ON pages(layout_pattern);
+CREATE INDEX IF NOT EXISTS idx_pages_run ON pages(run_id);
+
+CREATE TABLE IF NOT EXISTS elements (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    page_id INTEGER NOT NULL REFERENCES pages(id),
+    element_index INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    position TEXT,
+    left INTEGER,
+    top INTEGER,
+    right INTEGER,
+    bottom INTEGER,
+    width_percentage REAL,
+    height_percentage REAL,
+    text_content TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_elements_page ON elements(page_id);
+CREATE INDEX IF NOT EXISTS idx_elements_type ON elements(type);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    page_id INTEGER NOT NULL REFERENCES pages(id),
+    analysis_type TEXT,
+    prompt TEXT,
+    response TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_page ON analyses(page_id);
+CREATE INDEX IF NOT EXISTS idx_analyses_type ON analyses(analysis_type);
+"""
+
+class SQLiteResultsStore(ResultsStore):
+    """
+    Results store backed by a SQLite database.
+
+    Pages are buffered in memory and written in one transaction per batch, so a
+    busy pipeline commits once every `batch_size` pages instead of once per file.
+    The database runs in WAL mode so readers can query while a run is writing.
+    """
+
+    def __init__(self, db_path: str = None, batch_size: int = 50):
+        if db_path is None:
+            db_path = os.path.join(os.getcwd(), 'output', 'results.db')
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+    def start_run(self, metadata: Dict[str, Any] = None) -> str:
+        run_id = uuid.uuid4().hex
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO runs (id, started_at, status, metadata) VALUES (?, ?, ?, ?)',
+                (run_id, datetime.now().isoformat(), 'running', json.dumps(metadata or {}))
+            )
+        return run_id
+
+    def finish_run(self, run_id: str, status: str = 'completed') -> None:
+        self.flush()
+        with self._lock, self.conn:
+            self.conn.execute(
+                'UPDATE runs SET finished_at = ?, status = ? WHERE id = ?',
+                (datetime.now().isoformat(), status, run_id)
+            )
+
+    def save_page(self, run_id: str, url: str, results: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending.append((run_id, url, datetime.now().isoformat(), results))
+            should_flush = len(self._pending) >= self.batch_size
+
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered pages in a single transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            with self.conn:
+                for run_id, url, captured_at, results in pending:
+                    self._insert_page(run_id, url, captured_at, results)
+
+    def latest_run_for_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the most recent stored page for a URL, with its run information."""
+        self.flush()
+        row = self.conn.execute(
+            '''SELECT pages.*, runs.started_at AS run_started_at, runs.status AS run_status
+               FROM pages JOIN runs ON runs.id = pages.run_id
+               WHERE pages.url = ?
+               ORDER BY pages.captured_at DESC, pages.id DESC
+               LIMIT 1''',
+            (url,)
+        ).fetchone()
+        return self._page_from_row(row) if row else None
+
+    def pages_with_layout(self, layout_pattern: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return the most recent pages that use a layout pattern."""
+        self.flush()
+        rows = self.conn.execute(
+            '''SELECT id, run_id, url, captured_at, page_title, layout_pattern, screenshot_path
+               FROM pages WHERE layout_pattern = ?
+               ORDER BY captured_at DESC LIMIT ?''',
+            (layout_pattern, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def pages_for_run(self, run_id: str) -> List[Dict[str, Any]]:
+        """Return the pages stored for a run, in the order they were saved."""
+        self.flush()
+        rows = self.conn.execute(
+            '''SELECT id, run_id, url, captured_at, page_title, layout_pattern, screenshot_path
+               FROM pages WHERE run_id = ? ORDER BY id''',
+            (run_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_page(self, page_id: int) -> Optional[Dict[str, Any]]:
+        """Return a stored page with its elements and analyses."""
+        self.flush()
+        row = self.conn.execute('SELECT * FROM pages WHERE id = ?', (page_id,)).fetchone()
+        return self._page_from_row(row) if row else None
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    def _insert_page(self, run_id: str, url: str, captured_at: str, results: Dict[str, Any]) -> int:
+        structured = results.get('structured_description', {}) or {}
+        cursor = self.conn.execute(
+            '''INSERT INTO pages (run_id, url, captured_at, page_title, layout_pattern,
+                                  screenshot_path, change_status, textual_description,
+                                  structured_description)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (
+                run_id,
+                url,
+                captured_at,
+                structured.get('page_title'),
+                structured.get('layout_pattern'),
+                results.get('screenshot_path'),
+                results.get('change_status'),
+                results.get('textual_description'),
+                dumps_json(structured)
+            )
+        )
+        page_id = cursor.lastrowid
+
+        element_rows = []
+        for index, element in enumerate(structured.get('ui_elements', [])):
+            bbox = element.get('bounding_box') or {}
+            size = element.get('size_percentage') or {}
+            element_rows.append((
+                page_id,
+                index,
+                element.get('type', 'unknown'),
+                (element.get('position') or {}).get('description'),
+                bbox.get('left'),
+                bbox.get('top'),
+                bbox.get('right'),
+                bbox.get('bottom'),
+                size.get('width'),
+                size.get('height'),
+                element.get('text_content')
+            ))
+        self.conn.executemany(
+            '''INSERT INTO elements (page_id, element_index, type, position, left, top, right,
+                                     bottom, width_percentage, height_percentage, text_content)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            element_rows
+        )
+
+        llm_analysis = results.get('llm_analysis')
+        if llm_analysis:
+            self.conn.execute(
+                '''INSERT INTO analyses (page_id, analysis_type, prompt, response, error)
+                   VALUES (?, ?, ?, ?, ?)''',
+                (
+                    page_id,
+                    llm_analysis.get('analysis_type'),
+                    llm_analysis.get('prompt'),
+                    llm_analysis.get('response'),
+                    llm_analysis.get('error')
+                )
+            )
+
+        return page_id
+
+    def _page_from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        page = dict(row)
+        page['structured_description'] = json.loads(page['structured_description'] or '{}')
+        page['elements'] = [dict(r) for r in self.conn.execute(
+            'SELECT * FROM elements WHERE page_id = ? ORDER BY element_index', (page['id'],)
+        ).fetchall()]
+        page['analyses'] = [dict(r) for r in self.conn.execute(
+            'SELECT analysis_type, prompt, response, error FROM analyses WHERE page_id = ?', (page['id'],)
+        ).fetchall()]
+        return page
+
+# Available backends, selected with results_store.backend in the configuration
+RESULTS_STORE_BACKENDS = {
+    'sqlite': SQLiteResultsStore
+}
+
+def create_results_store(store_config: Dict[str, Any]) -> Optional[ResultsStore]:
+    """
+    Create the results store described by the `results_store` config section.
+
+    Args:
+        store_config: Configuration with 'backend', 'path' and 'batch_size'
+
+    Returns:
+        The results store, or None when no store is configured
+    """
+    if not store_config or not store_config.get('enabled', True):
+        return None
+
+    backend = store_config.get('backend', 'sqlite')
+    if backend not in RESULTS_STORE_BACKENDS:
+        raise ValueError(f"Unknown results store backend: {backend}")
+
+    return RESULTS_STORE_BACKENDS[backend](
+        store_config.get('path'),
+        batch_size=store_config.get('batch_size', 50)
+    )
@@ -0,0 +1,45 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    """Fallback for values the standard json module cannot encode (NumPy scalars and arrays)."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_json_bytes(obj: Any, pretty: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 JSON bytes, using orjson when it is installed.
+    
+    Args:
+        obj: The object to serialize
+        pretty: Indent the output by two spaces
+        sort_keys: Sort the keys of objects, so equal dicts encode the same way
+            whatever the order their keys were inserted in
+    
+    Returns:
+        The encoded JSON document
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option, default=_default)
+    
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, sort_keys=sort_keys, default=_default).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys,
+                      default=_default).encode('utf-8')
+
+def dumps_json(obj: Any, pretty: bool = False) -> str:
+    """Serialize an object to a JSON string, using orjson when it is installed."""
+    return dumps_json_bytes(obj, pretty).decode('utf-8')
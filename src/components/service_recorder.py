@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Any, Callable, List, Optional
+
+from .serialization import dumps_json_bytes
+
+RECORDER_MODES = ('record', 'replay')
+MATCH_MODES = ('request', 'order')
+
+class ServiceRecorder:
+    """
+    Records the responses of external services and replays them offline.
+
+    In 'record' mode, calls go to the real service and each response is
+    appended to a cassette (one JSONL file per service in `cassette_dir`) with
+    the time the call took. In 'replay' mode, no service is contacted: the
+    recorded response is returned after waiting the recorded latency times
+    `latency_scale` (1.0 replays at recorded speed, 0 instantly).
+
+    Requests are matched by a SHA-256 key of the method and request (images by
+    the hash of their content). Repeated calls with the same key get the
+    recordings of that key in order. With `match='order'`, the request is
+    ignored and each method's recordings are replayed in the order they were
+    made, for inputs that are never byte-identical between runs, such as fresh
+    screenshots. Calls of a method must then be made in the same order when
+    recording and replaying (the pipeline runs tile OCR and pages sequentially in
+    this mode). Recordings are reused from the start when a replay runs past
+    the last one.
+    """
+
+    def __init__(self,
+                 cassette_dir: str = None,
+                 mode: str = 'replay',
+                 latency_scale: float = 1.0,
+                 match: str = 'request'):
+        """
+        Args:
+            cassette_dir: Directory of the cassettes
+            mode: 'record' or 'replay'
+            latency_scale: Factor applied to recorded latencies when replaying
+            match: 'request' to match recordings by request, 'order' to replay them
+                in recorded order
+        """
+        if cassette_dir is None:
+            cassette_dir = os.path.join(os.getcwd(), 'cassettes')
+        if mode not in RECORDER_MODES:
+            raise ValueError(f"Unknown recorder mode: {mode}")
+        if match not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {match}")
+        if latency_scale < 0:
+            raise ValueError("Latency scale cannot be negative")
+
+        self.cassette_dir = cassette_dir
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.match = match
+        os.makedirs(cassette_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._cassettes = {}
+        self._positions = {}
+
+    def call(self,
+             service: str,
+             method: str,
+             request: Dict[str, Any],
+             perform: Callable[[], Any],
+             encode: Callable[[Any], Any],
+             decode: Callable[[Any], Any]) -> Any:
+        """
+        Make a call through the recorder.
+
+        Args:
+            service: Name of the service (the cassette file)
+            method: Name of the method called
+            request: JSON-serializable description of the request; binary content
+                should be given as its hash
+            perform: Makes the real call (only in 'record' mode)
+            encode: Turns the response into a JSON-serializable value
+            decode: Turns a recorded value back into a response
+
+        Returns:
+            The response
+        """
+        key = request_key(method, request)
+        if self.mode == 'record':
+            start = time.perf_counter()
+            response = perform()
+            latency = time.perf_counter() - start
+            self._append(service, {
+                'method': method,
+                'key': key,
+                'latency': round(latency, 6),
+                'recorded_at': time.time(),
+                'response': encode(response)
+            })
+            return response
+
+        interaction = self._next(service, method, key)
+        if interaction is None:
+            raise RuntimeError(f"No recorded {service} response for {method} "
+                               f"(request {key[:12]}) in {self.cassette_dir}")
+        if self.latency_scale:
+            time.sleep(interaction['latency'] * self.latency_scale)
+        return decode(interaction['response'])
+
+    def interactions(self, service: str) -> List[Dict[str, Any]]:
+        """Return the recorded interactions of a service, in recorded order."""
+        with self._lock:
+            return list(self._load(service))
+
+    def _next(self, service: str, method: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            match_on = 'key' if self.match == 'request' else 'method'
+            value = key if self.match == 'request' else method
+            candidates = [interaction for interaction in self._load(service) if interaction[match_on] == value]
+            if not candidates:
+                return None
+            position = self._positions.get((service, value), 0)
+            self._positions[(service, value)] = position + 1
+            return candidates[position % len(candidates)]
+
+    def _load(self, service: str) -> List[Dict[str, Any]]:
+        if service not in self._cassettes:
+            interactions = []
+            path = self._path(service)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    for line in f:
+                        try:
+                            interactions.append(json.loads(line))
+                        except ValueError:
+                            # A recording cut off mid-line
+                            continue
+            self._cassettes[service] = interactions
+        return self._cassettes[service]
+
+    def _append(self, service: str, interaction: Dict[str, Any]) -> None:
+        line = dumps_json_bytes(interaction) + b'\n'
+        with self._lock:
+            self._load(service).append(interaction)
+            # One write per line, so concurrent recorders append whole lines
+            with open(self._path(service), 'ab') as f:
+                f.write(line)
+
+    def _path(self, service: str) -> str:
+        return os.path.join(self.cassette_dir, f'{service}.jsonl')
+
+def request_key(method: str, request: Dict[str, Any]) -> str:
+    """SHA-256 key of a method and its request, independent of key order."""
+    encoded = json.dumps({'method': method, 'request': request}, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+class RecordedVisionClient:
+    """
+    Google Cloud Vision client that records or replays through a ServiceRecorder.
+
+    Offers the annotation methods the OCR Extractor uses. The real client is
+    created on the first recorded call, so replaying needs no credentials.
+    """
+
+    def __init__(self, make_client: Callable[[], Any], recorder: ServiceRecorder):
+        self._make_client = make_client
+        self._client = None
+        self.recorder = recorder
+
+    def text_detection(self, image, **kwargs):
+        return self._annotate('text_detection', image, kwargs)
+
+    def document_text_detection(self, image, **kwargs):
+        return self._annotate('document_text_detection', image, kwargs)
+
+    def label_detection(self, image, **kwargs):
+        return self._annotate('label_detection', image, kwargs)
+
+    def _annotate(self, method: str, image, kwargs: Dict[str, Any]):
+        from google.cloud import vision
+
+        request = {
+            'image': hashlib.sha256(image.content).hexdigest(),
+            'image_context': kwargs.get('image_context')
+        }
+        return self.recorder.call(
+            'vision', method, request,
+            perform=lambda: getattr(self._real_client(), method)(image=image, **kwargs),
+            encode=lambda response: json.loads(vision.AnnotateImageResponse.to_json(response)),
+            decode=lambda value: vision.AnnotateImageResponse.from_json(json.dumps(value))
+        )
+
+    def _real_client(self):
+        if self._client is None:
+            self._client = self._make_client()
+        return self._client
+
+class RecordedAnthropicClient:
+    """
+    Anthropic client that records or replays `messages.create` through a ServiceRecorder.
+
+    The real client is created on the first recorded call, so replaying needs no
+    API key.
+    """
+
+    def __init__(self, make_client: Callable[[], Any], recorder: ServiceRecorder):
+        self._make_client = make_client
+        self._client = None
+        self.recorder = recorder
+        self.messages = _RecordedMessages(self)
+
+    def _real_client(self):
+        if self._client is None:
+            self._client = self._make_client()
+        return self._client
+
+class _RecordedMessages:
+    def __init__(self, owner: RecordedAnthropicClient):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        from anthropic.types import Message
+
+        return self._owner.recorder.call(
+            'anthropic', 'messages.create', kwargs,
+            perform=lambda: self._owner._real_client().messages.create(**kwargs),
+            encode=lambda response: response.model_dump(mode='json'),
+            decode=Message.model_validate
+        )
+
+# Recorders by settings; see create_service_recorder
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+def create_service_recorder(services_config: Dict[str, Any]) -> Optional[ServiceRecorder]:
+    """
+    Create the recorder described by the `services` config section.
+
+    Within a process, one recorder is shared per configuration, so the replay
+    position carries over from one page to the next.
+
+    Args:
+        services_config: Configuration with 'mode' ('live', 'record' or 'replay'),
+            'cassette_dir', 'latency_scale' and 'match'
+
+    Returns:
+        The recorder, or None when services are called live
+    """
+    mode = services_config.get('mode', 'live')
+    if mode == 'live':
+        return None
+
+    settings = (
+        os.path.abspath(services_config.get('cassette_dir') or os.path.join(os.getcwd(), 'cassettes')),
+        mode,
+        services_config.get('latency_scale', 1.0),
+        services_config.get('match', 'request')
+    )
+    with _recorders_lock:
+        if settings not in _recorders:
+            cassette_dir, mode, latency_scale, match = settings
+            _recorders[settings] = ServiceRecorder(cassette_dir, mode=mode, latency_scale=latency_scale, match=match)
+        return _recorders[settings]
@@ -0,0 +1,405 @@
+import gzip
+import asyncio
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode, quote
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+DEFAULT_USER_AGENT = 'WebpageDesignToText'
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMETERS = ('utm_', 'gclid', 'fbclid', 'msclkid')
+
+# Links to these files are never pages worth rendering
+SKIP_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.bmp',
+    '.pdf', '.zip', '.gz', '.tar', '.rar', '.7z', '.exe', '.dmg',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm', '.css', '.js', '.json', '.xml',
+    '.woff', '.woff2', '.ttf', '.eot'
+)
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Normalize a URL so that equivalent spellings of a page compare equal.
+
+    The scheme and host are lowercased, default ports, fragments and tracking
+    parameters are dropped, dot segments are resolved and the query parameters are
+    sorted.
+
+    Args:
+        url: Absolute URL, or a URL relative to `base`
+        base: URL of the page the link appeared on
+
+    Returns:
+        The normalized URL, or None when it is not an http(s) URL
+    """
+    try:
+        parts = urlsplit(urljoin(base, url.strip()) if base else url.strip())
+        scheme = parts.scheme.lower()
+        host = parts.hostname
+        port = parts.port
+    except ValueError:
+        return None
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+
+    netloc = f'[{host}]' if ':' in host else host
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        netloc = f'{netloc}:{port}'
+
+    segments = []
+    for segment in parts.path.split('/')[1:]:
+        if segment == '..':
+            if segments:
+                segments.pop()
+        elif segment != '.':
+            segments.append(segment)
+    if parts.path.split('/')[-1] in ('.', '..'):
+        segments.append('')
+    path = quote('/' + '/'.join(segments), safe="/%:@!$&'()*+,;=-._~")
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMETERS)
+    ))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+class _LinkParser(HTMLParser):
+    """Collects the link targets of an HTML page, honoring its <base href>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base = None
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        href = attrs.get('href')
+        if not href:
+            return
+        if tag == 'base' and self.base is None:
+            self.base = href
+        elif tag in ('a', 'area') and 'nofollow' not in (attrs.get('rel') or '').lower().split():
+            self.links.append(href)
+
+def extract_links(html: str, page_url: str) -> List[str]:
+    """Return the normalized http(s) links of an HTML page, in document order."""
+    parser = _LinkParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # Keep the links found before the markup became unparseable
+        pass
+
+    base = urljoin(page_url, parser.base) if parser.base else page_url
+    links = []
+    for href in parser.links:
+        link = normalize_url(href, base)
+        if link is not None:
+            links.append(link)
+    return links
+
+class SiteCrawler:
+    """
+    Discovers the pages of a site for the render pipeline.
+
+    Starting from seed URLs and/or a sitemap, the crawler fetches pages with
+    plain HTTP requests, follows their links up to `max_depth` and hands every
+    HTML page it finds to the pipeline, at most `max_pages` of them. URLs are
+    normalized before they are queued, so each page is fetched and rendered
+    once; pages reached through redirects are de-duplicated by their final URL.
+
+    Fetching runs on an asyncio event loop with `concurrency` workers, but
+    requests to the same host are serialized and spaced by `delay` seconds (or
+    the host's robots.txt Crawl-delay, when longer), so concurrency only
+    overlaps different hosts. Found pages go through a queue of `queue_size`
+    pages: when the pipeline falls behind, the workers wait instead of crawling
+    ahead of it. A crawler runs one crawl at a time.
+
+    Pages and sitemaps that fail to load are skipped; the failures of the last
+    crawl are kept in `errors` as {'url', 'error'} dictionaries.
+    """
+
+    def __init__(self,
+                 max_depth: int = 2,
+                 max_pages: int = 50,
+                 concurrency: int = 4,
+                 delay: float = 1.0,
+                 respect_robots: bool = True,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 queue_size: int = 8,
+                 timeout: float = 10.0,
+                 max_page_bytes: int = 5 * 1024 * 1024,
+                 allowed_hosts: Optional[Iterable[str]] = None):
+        """
+        Args:
+            max_depth: Links followed from a seed page (0 only visits the seeds)
+            max_pages: Maximum number of pages handed to the pipeline
+            concurrency: Number of pages fetched at the same time (across hosts)
+            delay: Minimum time between two requests to the same host, in seconds
+            respect_robots: Skip pages that robots.txt disallows for `user_agent`
+            user_agent: User agent sent with requests and matched in robots.txt
+            queue_size: Found pages waiting for the pipeline before crawling pauses
+            timeout: Timeout of each request, in seconds
+            max_page_bytes: Pages are read up to this size for link extraction
+            allowed_hosts: Hosts (with port, if not the default) the crawl may visit;
+                defaults to the hosts of the seeds and the pages in the sitemap
+        """
+        if concurrency < 1:
+            raise ValueError("A crawler needs at least one worker")
+        if queue_size < 1:
+            raise ValueError("The page queue must hold at least one page")
+
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.delay = delay
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_page_bytes = max_page_bytes
+        self.allowed_hosts = set(allowed_hosts) if allowed_hosts else None
+        self.errors = []
+
+    async def crawl(self,
+                    seeds: Iterable[str] = (),
+                    sitemap: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Crawl a site, yielding pages as they are found.
+
+        Args:
+            seeds: URLs to start from
+            sitemap: URL of a sitemap.xml (or sitemap index) whose pages are added
+                to the seeds
+
+        Yields:
+            Dictionaries with the normalized page 'url', the number of links
+            followed from a seed to reach it ('depth'), the 'referrer' it was
+            found on (None for seeds) and the HTTP 'status'
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._session = requests.Session()
+        self._session.headers['User-Agent'] = self.user_agent
+        self._seen = set()
+        self._robots = {}
+        self._host_locks = {}
+        self._host_delays = {}
+        self._next_request = {}
+        self._emitted = 0
+        self.errors = []
+
+        frontier = asyncio.Queue()
+        pages = asyncio.Queue(maxsize=self.queue_size)
+        tasks = []
+        try:
+            seed_urls = [url for url in (normalize_url(seed) for seed in seeds) if url]
+            if sitemap:
+                seed_urls.extend(await self._sitemap_urls(normalize_url(sitemap) or sitemap, set()))
+            self._hosts = self.allowed_hosts or {urlsplit(url).netloc for url in seed_urls}
+
+            for url in seed_urls:
+                self._enqueue(frontier, url, 0, None)
+
+            tasks = [asyncio.ensure_future(self._worker(frontier, pages)) for _ in range(self.concurrency)]
+            tasks.append(asyncio.ensure_future(self._finish(frontier, pages)))
+
+            while True:
+                page = await pages.get()
+                if page is None:
+                    return
+                yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, *self._robots.values(), return_exceptions=True)
+            self._executor.shutdown(wait=False)
+            self._session.close()
+
+    def pages(self, seeds: Iterable[str] = (), sitemap: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Crawl on a background event loop, yielding pages to synchronous code.
+
+        The render pipeline drives its own event loop on the calling thread, so the
+        crawl runs on a loop in a separate thread and each page is taken from its
+        bounded queue as the pipeline asks for it.
+        """
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name='site-crawler', daemon=True)
+        thread.start()
+        generator = self.crawl(seeds, sitemap)
+        try:
+            while True:
+                try:
+                    page = asyncio.run_coroutine_threadsafe(generator.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    return
+                yield page
+        finally:
+            asyncio.run_coroutine_threadsafe(generator.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def _enqueue(self, frontier: asyncio.Queue, url: str, depth: int, referrer: Optional[str]) -> None:
+        if url in self._seen or urlsplit(url).netloc not in self._hosts:
+            return
+        if urlsplit(url).path.lower().endswith(SKIP_EXTENSIONS):
+            return
+        self._seen.add(url)
+        frontier.put_nowait((url, depth, referrer))
+
+    def _error(self, url: str, message: str) -> None:
+        # Also called from the executor threads; list.append is atomic
+        self.errors.append({'url': url, 'error': message})
+
+    async def _finish(self, frontier: asyncio.Queue, pages: asyncio.Queue) -> None:
+        """Signal the end of the crawl once every queued URL has been visited."""
+        await frontier.join()
+        await pages.put(None)
+
+    async def _worker(self, frontier: asyncio.Queue, pages: asyncio.Queue) -> None:
+        while True:
+            url, depth, referrer = await frontier.get()
+            try:
+                # Once the page limit is reached, the rest of the frontier is drained unvisited
+                if self._emitted < self.max_pages:
+                    await self._visit(frontier, pages, url, depth, referrer)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._error(url, f"Error crawling: {e}")
+            finally:
+                frontier.task_done()
+
+    async def _visit(self,
+                     frontier: asyncio.Queue,
+                     pages: asyncio.Queue,
+                     url: str,
+                     depth: int,
+                     referrer: Optional[str]) -> None:
+        if not await self._allowed(url):
+            return
+
+        response = await self._fetch(url)
+        if response is None:
+            return
+        status, final_url, content_type, body = response
+
+        # A response URL that only differs in form (case, default port, fragment)
+        # is the same page, not a redirect
+        final_url = normalize_url(final_url)
+        if final_url is None:
+            return
+        if final_url != url:
+            # Redirected: the page is known by where it ended up
+            if (final_url in self._seen or
+                    urlsplit(final_url).netloc not in self._hosts or not await self._allowed(final_url)):
+                return
+            self._seen.add(final_url)
+
+        if status >= 400 or 'html' not in content_type or self._emitted >= self.max_pages:
+            return
+
+        self._emitted += 1
+        # Blocks while the pipeline has queue_size pages waiting
+        await pages.put({'url': final_url, 'depth': depth, 'referrer': referrer, 'status': status})
+
+        if depth < self.max_depth:
+            for link in extract_links(body.decode('utf-8', errors='replace'), final_url):
+                self._enqueue(frontier, link, depth + 1, final_url)
+
+    async def _allowed(self, url: str) -> bool:
+        """Check robots.txt, fetching it once per origin."""
+        if not self.respect_robots:
+            return True
+
+        parts = urlsplit(url)
+        origin = f'{parts.scheme}://{parts.netloc}'
+        task = self._robots.get(origin)
+        if task is None:
+            task = self._robots[origin] = asyncio.ensure_future(self._load_robots(origin))
+        parser = await task
+        return parser.can_fetch(self.user_agent, url)
+
+    async def _load_robots(self, origin: str) -> RobotFileParser:
+        parser = RobotFileParser(origin + '/robots.txt')
+        response = await self._fetch(origin + '/robots.txt')
+        if response is None or response[0] >= 500:
+            # An unreachable robots.txt means the whole site is off limits (RFC 9309)
+            parser.disallow_all = True
+        elif response[0] >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response[3].decode('utf-8', errors='replace').splitlines())
+            crawl_delay = parser.crawl_delay(self.user_agent)
+            if crawl_delay:
+                self._host_delays[urlsplit(origin).netloc] = max(self.delay, float(crawl_delay))
+        return parser
+
+    async def _sitemap_urls(self, sitemap_url: str, visited: set) -> List[str]:
+        """Return the page URLs of a sitemap, following sitemap indexes."""
+        visited.add(sitemap_url)
+        response = await self._fetch(sitemap_url)
+        if response is None or response[0] >= 400:
+            self._error(sitemap_url, "Could not fetch sitemap")
+            return []
+
+        body = response[3]
+        if body[:2] == b'\x1f\x8b':
+            body = gzip.decompress(body)
+        try:
+            root = ET.fromstring(body)
+        except ET.ParseError as e:
+            self._error(sitemap_url, f"Invalid sitemap: {e}")
+            return []
+
+        locations = [element.text.strip() for element in root.iter()
+                     if element.tag.endswith('loc') and element.text and element.text.strip()]
+        if not root.tag.endswith('sitemapindex'):
+            return [url for url in (normalize_url(location) for location in locations) if url]
+
+        urls = []
+        for location in locations:
+            child = normalize_url(location)
+            if child and child not in visited:
+                urls.extend(await self._sitemap_urls(child, visited))
+        return urls
+
+    async def _fetch(self, url: str) -> Optional[Tuple[int, str, str, bytes]]:
+        """Fetch a URL once the host's politeness delay has passed."""
+        loop = asyncio.get_running_loop()
+        host = urlsplit(url).netloc
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+
+        async with lock:
+            wait = self._next_request.get(host, 0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await loop.run_in_executor(self._executor, self._get, url)
+            finally:
+                self._next_request[host] = loop.time() + self._host_delays.get(host, self.delay)
+
+    def _get(self, url: str) -> Optional[Tuple[int, str, str, bytes]]:
+        """Blocking request, run on the executor: (status, final URL, content type, body)."""
+        try:
+            with self._session.get(url, timeout=self.timeout, stream=True) as response:
+                body = bytearray()
+                for chunk in response.iter_content(chunk_size=65536):
+                    body += chunk
+                    if len(body) >= self.max_page_bytes:
+                        break
+                return (response.status_code, response.url,
+                        response.headers.get('Content-Type', '').lower(), bytes(body[:self.max_page_bytes]))
+        except requests.RequestException as e:
+            self._error(url, f"Request failed: {e}")
+            return None
@@ -0,0 +1,189 @@
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional
+import numpy as np
+from PIL import Image
+
+from .change_detector import difference_hash
+
+# Bits of the DOM SimHash, split into LSH bands of BAND_BITS bits
+SIMHASH_BITS = 64
+BAND_BITS = 8
+
+# Consecutive DOM signature lines hashed together as one feature
+SHINGLE_LINES = 3
+
+def simhash(features: List[str]) -> int:
+    """
+    Compute the 64-bit SimHash of a set of features.
+
+    Each bit is the majority vote of that bit over the hashes of the features, so
+    sets sharing most of their features get hashes a few bits apart.
+    """
+    if not features:
+        return 0
+    hashes = np.array([
+        int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for feature in features
+    ], dtype=np.uint64)
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    majority = bits.sum(axis=0) * 2 > len(features)
+    return int(sum(1 << bit for bit in np.flatnonzero(majority).tolist()))
+
+class TemplateClusterer:
+    """
+    Groups the pages of a crawl by the template they were rendered from.
+
+    A page is fingerprinted by a difference hash of its first viewport, where the
+    header, navigation and layout of a template are, and a SimHash of its DOM
+    structure. The DOM features are shingles of consecutive 'depth:tag.class'
+    lines of the renderer's DOM signature, taken as a set, so a product page with
+    five list items and one with fifty share nearly all of them; page text is left
+    out because it is what differs between pages of one template.
+
+    The first page of a cluster is its representative. Later pages join a
+    cluster when both hashes lie within their thresholds of the representative's.
+    Candidates are looked up in locality-sensitive buckets keyed by 8-bit bands of
+    the DOM SimHash: two hashes at most `dom_threshold` < 8 bits apart agree on
+    at least one band, so no cluster within the threshold is missed and only the
+    clusters sharing a band are compared.
+    """
+
+    def __init__(self, image_threshold: int = 12, dom_threshold: int = 6, top_height: int = 1080):
+        """
+        Args:
+            image_threshold: Maximum dHash distance (in bits, of 64) to a representative
+            dom_threshold: Maximum DOM SimHash distance (in bits, of 64); below 8 the
+                LSH lookup is exact, otherwise every cluster is compared
+            top_height: Height of the top of the screenshot that is hashed (in pixels)
+        """
+        self.image_threshold = image_threshold
+        self.dom_threshold = dom_threshold
+        self.top_height = top_height
+
+        self._clusters = []
+        self._buckets = [{} for _ in range(SIMHASH_BITS // BAND_BITS)]
+        self._reused = 0
+        # Pages of a crawl are assigned from several threads at once
+        self._lock = threading.Lock()
+
+    def fingerprint(self, image_path: str, dom_signature: str = '') -> Dict[str, Any]:
+        """
+        Fingerprint a rendered page.
+
+        Args:
+            image_path: Path to the screenshot
+            dom_signature: Structural signature of the DOM reported by the renderer
+
+        Returns:
+            Dictionary with the 'image_hash' and 'dom_hash' as hex strings
+        """
+        with Image.open(image_path) as img:
+            top = img.crop((0, 0, img.width, min(img.height, self.top_height)))
+            image_hash = difference_hash(top)
+
+        return {
+            'image_hash': f'{image_hash:016x}',
+            'dom_hash': f'{self.dom_simhash(dom_signature):016x}'
+        }
+
+    def dom_simhash(self, dom_signature: str) -> int:
+        """SimHash of the set of line shingles of a DOM signature."""
+        lines = [line for line in (dom_signature or '').split('\n') if line]
+        shingles = {'\n'.join(lines[index:index + SHINGLE_LINES])
+                    for index in range(max(1, len(lines) - SHINGLE_LINES + 1))}
+        return simhash(sorted(shingle for shingle in shingles if shingle))
+
+    def assign(self, url: str, fingerprint: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Put a page into the cluster of its template, starting a new one if needed.
+
+        Args:
+            url: URL of the page
+            fingerprint: Result of fingerprint()
+
+        Returns:
+            Dictionary with the 'cluster' ID, the 'representative' URL, whether this
+            page 'is_representative' and the representative's 'results' (None until
+            they are remembered)
+        """
+        image_hash = int(fingerprint['image_hash'], 16)
+        dom_hash = int(fingerprint['dom_hash'], 16)
+
+        with self._lock:
+            return self._assign(url, image_hash, dom_hash)
+
+    def _assign(self, url: str, image_hash: int, dom_hash: int) -> Dict[str, Any]:
+        cluster = self._find(image_hash, dom_hash)
+        if cluster is None:
+            cluster = {
+                'id': len(self._clusters),
+                'representative': url,
+                'image_hash': image_hash,
+                'dom_hash': dom_hash,
+                'pages': [],
+                'results': None
+            }
+            self._clusters.append(cluster)
+            for band, bucket in zip(self._bands(dom_hash), self._buckets):
+                bucket.setdefault(band, []).append(cluster['id'])
+
+        cluster['pages'].append(url)
+        if cluster['results'] is not None:
+            self._reused += 1
+
+        return {
+            'cluster': cluster['id'],
+            'representative': cluster['representative'],
+            'is_representative': cluster['representative'] == url,
+            'results': cluster['results']
+        }
+
+    def remember(self, cluster_id: int, results: Dict[str, Any]) -> None:
+        """
+        Keep the analysis results of a cluster for its other pages.
+
+        A page of a cluster whose representative failed before remembering results
+        is analyzed in full; its results are then kept instead.
+        """
+        with self._lock:
+            cluster = self._clusters[cluster_id]
+            if cluster['results'] is None:
+                cluster['results'] = results
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the number of 'pages', 'clusters' and 'reused' analyses and the clusters."""
+        return {
+            'pages': sum(len(cluster['pages']) for cluster in self._clusters),
+            'clusters': len(self._clusters),
+            'reused': self._reused,
+            'templates': [{
+                'cluster': cluster['id'],
+                'representative': cluster['representative'],
+                'pages': list(cluster['pages'])
+            } for cluster in self._clusters]
+        }
+
+    def _find(self, image_hash: int, dom_hash: int) -> Optional[Dict[str, Any]]:
+        """Find the closest cluster within both thresholds."""
+        if self.dom_threshold < len(self._buckets):
+            candidates = set()
+            for band, bucket in zip(self._bands(dom_hash), self._buckets):
+                candidates.update(bucket.get(band, ()))
+        else:
+            candidates = range(len(self._clusters))
+
+        best, best_distance = None, None
+        for cluster_id in sorted(candidates):
+            cluster = self._clusters[cluster_id]
+            dom_distance = bin(cluster['dom_hash'] ^ dom_hash).count('1')
+            image_distance = bin(cluster['image_hash'] ^ image_hash).count('1')
+            if dom_distance > self.dom_threshold or image_distance > self.image_threshold:
+                continue
+            if best is None or dom_distance + image_distance < best_distance:
+                best, best_distance = cluster, dom_distance + image_distance
+        return best
+
+    def _bands(self, value: int) -> List[int]:
+        mask = (1 << BAND_BITS) - 1
+        return [(value >> shift) & mask for shift in range(0, SIMHASH_BITS, BAND_BITS)]
@@ -0,0 +1,194 @@
+from typing import Dict, Any, List, Union
+import numpy as np
+
+from .models import TextBlockArray, as_text_block_array, polygon_from_box
+
+class TextGrouper:
+    """
+    Groups OCR words into lines, paragraphs and columns in reading order.
+
+    Lines are built with a sort-and-sweep over the vertical centers of the words and
+    split wherever the horizontal gap between two words is wider than a column gap.
+    The lines are then arranged with a recursive XY-cut: a region is split into
+    columns at vertical gaps, otherwise into blocks at horizontal gaps, and a region
+    that cannot be split further is one paragraph. Every step sorts and sweeps once,
+    so no word or line is ever compared with all the others.
+
+    Gaps are measured in multiples of the median word height, which makes the
+    thresholds independent of the page's zoom level.
+    """
+
+    def __init__(self,
+                 line_tolerance: float = 0.5,
+                 column_gap: float = 1.5,
+                 paragraph_gap: float = 0.8):
+        """
+        Args:
+            line_tolerance: Maximum distance between the vertical centers of words on
+                the same line
+            column_gap: Minimum horizontal gap that separates columns (and splits lines)
+            paragraph_gap: Minimum vertical gap between lines that separates paragraphs
+        """
+        self.line_tolerance = line_tolerance
+        self.column_gap = column_gap
+        self.paragraph_gap = paragraph_gap
+
+    def group(self, text_blocks: Union[TextBlockArray, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Group word-level text blocks.
+
+        Args:
+            text_blocks: Words as a TextBlockArray or in the dict format of extract_text
+
+        Returns:
+            Dictionary with 'lines', 'paragraphs' and 'columns', each a list in reading
+            order. Lines reference their paragraph, paragraphs their column and lines,
+            and columns their paragraphs, by index.
+        """
+        words = as_text_block_array(text_blocks)
+        if not len(words):
+            return {'lines': [], 'paragraphs': [], 'columns': []}
+
+        line_words, line_boxes, paragraphs = self._arrange(words.boxes)
+
+        # Number the columns in reading order, leaving out those split further
+        column_ids = {}
+        for column, _ in paragraphs:
+            column_ids.setdefault(column, len(column_ids))
+
+        lines_out = []
+        paragraphs_out = []
+        column_members = [[] for _ in column_ids]
+        for paragraph_index, (column, members) in enumerate(paragraphs):
+            line_indices = []
+            for line in members:
+                line_indices.append(len(lines_out))
+                lines_out.append({
+                    'text': ' '.join(words.texts[word] for word in line_words[line]),
+                    'bounding_box': polygon_from_box(line_boxes[line]),
+                    'paragraph': paragraph_index
+                })
+            paragraphs_out.append({
+                'text': ' '.join(lines_out[index]['text'] for index in line_indices),
+                'bounding_box': polygon_from_box(self._enclosing_box(line_boxes[members])),
+                'column': column_ids[column],
+                'lines': line_indices
+            })
+            column_members[column_ids[column]].append((paragraph_index, members))
+
+        columns_out = []
+        for members in column_members:
+            box = self._enclosing_box(np.concatenate([line_boxes[lines] for _, lines in members]))
+            columns_out.append({
+                'bounding_box': polygon_from_box(box),
+                'paragraphs': [index for index, _ in members]
+            })
+
+        return {
+            'lines': lines_out,
+            'paragraphs': paragraphs_out,
+            'columns': columns_out
+        }
+
+    def reading_order(self, boxes: np.ndarray) -> np.ndarray:
+        """
+        Order word boxes for reading without building the grouped output.
+
+        Args:
+            boxes: N×4 array of word boxes (left, top, right, bottom)
+
+        Returns:
+            Indices of the boxes in reading order
+        """
+        if len(boxes) < 2:
+            return np.arange(len(boxes))
+
+        line_words, _, paragraphs = self._arrange(boxes)
+        return np.concatenate([line_words[line] for _, members in paragraphs for line in members])
+
+    def _arrange(self, boxes: np.ndarray):
+        """Build the lines of the words and arrange them into (column, lines) paragraphs."""
+        boxes = np.asarray(boxes, dtype=np.int64)
+        unit = max(1.0, float(np.median(boxes[:, 3] - boxes[:, 1])))
+
+        line_words = self._build_lines(boxes, unit)
+        line_boxes = np.array([self._enclosing_box(boxes[members]) for members in line_words], dtype=np.int64)
+
+        paragraphs = []
+        self._xy_cut(np.arange(len(line_words)), line_boxes, unit, paragraphs, [0], column=None)
+        return line_words, line_boxes, paragraphs
+
+    def _build_lines(self, boxes: np.ndarray, unit: float) -> List[np.ndarray]:
+        """Sweep the words by vertical center into lines, splitting lines at wide gaps."""
+        centers = (boxes[:, 1] + boxes[:, 3]) / 2
+        by_center = np.argsort(centers, kind='stable')
+
+        # Words whose center is within the tolerance of the line's first word share the line
+        rows = []
+        row_start = 0
+        anchor = centers[by_center[0]]
+        for position in range(1, len(by_center)):
+            center = centers[by_center[position]]
+            if center - anchor > self.line_tolerance * unit:
+                rows.append(by_center[row_start:position])
+                row_start, anchor = position, center
+        rows.append(by_center[row_start:])
+
+        lines = []
+        max_gap = self.column_gap * unit
+        for row in rows:
+            row = row[np.argsort(boxes[row, 0], kind='stable')]
+            # Running right edge, so a long word is not "jumped over" by a short one
+            right_edges = np.maximum.accumulate(boxes[row, 2])
+            gaps = boxes[row[1:], 0] - right_edges[:-1]
+            splits = np.flatnonzero(gaps > max_gap) + 1
+            lines.extend(np.split(row, splits))
+
+        return lines
+
+    def _xy_cut(self,
+                lines: np.ndarray,
+                line_boxes: np.ndarray,
+                unit: float,
+                paragraphs: List,
+                column_counter: List[int],
+                column: int) -> None:
+        """Recursively split lines into columns and paragraphs, appending in reading order."""
+        if column is None:
+            column = column_counter[0]
+            column_counter[0] += 1
+
+        boxes = line_boxes[lines]
+
+        # Columns first: gaps in the projection onto the x axis
+        groups = self._split_projection(lines, boxes[:, 0], boxes[:, 2], self.column_gap * unit)
+        if len(groups) > 1:
+            for group in groups:
+                self._xy_cut(group, line_boxes, unit, paragraphs, column_counter, column=None)
+            return
+
+        # Then blocks: gaps in the projection onto the y axis
+        groups = self._split_projection(lines, boxes[:, 1], boxes[:, 3], self.paragraph_gap * unit)
+        if len(groups) > 1:
+            for group in groups:
+                self._xy_cut(group, line_boxes, unit, paragraphs, column_counter, column=column)
+            return
+
+        # An unsplittable region is a paragraph; its lines read top to bottom, then left to right
+        order = np.lexsort((boxes[:, 0], boxes[:, 1]))
+        paragraphs.append((column, lines[order]))
+
+    def _split_projection(self,
+                          items: np.ndarray,
+                          starts: np.ndarray,
+                          ends: np.ndarray,
+                          min_gap: float) -> List[np.ndarray]:
+        """Split items into groups separated by gaps wider than min_gap along one axis."""
+        order = np.argsort(starts, kind='stable')
+        reach = np.maximum.accumulate(ends[order])
+        gaps = starts[order][1:] - reach[:-1]
+        splits = np.flatnonzero(gaps > min_gap) + 1
+        return [items[group] for group in np.split(order, splits)]
+
+    def _enclosing_box(self, boxes: np.ndarray) -> List[int]:
+        return [int(boxes[:, 0].min()), int(boxes[:, 1].min()), int(boxes[:, 2].max()), int(boxes[:, 3].max())]
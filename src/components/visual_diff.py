@@ -0,0 +1,340 @@
+from difflib import SequenceMatcher
+from typing import Dict, Any, List, Optional, Tuple, Union
+import numpy as np
+from PIL import Image
+
+BOX_KEYS = ('left', 'top', 'right', 'bottom')
+
+# Rows of blocks compared at once in a changed span
+BAND_BLOCKS = 64
+
+class VisualDiff:
+    """
+    Compares two captures of the same page.
+
+    The screenshots are aligned row by row: every pixel row is hashed, runs of
+    identical rows are collapsed into one (hash, length) token, and the two token
+    sequences are diffed like lines of text, so content inserted or removed in the
+    middle of a page shifts what follows instead of making it all look changed. Rows that differ are compared block by block, with one
+    vectorized pass per changed span, and the changed blocks are merged into
+    regions. UI elements are matched across the captures by the IoU of their
+    boxes, after mapping the earlier boxes through the row alignment, or by
+    identical text, and classified as added, removed, changed or unchanged.
+    """
+
+    def __init__(self,
+                 block_size: int = 16,
+                 block_threshold: float = 4.0,
+                 iou_threshold: float = 0.5,
+                 move_tolerance: int = 2):
+        """
+        Args:
+            block_size: Side of the square blocks compared in changed spans, in pixels
+            block_threshold: Mean absolute difference (0-255) above which a block changed
+            iou_threshold: Minimum IoU for elements of the same type to match
+            move_tolerance: Largest edge displacement, in pixels, of an unchanged element
+        """
+        self.block_size = block_size
+        self.block_threshold = block_threshold
+        self.iou_threshold = iou_threshold
+        self.move_tolerance = move_tolerance
+
+    def diff(self,
+             before_image: Union[str, Image.Image, np.ndarray],
+             after_image: Union[str, Image.Image, np.ndarray],
+             before_elements: Optional[List[Dict[str, Any]]] = None,
+             after_elements: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Diff two captures.
+
+        Args:
+            before_image: Earlier screenshot (path, image or H×W×3 array)
+            after_image: Later screenshot
+            before_elements: Described UI elements of the earlier capture (with a pixel
+                'bounding_box' and 'text_content')
+            after_elements: Described UI elements of the later capture
+
+        Returns:
+            Dictionary with the 'dimensions' of both screenshots, the 'alignment'
+            (matching row spans and their vertical offset), the 'changed_regions'
+            with their boxes in either capture, the 'changed_fraction' of the later
+            screenshot, the element changes under 'elements' and a one-line 'summary'
+        """
+        before = self._pixels(before_image)
+        after = self._pixels(after_image)
+
+        # Compare over the common width; a changed width is reported in 'dimensions'
+        width = min(before.shape[1], after.shape[1])
+        opcodes = self._align(before[:, :width], after[:, :width])
+
+        alignment = []
+        regions = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                alignment.append({'before_top': i1, 'after_top': j1, 'height': i2 - i1, 'offset': j1 - i1})
+                continue
+
+            # Rows present on both sides are compared block by block; the rest was added or removed
+            common = min(i2 - i1, j2 - j1)
+            if common:
+                regions.extend(self._changed_blocks(before[i1:i1 + common, :width], after[j1:j1 + common, :width], i1, j1))
+            if j2 - j1 > common:
+                regions.append({'change': 'added', 'before': None,
+                                'after': self._box(0, j1 + common, width, j2)})
+            if i2 - i1 > common:
+                regions.append({'change': 'removed', 'before': self._box(0, i1 + common, width, i2),
+                                'after': None})
+
+        changed_area = sum(self._area(region['after']) for region in regions if region['after'])
+        report = {
+            'dimensions': {
+                'before': {'width': int(before.shape[1]), 'height': int(before.shape[0])},
+                'after': {'width': int(after.shape[1]), 'height': int(after.shape[0])}
+            },
+            'alignment': alignment,
+            'changed_regions': regions,
+            'changed_fraction': round(changed_area / max(1, width * after.shape[0]), 4),
+            'elements': None
+        }
+
+        if before_elements is not None and after_elements is not None:
+            row_map = self._row_map(opcodes, before.shape[0])
+            report['elements'] = self.match_elements(before_elements, after_elements, row_map)
+
+        report['summary'] = self._summary(report)
+        return report
+
+    def match_elements(self,
+                       before_elements: List[Dict[str, Any]],
+                       after_elements: List[Dict[str, Any]],
+                       row_map: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Match UI elements across two captures.
+
+        Args:
+            before_elements: Described UI elements of the earlier capture
+            after_elements: Described UI elements of the later capture
+            row_map: Row of the later screenshot for every row of the earlier one
+
+        Returns:
+            Dictionary with the 'added', 'removed' and 'changed' elements and the
+            number of 'unchanged' ones
+        """
+        before_boxes = self._element_boxes(before_elements)
+        after_boxes = self._element_boxes(after_elements)
+        mapped = before_boxes.copy()
+        if row_map is not None and len(row_map) and len(mapped):
+            mapped[:, 1] = row_map[np.clip(mapped[:, 1], 0, len(row_map) - 1)]
+            mapped[:, 3] = row_map[np.clip(mapped[:, 3] - 1, 0, len(row_map) - 1)] + 1
+
+        before_types = [element.get('type') for element in before_elements]
+        after_types = [element.get('type') for element in after_elements]
+        before_texts = [element.get('text_content') or '' for element in before_elements]
+        after_texts = [element.get('text_content') or '' for element in after_elements]
+
+        # Integer ids for types and texts, so equality is one broadcast comparison
+        ids = {}
+        to_ids = lambda values: np.array([ids.setdefault(value, len(ids)) for value in values], dtype=np.int64)
+        same_type = to_ids(before_types)[:, None] == to_ids(after_types)[None, :]
+        same_text = to_ids(before_texts)[:, None] == to_ids(after_texts)[None, :]
+        has_text = np.array([bool(text) for text in before_texts], dtype=bool)[:, None]
+
+        iou = self._iou_matrix(mapped, after_boxes)
+        candidates = same_type & ((iou >= self.iou_threshold) | (same_text & has_text))
+        scores = iou + same_text
+
+        # Greedy one-to-one assignment, best pairs first
+        pairs = np.argwhere(candidates)
+        pairs = pairs[np.argsort(-scores[candidates], kind='stable')]
+        used_before, used_after = set(), set()
+        changed = []
+        unchanged = 0
+        for b, a in pairs.tolist():
+            if b in used_before or a in used_after:
+                continue
+            used_before.add(b)
+            used_after.add(a)
+
+            changes = []
+            if np.abs(mapped[b] - after_boxes[a]).max() > self.move_tolerance:
+                changes.append('moved' if self._same_size(before_boxes[b], after_boxes[a]) else 'resized')
+            if before_texts[b] != after_texts[a]:
+                changes.append('text')
+            if not changes:
+                unchanged += 1
+                continue
+            changed.append({
+                'type': after_types[a],
+                'changes': changes,
+                'before': self._box(*before_boxes[b]),
+                'after': self._box(*after_boxes[a]),
+                'text_before': before_texts[b],
+                'text_after': after_texts[a]
+            })
+
+        return {
+            'added': [self._element_summary(after_elements[i], after_boxes[i])
+                      for i in range(len(after_elements)) if i not in used_after],
+            'removed': [self._element_summary(before_elements[i], before_boxes[i])
+                        for i in range(len(before_elements)) if i not in used_before],
+            'changed': changed,
+            'unchanged': unchanged
+        }
+
+    def _pixels(self, image: Union[str, Image.Image, np.ndarray]) -> np.ndarray:
+        if isinstance(image, np.ndarray):
+            return image[..., :3]
+        if isinstance(image, str):
+            with Image.open(image) as img:
+                return np.asarray(img.convert('RGB'))
+        return np.asarray(image.convert('RGB'))
+
+    def _align(self, before: np.ndarray, after: np.ndarray) -> List[Tuple[str, int, int, int, int]]:
+        """Diff the rows of two screenshots, returning difflib opcodes in row coordinates."""
+        before_hashes = [hash(row.tobytes()) for row in before]
+        after_hashes = [hash(row.tobytes()) for row in after]
+        before_tokens, before_starts = self._row_runs(before_hashes)
+        after_tokens, after_starts = self._row_runs(after_hashes)
+
+        # Blank and repeated rows are the norm on web pages, so nothing is treated as junk
+        matcher = SequenceMatcher(None, before_tokens, after_tokens, autojunk=False)
+
+        opcodes = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            i1, i2, j1, j2 = before_starts[i1], before_starts[i2], after_starts[j1], after_starts[j2]
+            if tag == 'equal':
+                self._append_opcode(opcodes, 'equal', i1, i2, j1, j2)
+                continue
+
+            # Runs that only changed length still share rows at both ends of the span
+            prefix = 0
+            while i1 + prefix < i2 and j1 + prefix < j2 and before_hashes[i1 + prefix] == after_hashes[j1 + prefix]:
+                prefix += 1
+            suffix = 0
+            while (i2 - suffix > i1 + prefix and j2 - suffix > j1 + prefix and
+                   before_hashes[i2 - suffix - 1] == after_hashes[j2 - suffix - 1]):
+                suffix += 1
+
+            self._append_opcode(opcodes, 'equal', i1, i1 + prefix, j1, j1 + prefix)
+            changed_tag = 'replace' if i2 - suffix > i1 + prefix and j2 - suffix > j1 + prefix else (
+                'delete' if i2 - suffix > i1 + prefix else 'insert')
+            self._append_opcode(opcodes, changed_tag, i1 + prefix, i2 - suffix, j1 + prefix, j2 - suffix)
+            self._append_opcode(opcodes, 'equal', i2 - suffix, i2, j2 - suffix, j2)
+        return opcodes
+
+    def _append_opcode(self, opcodes: List[Tuple], tag: str, i1: int, i2: int, j1: int, j2: int) -> None:
+        """Append an opcode, skipping empty spans and merging contiguous equal spans."""
+        if i1 == i2 and j1 == j2:
+            return
+        if tag == 'equal' and opcodes and opcodes[-1][0] == 'equal' and opcodes[-1][2] == i1 and opcodes[-1][4] == j1:
+            opcodes[-1] = ('equal', opcodes[-1][1], i2, opcodes[-1][3], j2)
+            return
+        opcodes.append((tag, i1, i2, j1, j2))
+
+    def _row_runs(self, hashes: List[int]) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """Collapse runs of identical rows into (row hash, run length) tokens, with the first row of each."""
+        tokens = []
+        starts = []
+        for index, row_hash in enumerate(hashes):
+            if not tokens or row_hash != hashes[index - 1]:
+                tokens.append([row_hash, 0])
+                starts.append(index)
+            tokens[-1][1] += 1
+        starts.append(len(hashes))
+        return [tuple(token) for token in tokens], starts
+
+    def _row_map(self, opcodes: List[Tuple], height: int) -> np.ndarray:
+        """Row of the later screenshot for every row of the earlier one."""
+        row_map = np.zeros(height, dtype=np.int64)
+        for tag, i1, i2, j1, j2 in opcodes:
+            if i2 > i1:
+                # Equal and replaced spans map row by row; removed rows collapse onto their position
+                row_map[i1:i2] = np.minimum(j1 + np.arange(i2 - i1), max(j1, j2 - 1))
+        return row_map
+
+    def _changed_blocks(self, before: np.ndarray, after: np.ndarray, before_top: int, after_top: int) -> List[Dict[str, Any]]:
+        """Compare two equally sized spans block by block and merge changed blocks into regions."""
+        height, width = before.shape[:2]
+        size = self.block_size
+        columns = -(-width // size)
+        column_counts = np.minimum(size, width - np.arange(columns) * size)
+
+        # Mean absolute difference per block, a band of blocks at a time to bound memory
+        band_rows = size * BAND_BLOCKS
+        changed = []
+        for band_top in range(0, height, band_rows):
+            band_height = min(band_rows, height - band_top)
+            rows = -(-band_height // size)
+            difference = np.zeros((rows * size, columns * size), dtype=np.float32)
+            difference[:band_height, :width] = np.abs(
+                before[band_top:band_top + band_height].astype(np.int16) -
+                after[band_top:band_top + band_height].astype(np.int16)).mean(axis=2)
+            block_sums = difference.reshape(rows, size, columns, size).sum(axis=(1, 3))
+            row_counts = np.minimum(size, band_height - np.arange(rows) * size)
+            changed.append(block_sums / (row_counts[:, None] * column_counts[None, :]) > self.block_threshold)
+        changed = np.concatenate(changed)
+
+        regions = []
+        for row_start, row_end in self._runs(changed.any(axis=1)):
+            band = changed[row_start:row_end]
+            for column_start, column_end in self._runs(band.any(axis=0)):
+                # Shrink the box to the block rows that changed in these columns
+                rows_hit = np.flatnonzero(band[:, column_start:column_end].any(axis=1))
+                left, right = column_start * size, min(column_end * size, width)
+                top = (row_start + rows_hit[0]) * size
+                bottom = min((row_start + rows_hit[-1] + 1) * size, height)
+                regions.append({
+                    'change': 'modified',
+                    'before': self._box(left, before_top + top, right, before_top + bottom),
+                    'after': self._box(left, after_top + top, right, after_top + bottom)
+                })
+        return regions
+
+    def _runs(self, mask: np.ndarray) -> List[Tuple[int, int]]:
+        """(start, end) of the runs of True in a 1-D mask."""
+        change = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        return list(zip(np.flatnonzero(change == 1).tolist(), np.flatnonzero(change == -1).tolist()))
+
+    def _element_boxes(self, elements: List[Dict[str, Any]]) -> np.ndarray:
+        boxes = [[(element.get('bounding_box') or {}).get(key, 0) for key in BOX_KEYS] for element in elements]
+        return np.array(boxes, dtype=np.int64).reshape(-1, 4)
+
+    def _iou_matrix(self, boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+        left = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+        top = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+        right = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+        bottom = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+        intersection = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+
+        area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+        area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+        union = area1[:, None] + area2[None, :] - intersection
+        return intersection / np.maximum(union, 1)
+
+    def _same_size(self, box1: np.ndarray, box2: np.ndarray) -> bool:
+        size1 = (box1[2] - box1[0], box1[3] - box1[1])
+        size2 = (box2[2] - box2[0], box2[3] - box2[1])
+        return max(abs(size1[0] - size2[0]), abs(size1[1] - size2[1])) <= self.move_tolerance
+
+    def _element_summary(self, element: Dict[str, Any], box: np.ndarray) -> Dict[str, Any]:
+        return {'type': element.get('type'), 'bounding_box': self._box(*box), 'text': element.get('text_content') or ''}
+
+    def _box(self, left: int, top: int, right: int, bottom: int) -> Dict[str, int]:
+        return dict(zip(BOX_KEYS, (int(left), int(top), int(right), int(bottom))))
+
+    def _area(self, box: Dict[str, int]) -> int:
+        return (box['right'] - box['left']) * (box['bottom'] - box['top'])
+
+    def _summary(self, report: Dict[str, Any]) -> str:
+        regions = report['changed_regions']
+        if not regions:
+            summary = "No visual changes"
+        else:
+            summary = (f"{len(regions)} changed region{'s' if len(regions) != 1 else ''} covering "
+                       f"{report['changed_fraction'] * 100:.1f}% of the page")
+
+        elements = report['elements']
+        if elements is not None:
+            summary += (f"; elements: {len(elements['added'])} added, {len(elements['removed'])} removed, "
+                        f"{len(elements['changed'])} changed, {elements['unchanged']} unchanged")
+        return summary
@@ -1,17 +1,169 @@
 import os
+import zlib
+import struct
 import asyncio
+import time
 import urllib.parse
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List, AsyncIterator
+import numpy as np
+from PIL import Image
 from pyppeteer import launch
 
+from .request_interceptor import RequestInterceptor
+from .asset_cache import AssetCache
+
+# Runs inside the page and resolves once the DOM has stopped mutating, fonts and
+# the images in the viewport have finished loading and no layout shift has
+# occurred for a short window, or once the cap is reached. The signal that was
+# satisfied last is reported as the one that ended the wait.
+READINESS_SCRIPT = '''(opts) => new Promise(resolve => {
+    const start = performance.now();
+    let lastMutation = start;
+    let lastShift = start;
+    let fontsAt = document.fonts ? null : start;
+    let imagesAt = null;
+
+    const mutationObserver = new MutationObserver(() => { lastMutation = performance.now(); });
+    mutationObserver.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+
+    let shiftObserver = null;
+    try {
+        shiftObserver = new PerformanceObserver(list => {
+            if (list.getEntries().length) lastShift = performance.now();
+        });
+        shiftObserver.observe({type: 'layout-shift', buffered: false});
+    } catch (e) {
+        shiftObserver = null;
+    }
+
+    if (document.fonts) {
+        document.fonts.ready.then(() => { fontsAt = performance.now(); });
+    }
+
+    // Lazy and off-screen images may never load before they are scrolled to, so
+    // only images intersecting the viewport are waited for
+    const inViewport = (img) => {
+        const rect = img.getBoundingClientRect();
+        return rect.bottom > 0 && rect.right > 0 &&
+            rect.top < window.innerHeight && rect.left < window.innerWidth;
+    };
+    const imagesComplete = () => Array.from(document.images).every(
+        img => img.complete || img.loading === 'lazy' || !inViewport(img));
+
+    let timer = null;
+    const finish = (signal) => {
+        clearInterval(timer);
+        mutationObserver.disconnect();
+        if (shiftObserver) shiftObserver.disconnect();
+        resolve({
+            signal: signal,
+            elapsed: Math.round(performance.now() - start),
+            fonts_ready: fontsAt !== null,
+            images_ready: imagesComplete()
+        });
+    };
+
+    timer = setInterval(() => {
+        const now = performance.now();
+        if (imagesAt === null && imagesComplete()) imagesAt = now;
+        if (now - start >= opts.maxWait) return finish('max_wait');
+        if (fontsAt === null || imagesAt === null) return;
+
+        const satisfiedAt = {
+            fonts: fontsAt,
+            images: imagesAt,
+            dom_quiescence: lastMutation + opts.quietWindow,
+            layout_stable: lastShift + opts.shiftWindow
+        };
+        if (satisfiedAt.dom_quiescence > now || satisfiedAt.layout_stable > now) return;
+
+        let signal = 'fonts';
+        for (const name of Object.keys(satisfiedAt)) {
+            if (satisfiedAt[name] > satisfiedAt[signal]) signal = name;
+        }
+        finish(signal);
+    }, opts.pollInterval);
+})'''
+
+# Hides fixed and sticky elements so headers and banners appear only in the first tile
+HIDE_FIXED_ELEMENTS_SCRIPT = '''() => {
+    for (const el of document.querySelectorAll('body *')) {
+        const position = getComputedStyle(el).position;
+        if (position === 'fixed' || position === 'sticky') {
+            el.style.setProperty('visibility', 'hidden', 'important');
+        }
+    }
+}'''
+
+# Scrolls to a position and resolves after two animation frames so lazy content can paint
+SCROLL_SCRIPT = '''(y) => new Promise(resolve => {
+    window.scrollTo(0, y);
+    requestAnimationFrame(() => requestAnimationFrame(() => resolve({
+        scroll_y: Math.round(window.scrollY),
+        height: document.documentElement.scrollHeight
+    })));
+})'''
+
+# Serializes the element tree as one 'depth:tag.class' line per element. Scripts and
+# generated class names (containing digits) are left out so the signature reflects
+# the page structure rather than per-request noise.
+DOM_SIGNATURE_SCRIPT = '''(maxNodes) => {
+    const skipped = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'LINK', 'META']);
+    const lines = [];
+    const walk = (el, depth) => {
+        if (lines.length >= maxNodes || skipped.has(el.tagName)) return;
+        const classes = Array.from(el.classList).filter(c => !/\\d/.test(c)).sort();
+        lines.push(depth + ':' + el.tagName.toLowerCase() + (classes.length ? '.' + classes.join('.') : ''));
+        for (const child of el.children) walk(child, depth + 1);
+    };
+    walk(document.body || document.documentElement, 0);
+    return lines.join('\\n');
+}'''
+
+# Lists the visible text nodes of the page as [top, bottom, text] in document
+# coordinates, so text changes can be located even when they barely change pixels
+TEXT_LAYOUT_SCRIPT = '''(maxNodes) => {
+    const skipped = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+    const root = document.body || document.documentElement;
+    const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+    const range = document.createRange();
+    const nodes = [];
+    while (nodes.length < maxNodes && walker.nextNode()) {
+        const node = walker.currentNode;
+        const text = node.textContent.trim();
+        if (!text || (node.parentElement && skipped.has(node.parentElement.tagName))) continue;
+        range.selectNodeContents(node);
+        const rect = range.getBoundingClientRect();
+        if (!rect.width || !rect.height) continue;
+        nodes.push([Math.round(rect.top + window.scrollY), Math.round(rect.bottom + window.scrollY), text]);
+    }
+    return {height: document.documentElement.scrollHeight, nodes: nodes};
+}'''
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def _write_png_chunk(f, chunk_type: bytes, data: bytes) -> None:
+    """Write a PNG chunk: length, type, data and the CRC of type and data."""
+    f.write(struct.pack('>I', len(data)) + chunk_type + data)
+    f.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
+
 class WebpageRenderer:
-    async def capture_screenshot(self, url: str, output_path: str = None, config: Dict[str, Any] = None) -> Dict[str, Any]:
+    def __init__(self):
+        # Asset caches are shared by every page rendered by this instance
+        self._asset_caches = {}
+    
+    async def capture_screenshot(self,
+                                 url: str,
+                                 output_path: str = None,
+                                 config: Dict[str, Any] = None,
+                                 on_tile: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         # Parse the configuration settings
         if config is None:
             config = {}
         
-        wait_time = config.get('wait_time', 2)
         device_type = config.get('device', 'desktop')
         viewport = config.get('viewport', {'width': 1920, 'height': 1080})
         
@@ -28,9 +180,13 @@ class WebpageRenderer:
             # Ensure the directory exists
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        # Docker-compatible launch options
+        # Docker-compatible launch options. Pages may render on worker threads, where
+        # signal handlers cannot be installed; the browser is closed below instead.
         browser = await launch({
             'headless': True,
+            'handleSIGINT': False,
+            'handleSIGTERM': False,
+            'handleSIGHUP': False,
             'args': [
                 '--no-sandbox',
                 '--disable-setuid-sandbox',
@@ -45,7 +201,15 @@ class WebpageRenderer:
         
         page = await browser.newPage()
         
+        # Block ads, trackers and heavy media that do not affect the layout
+        interceptor = RequestInterceptor(
+            config.get('interception', {}),
+            asset_cache=self._get_asset_cache(config.get('asset_cache', {}))
+        )
+        
         try:
+            await interceptor.attach(page)
+            
             # Set viewport based on configuration
             await page.setViewport({
                 'width': viewport['width'],
@@ -55,12 +219,8 @@ class WebpageRenderer:
                 'hasTouch': device_type.lower() == 'mobile'
             })
             
-            # Navigate to URL with timeout and wait until parameter
-            await page.goto(url, {'waitUntil': 'networkidle0', 'timeout': 60000})
-            
-            # Optional wait for dynamic content
-            if wait_time > 0:
-                await asyncio.sleep(wait_time)
+            # Navigate and wait until the page is ready to be captured
+            readiness = await self._wait_for_page_ready(page, url, config)
             
             # Get page dimensions for full screenshot
             page_dimensions = await page.evaluate('''() => {
@@ -70,14 +230,34 @@ class WebpageRenderer:
                 }
             }''')
             
-            # Update viewport to match page dimensions for full screenshot
-            await page.setViewport({
-                'width': page_dimensions['width'],
-                'height': page_dimensions['height']
-            })
+            tiles = None
+            screenshot_path = output_path
             
-            # Take screenshot
-            await page.screenshot({'path': output_path, 'fullPage': True})
+            if config.get('capture_mode', 'full') == 'tiled':
+                # Capture viewport by viewport and hand each tile over as soon as it exists
+                tiles = []
+                async for tile in self._capture_tiles(page, output_path, viewport, config):
+                    tiles.append(tile)
+                    if on_tile is not None:
+                        on_tile(tile)
+                
+                page_dimensions = {
+                    'width': page_dimensions['width'],
+                    'height': sum(tile['height'] for tile in tiles)
+                }
+                if config.get('stitch', False):
+                    self.stitch_tiles(tiles, output_path)
+                else:
+                    screenshot_path = None
+            else:
+                # Update viewport to match page dimensions for full screenshot
+                await page.setViewport({
+                    'width': page_dimensions['width'],
+                    'height': page_dimensions['height']
+                })
+                
+                # Take screenshot
+                await page.screenshot({'path': output_path, 'fullPage': True})
             
             # Collect page metadata
             page_title = await page.title()
@@ -103,19 +283,235 @@ class WebpageRenderer:
                 }
             }''')
             
-            return {
-                'screenshot_path': output_path,
+            # Structural fingerprint of the DOM, used for change and template detection
+            dom_signature = await page.evaluate(
+                DOM_SIGNATURE_SCRIPT, config.get('dom_signature_max_nodes', 5000))
+            text_layout = await page.evaluate(
+                TEXT_LAYOUT_SCRIPT, config.get('dom_signature_max_nodes', 5000))
+            
+            results = {
+                'screenshot_path': screenshot_path,
                 'page_title': page_title,
                 'page_dimensions': page_dimensions,
                 'page_metadata': page_metadata,
-                'page_info': page_info
+                'page_info': page_info,
+                'dom_signature': dom_signature,
+                'text_layout': text_layout,
+                'readiness': readiness,
+                'request_stats': interceptor.get_stats()
             }
+            if tiles is not None:
+                results['tiles'] = tiles
+            
+            return results
         finally:
             await browser.close()
     
-    def render_webpage(self, url: str, output_path: str = None, config: Dict[str, Any] = None) -> Dict[str, Any]:
-        return asyncio.get_event_loop().run_until_complete(
-            self.capture_screenshot(url, output_path, config)
+    async def _wait_for_page_ready(self, page, url: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Navigate to the URL and wait until the page is ready for capture.
+        
+        The 'adaptive' strategy (default) navigates until DOMContentLoaded and then
+        waits in the page for DOM mutation quiescence, font and image load completion
+        and a layout-shift settle window, capped at `max_wait` seconds. The 'fixed'
+        strategy keeps the previous behaviour of waiting for networkidle0 followed
+        by a flat `wait_time` sleep.
+        
+        Args:
+            page: The pyppeteer page to navigate
+            url: The URL to load
+            config: Screenshot configuration
+        
+        Returns:
+            Dictionary describing which signal ended the wait and how long it took
+        """
+        strategy = config.get('wait_strategy', 'adaptive')
+        navigation_timeout = int(config.get('navigation_timeout', 60) * 1000)
+        start = time.monotonic()
+        
+        if strategy == 'fixed':
+            wait_time = config.get('wait_time', 2)
+            await page.goto(url, {'waitUntil': 'networkidle0', 'timeout': navigation_timeout})
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            return {
+                'strategy': strategy,
+                'signal': 'fixed_delay',
+                'elapsed': round((time.monotonic() - start) * 1000)
+            }
+        
+        if strategy != 'adaptive':
+            raise ValueError(f"Unknown wait strategy: {strategy}")
+        
+        max_wait = config.get('max_wait', 10)
+        await page.goto(url, {'waitUntil': 'domcontentloaded', 'timeout': navigation_timeout})
+        
+        options = {
+            'maxWait': max(0, max_wait * 1000 - (time.monotonic() - start) * 1000),
+            'quietWindow': config.get('quiet_window', 500),
+            'shiftWindow': config.get('layout_shift_window', 300),
+            'pollInterval': config.get('poll_interval', 50)
+        }
+        
+        try:
+            # Guard against the page never resolving the promise (e.g. a frozen tab)
+            readiness = await asyncio.wait_for(
+                page.evaluate(READINESS_SCRIPT, options),
+                timeout=max_wait + 5
+            )
+        except asyncio.TimeoutError:
+            readiness = {'signal': 'timeout'}
+        
+        readiness['strategy'] = strategy
+        readiness['elapsed'] = round((time.monotonic() - start) * 1000)
+        return readiness
+    
+    async def _capture_tiles(self,
+                             page,
+                             output_path: str,
+                             viewport: Dict[str, int],
+                             config: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Scroll through the page one viewport at a time and save each view as a tile.
+        
+        Tiles are cropped so that they are exactly adjacent, even when the last scroll
+        position is clamped by the browser. Capture stops at the end of the document or
+        at `max_height` pixels, whichever comes first, so pages that keep growing while
+        scrolled (infinite scroll) are bounded.
+        
+        Args:
+            page: The pyppeteer page to capture
+            output_path: Path of the full screenshot; tiles are written next to it
+            viewport: Viewport size used for every tile
+            config: Screenshot configuration
+        
+        Yields:
+            Dictionary with the tile index, path, top offset and height in page pixels
+        """
+        max_height = config.get('max_height', 20000)
+        tile_height = viewport['height']
+        base_path = os.path.splitext(output_path)[0]
+        
+        top = 0
+        index = 0
+        page_height = tile_height
+        
+        while top < min(page_height, max_height):
+            position = await page.evaluate(SCROLL_SCRIPT, top)
+            page_height = position['height']
+            
+            tile_path = f"{base_path}_tile_{index:04d}.png"
+            await page.screenshot({'path': tile_path})
+            
+            # The browser clamps scrolling at the bottom, so skip rows already captured
+            crop_top = max(0, top - position['scroll_y'])
+            height = min(tile_height - crop_top, page_height - top, max_height - top)
+            if height <= 0:
+                os.remove(tile_path)
+                break
+            
+            if crop_top or height < tile_height:
+                with Image.open(tile_path) as tile_image:
+                    cropped = tile_image.crop((0, crop_top, tile_image.width, crop_top + height))
+                cropped.save(tile_path)
+            
+            yield {
+                'index': index,
+                'path': tile_path,
+                'top': top,
+                'height': height
+            }
+            
+            if index == 0:
+                await page.evaluate(HIDE_FIXED_ELEMENTS_SCRIPT)
+            
+            top += height
+            index += 1
+    
+    def stitch_tiles(self, tiles: List[Dict[str, Any]], output_path: str) -> str:
+        """
+        Stitch captured tiles into a single PNG image.
+        
+        The image is encoded strip by strip as the tiles are read, one tile at a
+        time, so peak memory is one tile however tall the page is.
+        
+        Args:
+            tiles: Tiles as yielded by the tiled capture, in order
+            output_path: Where to save the stitched image
+        
+        Returns:
+            The path of the stitched image
+        """
+        if not tiles:
+            raise ValueError("No tiles to stitch")
+        
+        # Opening an image only reads its header
+        sizes = []
+        for tile in tiles:
+            with Image.open(tile['path']) as tile_image:
+                sizes.append(tile_image.size)
+        width = sizes[0][0]
+        height = sum(tile_height for _, tile_height in sizes)
+        
+        compressor = zlib.compressobj(6)
+        previous = np.zeros(width * 3, dtype=np.uint8)
+        with open(output_path, 'wb') as f:
+            f.write(PNG_SIGNATURE)
+            _write_png_chunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            for tile in tiles:
+                with Image.open(tile['path']) as tile_image:
+                    strip = tile_image.convert('RGB')
+                if strip.width != width:
+                    padded = Image.new('RGB', (width, strip.height))
+                    padded.paste(strip, (0, 0))
+                    strip = padded
+                rows = np.asarray(strip).reshape(strip.height, width * 3)
+                
+                # 'Up' filter: every row is stored as its difference to the row above
+                filtered = np.empty((len(rows), width * 3 + 1), dtype=np.uint8)
+                filtered[:, 0] = 2
+                filtered[0, 1:] = rows[0] - previous
+                filtered[1:, 1:] = rows[1:] - rows[:-1]
+                previous = rows[-1].copy()
+                
+                data = compressor.compress(filtered.tobytes())
+                if data:
+                    _write_png_chunk(f, b'IDAT', data)
+            _write_png_chunk(f, b'IDAT', compressor.flush())
+            _write_png_chunk(f, b'IEND', b'')
+        
+        return output_path
+    
+    def _get_asset_cache(self, cache_config: Dict[str, Any]) -> Optional[AssetCache]:
+        """Return the shared asset cache for the configured directory, if enabled."""
+        if not cache_config.get('enabled', False):
+            return None
+        
+        cache_dir = os.path.abspath(
+            cache_config.get('directory', os.path.join(os.getcwd(), '.cache', 'assets')))
+        if cache_dir not in self._asset_caches:
+            self._asset_caches[cache_dir] = AssetCache(
+                cache_dir=cache_dir,
+                max_size_mb=cache_config.get('max_size_mb', 512),
+                max_entry_size_mb=cache_config.get('max_entry_size_mb', 16),
+                cacheable_types=cache_config.get('resource_types'),
+                default_ttl=cache_config.get('default_ttl', 3600)
+            )
+        return self._asset_caches[cache_dir]
+    
+    def render_webpage(self,
+                       url: str,
+                       output_path: str = None,
+                       config: Dict[str, Any] = None,
+                       on_tile: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            # No loop left in this thread (e.g. after asyncio.run), so create one
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+        return loop.run_until_complete(
+            self.capture_screenshot(url, output_path, config, on_tile)
         )
     
     def _extract_domain(self, url: str) -> str:
@@ -0,0 +1,410 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+from .serialization import dumps_json
+
+class WorkQueue(ABC):
+    """
+    Interface for a queue of URL jobs shared by a coordinator and its workers.
+
+    A worker claims a job with a lease that it extends with heartbeats while it
+    works. A job whose lease runs out, because its worker died or hung, is handed
+    to the next worker that claims one. Every claim counts as an attempt; a job
+    that fails or is abandoned on its last attempt is marked failed. Completing,
+    failing or extending a job only succeeds for the claim currently holding it,
+    so a worker that lost its lease cannot overwrite the outcome of the next one.
+    """
+
+    @abstractmethod
+    def enqueue(self, urls: Iterable[str], payload: Optional[Dict[str, Any]] = None) -> int:
+        ...
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, job: Dict[str, Any], lease_seconds: float) -> bool:
+        ...
+
+    @abstractmethod
+    def complete(self, job: Dict[str, Any], result: Optional[Dict[str, Any]] = None) -> bool:
+        ...
+
+    @abstractmethod
+    def fail(self, job: Dict[str, Any], error: str) -> bool:
+        ...
+
+    @abstractmethod
+    def release(self, job: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    def jobs(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+JOB_STATUSES = ('queued', 'leased', 'done', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    payload TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_url ON jobs(url);
+"""
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work queue backed by a SQLite database.
+
+    Claims run in IMMEDIATE transactions, so workers in any number of processes
+    sharing the database file never claim the same job twice. SQLite needs a file
+    system with working locks: it serves workers on one host, or on hosts sharing
+    a volume that supports them. Lease expiry compares wall-clock times, so the
+    clocks of the hosts must agree to well within `lease_seconds`.
+    """
+
+    def __init__(self, db_path: str = None, max_attempts: int = 3, busy_timeout: float = 30.0):
+        """
+        Args:
+            db_path: Path to the database file
+            max_attempts: Claims of a job before it is marked failed
+            busy_timeout: Seconds to wait for another process's transaction
+        """
+        if db_path is None:
+            db_path = os.path.join(os.getcwd(), 'output', 'queue.db')
+        if max_attempts < 1:
+            raise ValueError("A job needs at least one attempt")
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        # Autocommit mode; transactions are started explicitly
+        self.conn = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def enqueue(self, urls: Iterable[str], payload: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Add a job per URL; URLs with a job still queued or leased are skipped.
+
+        Args:
+            urls: The URLs to process
+            payload: Options handed to the worker with every job
+
+        Returns:
+            Number of jobs added
+        """
+        encoded = dumps_json(payload or {})
+        now = time.time()
+        with self._transaction():
+            active = {row['url'] for row in self.conn.execute(
+                "SELECT url FROM jobs WHERE status IN ('queued', 'leased')")}
+            rows = []
+            for url in urls:
+                if url not in active:
+                    active.add(url)
+                    rows.append((url, encoded, 'queued', self.max_attempts, now))
+            self.conn.executemany(
+                'INSERT INTO jobs (url, payload, status, max_attempts, enqueued_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+        return len(rows)
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest available job, including jobs whose lease has expired.
+
+        Jobs with fewer attempts come first, so retries wait behind fresh work.
+
+        Returns:
+            The job with its 'id', 'url', 'payload', 'attempt' and 'lease_token',
+            or None when no job is available
+        """
+        now = time.time()
+        with self._transaction():
+            # Jobs abandoned on their last attempt are not handed out again
+            self.conn.execute(
+                '''UPDATE jobs SET status = 'failed', finished_at = ?, lease_token = NULL,
+                                   error = COALESCE(error, 'Lease expired')
+                   WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts''',
+                (now, now)
+            )
+            row = self.conn.execute(
+                '''SELECT id, url, payload, attempts FROM jobs
+                   WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY attempts, id LIMIT 1''',
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            token = uuid.uuid4().hex
+            self.conn.execute(
+                '''UPDATE jobs SET status = 'leased', worker = ?, lease_token = ?, lease_expires = ?,
+                                   attempts = attempts + 1
+                   WHERE id = ?''',
+                (worker_id, token, now + lease_seconds, row['id'])
+            )
+        return {
+            'id': row['id'],
+            'url': row['url'],
+            'payload': json.loads(row['payload'] or '{}'),
+            'attempt': row['attempts'] + 1,
+            'worker': worker_id,
+            'lease_token': token
+        }
+
+    def heartbeat(self, job: Dict[str, Any], lease_seconds: float) -> bool:
+        """Extend the lease of a job; False when the lease was lost."""
+        return self._update_leased(job, 'UPDATE jobs SET lease_expires = ?', (time.time() + lease_seconds,))
+
+    def complete(self, job: Dict[str, Any], result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark a job done; False (and nothing changes) when the lease was lost."""
+        return self._update_leased(
+            job,
+            "UPDATE jobs SET status = 'done', finished_at = ?, lease_token = NULL, error = NULL, result = ?",
+            (time.time(), dumps_json(result) if result is not None else None)
+        )
+
+    def fail(self, job: Dict[str, Any], error: str) -> bool:
+        """Record a failed attempt; the job is queued again unless it was the last one."""
+        return self._update_leased(
+            job,
+            '''UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                               finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE NULL END,
+                               lease_token = NULL, error = ?''',
+            (time.time(), error)
+        )
+
+    def release(self, job: Dict[str, Any]) -> bool:
+        """Give a job back without counting the attempt (when a worker shuts down)."""
+        return self._update_leased(
+            job, "UPDATE jobs SET status = 'queued', lease_token = NULL, attempts = attempts - 1", ()
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of jobs per status."""
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        with self._lock:
+            for row in self.conn.execute('SELECT status, COUNT(*) AS count FROM jobs GROUP BY status'):
+                counts[row['status']] = row['count']
+        return counts
+
+    def jobs(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return jobs, optionally of one status, in the order they were enqueued."""
+        query = '''SELECT id, url, status, attempts, max_attempts, worker, lease_expires,
+                          enqueued_at, finished_at, error, result FROM jobs'''
+        params = ()
+        if status is not None:
+            query += ' WHERE status = ?'
+            params = (status,)
+        with self._lock:
+            rows = self.conn.execute(query + ' ORDER BY id LIMIT ?', params + (limit,)).fetchall()
+
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job['result'] = json.loads(job['result']) if job['result'] else None
+            jobs.append(job)
+        return jobs
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def _update_leased(self, job: Dict[str, Any], statement: str, params: tuple) -> bool:
+        with self._transaction():
+            cursor = self.conn.execute(
+                statement + " WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                params + (job['id'], job['lease_token'])
+            )
+        return cursor.rowcount == 1
+
+    def _transaction(self):
+        return _ImmediateTransaction(self.conn, self._lock)
+
+class _ImmediateTransaction:
+    """Holds the connection lock and a write lock on the database for a block."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.conn.execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.conn.execute('ROLLBACK' if exc_type is not None else 'COMMIT')
+        finally:
+            self.lock.release()
+
+class QueueWorker:
+    """
+    Claims jobs from a work queue and processes them one at a time.
+
+    Jobs are processed on the calling thread while a background thread renews
+    the lease every `heartbeat_interval` seconds. If a renewal fails, the job has
+    been handed to another worker; the result of this worker is then dropped.
+    """
+
+    def __init__(self,
+                 queue: WorkQueue,
+                 process: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 worker_id: Optional[str] = None,
+                 lease_seconds: float = 300.0,
+                 heartbeat_interval: Optional[float] = None,
+                 poll_interval: float = 1.0):
+        """
+        Args:
+            queue: The work queue
+            process: Called with each job; returns a result dictionary, which fails
+                the attempt when it holds an 'error'
+            worker_id: Name of the worker (defaults to host name and process ID)
+            lease_seconds: Time a job stays leased without a heartbeat
+            heartbeat_interval: Seconds between heartbeats (defaults to a third of
+                the lease)
+            poll_interval: Seconds to wait before claiming again when the queue is empty
+        """
+        if heartbeat_interval is None:
+            heartbeat_interval = lease_seconds / 3
+        if heartbeat_interval >= lease_seconds:
+            raise ValueError("Heartbeats must come more often than the lease expires")
+
+        self.queue = queue
+        self.process = process
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+
+    def run(self, max_jobs: Optional[int] = None, idle_timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        Process jobs until stopped.
+
+        Args:
+            max_jobs: Stop after this many jobs (None for no limit)
+            idle_timeout: Stop after the queue has been empty this many seconds
+                (None to wait for jobs indefinitely)
+
+        Returns:
+            Number of jobs 'completed', 'failed' and 'lost' (leases taken over by
+            another worker)
+        """
+        counts = {'completed': 0, 'failed': 0, 'lost': 0}
+        idle_since = time.monotonic()
+        while max_jobs is None or sum(counts.values()) < max_jobs:
+            job = self.queue.claim(self.worker_id, self.lease_seconds)
+            if job is None:
+                if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+
+            counts[self.run_job(job)] += 1
+            idle_since = time.monotonic()
+        return counts
+
+    def run_job(self, job: Dict[str, Any]) -> str:
+        """Process one claimed job; returns 'completed', 'failed' or 'lost'."""
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat_interval):
+                if not self.queue.heartbeat(job, self.lease_seconds):
+                    lost.set()
+                    return
+
+        heartbeat = threading.Thread(target=beat, name=f"heartbeat-{job['id']}", daemon=True)
+        heartbeat.start()
+        try:
+            try:
+                result = self.process(job)
+                error = result.get('error') if isinstance(result, dict) else None
+            except Exception as e:
+                result, error = None, str(e)
+            except BaseException:
+                # Interrupted: hand the job to another worker without using up an attempt
+                stop.set()
+                heartbeat.join()
+                self.queue.release(job)
+                raise
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if lost.is_set():
+            # Reported in the counts of run(); the job belongs to another worker now
+            return 'lost'
+        if error is not None:
+            return 'failed' if self.queue.fail(job, error) else 'lost'
+        return 'completed' if self.queue.complete(job, result) else 'lost'
+
+# Available backends, selected with queue.backend in the configuration
+WORK_QUEUE_BACKENDS = {
+    'sqlite': SQLiteWorkQueue
+}
+
+def create_work_queue(queue_config: Dict[str, Any]) -> WorkQueue:
+    """
+    Create the work queue described by the `queue` config section.
+
+    Args:
+        queue_config: Configuration with 'backend', 'path' and 'max_attempts'
+
+    Returns:
+        The work queue
+    """
+    backend = queue_config.get('backend', 'sqlite')
+    if backend not in WORK_QUEUE_BACKENDS:
+        raise ValueError(f"Unknown work queue backend: {backend}")
+
+    return WORK_QUEUE_BACKENDS[backend](
+        queue_config.get('path'),
+        max_attempts=queue_config.get('max_attempts', 3)
+    )
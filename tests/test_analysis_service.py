@@ -0,0 +1,78 @@
+import os
+import pytest
+import numpy as np
+from PIL import Image
+from src.components.analysis_service import AnalysisService, resource, _worker_pid
+from src.components.pixel_buffer import SharedPixelBuffer
+
+@pytest.fixture
+def screenshot_paths(tmp_path):
+    paths = []
+    for index, color in enumerate([(20, 40, 60), (200, 30, 30)]):
+        pixels = np.full((400, 200, 3), 255, dtype=np.uint8)
+        pixels[:100] = color
+        path = str(tmp_path / f"page{index}.png")
+        Image.fromarray(pixels).save(path)
+        paths.append(path)
+    return paths
+
+def _allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+def test_analysis_service_results(screenshot_paths):
+    with AnalysisService(workers=2) as service:
+        futures = [service.submit(path) for path in screenshot_paths]
+        results = [future.result(timeout=120) for future in futures]
+        mapped = list(service.map(screenshot_paths * 2))
+    
+    assert [{color['hex'] for color in result['color_palette']} for result in results] == [
+        {'#ffffff', '#14283c'}, {'#ffffff', '#c81e1e'}]
+    assert results[0]['image_dimensions'] == {'width': 200, 'height': 400}
+    assert results[0]['ui_elements']
+    
+    # map() yields in submission order
+    assert [{color['hex'] for color in result['color_palette']} for result in mapped] == [
+        {'#ffffff', '#14283c'}, {'#ffffff', '#c81e1e'}] * 2
+
+def test_analysis_service_shared_buffer(screenshot_paths):
+    text_blocks = [{'text': 'word', 'bounding_box': [(10, 20), (60, 20), (60, 40), (10, 40)]}]
+    with AnalysisService(workers=1) as service, SharedPixelBuffer.from_image(screenshot_paths[0]) as buffer:
+        result = service.submit(buffer, text_blocks=text_blocks).result(timeout=120)
+    
+    assert {color['hex'] for color in result['color_palette']} == {'#ffffff', '#14283c'}
+    assert result['image_dimensions'] == {'width': 200, 'height': 400}
+    # The contrast audit reads the shared pixels in the worker
+    assert result['contrast']['checked'] == 1
+
+def test_analysis_service_warm_up_reaches_every_worker():
+    with AnalysisService(workers=3, max_tasks_per_worker=1) as service:
+        pids = service.warm_up()
+        # Warm-up tasks do not count towards recycling
+        assert service.warm_up() == pids
+    
+    assert len(pids) == 3
+
+def test_analysis_service_recycles_workers():
+    with AnalysisService(workers=1, max_tasks_per_worker=2) as service:
+        first = [service._submit(_worker_pid, 0).result(timeout=120) for _ in range(2)]
+        second = service._submit(_worker_pid, 0).result(timeout=120)
+    
+    assert first[0] == first[1]
+    assert second != first[0]
+
+@pytest.mark.skipif(resource is None, reason="memory limits need the resource module")
+def test_analysis_service_memory_limit():
+    with AnalysisService(workers=1, memory_limit_mb=2048) as service:
+        with pytest.raises(MemoryError):
+            service._submit(_allocate, 4096).result(timeout=120)
+        # The worker survives its failed task
+        assert service._submit(_allocate, 16).result(timeout=120) == 16 * 1024 * 1024
+
+def test_analysis_service_shutdown(screenshot_paths):
+    service = AnalysisService(workers=1)
+    service.shutdown()
+    
+    with pytest.raises(RuntimeError):
+        service.submit(screenshot_paths[0])
+    with pytest.raises(ValueError):
+        AnalysisService(workers=0)
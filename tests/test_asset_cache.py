@@ -0,0 +1,95 @@
+import pytest
+import os
+import json
+from src.components.asset_cache import AssetCache, freshness_lifetime
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "assets")
+
+def test_store_and_lookup(cache_dir):
+    cache = AssetCache(cache_dir=cache_dir)
+    url = 'https://example.com/static/app.css'
+    
+    assert cache.lookup(url) is None
+    
+    stored = cache.store(url, 200, {'content-type': 'text/css', 'set-cookie': 'a=b'}, b'body{}')
+    assert stored == True
+    
+    entry = cache.lookup(url)
+    assert entry['status'] == 200
+    assert entry['body'] == b'body{}'
+    # Only replayable headers are kept
+    assert entry['headers'] == {'content-type': 'text/css'}
+
+def test_cache_shared_between_instances(cache_dir):
+    url = 'https://example.com/font.woff2'
+    AssetCache(cache_dir=cache_dir).store(url, 200, {}, b'\x00\x01font')
+    
+    other = AssetCache(cache_dir=cache_dir)
+    assert other.lookup(url)['body'] == b'\x00\x01font'
+    assert other.size() > 0
+
+def test_is_cacheable(cache_dir):
+    cache = AssetCache(cache_dir=cache_dir)
+    
+    assert cache.is_cacheable('stylesheet') == True
+    assert cache.is_cacheable('document') == False
+    assert cache.is_cacheable('script', status=404) == False
+    assert cache.is_cacheable('script', headers={'cache-control': 'no-store'}) == False
+    assert cache.is_cacheable('image', headers={'cache-control': 'private, max-age=60'}) == False
+
+def test_store_skips_oversized_entries(cache_dir):
+    cache = AssetCache(cache_dir=cache_dir, max_entry_size_mb=0.001)
+    assert cache.store('https://example.com/big.js', 200, {}, b'x' * 2048) == False
+    assert cache.lookup('https://example.com/big.js') is None
+
+def test_eviction_keeps_cache_under_cap(cache_dir):
+    # 4 KB cap; each entry is about 1 KB
+    cache = AssetCache(cache_dir=cache_dir, max_size_mb=4 / 1024)
+    
+    for i in range(10):
+        path_url = f'https://example.com/img{i}.png'
+        cache.store(path_url, 200, {}, b'x' * 1000)
+        # Make access order deterministic for LRU eviction
+        entry_path = cache._entry_path(path_url)
+        os.utime(entry_path, (i, i))
+    
+    assert cache.size() <= 4 * 1024
+    assert cache.lookup('https://example.com/img9.png') is not None
+    assert cache.lookup('https://example.com/img0.png') is None
+
+def test_entries_expire_by_response_headers(cache_dir):
+    cache = AssetCache(cache_dir=cache_dir, default_ttl=60)
+    url = 'https://example.com/app.js'
+    
+    assert cache.store(url, 200, {'cache-control': 'public, max-age=0'}, b'v1') == False
+    assert cache.store(url, 200, {'Cache-Control': 'no-cache'}, b'v1') == False
+    assert cache.store(url, 200, {'expires': 'Thu, 01 Jan 1970 00:00:00 GMT'}, b'v1') == False
+    assert cache.lookup(url) is None
+    
+    assert cache.store(url, 200, {'cache-control': 'max-age=1'}, b'v1') == True
+    assert cache.lookup(url)['body'] == b'v1'
+    
+    # Once expired, the entry is evicted and the asset fetched again
+    entry_path = cache._entry_path(url)
+    with open(entry_path, 'rb') as f:
+        data = f.read()
+    header_length = int.from_bytes(data[:4], 'big')
+    header = json.loads(data[4:4 + header_length])
+    header['expires_at'] -= 2
+    encoded = json.dumps(header).encode('utf-8')
+    with open(entry_path, 'wb') as f:
+        f.write(len(encoded).to_bytes(4, 'big') + encoded + data[4 + header_length:])
+    assert cache.lookup(url) is None
+    assert not os.path.exists(entry_path)
+
+def test_freshness_lifetime():
+    now = 1_700_000_000
+    date = 'Tue, 14 Nov 2023 22:13:20 GMT'
+    assert freshness_lifetime({'cache-control': 'max-age=600, s-maxage=30'}, 3600, now) == 30
+    assert freshness_lifetime({'expires': 'Tue, 14 Nov 2023 23:13:20 GMT', 'date': date}, 60, now) == 3600
+    assert freshness_lifetime({'expires': 'garbage'}, 60, now) == 0
+    assert freshness_lifetime({'last-modified': 'Tue, 14 Nov 2023 12:13:20 GMT', 'date': date}, 86400, now) == 3600
+    assert freshness_lifetime({}, 60, now) == 60
+    assert freshness_lifetime({'cache-control': 'private, max-age=600'}, 60, now) == 0
@@ -0,0 +1,69 @@
+import pytest
+from src.components.batch_journal import BatchJournal
+
+def test_state_is_replayed_from_the_journal(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = BatchJournal(path)
+    journal.start('https://a.example/')
+    journal.stage('https://a.example/', 'render', 'ran', {'screenshot': 'f00d'})
+    digest = journal.complete('https://a.example/', {'url': 'https://a.example/', 'textual_description': 'A'})
+    journal.start('https://b.example/')
+    journal.stage('https://b.example/', 'render', 'ran', {'screenshot': 'beef'})
+    journal.stage('https://b.example/', 'ocr', 'failed', {})
+    journal.fail('https://b.example/', 'quota exceeded', stage='ocr')
+    journal.start('https://c.example/')
+    journal.close()
+
+    resumed = BatchJournal(path)
+    a = resumed.page('https://a.example/')
+    assert a['status'] == 'done' and a['attempts'] == 1 and a['results'] == digest
+    assert resumed.get_artifact(digest)['textual_description'] == 'A'
+
+    b = resumed.page('https://b.example/')
+    assert b['status'] == 'failed' and b['stage'] == 'ocr' and b['error'] == 'quota exceeded'
+    assert b['stages'] == {'render': {'screenshot': 'beef'}}
+    # An attempt without an outcome was interrupted
+    assert resumed.page('https://c.example/')['status'] == 'running'
+    assert resumed.page('https://d.example/')['status'] == 'pending'
+
+    assert resumed.start('https://b.example/') == 2
+    assert resumed.page('https://b.example/')['stages'] == {}
+    resumed.close()
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = BatchJournal(str(path))
+    journal.start('https://a.example/')
+    journal.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"event": "done", "url": "https://a.exa')
+
+    resumed = BatchJournal(str(path))
+    assert resumed.page('https://a.example/')['status'] == 'running'
+    resumed.complete('https://a.example/', {})
+    resumed.close()
+
+    assert BatchJournal(str(path)).page('https://a.example/')['status'] == 'done'
+
+def test_artifacts_are_stored_once_by_content(tmp_path):
+    journal = BatchJournal(str(tmp_path / 'journal.jsonl'), artifact_dir=str(tmp_path / 'blobs'), sync=False)
+    first = journal.put_artifact({'b': 1, 'a': [1, 2]})
+    assert journal.put_artifact({'b': 1, 'a': [1, 2]}) == first
+    assert journal.put_artifact({'a': [1, 2], 'b': 1}) == first
+    assert journal.put_artifact({'b': 1, 'a': [2, 1]}) != first
+    assert len(list((tmp_path / 'blobs').rglob('*.json'))) == 2
+    journal.close()
+
+def test_manifest(tmp_path):
+    journal = BatchJournal(str(tmp_path / 'journal.jsonl'), sync=False)
+    journal.start('/ok')
+    journal.complete('/ok', {'url': '/ok'})
+    journal.start('/bad')
+    journal.fail('/bad', 'timeout', stage='render')
+
+    manifest = journal.manifest(['/ok', '/bad', '/new'])
+    assert manifest['total'] == 3
+    assert [page['url'] for page in manifest['succeeded']] == ['/ok']
+    assert manifest['failed'] == [{'url': '/bad', 'stage': 'render', 'error': 'timeout', 'attempts': 1}]
+    assert manifest['pending'] == [{'url': '/new', 'attempts': 0}]
+    journal.close()
@@ -0,0 +1,100 @@
+import pytest
+import os
+from PIL import Image, ImageDraw
+from src.components.change_detector import ChangeDetector
+
+@pytest.fixture
+def detector(tmp_path):
+    return ChangeDetector(store_dir=str(tmp_path / "changes"), band_height=100)
+
+def make_page(path, blocks):
+    """Create a 200x400 page with black rectangles drawn at the given positions."""
+    img = Image.new('RGB', (200, 400), color='white')
+    draw = ImageDraw.Draw(img)
+    for box in blocks:
+        draw.rectangle(box, fill='black')
+    img.save(path)
+    return path
+
+def test_fingerprint(detector, tmp_path):
+    path = make_page(os.path.join(tmp_path, "page.png"), [(10, 10, 60, 40)])
+    fingerprint = detector.fingerprint(path, '0:body')
+    
+    assert len(fingerprint['phash']) == 16
+    assert len(fingerprint['band_hashes']) == 4
+    assert fingerprint['width'] == 200
+    assert fingerprint['height'] == 400
+    assert fingerprint['dom_hash'] == detector.dom_hash('0:body')
+
+def test_compare_new_and_unchanged(detector, tmp_path):
+    path = make_page(os.path.join(tmp_path, "page.png"), [(10, 10, 60, 40), (20, 250, 180, 300)])
+    fingerprint = detector.fingerprint(path, '0:body')
+    
+    assert detector.compare('https://example.com', fingerprint)['status'] == 'new'
+    
+    detector.save('https://example.com', fingerprint, {'textual_description': 'cached'})
+    change = detector.compare('https://example.com', detector.fingerprint(path, '0:body'))
+    
+    assert change['status'] == 'unchanged'
+    assert change['previous']['textual_description'] == 'cached'
+
+def test_compare_partial_change(detector, tmp_path):
+    before = make_page(os.path.join(tmp_path, "before.png"), [(10, 10, 60, 40), (20, 250, 180, 300)])
+    after = make_page(os.path.join(tmp_path, "after.png"), [(10, 10, 60, 40), (120, 220, 190, 290)])
+    
+    detector.save('https://example.com', detector.fingerprint(before, '0:body'), {})
+    change = detector.compare('https://example.com', detector.fingerprint(after, '0:body'))
+    
+    assert change['status'] == 'partial'
+    assert change['changed_regions'] == [(200, 300)]
+
+def test_compare_changed(detector, tmp_path):
+    before = make_page(os.path.join(tmp_path, "before.png"), [(10, 10, 60, 40)])
+    detector.save('https://example.com', detector.fingerprint(before, '0:body'), {})
+    
+    # Same pixels but a different DOM structure
+    change = detector.compare('https://example.com', detector.fingerprint(before, '0:body\n1:div'))
+    assert change['status'] == 'changed'
+    
+    # Different page size
+    resized = os.path.join(tmp_path, "resized.png")
+    Image.new('RGB', (200, 500), color='white').save(resized)
+    change = detector.compare('https://example.com', detector.fingerprint(resized, '0:body'))
+    assert change['status'] == 'changed'
+
+def test_text_only_edit_is_detected(tmp_path):
+    detector = ChangeDetector(store_dir=str(tmp_path / "changes"))
+    layouts = {}
+    for price in ('$19.99', '$29.99'):
+        img = Image.new('RGB', (1920, 2048), color='white')
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((0, 0, 1920, 120), fill='navy')
+        draw.text((200, 700), f'Pro plan {price} per month', fill='black')
+        img.save(tmp_path / f"{price}.png")
+        layouts[price] = {'height': 2048, 'nodes': [[20, 100, 'Pricing'], [700, 712, 'Pro plan'], [700, 712, price]]}
+    before, after = (str(tmp_path / f"{price}.png") for price in ('$19.99', '$29.99'))
+    
+    # The pixels alone barely differ
+    detector.save('https://example.com', detector.fingerprint(before, '0:body'), {})
+    assert detector.compare('https://example.com', detector.fingerprint(after, '0:body'))['status'] == 'unchanged'
+    
+    detector.save('https://example.com', detector.fingerprint(before, '0:body', layouts['$19.99']), {})
+    assert detector.compare('https://example.com',
+                            detector.fingerprint(before, '0:body', layouts['$19.99']))['status'] == 'unchanged'
+    change = detector.compare('https://example.com', detector.fingerprint(after, '0:body', layouts['$29.99']))
+    assert change['status'] == 'partial'
+    assert change['changed_regions'] == [(512, 1024)]
+
+def test_merge_ocr_results(detector):
+    previous = {'text_blocks': [
+        {'text': 'Kept', 'bounding_box': [[10, 10], [50, 10], [50, 30], [10, 30]]},
+        {'text': 'Stale', 'bounding_box': [[10, 210], [50, 210], [50, 230], [10, 230]]}
+    ]}
+    region = {'text_blocks': [
+        {'text': 'Fresh', 'bounding_box': [(10, 220), (50, 220), (50, 240), (10, 240)]}
+    ]}
+    
+    merged = detector.merge_ocr_results(previous, region, [(200, 300)])
+    
+    assert [block['text'] for block in merged['text_blocks']] == ['Kept', 'Fresh']
+    assert merged['full_text'] == 'Kept Fresh'
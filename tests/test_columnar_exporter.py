@@ -0,0 +1,85 @@
+import pytest
+import os
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.dataset as ds
+from src.components.columnar_exporter import ColumnarExporter
+
+@pytest.fixture
+def sample_results():
+    return {
+        'structured_description': {
+            'page_title': 'Example Website',
+            'layout_pattern': 'standard-layout',
+            'color_palette': {
+                'primary_colors': [
+                    {'hex': '#ffffff', 'percentage': 60.5},
+                    {'hex': '#0066cc', 'percentage': 25.3}
+                ]
+            },
+            'ui_elements': [
+                {'type': 'header', 'position': {'horizontal': 'center', 'vertical': 'top'},
+                 'size_percentage': {'width': 100.0, 'height': 12.5}, 'text_content': 'Welcome'},
+                {'type': 'button', 'position': {'horizontal': 'right', 'vertical': 'top'},
+                 'size_percentage': {'width': 20.0, 'height': 6.2}, 'text_content': 'Click here'}
+            ]
+        }
+    }
+
+@pytest.mark.parametrize('export_format, dataset_format', [('parquet', 'parquet'), ('arrow', 'ipc')])
+def test_export_runs(tmp_path, sample_results, export_format, dataset_format):
+    export_dir = str(tmp_path / "columnar")
+    exporter = ColumnarExporter(export_dir, format=export_format)
+    
+    exporter.add_page('run1', 'https://a.example', sample_results)
+    exporter.add_page('run1', 'https://b.example', sample_results)
+    # Starting a new run closes the files of the previous one
+    exporter.add_page('run2', 'https://a.example', sample_results)
+    exporter.close()
+    
+    assert sorted(os.listdir(os.path.join(export_dir, 'elements'))) == [
+        f'run1.{export_format}', f'run2.{export_format}']
+    
+    elements = ds.dataset(os.path.join(export_dir, 'elements'), format=dataset_format).to_table()
+    assert elements.num_rows == 6
+    assert pa.types.is_dictionary(elements.schema.field('element_type').type)
+    assert elements.schema.field('width_percentage').type == pa.float32()
+    assert sorted(set(elements.column('element_type').to_pylist())) == ['button', 'header']
+    
+    palette = ds.dataset(os.path.join(export_dir, 'palette'), format=dataset_format).to_table()
+    assert palette.num_rows == 6
+    first = palette.slice(0, 1).to_pylist()[0]
+    assert (first['hex'], first['red'], first['green'], first['blue']) == ('#ffffff', 255, 255, 255)
+
+def test_row_groups_per_run(tmp_path, sample_results):
+    import pyarrow.parquet as pq
+    export_dir = str(tmp_path / "columnar")
+    exporter = ColumnarExporter(export_dir, row_group_size=4)
+    
+    for i in range(3):
+        exporter.add_page('run1', f'https://example.com/{i}', sample_results)
+    exporter.close()
+    
+    # 6 element rows with a row group size of 4: one full group plus the remainder
+    metadata = pq.ParquetFile(os.path.join(export_dir, 'elements', 'run1.parquet')).metadata
+    assert metadata.num_rows == 6
+    assert metadata.num_row_groups == 2
+
+def test_shared_output_handler_exports_run_once(tmp_path, sample_results):
+    from src.components.output_handler import OutputHandler
+    export_dir = str(tmp_path / "columnar")
+    handler = OutputHandler(output_dir=str(tmp_path / "output"), write_files=False,
+                            columnar_exporter=ColumnarExporter(export_dir))
+    
+    for i in range(3):
+        handler.save_results(sample_results, f'https://example.com/{i}')
+    handler.close()
+    
+    # All pages of the run are in one file per table
+    assert os.listdir(os.path.join(export_dir, 'elements')) == [f'{handler.run_id}.parquet']
+    elements = ds.dataset(os.path.join(export_dir, 'elements'), format='parquet').to_table()
+    assert sorted(set(elements.column('url').to_pylist())) == [f'https://example.com/{i}' for i in range(3)]
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        ColumnarExporter(str(tmp_path), format='csv')
@@ -0,0 +1,98 @@
+import pytest
+import numpy as np
+from src.components.contrast_audit import ContrastAuditor, contrast_ratio
+
+def _page():
+    """White page with four 'words', drawn as solid glyph strokes with grey anti-aliased edges."""
+    pixels = np.full((200, 400, 3), 255, dtype=np.uint8)
+    words = [
+        ('black', (0, 0, 0), (10, 10, 110, 30)),
+        ('light', (200, 200, 200), (10, 50, 110, 70)),
+        ('mid', (119, 119, 119), (10, 90, 110, 110)),
+        ('navy', (255, 255, 255), (10, 150, 110, 170))
+    ]
+    pixels[140:180] = (0, 0, 128)
+    for _, color, (left, top, right, bottom) in words:
+        background = pixels[top - 1, left].astype(int)
+        for x in range(left + 2, right - 2, 6):
+            # A stroke, with a half-blended column on each side
+            pixels[top + 2:bottom - 2, x + 1:x + 3] = color
+            edge = ((np.array(color) + background) // 2).astype(np.uint8)
+            pixels[top + 2:bottom - 2, x] = edge
+            pixels[top + 2:bottom - 2, x + 3] = edge
+    blocks = [{
+        'text': text,
+        'bounding_box': [(left, top), (right, top), (right, bottom), (left, bottom)]
+    } for text, _, (left, top, right, bottom) in words]
+    return pixels, blocks
+
+def test_contrast_ratio_reference_values():
+    assert contrast_ratio(np.array(1.0), np.array(0.0)) == pytest.approx(21)
+    assert contrast_ratio(np.array(0.5), np.array(0.5)) == pytest.approx(1)
+
+def test_measure_estimates_colors_and_ratio():
+    pixels, blocks = _page()
+    auditor = ContrastAuditor()
+    boxes = np.array([[10, 10, 110, 30], [10, 90, 110, 110], [10, 150, 110, 170], [500, 0, 600, 20]])
+    
+    ratios, foregrounds, backgrounds = auditor.measure(pixels, boxes)
+    
+    assert ratios[0] == pytest.approx(21)
+    # #777777 on white is just below 4.5:1
+    assert ratios[1] == pytest.approx(4.48, abs=0.01)
+    assert foregrounds[1].tolist() == [119, 119, 119]
+    assert backgrounds[1].tolist() == [255, 255, 255]
+    # Light text on a dark background
+    assert foregrounds[2].tolist() == [255, 255, 255]
+    assert backgrounds[2].tolist() == [0, 0, 128]
+    assert ratios[2] > 14
+    # Outside the image
+    assert np.isnan(ratios[3])
+
+def test_stray_pixels_do_not_decide_the_text_color():
+    pixels, _ = _page()
+    # A speck of black inside the #777777 word, e.g. the edge of an adjacent icon
+    pixels[95:97, 60:62] = 0
+    
+    ratios, foregrounds, _ = ContrastAuditor().measure(pixels, np.array([[10, 90, 110, 110]]))
+    
+    assert foregrounds[0].tolist() == [119, 119, 119]
+    assert ratios[0] == pytest.approx(4.48, abs=0.01)
+
+def test_audit_reports_failing_text():
+    pixels, blocks = _page()
+    
+    report = ContrastAuditor().audit(pixels, blocks)
+    
+    assert report['checked'] == 4
+    assert [finding['text'] for finding in report['failing']] == ['light', 'mid']
+    light = report['failing'][0]
+    assert light['contrast_ratio'] == report['min_contrast_ratio'] == pytest.approx(1.67, abs=0.01)
+    assert light['required_ratio'] == 4.5
+    assert light['foreground'] == '#c8c8c8'
+    assert light['background'] == '#ffffff'
+    assert light['bounding_box'] == {'left': 10, 'top': 50, 'right': 110, 'bottom': 70}
+
+def test_audit_large_text_threshold():
+    pixels, blocks = _page()
+    
+    # With every block counting as large text, #777777 (4.48:1) passes 3:1
+    report = ContrastAuditor(large_text_height=20).audit(pixels, blocks)
+    assert [finding['text'] for finding in report['failing']] == ['light']
+    assert report['failing'][0]['required_ratio'] == 3.0
+
+def test_measure_in_chunks_matches_single_pass():
+    pixels, blocks = _page()
+    boxes = np.array([[10, 10, 110, 30], [10, 50, 110, 70], [10, 90, 110, 110], [10, 150, 110, 170]])
+    
+    single = ContrastAuditor().measure(pixels, boxes)
+    chunked = ContrastAuditor(max_pixels=1).measure(pixels, boxes)
+    
+    for expected, actual in zip(single, chunked):
+        assert np.array_equal(expected, actual)
+
+def test_audit_without_text():
+    pixels, _ = _page()
+    
+    report = ContrastAuditor().audit(pixels, [])
+    assert report == {'checked': 0, 'failing': [], 'min_contrast_ratio': None}
@@ -0,0 +1,72 @@
+import time
+import numpy as np
+from src.components.element_tree import ElementTreeBuilder
+
+def brute_force_parents(boxes):
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    parents = []
+    for i in range(len(boxes)):
+        best = -1
+        for j in range(len(boxes)):
+            if i != j and np.all(boxes[j, :2] <= boxes[i, :2]) and np.all(boxes[j, 2:] >= boxes[i, 2:]):
+                if best < 0 or areas[j] < areas[best]:
+                    best = j
+        parents.append(best)
+    return np.array(parents), areas
+
+def test_parents_nested_page():
+    boxes = np.array([
+        [0, 0, 1000, 2000],    # main content
+        [20, 100, 980, 900],   # grid
+        [40, 120, 300, 400],   # card
+        [60, 140, 280, 200],   # card title
+        [340, 120, 600, 400],  # card
+        [0, 1900, 1000, 2000]  # footer inside main content
+    ])
+    
+    parents = ElementTreeBuilder().parents(boxes)
+    assert parents.tolist() == [-1, 0, 1, 2, 1, 0]
+
+def test_parents_match_brute_force():
+    rng = np.random.default_rng(7)
+    builder = ElementTreeBuilder()
+    
+    for _ in range(20):
+        left = rng.integers(0, 500, 80)
+        top = rng.integers(0, 500, 80)
+        boxes = np.stack([left, top, left + rng.integers(1, 400, 80), top + rng.integers(1, 400, 80)], axis=1)
+        
+        parents = builder.parents(boxes)
+        expected, areas = brute_force_parents(boxes)
+        
+        # Containers of equal area are interchangeable
+        assert np.array_equal(parents < 0, expected < 0)
+        assert np.array_equal(areas[parents[parents >= 0]], areas[expected[expected >= 0]])
+
+def test_build_orders_siblings_for_reading():
+    boxes = np.array([
+        [0, 0, 1000, 1000],
+        [500, 100, 900, 200],
+        [100, 100, 400, 200],
+        [100, 500, 400, 600]
+    ])
+    
+    tree = ElementTreeBuilder().build(boxes)
+    assert tree == [{'element': 0, 'children': [{'element': 2}, {'element': 1}, {'element': 3}]}]
+
+def test_build_empty_and_single():
+    builder = ElementTreeBuilder()
+    assert builder.build(np.empty((0, 4))) == []
+    assert builder.build(np.array([[0, 0, 10, 10]])) == [{'element': 0}]
+
+def test_parents_of_a_wide_row_scale():
+    # Thousands of siblings are open at once, but only the container spans them,
+    # so they are never compared with each other
+    n = 20000
+    cells = np.stack([np.arange(n) * 10, np.full(n, 100), np.arange(n) * 10 + 8, np.full(n, 200)], axis=1)
+    boxes = np.vstack([[[0, 0, n * 10, 1000]], cells])
+    
+    start = time.perf_counter()
+    parents = ElementTreeBuilder().parents(boxes)
+    assert time.perf_counter() - start < 5
+    assert parents.tolist() == [-1] + [0] * n
@@ -99,6 +99,11 @@ def test_analyze_screenshot(mock_image_path):
     assert 'layout_pattern' in results
     assert 'image_dimensions' in results
     
+    # Structured layout alongside the pattern label
+    assert results['layout']['pattern'] == results['layout_pattern']
+    assert 'columns' in results['layout']
+    assert 'rows' in results['layout']
+    
     assert isinstance(results['ui_elements'], list)
     assert isinstance(results['color_palette'], list)
     assert isinstance(results['layout_pattern'], str)
@@ -108,4 +113,165 @@ def test_analyze_screenshot(mock_image_path):
     assert 'width' in dimensions
     assert 'height' in dimensions
     assert dimensions['width'] == 100
-    assert dimensions['height'] == 100
\ No newline at end of file
+    assert dimensions['height'] == 100
+
+def test_analyze_tiles(tmp_path):
+    analyzer = GUIAnalyzer()
+    tiles = []
+    for index, (top, height) in enumerate([(0, 100), (100, 60)]):
+        path = os.path.join(tmp_path, f"tile_{index}.png")
+        Image.new('RGB', (120, height), color='white').save(path)
+        tiles.append({'index': index, 'path': path, 'top': top, 'height': height})
+    
+    results = analyzer.analyze_tiles(tiles)
+    
+    assert results['image_dimensions'] == {'width': 120, 'height': 160}
+    assert results['color_palette'][0]['hex'] == '#ffffff'
+    assert len(results['ui_elements']) > 0
+
+def test_analyze_screenshot_palette_from_reduced_level(tmp_path):
+    # 1px dots of one color over a white page survive the reduced palette level
+    pixels = np.full((2048, 512, 3), 255, dtype=np.uint8)
+    pixels[::7, ::5] = (10, 20, 30)
+    path = os.path.join(tmp_path, "dotted.png")
+    Image.fromarray(pixels).save(path)
+    
+    analyzer = GUIAnalyzer(palette_max_pixels=128 * 512)
+    results = analyzer.analyze_screenshot(path)
+    
+    palette = {color['hex']: color['percentage'] for color in results['color_palette']}
+    assert set(palette) == {'#ffffff', '#0a141e'}
+    assert 1 < palette['#0a141e'] < 6
+    assert results['image_dimensions'] == {'width': 512, 'height': 2048}
+
+def test_analyze_buffer_matches_screenshot(tmp_path):
+    from src.components.pixel_buffer import SharedPixelBuffer
+    
+    pixels = np.full((1024, 256, 3), 255, dtype=np.uint8)
+    pixels[:256] = (20, 40, 60)
+    path = os.path.join(tmp_path, "banded.png")
+    Image.fromarray(pixels).save(path)
+    
+    analyzer = GUIAnalyzer(palette_max_pixels=128 * 512)
+    # The palette samples pixels at random
+    np.random.seed(0)
+    expected = analyzer.analyze_screenshot(path)
+    
+    with SharedPixelBuffer.from_image(path) as buffer:
+        np.random.seed(0)
+        assert analyzer.analyze_buffer(buffer) == expected
+        # Workers pass the descriptor instead
+        np.random.seed(0)
+        assert analyzer.analyze_buffer(buffer.descriptor()) == expected
+
+def test_contrast_audit_of_screenshot_and_tiles(tmp_path):
+    # Grey (#999999, 2.85:1) text in the lower half of a white page, black text above
+    pixels = np.full((160, 120, 3), 255, dtype=np.uint8)
+    pixels[20:30, 10:60:3] = 0
+    pixels[120:130, 10:60:3] = 153
+    path = os.path.join(tmp_path, "page.png")
+    Image.fromarray(pixels).save(path)
+    
+    tiles = []
+    for index, (top, height) in enumerate([(0, 100), (100, 60)]):
+        tile_path = os.path.join(tmp_path, f"tile_{index}.png")
+        Image.fromarray(pixels[top:top + height]).save(tile_path)
+        tiles.append({'index': index, 'path': tile_path, 'top': top, 'height': height})
+    
+    text_blocks = [
+        {'text': 'dark', 'bounding_box': [(10, 20), (60, 20), (60, 30), (10, 30)]},
+        {'text': 'grey', 'bounding_box': [(10, 120), (60, 120), (60, 130), (10, 130)]}
+    ]
+    analyzer = GUIAnalyzer()
+    
+    assert 'contrast' not in analyzer.analyze_screenshot(path)
+    for results in (analyzer.analyze_screenshot(path, text_blocks=text_blocks),
+                    analyzer.analyze_tiles(tiles, text_blocks=text_blocks)):
+        contrast = results['contrast']
+        assert contrast['checked'] == 2
+        assert [finding['text'] for finding in contrast['failing']] == ['grey']
+        assert contrast['failing'][0]['contrast_ratio'] == pytest.approx(2.85, abs=0.01)
+        assert contrast['failing'][0]['foreground'] == '#999999'
+
+def test_reuse_analysis_audits_own_contrast(tmp_path):
+    pixels = np.full((200, 120, 3), 255, dtype=np.uint8)
+    pixels[20:30, 10:60:3] = 153
+    path = os.path.join(tmp_path, "member.png")
+    Image.fromarray(pixels).save(path)
+    representative = {
+        'ui_elements': [{'type': 'header'}],
+        'layout_pattern': 'single-column',
+        'image_dimensions': {'width': 120, 'height': 900},
+        'contrast': {'checked': 5, 'failing': [], 'min_contrast_ratio': 21.0}
+    }
+    text_blocks = [{'text': 'grey', 'bounding_box': [(10, 20), (60, 20), (60, 30), (10, 30)]}]
+    
+    results = GUIAnalyzer().reuse_analysis(representative, path, text_blocks=text_blocks)
+    
+    assert results['ui_elements'] == representative['ui_elements']
+    assert results['image_dimensions'] == {'width': 120, 'height': 200}
+    assert results['contrast']['checked'] == 1
+    assert [finding['text'] for finding in results['contrast']['failing']] == ['grey']
+    assert representative['image_dimensions']['height'] == 900
+
+def test_min_confidence_and_max_colors(mock_image_path):
+    results = GUIAnalyzer(max_colors=2, min_confidence=0.9).analyze_screenshot(mock_image_path)
+    
+    assert len(results['color_palette']) <= 2
+    assert results['ui_elements']
+    assert all(element['confidence'] >= 0.9 for element in results['ui_elements'])
+    assert len(results['ui_elements']) < len(GUIAnalyzer().analyze_screenshot(mock_image_path)['ui_elements'])
+
+def test_audit_contrast_of_tiles(tmp_path):
+    pixels = np.full((160, 120, 3), 255, dtype=np.uint8)
+    pixels[120:130, 10:60:3] = 153
+    tiles = []
+    for index, (top, height) in enumerate([(0, 100), (100, 60)]):
+        tile_path = os.path.join(tmp_path, f"tile_{index}.png")
+        Image.fromarray(pixels[top:top + height]).save(tile_path)
+        tiles.append({'index': index, 'path': tile_path, 'top': top, 'height': height})
+    text_blocks = [{'text': 'grey', 'bounding_box': [(10, 120), (60, 120), (60, 130), (10, 130)]}]
+    
+    contrast = GUIAnalyzer().audit_contrast(text_blocks, tiles=tiles)
+    
+    assert contrast['checked'] == 1
+    assert contrast['failing'][0]['contrast_ratio'] == pytest.approx(2.85, abs=0.01)
+    with pytest.raises(ValueError):
+        GUIAnalyzer().audit_contrast(text_blocks)
+
+def test_changed_regions_are_reanalyzed_alone(tmp_path):
+    # Grey text in the top band of both runs; the bottom band turns red and gets grey text
+    before = np.full((1200, 200, 3), 255, dtype=np.uint8)
+    before[20:30, 10:60:3] = 153
+    after = before.copy()
+    after[900:1200] = (220, 30, 30)
+    after[1000:1010, 10:60:3] = 153
+    paths = []
+    for name, pixels in (('before', before), ('after', after)):
+        paths.append(os.path.join(tmp_path, f"{name}.png"))
+        Image.fromarray(pixels).save(paths[-1])
+    previous_blocks = [{'text': 'kept', 'bounding_box': [(10, 20), (60, 20), (60, 30), (10, 30)]}]
+    text_blocks = previous_blocks + [{'text': 'new', 'bounding_box': [(10, 1000), (60, 1000), (60, 1010), (10, 1010)]}]
+    regions = [(600, 1200)]
+    analyzer = GUIAnalyzer()
+    
+    previous = analyzer.analyze_screenshot(paths[0])
+    results = analyzer.analyze_regions(previous, regions, image_path=paths[1])
+    kept = [element for element in previous['ui_elements']
+            if element['bounding_box'][0][1] + element['bounding_box'][2][1] < 2 * 600]
+    assert all(element in results['ui_elements'] for element in kept)
+    assert results['image_dimensions'] == {'width': 200, 'height': 1200}
+    assert '#dc1e1e' in [color['hex'] for color in results['color_palette']]
+    
+    # Only the text in the changed region is measured again
+    previous_contrast = analyzer.audit_contrast(previous_blocks, image_path=paths[0], keep_ratios=True)
+    measured = []
+    measure = analyzer.contrast_auditor.measure
+    def counting_measure(pixels, boxes):
+        measured.append(len(boxes))
+        return measure(pixels, boxes)
+    with patch.object(analyzer.contrast_auditor, 'measure', counting_measure):
+        contrast = analyzer.audit_contrast_regions(text_blocks, regions, previous_blocks, previous_contrast,
+                                                   image_path=paths[1])
+    assert measured == [1]
+    assert contrast == analyzer.audit_contrast(text_blocks, image_path=paths[1], keep_ratios=True)
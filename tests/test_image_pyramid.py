@@ -0,0 +1,63 @@
+import pytest
+import numpy as np
+from PIL import Image
+from src.components.image_pyramid import ImagePyramid
+
+@pytest.fixture
+def striped_image():
+    """A 256 × 1024 image with 64px horizontal color bands."""
+    pixels = np.zeros((1024, 256, 3), dtype=np.uint8)
+    colors = [(255, 255, 255), (20, 40, 60), (200, 30, 30), (0, 128, 0)]
+    for band in range(16):
+        pixels[band * 64:(band + 1) * 64] = colors[band % 4]
+    return Image.fromarray(pixels)
+
+def test_pyramid_levels(striped_image):
+    pyramid = ImagePyramid(striped_image)
+    
+    assert pyramid.sizes == [(256, 1024), (128, 512), (64, 256)]
+    assert len(pyramid) == 3
+    assert pyramid.scale(2) == 4
+    assert pyramid.level(0) is striped_image
+
+def test_pyramid_level_for(striped_image):
+    pyramid = ImagePyramid(striped_image)
+    
+    assert pyramid.level_for(10 ** 9) == 0
+    assert pyramid.level_for(128 * 512) == 1
+    # Nothing fits: the coarsest level
+    assert pyramid.level_for(10) == 2
+    
+    pixels = pyramid.pixels(64 * 256)
+    assert pixels.shape == (64 * 256, 3)
+    assert pixels.dtype == np.uint8
+
+def test_pyramid_keeps_exact_colors():
+    # A fine checkerboard averages to grey with a box filter, but not with nearest
+    checker = (np.indices((256, 256)).sum(axis=0) % 2 * 255).astype(np.uint8)
+    image = Image.fromarray(np.stack([checker] * 3, axis=-1))
+    
+    nearest = np.unique(ImagePyramid(image).pixels(64 * 64), axis=0)
+    assert set(map(tuple, nearest.tolist())) <= {(0, 0, 0), (255, 255, 255)}
+    
+    box = np.unique(ImagePyramid(image, resample='box').pixels(64 * 64), axis=0)
+    assert box.tolist() == [[127, 127, 127]] or box.tolist() == [[128, 128, 128]]
+    
+    with pytest.raises(ValueError):
+        ImagePyramid(image, resample='bicubic')
+
+def test_pyramid_without_full_resolution(tmp_path, striped_image):
+    path = str(tmp_path / 'page.png')
+    striped_image.save(path)
+    
+    pyramid = ImagePyramid.open(path, keep_full_resolution=False)
+    
+    assert (pyramid.width, pyramid.height) == (256, 1024)
+    with pytest.raises(ValueError):
+        pyramid.level(0)
+    assert pyramid.level_for(10 ** 9) == 1
+    
+    # Regions are addressed in full-resolution coordinates at any level
+    region = pyramid.crop((0, 64, 256, 128), index=1)
+    assert region.size == (128, 32)
+    assert np.asarray(region)[0, 0].tolist() == [20, 40, 60]
@@ -0,0 +1,87 @@
+import time
+import pytest
+import numpy as np
+from src.components.layout_analysis import LayoutAnalyzer
+from src.components.models import UIElement
+
+@pytest.fixture
+def sidebar_page():
+    """Header, left sidebar, main content with a 3 × 2 card grid, and footer."""
+    elements = [
+        UIElement('header', 0, 0, 1200, 80),
+        UIElement('navigation_bar', 0, 80, 1200, 120),
+        UIElement('menu', 20, 160, 220, 900),
+    ]
+    for row in range(2):
+        for column in range(3):
+            left = 300 + column * 300
+            top = 160 + row * 400
+            elements.append(UIElement('card', left, top, left + 260, top + 340))
+    elements.append(UIElement('footer', 0, 1000, 1200, 1100))
+    return elements
+
+def test_analyze_empty():
+    layout = LayoutAnalyzer().analyze([])
+    assert layout['pattern'] == 'complex-layout'
+    assert layout['columns'] == []
+    assert layout['grid'] is None
+
+def test_analyze_columns_gutters_and_sidebar(sidebar_page):
+    layout = LayoutAnalyzer().analyze(sidebar_page, 1200, 1100)
+    
+    # Sidebar plus three card columns
+    assert len(layout['columns']) == 4
+    assert layout['columns'][0]['left'] == 20
+    assert len(layout['gutters']) == 3
+    assert all(gutter['width'] >= 16 for gutter in layout['gutters'])
+    
+    assert [sidebar['side'] for sidebar in layout['sidebars']] == ['left']
+    assert layout['regions'] == {'header': True, 'navigation': True, 'footer': True}
+
+def test_analyze_rows_and_grid(sidebar_page):
+    layout = LayoutAnalyzer().analyze(sidebar_page, 1200, 1100)
+    
+    # Header and navigation touch, and the sidebar spans both card rows
+    assert [(row['top'], row['bottom']) for row in layout['rows']] == [(0, 120), (160, 904), (1000, 1104)]
+    assert layout['grid'] == {'columns': 3, 'rows': 2}
+    assert layout['alignment']['left_edges'] == [0, 20, 300, 600, 900]
+
+def test_analyze_is_order_independent(sidebar_page):
+    analyzer = LayoutAnalyzer()
+    expected = analyzer.analyze(sidebar_page, 1200, 1100)
+    
+    shuffled = list(sidebar_page)
+    np.random.default_rng(3).shuffle(shuffled)
+    assert analyzer.analyze(shuffled, 1200, 1100) == expected
+    
+    # Dicts in the pipeline format give the same result
+    assert analyzer.analyze([element.to_dict() for element in shuffled], 1200, 1100) == expected
+
+def test_analyze_single_column_pattern():
+    elements = [
+        {'type': 'header', 'bounding_box': [(0, 0), (100, 50), (100, 50), (0, 0)]},
+        {'type': 'text', 'bounding_box': [(0, 60), (100, 100), (100, 100), (0, 60)]},
+        {'type': 'button', 'bounding_box': [(0, 110), (100, 150), (100, 150), (0, 110)]},
+        {'type': 'footer', 'bounding_box': [(0, 160), (100, 200), (100, 200), (0, 160)]}
+    ]
+    layout = LayoutAnalyzer().analyze(elements)
+    
+    assert layout['pattern'] == 'single-column'
+    assert layout['sidebars'] == []
+    assert layout['grid'] is None
+
+def test_analyze_many_elements():
+    # A 50 × 40 grid of tiles
+    elements = [
+        UIElement('card', column * 40, row * 40, column * 40 + 30, row * 40 + 30)
+        for row in range(50) for column in range(40)
+    ]
+    
+    start = time.perf_counter()
+    layout = LayoutAnalyzer(min_gutter=8, min_row_gap=8).analyze(elements)
+    elapsed = time.perf_counter() - start
+    
+    assert len(layout['columns']) == 40
+    assert len(layout['rows']) == 50
+    assert layout['grid'] == {'columns': 40, 'rows': 50}
+    assert elapsed < 1.0
@@ -1,5 +1,7 @@
 import pytest
+import numpy as np
 from src.components.layout_to_text_converter import LayoutToTextConverter
+from src.components.models import TextBlockArray
 
 @pytest.fixture
 def sample_ui_analysis():
@@ -139,6 +141,10 @@ def test_find_text_in_element():
     result = converter._find_text_in_element(element_bbox, text_blocks)
     assert 'Inside Element' in result
     assert 'Outside Element' not in result
+    
+    # The compact model gives the same answer
+    result = converter._find_text_in_element((0, 0, 100, 100), TextBlockArray.from_dicts(text_blocks))
+    assert result == 'Inside Element'
 
 def test_convert_to_text(sample_ui_analysis, sample_ocr_results, sample_page_info):
     converter = LayoutToTextConverter()
@@ -169,4 +175,219 @@ def test_convert_to_text(sample_ui_analysis, sample_ocr_results, sample_page_inf
     
     # Check JSON output
     assert isinstance(results['json_output'], str)
-    assert 'Example Website' in results['json_output']
\ No newline at end of file
+    assert 'Example Website' in results['json_output']
+
+def test_json_output_is_lazy(sample_ui_analysis, sample_ocr_results, sample_page_info):
+    import json
+    converter = LayoutToTextConverter()
+    
+    results = converter.convert_to_text(
+        ui_analysis=sample_ui_analysis,
+        ocr_results=sample_ocr_results,
+        page_info=sample_page_info
+    )
+    
+    # A key before it is serialized, and every view agrees on it
+    assert 'json_output' in results
+    assert 'json_output' in results.keys()
+    assert list(results) == list(results.keys())
+    assert 'json_output' in list(results)
+    assert len(results) == len(list(results))
+    assert not dict.__contains__(results, 'json_output')
+    
+    json_output = results.get('json_output')
+    assert json.loads(json_output) == json.loads(json.dumps(results['structured_description']))
+    
+    # Serialized once and cached, still listed once
+    assert results['json_output'] is json_output
+    assert list(results).count('json_output') == 1
+    assert len(results) == len(list(results)) == len(results.keys())
+    assert dict(results.items())['json_output'] is json_output
+    assert dict(results) == dict(results.items())
+    
+    with pytest.raises(KeyError):
+        results['missing']
+
+def test_assign_text_to_elements_reading_order_and_chunks():
+    converter = LayoutToTextConverter(max_matrix_cells=4)
+    
+    # OCR order differs from reading order; 'world' sits slightly higher than 'Hello'
+    blocks = TextBlockArray(
+        ['again', 'world', 'Hello', 'Elsewhere'],
+        np.array([[10, 40, 50, 60], [60, 9, 100, 29], [10, 10, 50, 30], [300, 10, 350, 30]])
+    )
+    element_boxes = np.array([[0, 0, 200, 100], [290, 0, 400, 50], [500, 500, 600, 600]])
+    
+    texts = converter._assign_text_to_elements(element_boxes, blocks)
+    assert texts == ['Hello world again', 'Elsewhere', '']
+
+def test_assign_text_to_elements_partial_overlap():
+    blocks = TextBlockArray(['Straddling'], np.array([[80, 10, 120, 30]]))
+    element_boxes = np.array([[0, 0, 110, 100]])
+    
+    # 75% of the text block lies inside the element
+    assert LayoutToTextConverter()._assign_text_to_elements(element_boxes, blocks) == ['']
+    assert LayoutToTextConverter(min_text_overlap=0.7)._assign_text_to_elements(element_boxes, blocks) == ['Straddling']
+
+def test_assign_text_to_elements_large_page():
+    import time
+    rng = np.random.default_rng(0)
+    
+    # 5k words and 500 elements
+    left = rng.integers(0, 1900, 5000)
+    top = rng.integers(0, 9900, 5000)
+    blocks = TextBlockArray([f'w{i}' for i in range(5000)],
+                            np.stack([left, top, left + 60, top + 18], axis=1))
+    e_left = rng.integers(0, 1500, 500)
+    e_top = rng.integers(0, 9500, 500)
+    element_boxes = np.stack([e_left, e_top, e_left + 400, e_top + 300], axis=1)
+    
+    converter = LayoutToTextConverter(max_matrix_cells=500000)
+    start = time.perf_counter()
+    texts = converter._assign_text_to_elements(element_boxes, blocks)
+    elapsed = time.perf_counter() - start
+    
+    assert len(texts) == 500
+    # Same assignment as the one-element-at-a-time path
+    for index in range(0, 500, 50):
+        expected = converter._find_text_in_element(tuple(element_boxes[index]), blocks)
+        assert texts[index] == expected
+    assert elapsed < 1.0
+
+def test_convert_to_text_uses_text_lines(sample_page_info):
+    converter = LayoutToTextConverter()
+    ui_analysis = {
+        'ui_elements': [{'type': 'card', 'bounding_box': [(0, 0), (400, 0), (400, 200), (0, 200)]}],
+        'image_dimensions': {'width': 1000, 'height': 1000}
+    }
+    ocr_results = {
+        'full_text': 'Left one Right one Left two Right two',
+        'text_blocks': [],
+        # Two columns: the left one is read completely before the right one
+        'lines': [
+            {'text': 'Left one', 'bounding_box': [(10, 60), (90, 60), (90, 80), (10, 80)]},
+            {'text': 'Left two', 'bounding_box': [(10, 85), (90, 85), (90, 105), (10, 105)]},
+            {'text': 'Right one', 'bounding_box': [(300, 60), (390, 60), (390, 80), (300, 80)]},
+            {'text': 'Right two', 'bounding_box': [(300, 85), (390, 85), (390, 105), (300, 105)]}
+        ]
+    }
+    
+    results = converter.convert_to_text(ui_analysis, ocr_results, sample_page_info)
+    
+    element = results['structured_description']['ui_elements'][0]
+    assert element['text_content'] == 'Left one Left two Right one Right two'
+
+def test_buttons_on_one_line_get_their_own_text(sample_page_info):
+    from src.components.text_grouping import TextGrouper
+    converter = LayoutToTextConverter()
+    
+    def box(left, top, right, bottom):
+        return [(left, top), (right, top), (right, bottom), (left, bottom)]
+    
+    words = [
+        {'text': 'Home', 'bounding_box': box(110, 20, 170, 40)},
+        {'text': 'Pricing', 'bounding_box': box(190, 20, 260, 40)},
+        {'text': 'Sign', 'bounding_box': box(280, 20, 320, 40)},
+        {'text': 'up', 'bounding_box': box(325, 20, 350, 40)}
+    ]
+    ui_analysis = {
+        'ui_elements': [
+            {'type': 'button', 'bounding_box': box(100, 10, 180, 50)},
+            {'type': 'button', 'bounding_box': box(185, 10, 270, 50)},
+            {'type': 'button', 'bounding_box': box(275, 10, 360, 50)}
+        ],
+        'image_dimensions': {'width': 1000, 'height': 1000}
+    }
+    # As returned by the OCR extractor: the words and the lines grouped from them
+    ocr_results = dict({'full_text': 'Home Pricing Sign up', 'text_blocks': words}, **TextGrouper().group(words))
+    assert [line['text'] for line in ocr_results['lines']] == ['Home Pricing Sign up']
+    
+    results = converter.convert_to_text(ui_analysis, ocr_results, sample_page_info)
+    
+    texts = [element['text_content'] for element in results['structured_description']['ui_elements']]
+    assert texts == ['Home', 'Pricing', 'Sign up']
+
+def test_describe_layout():
+    converter = LayoutToTextConverter()
+    
+    assert converter._describe_layout(None) == {'description': 'No layout structure available'}
+    
+    layout = {
+        'pattern': 'standard-layout',
+        'columns': [{'left': 20, 'right': 220, 'width': 200}, {'left': 300, 'right': 1160, 'width': 860}],
+        'gutters': [{'left': 220, 'right': 300, 'width': 80}],
+        'rows': [{'top': 0, 'bottom': 120, 'height': 120}],
+        'sidebars': [{'side': 'left', 'left': 20, 'right': 220, 'width': 200}],
+        'grid': {'columns': 3, 'rows': 2}
+    }
+    result = converter._describe_layout(layout)
+    
+    assert result['columns'] == 2
+    assert result['sidebars'] == ['left']
+    assert result['description'] == (
+        "The content is arranged in 2 columns separated by 1 gutter and 1 row with a left sidebar. "
+        "Elements form a grid of 3 columns by 2 rows."
+    )
+
+def test_element_tree_and_collapsed_siblings(sample_page_info):
+    converter = LayoutToTextConverter()
+    
+    def box(left, top, right, bottom):
+        return [(left, top), (right, top), (right, bottom), (left, bottom)]
+    
+    ui_elements = [{'type': 'form', 'bounding_box': box(0, 0, 1000, 1000)}]
+    for column in range(4):
+        ui_elements.append({'type': 'card', 'bounding_box': box(column * 250, 100, column * 250 + 200, 400)})
+        ui_elements.append({'type': 'button', 'bounding_box': box(column * 250 + 20, 300, column * 250 + 120, 350)})
+    ui_elements.append({'type': 'footer', 'bounding_box': box(0, 1000, 1000, 1100)})
+    ui_analysis = {'ui_elements': ui_elements, 'image_dimensions': {'width': 1000, 'height': 1100}}
+    
+    results = converter.convert_to_text(ui_analysis, {'text_blocks': []}, sample_page_info)
+    structured = results['structured_description']
+    
+    assert structured['ui_elements'][1]['bounding_box'] == {'left': 0, 'top': 100, 'right': 200, 'bottom': 400}
+    assert structured['element_tree'] == [
+        {'element': 0, 'children': [
+            {'element': 1, 'children': [{'element': 2}]},
+            {'element': 3, 'children': [{'element': 4}]},
+            {'element': 5, 'children': [{'element': 6}]},
+            {'element': 7, 'children': [{'element': 8}]}
+        ]},
+        {'element': 9}
+    ]
+    
+    text_desc = results['textual_description']
+    assert "The page contains 1 form, 4 card, 4 button, 1 footer." in text_desc
+    assert "  - 4 similar card elements, such as: A card in the top left of the page" in text_desc
+    assert "    - A button in the top left of the page" in text_desc
+    assert text_desc.count("A button") == 1
+
+def test_convert_to_text_reports_contrast(sample_ui_analysis, sample_ocr_results, sample_page_info):
+    finding = {
+        'text': 'Subscribe',
+        'bounding_box': {'left': 40, 'top': 900, 'right': 120, 'bottom': 916},
+        'contrast_ratio': 2.32,
+        'required_ratio': 4.5,
+        'foreground': '#aaaaaa',
+        'background': '#ffffff'
+    }
+    sample_ui_analysis['contrast'] = {'checked': 12, 'failing': [finding] * 3, 'min_contrast_ratio': 2.32}
+    converter = LayoutToTextConverter(max_contrast_findings=2)
+    
+    results = converter.convert_to_text(sample_ui_analysis, sample_ocr_results, sample_page_info)
+    
+    contrast = results['structured_description']['accessibility']['contrast']
+    assert contrast['checked'] == 12
+    assert len(contrast['failing']) == 3
+    text = results['textual_description']
+    assert "## Accessibility" in text
+    assert "3 of 12 text blocks fall below the WCAG AA contrast minimum (lowest ratio 2.32:1)." in text
+    assert '- "Subscribe" at (40, 900): 2.32:1, needs 4.5:1 (#aaaaaa on #ffffff)' in text
+    assert text.count('"Subscribe"') == 2
+    assert "- and 1 more" in text
+    
+    # Without a contrast audit there is no accessibility section
+    del sample_ui_analysis['contrast']
+    results = converter.convert_to_text(sample_ui_analysis, sample_ocr_results, sample_page_info)
+    assert 'accessibility' not in results['structured_description']
+    assert "## Accessibility" not in results['textual_description']
@@ -0,0 +1,190 @@
+import os
+import uuid
+import signal
+import sqlite3
+import threading
+import numpy as np
+from PIL import Image
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import main
+from src.components.webpage_renderer import WebpageRenderer
+
+URLS = ['https://example.com/', 'https://example.com/pricing']
+
+def _capture(edited: bool) -> np.ndarray:
+    page = np.full((600, 320, 3), 255, dtype=np.uint8)
+    for top in range(0, 600, 40):
+        page[top + 10:top + 24, 20:40 + (top * 3) % 260] = (top // 4) % 200
+    if edited:
+        page[300:314, 200:300] = (200, 30, 30)
+    return page
+
+class FakePipeline:
+    """Stands in for the rendering and analysis stages; saves through the shared handler."""
+
+    def __init__(self, output_handler, screenshot_dir, edited_urls):
+        self.output_handler = output_handler
+        self.screenshot_dir = screenshot_dir
+        self.edited_urls = edited_urls
+
+    def run(self, inputs, rerun=(), on_stage=None):
+        url = inputs['url']
+        path = os.path.join(self.screenshot_dir, f"{uuid.uuid4().hex}.png")
+        Image.fromarray(_capture(url in self.edited_urls)).save(path)
+        results = {
+            'url': url,
+            'screenshot_path': path,
+            'textual_description': f"# {url}",
+            'structured_description': {'page_title': url, 'ui_elements': []}
+        }
+        results['saved_files'] = self.output_handler.save_results(results, url)
+        return {'stages': {'render': 'computed', 'save': 'computed'}, 'artifacts': {'results': results}}
+
+def test_diff_two_batch_runs(tmp_path):
+    output_dir = str(tmp_path / "output")
+    screenshot_dir = tmp_path / "screenshots"
+    screenshot_dir.mkdir()
+    config = {
+        'results_store': {'path': str(tmp_path / "results.db"), 'write_files': False},
+        'output': {'async_writes': False}
+    }
+
+    for run, edited_urls in enumerate([(), (URLS[1],)]):
+        def build(config, output_handler, **kwargs):
+            return FakePipeline(output_handler, str(screenshot_dir), edited_urls)
+        with patch.object(main, 'build_webpage_pipeline', build):
+            manifest = main.run_batch(URLS, config, journal_path=str(tmp_path / f"journal{run}.jsonl"),
+                                      output_dir=output_dir)
+        assert len(manifest['succeeded']) == 2
+
+    # Each batch is one run holding all of its pages
+    with sqlite3.connect(str(tmp_path / "results.db")) as conn:
+        runs = [row[0] for row in conn.execute('SELECT id FROM runs ORDER BY started_at')]
+        counts = [conn.execute('SELECT COUNT(*) FROM pages WHERE run_id = ?', (run_id,)).fetchone()[0]
+                  for run_id in runs]
+    assert counts == [2, 2]
+
+    report = main.diff_runs(runs[0], runs[1], config, output_dir=output_dir)
+
+    pages = {page['url']: page for page in report['pages']}
+    assert sorted(pages) == sorted(URLS)
+    assert pages[URLS[0]]['changed_regions'] == []
+    assert [region['change'] for region in pages[URLS[1]]['changed_regions']] == ['modified']
+    assert report['only_before'] == [] and report['only_after'] == []
+    assert os.path.exists(os.path.join(output_dir, f"diff_{runs[0]}_{runs[1]}.json"))
+
+def test_batch_processes_pages_concurrently(tmp_path):
+    screenshot_dir = tmp_path / "screenshots"
+    screenshot_dir.mkdir()
+    config = {
+        'results_store': {'path': str(tmp_path / "results.db"), 'write_files': False},
+        'output': {'async_writes': False},
+        'pipeline': {'concurrent_pages': 2}
+    }
+    # Each page waits for a second one to be in progress at the same time
+    barrier = threading.Barrier(2, timeout=10)
+    
+    class ConcurrentPipeline(FakePipeline):
+        def run(self, inputs, rerun=(), on_stage=None):
+            barrier.wait()
+            return super().run(inputs, rerun, on_stage)
+    
+    def build(config, output_handler, **kwargs):
+        return ConcurrentPipeline(output_handler, str(screenshot_dir), ())
+    
+    urls = [f'https://example.com/{index}' for index in range(4)]
+    with patch.object(main, 'build_webpage_pipeline', build):
+        manifest = main.run_batch(urls, config, journal_path=str(tmp_path / "journal.jsonl"),
+                                  output_dir=str(tmp_path / "output"))
+    
+    assert [page['url'] for page in manifest['succeeded']] == urls
+    with sqlite3.connect(str(tmp_path / "results.db")) as conn:
+        assert conn.execute('SELECT COUNT(DISTINCT run_id), COUNT(*) FROM pages').fetchone() == (1, 4)
+
+def test_stage_cache_is_opt_in(tmp_path):
+    assert main.create_stage_cache({}) is None
+    cache = main.create_stage_cache({'cache': True, 'cache_dir': str(tmp_path / "cache")})
+    assert cache.cache_dir == str(tmp_path / "cache")
+
+def test_order_matched_services_process_pages_sequentially():
+    config = {'pipeline': {'concurrent_pages': 4}}
+    assert main.page_concurrency(config, None) == 4
+    
+    config['services'] = {'mode': 'replay', 'match': 'order'}
+    assert main.ordered_services(config)
+    assert main.page_concurrency(config, None) == 1
+    
+    config['services'] = {'mode': 'replay', 'match': 'request'}
+    assert not main.ordered_services(config)
+
+def test_pages_render_on_worker_threads(tmp_path):
+    async def launch(options):
+        # Like pyppeteer, install the handlers the options ask for; this raises off the main thread
+        for name in ('SIGINT', 'SIGTERM', 'SIGHUP'):
+            if options.get(f'handle{name}', True):
+                signal.signal(getattr(signal, name), signal.SIG_DFL)
+        page = AsyncMock()
+        page.on = MagicMock()
+        page.title = AsyncMock(return_value="Page")
+        page.evaluate = AsyncMock(return_value={'width': 200, 'height': 100, 'signal': 'fonts', 'elapsed': 1})
+        browser = AsyncMock()
+        browser.newPage = AsyncMock(return_value=page)
+        return browser
+    
+    renderer = WebpageRenderer()
+    def render(url):
+        path = str(tmp_path / f"{url.rsplit('/', 1)[-1]}.png")
+        return renderer.render_webpage(url, output_path=path)
+    
+    urls = [f'https://example.com/{index}' for index in range(4)]
+    with patch('src.components.webpage_renderer.launch', launch):
+        results = list(main.map_pages(render, urls, 2))
+    
+    assert [result['page_title'] for result in results] == ["Page"] * 4
+
+def test_pixel_buffers_only_with_analysis_workers(tmp_path):
+    import tempfile
+    assert main.create_pixel_buffers({}, None) is None
+    assert main.create_pixel_buffers({'pixel_buffer': None}, object()) is None
+    
+    buffers = main.create_pixel_buffers({}, object())
+    assert buffers.backend == 'memmap'
+    path = tmp_path / "page.png"
+    Image.new('RGB', (8, 4)).save(path)
+    try:
+        assert os.path.dirname(buffers.get(str(path)).location) == tempfile.gettempdir()
+    finally:
+        buffers.release()
+
+def test_stage_cache_hits_with_change_detection(tmp_path):
+    screenshot = str(tmp_path / "page.png")
+    Image.fromarray(_capture(False)).save(screenshot)
+    config = {
+        'results_store': {'path': str(tmp_path / "results.db"), 'write_files': False},
+        'output': {'async_writes': False},
+        'pipeline': {'cache': True, 'cache_dir': str(tmp_path / "cache")},
+        'change_detection': {'enabled': True, 'store_dir': str(tmp_path / "changes")}
+    }
+    page = {'screenshot_path': screenshot, 'page_title': 'Page', 'page_dimensions': {'width': 320, 'height': 600},
+            'page_metadata': {}, 'dom_signature': '0:body', 'text_layout': {'height': 600, 'nodes': []}}
+    ocr = MagicMock()
+    ocr.return_value.extract_text.return_value = {
+        'full_text': 'Pricing',
+        'text_blocks': [{'text': 'Pricing', 'bounding_box': [(20, 10), (80, 10), (80, 24), (20, 24)]}]
+    }
+    
+    statuses = []
+    with patch.object(main, 'OCRExtractor', ocr), \
+            patch.object(main.WebpageRenderer, 'render_webpage', return_value=page):
+        for _ in range(3):
+            stages = {}
+            results = main.process_webpage('https://example.com/', config, output_dir=str(tmp_path / "output"),
+                                           on_stage=lambda name, status, digests: stages.update({name: status}))
+            assert 'error' not in results
+            statuses.append(stages)
+    
+    # The previous record changes every run, but it is not part of the cache keys
+    assert [stages['ocr'] for stages in statuses] == ['ran', 'ran', 'cached']
+    assert [stages['contrast'] for stages in statuses] == ['ran', 'ran', 'cached']
+    assert ocr.return_value.extract_text.call_count == 1
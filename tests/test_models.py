@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+from src.components.models import (
+    UIElement, TextBlock, TextBlockArray, as_ui_elements, as_text_block_array,
+    box_from_polygon, polygon_from_box, element_boxes
+)
+
+def test_box_polygon_round_trip():
+    polygon = [(10, 20), (110, 20), (110, 60), (10, 60)]
+    box = box_from_polygon(polygon)
+    
+    assert box == (10, 20, 110, 60)
+    assert polygon_from_box(box) == polygon
+
+def test_box_from_rotated_polygon():
+    # Vision API vertices of rotated text are not axis-aligned
+    assert box_from_polygon([(15, 10), (100, 20), (95, 60), (10, 50)]) == (10, 10, 100, 60)
+
+def test_ui_element_slots_and_dict_conversion():
+    element = UIElement.from_dict({
+        'type': 'button',
+        'bounding_box': [(880, 20), (980, 60), (980, 60), (880, 20)],
+        'confidence': 0.88
+    })
+    
+    assert element.box == (880, 20, 980, 60)
+    assert not hasattr(element, '__dict__')
+    with pytest.raises(AttributeError):
+        element.color = 'red'
+    
+    data = element.to_dict()
+    assert data == {
+        'type': 'button',
+        'bounding_box': [(880, 20), (980, 20), (980, 60), (880, 60)],
+        'confidence': 0.88
+    }
+    assert UIElement.from_dict(data) == element
+
+def test_as_ui_elements_skips_invalid_boxes():
+    element = UIElement('header', 0, 0, 100, 50)
+    elements = as_ui_elements([
+        element,
+        {'type': 'footer', 'bounding_box': [(0, 150), (100, 150), (100, 200), (0, 200)]},
+        {'type': 'broken', 'bounding_box': [(0, 0)]},
+        {'type': 'missing'}
+    ])
+    
+    assert [e.type for e in elements] == ['header', 'footer']
+    assert elements[0] is element
+    assert element_boxes(elements).tolist() == [[0, 0, 100, 50], [0, 150, 100, 200]]
+
+def test_text_block_array_from_dicts():
+    blocks = TextBlockArray.from_dicts([
+        {'text': 'Hello', 'bounding_box': [(10, 10), (50, 10), (50, 30), (10, 30)]},
+        {'text': 'No box', 'bounding_box': []},
+        {'text': 'World', 'bounding_box': [[60, 10], [100, 10], [100, 30], [60, 30]]}
+    ])
+    
+    assert len(blocks) == 2
+    assert blocks.boxes.dtype == np.int32
+    assert blocks.boxes.shape == (2, 4)
+    assert blocks.texts == ['Hello', 'World']
+    
+    block = blocks[1]
+    assert isinstance(block, TextBlock)
+    assert block.box == (60, 10, 100, 30)
+    assert [b.text for b in blocks] == ['Hello', 'World']
+    assert blocks.to_dicts()[0] == {'text': 'Hello', 'bounding_box': [(10, 10), (50, 10), (50, 30), (10, 30)]}
+
+def test_text_block_array_validation():
+    empty = as_text_block_array(None)
+    assert len(empty) == 0
+    assert empty.boxes.shape == (0, 4)
+    assert as_text_block_array(empty) is empty
+    
+    with pytest.raises(ValueError):
+        TextBlockArray(['one', 'two'], np.zeros((1, 4)))
@@ -99,6 +99,24 @@ def test_extract_text(mock_open, mock_vision_client):
     assert text_block['text'] == "This is"
     assert isinstance(text_block['bounding_box'], list)
     assert len(text_block['bounding_box']) == 4  # Four vertices
+    
+    # Words are grouped into lines and paragraphs
+    assert [line['text'] for line in result['lines']] == ["This is the full"]
+    assert len(result['paragraphs']) == 1
+    assert len(result['columns']) == 1
+
+@patch('io.open')
+def test_extract_text_with_languages_and_document_detection(mock_open, mock_vision_client):
+    mock_open.return_value.__enter__.return_value.read.return_value = b"fake image data"
+    client = mock_vision_client.return_value
+    client.document_text_detection = MagicMock(return_value=client.text_detection.return_value)
+    
+    extractor = OCRExtractor(languages=['en', 'de'], features=['TEXT_DETECTION', 'DOCUMENT_TEXT_DETECTION'])
+    result = extractor.extract_text("/path/to/image.png")
+    
+    client.text_detection.assert_not_called()
+    assert client.document_text_detection.call_args[1]['image_context'] == {'language_hints': ['en', 'de']}
+    assert len(result['text_blocks']) == 2
 
 @patch('io.open')
 def test_extract_text_error_handling(mock_open, mock_vision_client):
@@ -165,4 +183,49 @@ def test_detect_labels_error_handling(mock_open, mock_vision_client):
         extractor.detect_labels("/path/to/image.png")
     
     # Verify the error message
-    assert "Error in label detection: API Error" in str(excinfo.value)
\ No newline at end of file
+    assert "Error in label detection: API Error" in str(excinfo.value)
+
+def test_merge_tile_results(mock_vision_client):
+    extractor = OCRExtractor()
+    
+    tile_results = [
+        ({'top': 100, 'height': 100}, {
+            'full_text': 'Second',
+            'text_blocks': [{'text': 'Second', 'bounding_box': [(5, 10), (50, 10), (50, 30), (5, 30)]}]
+        }),
+        ({'top': 0, 'height': 100}, {
+            'full_text': 'First',
+            'text_blocks': [{'text': 'First', 'bounding_box': [(5, 10), (50, 10), (50, 30), (5, 30)]}]
+        })
+    ]
+    
+    result = extractor.merge_tile_results(tile_results)
+    
+    assert result['full_text'] == 'First\nSecond'
+    assert [block['text'] for block in result['text_blocks']] == ['First', 'Second']
+    assert result['text_blocks'][1]['bounding_box'][0] == (5, 110)
+
+def test_extract_text_regions(tmp_path, mock_vision_client):
+    from PIL import Image
+    image_path = str(tmp_path / "page.png")
+    Image.new('RGB', (100, 300), color='white').save(image_path)
+    
+    extractor = OCRExtractor()
+    result = extractor.extract_text_regions(image_path, [(200, 300)])
+    
+    # One OCR call for the region, with boxes shifted into page coordinates
+    assert mock_vision_client.return_value.text_detection.call_count == 1
+    assert result['text_blocks'][0]['bounding_box'][0] == (10, 210)
+
+def test_extract_text_regions_from_buffer(tmp_path, mock_vision_client):
+    from PIL import Image
+    from src.components.pixel_buffer import SharedPixelBuffer
+    image_path = str(tmp_path / "page.png")
+    Image.new('RGB', (100, 300), color='white').save(image_path)
+    
+    extractor = OCRExtractor()
+    with SharedPixelBuffer.from_image(image_path) as buffer:
+        result = extractor.extract_text_regions(buffer, [(200, 300)])
+    
+    assert mock_vision_client.return_value.text_detection.call_count == 1
+    assert result['text_blocks'][0]['bounding_box'][0] == (10, 210)
@@ -124,4 +124,75 @@ def test_display_results(mock_print, sample_results):
     handler.display_results(sample_results)
     
     # Verify print was called
-    assert mock_print.call_count > 0
\ No newline at end of file
+    assert mock_print.call_count > 0
+
+def test_save_results_to_results_store(output_dir, sample_results):
+    from src.components.results_store import SQLiteResultsStore
+    store = SQLiteResultsStore(os.path.join(output_dir, 'results.db'))
+    handler = OutputHandler(output_dir=output_dir, results_store=store, write_files=False)
+    
+    saved_files = handler.save_results(sample_results, 'https://example.com')
+    
+    # Only the store is written
+    assert list(saved_files.keys()) == ['results_store']
+    assert not any(name.endswith('.md') for name in os.listdir(output_dir))
+    
+    latest = store.latest_run_for_url('https://example.com')
+    assert latest['run_id'] == handler.run_id
+    assert latest['page_title'] == 'Example Website'
+    
+    handler.close()
+
+def test_save_results_async_compressed(output_dir, sample_results):
+    import gzip
+    from src.components.output_writer import AsyncOutputWriter
+    handler = OutputHandler(output_dir=output_dir, writer=AsyncOutputWriter(compression='gzip'))
+    
+    saved_files = handler.save_results(sample_results, 'https://example.com', include_timestamp=False)
+    handler.close()
+    
+    assert saved_files['structured_description'].endswith('.json.gz')
+    with gzip.open(saved_files['structured_description'], 'rt') as f:
+        content = f.read()
+    
+    # JSON is compact by default
+    assert '\n' not in content
+    assert json.loads(content)['page_title'] == 'Example Website'
+
+def test_shared_handler_stores_pages_in_one_run(output_dir, sample_results):
+    from src.components.results_store import SQLiteResultsStore
+    db_path = os.path.join(output_dir, 'results.db')
+    store = SQLiteResultsStore(db_path, batch_size=50)
+    handler = OutputHandler(output_dir=output_dir, results_store=store, write_files=False)
+    
+    for url in ('https://example.com/a', 'https://example.com/b', 'https://example.com/c'):
+        handler.save_results(dict(sample_results, url=url), url)
+    
+    # The pages wait for one batched transaction
+    assert len(store._pending) == 3
+    run_id = handler.run_id
+    handler.close()
+    
+    reopened = SQLiteResultsStore(db_path)
+    pages = reopened.pages_for_run(run_id)
+    reopened.close()
+    assert [page['url'] for page in pages] == ['https://example.com/a', 'https://example.com/b',
+                                              'https://example.com/c']
+
+def test_close_finishes_run_when_writer_fails(output_dir, sample_results):
+    from src.components.results_store import SQLiteResultsStore
+    db_path = os.path.join(output_dir, 'results.db')
+    writer = MagicMock()
+    writer.close.side_effect = IOError("disk full")
+    handler = OutputHandler(output_dir=output_dir, results_store=SQLiteResultsStore(db_path),
+                            write_files=False, writer=writer)
+    handler.save_results(sample_results, 'https://example.com')
+    
+    with pytest.raises(IOError):
+        handler.close('failed')
+    
+    reopened = SQLiteResultsStore(db_path)
+    latest = reopened.latest_run_for_url('https://example.com')
+    reopened.close()
+    assert latest['run_id'] == handler.run_id
+    assert latest['run_status'] == 'failed'
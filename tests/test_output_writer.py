@@ -0,0 +1,55 @@
+import pytest
+import os
+import gzip
+import json
+import threading
+from src.components.output_writer import OutputWriter, AsyncOutputWriter
+
+def test_sync_writer(tmp_path):
+    writer = OutputWriter()
+    path = writer.write(str(tmp_path / "out.md"), "# Title")
+    
+    assert path == str(tmp_path / "out.md")
+    with open(path) as f:
+        assert f.read() == "# Title"
+
+def test_gzip_compression(tmp_path):
+    writer = OutputWriter(compression='gzip', fsync=True)
+    path = writer.write(str(tmp_path / "out.json"), json.dumps({'a': 1}))
+    
+    assert path.endswith('.json.gz')
+    with gzip.open(path, 'rt') as f:
+        assert json.load(f) == {'a': 1}
+
+def test_unsupported_compression():
+    with pytest.raises(ValueError):
+        OutputWriter(compression='lz4')
+
+def test_async_writer_flushes_all_files(tmp_path):
+    writer = AsyncOutputWriter(max_queue_size=4, batch_size=3)
+    paths = [writer.write(str(tmp_path / f"file_{i}.txt"), f"content {i}") for i in range(20)]
+    writer.close()
+    
+    for i, path in enumerate(paths):
+        with open(path) as f:
+            assert f.read() == f"content {i}"
+
+def test_async_writer_writes_in_background(tmp_path):
+    writer = AsyncOutputWriter(fsync=False)
+    writer.write(str(tmp_path / "a.txt"), b"bytes")
+    writer.flush()
+    
+    assert writer._thread is not threading.current_thread()
+    assert (tmp_path / "a.txt").read_bytes() == b"bytes"
+    writer.close()
+    
+    with pytest.raises(RuntimeError):
+        writer.write(str(tmp_path / "b.txt"), "late")
+
+def test_async_writer_reports_errors(tmp_path):
+    writer = AsyncOutputWriter(fsync=False)
+    writer.write(str(tmp_path / "missing_dir" / "a.txt"), "data")
+    
+    with pytest.raises(IOError):
+        writer.flush()
+    writer.close()
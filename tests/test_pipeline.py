@@ -0,0 +1,157 @@
+import pytest
+import threading
+from src.components.pipeline import Pipeline, Stage, StageCache
+
+def counting(calls, name, fn):
+    def run(inputs):
+        calls.append(name)
+        return fn(inputs)
+    return run
+
+def build(calls, cache=None, suffix='!', **kwargs):
+    return Pipeline([
+        Stage('fetch', counting(calls, 'fetch', lambda i: {'text': i['url'].upper()}),
+              inputs=['url'], outputs=['text'], cache=True),
+        Stage('length', counting(calls, 'length', lambda i: {'length': len(i['text'])}),
+              inputs=['text'], outputs=['length'], cache=True),
+        Stage('format', counting(calls, 'format', lambda i: {'report': f"{i['text']}:{i['length']}{suffix}"}),
+              inputs=['text', 'length'], outputs=['report'], config={'suffix': suffix}, cache=True),
+    ], cache=cache, **kwargs)
+
+def test_stages_run_in_dependency_order():
+    calls = []
+    result = build(calls).run({'url': 'abc'})
+
+    assert result['artifacts']['report'] == 'ABC:3!'
+    assert calls == ['fetch', 'length', 'format']
+    assert result['stages'] == {'fetch': 'ran', 'length': 'ran', 'format': 'ran'}
+
+def test_unchanged_stages_are_served_from_the_cache(tmp_path):
+    cache = StageCache(str(tmp_path))
+    calls = []
+    build(calls, cache).run({'url': 'abc'})
+
+    # A downstream change only re-runs the downstream stage
+    calls.clear()
+    result = build(calls, cache, suffix='?').run({'url': 'abc'})
+    assert calls == ['format']
+    assert result['artifacts']['report'] == 'ABC:3?'
+    assert result['stages']['fetch'] == 'cached'
+
+    calls.clear()
+    build(calls, cache).run({'url': 'abc'}, rerun=['length'])
+    assert calls == ['length']
+
+    calls.clear()
+    build(calls, cache).run({'url': 'xyz'})
+    assert calls == ['fetch', 'length', 'format']
+
+def test_independent_stages_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+    def meet(name):
+        return lambda inputs: {name: barrier.wait() is not None}
+
+    result = Pipeline([
+        Stage('left', meet('a'), inputs=['x'], outputs=['a']),
+        Stage('right', meet('b'), inputs=['x'], outputs=['b']),
+        Stage('join', lambda i: {'both': i['a'] and i['b']}, inputs=['a', 'b'], outputs=['both'], main_thread=True),
+    ], parallelism=2).run({'x': 1})
+
+    assert result['artifacts']['both'] is True
+
+def test_digests_do_not_depend_on_key_order(tmp_path):
+    cache = StageCache(str(tmp_path))
+    calls = []
+    def pipeline(fields):
+        return Pipeline([
+            # Not cached: it builds the same fields in a different order each time
+            Stage('parse', lambda i: {'fields': dict(fields)}, inputs=['url'], outputs=['fields']),
+            Stage('count', counting(calls, 'count', lambda i: {'count': len(i['fields'])}),
+                  inputs=['fields'], outputs=['count'], cache=True),
+        ], cache=cache)
+
+    pipeline([('a', 1), ('b', 2)]).run({'url': 'abc'})
+    pipeline([('b', 2), ('a', 1)]).run({'url': 'abc'})
+    assert calls == ['count']
+
+def test_cache_key_leaves_out_unkeyed_inputs(tmp_path):
+    cache = StageCache(str(tmp_path))
+    calls = []
+    def pipeline():
+        return Pipeline([
+            Stage('count', counting(calls, 'count', lambda i: {'count': len(i['text'])}),
+                  inputs=['text', 'previous'], outputs=['count'], cache=True, key_inputs=['text']),
+        ], cache=cache)
+
+    pipeline().run({'text': 'abc', 'previous': {'run': 1}})
+    result = pipeline().run({'text': 'abc', 'previous': {'run': 2}})
+    assert calls == ['count']
+    assert result['stages']['count'] == 'cached'
+
+    with pytest.raises(ValueError):
+        Stage('count', lambda i: {}, inputs=['text'], outputs=['count'], key_inputs=['previous'])
+
+def test_file_outputs_are_digested_by_content(tmp_path):
+    cache = StageCache(str(tmp_path / 'cache'))
+    calls = []
+    def write(inputs):
+        path = tmp_path / f"shot_{len(calls)}.txt"
+        path.write_text('same pixels')
+        return {'shot': str(path)}
+    pipeline = lambda: Pipeline([
+        Stage('render', write, inputs=['url'], outputs=['shot'], file_outputs=['shot']),
+        Stage('ocr', counting(calls, 'ocr', lambda i: {'words': open(i['shot']).read().split()}),
+              inputs=['shot'], outputs=['words'], cache=True),
+    ], cache=cache)
+
+    pipeline().run({'url': 'u'})
+    result = pipeline().run({'url': 'u'})
+    # A new file with the same contents does not re-run OCR
+    assert calls == ['ocr']
+    assert result['stages']['ocr'] == 'cached'
+
+def test_failed_run_resumes_from_completed_stages(tmp_path):
+    cache = StageCache(str(tmp_path))
+    calls = []
+    def broken(inputs):
+        raise RuntimeError("converter bug")
+
+    pipeline = build(calls, cache)
+    pipeline.stages[2].run = broken
+    with pytest.raises(RuntimeError):
+        pipeline.run({'url': 'abc'})
+
+    calls.clear()
+    assert build(calls, cache).run({'url': 'abc'})['artifacts']['report'] == 'ABC:3!'
+    assert calls == ['format']
+
+def test_stage_ends_are_reported(tmp_path):
+    cache = StageCache(str(tmp_path))
+    ended = []
+    on_stage = lambda name, status, digests: ended.append((name, status, sorted(digests)))
+    build([], cache).run({'url': 'abc'})
+
+    pipeline = build([], cache, suffix='?')
+    pipeline.stages[2].run = lambda inputs: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        pipeline.run({'url': 'abc'}, on_stage=on_stage)
+    assert ended == [('fetch', 'cached', ['text']), ('length', 'cached', ['length']), ('format', 'failed', [])]
+
+def test_disabled_stage_produces_none():
+    result = Pipeline([
+        Stage('llm', lambda i: {'analysis': 'expensive'}, inputs=['text'], outputs=['analysis'], enabled=False),
+        Stage('save', lambda i: {'saved': i['analysis'] is None}, inputs=['analysis'], outputs=['saved']),
+    ]).run({'text': 't'})
+
+    assert result['artifacts']['saved'] is True
+    assert result['stages']['llm'] == 'disabled'
+
+def test_invalid_graphs():
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', dict, inputs=['y'], outputs=['x']), Stage('b', dict, inputs=['x'], outputs=['y'])])
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', dict, outputs=['x']), Stage('b', dict, outputs=['x'])])
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', dict, inputs=['missing'], outputs=['x'])]).run({})
+    with pytest.raises(ValueError):
+        Pipeline([Stage('a', lambda i: {}, outputs=['x'])]).run({})
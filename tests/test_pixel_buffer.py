@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import pytest
+import numpy as np
+from PIL import Image
+from src.components.pixel_buffer import SharedPixelBuffer, PixelBufferCache
+
+@pytest.fixture
+def image_path(tmp_path):
+    """A 64 × 1200 gradient, taller than one copy band."""
+    pixels = np.zeros((1200, 64, 3), dtype=np.uint8)
+    pixels[..., 0] = (np.arange(1200) % 256)[:, None]
+    pixels[..., 1] = np.arange(64)[None, :]
+    path = str(tmp_path / "page.png")
+    Image.fromarray(pixels).save(path)
+    return path
+
+def _checksum(descriptor):
+    buffer = SharedPixelBuffer.attach(descriptor)
+    try:
+        return int(buffer.array.sum(dtype=np.int64)), buffer.width, buffer.height
+    finally:
+        buffer.close()
+
+@pytest.mark.parametrize("backend", SharedPixelBuffer.BACKENDS)
+def test_pixel_buffer_from_image(image_path, tmp_path, backend):
+    expected = np.asarray(Image.open(image_path).convert('RGB'))
+    
+    with SharedPixelBuffer.from_image(image_path, backend=backend, directory=str(tmp_path)) as buffer:
+        assert (buffer.width, buffer.height) == (64, 1200)
+        assert np.array_equal(buffer.array, expected)
+        
+        attached = SharedPixelBuffer.attach(buffer.descriptor())
+        assert np.array_equal(attached.array, expected)
+        assert not attached.array.flags.writeable
+        with pytest.raises(RuntimeError):
+            attached.unlink()
+        attached.close()
+        
+        location = buffer.location
+    
+    if backend == 'memmap':
+        assert not os.path.exists(location)
+
+@pytest.mark.parametrize("backend", SharedPixelBuffer.BACKENDS)
+def test_pixel_buffer_attach_from_other_process(image_path, tmp_path, backend):
+    expected = int(np.asarray(Image.open(image_path).convert('RGB')).sum(dtype=np.int64))
+    
+    with SharedPixelBuffer.from_image(image_path, backend=backend, directory=str(tmp_path)) as buffer:
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            assert pool.apply(_checksum, (buffer.descriptor(),)) == (expected, 64, 1200)
+        
+        # The worker exiting does not free the pixels
+        assert int(buffer.array.sum(dtype=np.int64)) == expected
+
+def test_pixel_buffer_level_and_crop(image_path):
+    with SharedPixelBuffer.from_image(image_path) as buffer:
+        assert buffer.level(10 ** 9).shape == (1200, 64, 3)
+        
+        level = buffer.level(32 * 300)
+        assert level.shape == (300, 16, 3)
+        assert np.shares_memory(level, buffer.array)
+        assert np.array_equal(level[1, 1], buffer.array[4, 4])
+        
+        region = buffer.crop((8, 600, 40, 700))
+        assert region.size == (32, 100)
+        assert region.getpixel((0, 0)) == (600 % 256, 8, 0)
+
+@pytest.mark.parametrize("backend", SharedPixelBuffer.BACKENDS)
+def test_pixel_buffer_cache_decodes_once(image_path, tmp_path, backend):
+    from src.components.gui_analyzer import GUIAnalyzer
+    cache = PixelBufferCache(backend=backend, directory=str(tmp_path))
+    
+    buffer = cache.get(image_path)
+    assert cache.get(image_path) is buffer
+    descriptor = buffer.descriptor()
+    
+    # Stages read the shared pixels instead of decoding the screenshot again
+    analyzer = GUIAnalyzer()
+    words = [{'text': 'gradient', 'bounding_box': [(4, 100), (60, 100), (60, 140), (4, 140)]}]
+    assert analyzer.audit_contrast(words, buffer=buffer) == analyzer.audit_contrast(words, image_path=image_path)
+    assert _checksum(descriptor)[1:] == (64, 1200)
+    
+    cache.release()
+    with pytest.raises((FileNotFoundError, OSError)):
+        SharedPixelBuffer.attach(descriptor)
+
+def test_pixel_buffer_unsupported_backend(image_path):
+    with pytest.raises(ValueError):
+        SharedPixelBuffer.from_image(image_path, backend='pipe')
@@ -0,0 +1,123 @@
+import pytest
+import asyncio
+from unittest.mock import MagicMock, AsyncMock
+from src.components.request_interceptor import RequestInterceptor
+
+def make_request(url, resource_type):
+    request = MagicMock()
+    request.url = url
+    request.resourceType = resource_type
+    request.continue_ = AsyncMock()
+    request.abort = AsyncMock()
+    request.respond = AsyncMock()
+    return request
+
+def test_classify_defaults():
+    interceptor = RequestInterceptor()
+    
+    # Documents and regular assets are always allowed
+    assert interceptor.classify('https://example.com/', 'document') == 'allow'
+    assert interceptor.classify('https://example.com/app.css', 'stylesheet') == 'allow'
+    assert interceptor.classify('https://example.com/logo.png', 'image') == 'allow'
+    
+    # Tracker domains (including subdomains) are blocked
+    assert interceptor.classify('https://www.google-analytics.com/collect', 'script') == 'block'
+    assert interceptor.classify('https://stats.g.doubleclick.net/px', 'image') == 'block'
+    
+    # Heavy resource types are blocked or stubbed
+    assert interceptor.classify('https://example.com/ws', 'websocket') == 'block'
+    assert interceptor.classify('https://example.com/intro.mp4', 'media') == 'stub'
+
+def test_classify_custom_config():
+    interceptor = RequestInterceptor({
+        'block_resource_types': ['font'],
+        'block_domains': ['ads.example.net'],
+        'allow_domains': ['cdn.doubleclick.net'],
+        'stub_media': False
+    })
+    
+    assert interceptor.classify('https://example.com/font.woff2', 'font') == 'block'
+    assert interceptor.classify('https://ads.example.net/banner.js', 'script') == 'block'
+    assert interceptor.classify('https://cdn.doubleclick.net/lib.js', 'script') == 'allow'
+    assert interceptor.classify('https://example.com/intro.mp4', 'media') == 'allow'
+
+def test_classify_disabled():
+    interceptor = RequestInterceptor({'enabled': False})
+    assert interceptor.classify('https://www.google-analytics.com/collect', 'script') == 'allow'
+
+def test_handle_request_and_stats():
+    interceptor = RequestInterceptor()
+    
+    allowed = make_request('https://example.com/app.js', 'script')
+    blocked = make_request('https://www.googletagmanager.com/gtm.js', 'script')
+    stubbed = make_request('https://example.com/intro.mp4', 'media')
+    
+    async def run():
+        for request in (allowed, blocked, stubbed):
+            await interceptor.handle_request(request)
+    asyncio.run(run())
+    
+    allowed.continue_.assert_called_once()
+    blocked.abort.assert_called_once_with('blockedbyclient')
+    stubbed.respond.assert_called_once()
+    assert stubbed.respond.call_args[0][0]['body'] == ''
+    
+    response = MagicMock()
+    response.fromCache = False
+    response.headers = {'content-length': '2048'}
+    interceptor.handle_response(response)
+    
+    stats = interceptor.get_stats()
+    assert stats['allowed_requests'] == 1
+    assert stats['blocked_requests'] == 2
+    assert stats['stubbed_requests'] == 1
+    assert stats['transferred_bytes'] == 2048
+    assert stats['blocked_by_type'] == {'script': 1, 'media': 1}
+    assert stats['blocked_by_domain']['www.googletagmanager.com'] == 1
+
+def test_attach_enables_interception():
+    interceptor = RequestInterceptor()
+    page = MagicMock()
+    page.setRequestInterception = AsyncMock()
+    
+    asyncio.run(interceptor.attach(page))
+    
+    page.setRequestInterception.assert_called_once_with(True)
+    events = [call[0][0] for call in page.on.call_args_list]
+    assert 'request' in events
+    assert 'response' in events
+
+def test_asset_cache_serves_and_stores(tmp_path):
+    from src.components.asset_cache import AssetCache
+    cache = AssetCache(cache_dir=str(tmp_path / "assets"))
+    cache.store('https://example.com/app.css', 200, {'content-type': 'text/css'}, b'body{}')
+    interceptor = RequestInterceptor(asset_cache=cache)
+    
+    hit = make_request('https://example.com/app.css', 'stylesheet')
+    miss = make_request('https://example.com/app.js', 'script')
+    
+    response = MagicMock()
+    response.url = 'https://example.com/app.js'
+    response.fromCache = False
+    response.status = 200
+    response.headers = {'content-type': 'application/javascript'}
+    response.request.resourceType = 'script'
+    response.buffer = AsyncMock(return_value=b'console.log(1)')
+    
+    async def run():
+        await interceptor.handle_request(hit)
+        await interceptor.handle_request(miss)
+        interceptor.handle_response(response)
+        # Let the scheduled cache write complete
+        await asyncio.sleep(0)
+    asyncio.run(run())
+    
+    hit.respond.assert_called_once()
+    assert hit.respond.call_args[0][0]['body'] == b'body{}'
+    hit.continue_.assert_not_called()
+    miss.continue_.assert_called_once()
+    
+    assert cache.lookup('https://example.com/app.js')['body'] == b'console.log(1)'
+    stats = interceptor.get_stats()
+    assert stats['asset_cache_hits'] == 1
+    assert stats['asset_cache_stores'] == 1
@@ -0,0 +1,100 @@
+import pytest
+import os
+from src.components.results_store import ResultsStore, SQLiteResultsStore, create_results_store
+
+def make_results(url, layout='standard-layout', with_analysis=False):
+    results = {
+        'url': url,
+        'screenshot_path': '/tmp/screenshot.png',
+        'textual_description': f'# {url}',
+        'structured_description': {
+            'page_title': url,
+            'layout_pattern': layout,
+            'ui_elements': [
+                {'type': 'header', 'position': {'description': 'top center'},
+                 'size_percentage': {'width': 100.0, 'height': 10.0}, 'text_content': 'Welcome'},
+                {'type': 'button', 'position': {'description': 'top right'},
+                 'size_percentage': {'width': 5.0, 'height': 2.0}, 'text_content': 'Login'}
+            ]
+        }
+    }
+    if with_analysis:
+        results['llm_analysis'] = {'analysis_type': 'ux', 'prompt': 'p', 'response': 'Looks fine'}
+    return results
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteResultsStore(str(tmp_path / "results.db"), batch_size=10)
+    yield store
+    store.close()
+
+def test_save_and_query_latest_run(store):
+    first = store.start_run()
+    store.save_page(first, 'https://example.com', make_results('https://example.com'))
+    store.finish_run(first)
+    
+    second = store.start_run()
+    store.save_page(second, 'https://example.com', make_results('https://example.com', with_analysis=True))
+    
+    latest = store.latest_run_for_url('https://example.com')
+    assert latest['run_id'] == second
+    assert latest['run_status'] == 'running'
+    assert latest['structured_description']['layout_pattern'] == 'standard-layout'
+    assert [e['type'] for e in latest['elements']] == ['header', 'button']
+    assert latest['elements'][1]['text_content'] == 'Login'
+    assert latest['analyses'][0]['response'] == 'Looks fine'
+    
+    assert store.latest_run_for_url('https://unknown.example') is None
+
+def test_pages_with_layout(store):
+    run_id = store.start_run()
+    store.save_page(run_id, 'https://a.example', make_results('https://a.example', 'single-column'))
+    store.save_page(run_id, 'https://b.example', make_results('https://b.example', 'multi-column'))
+    store.save_page(run_id, 'https://c.example', make_results('https://c.example', 'single-column'))
+    
+    pages = store.pages_with_layout('single-column')
+    assert sorted(page['url'] for page in pages) == ['https://a.example', 'https://c.example']
+    assert len(store.pages_for_run(run_id)) == 3
+
+def test_writes_are_batched(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    store = SQLiteResultsStore(db_path, batch_size=3)
+    run_id = store.start_run()
+    
+    store.save_page(run_id, 'https://a.example', make_results('https://a.example'))
+    store.save_page(run_id, 'https://b.example', make_results('https://b.example'))
+    
+    # Nothing is visible to another connection until the batch is full
+    reader = SQLiteResultsStore(db_path)
+    assert reader.conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0] == 0
+    
+    store.save_page(run_id, 'https://c.example', make_results('https://c.example'))
+    assert reader.conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0] == 3
+    
+    reader.close()
+    store.close()
+
+def test_create_results_store(tmp_path):
+    assert create_results_store({}) is None
+    assert create_results_store({'enabled': False, 'path': str(tmp_path / "x.db")}) is None
+    
+    store = create_results_store({'backend': 'sqlite', 'path': str(tmp_path / "r.db")})
+    assert isinstance(store, SQLiteResultsStore)
+    store.close()
+    
+    with pytest.raises(ValueError):
+        create_results_store({'backend': 'unknown'})
+
+def test_incomplete_backend_fails_at_construction():
+    class WriteOnlyStore(ResultsStore):
+        def start_run(self, metadata=None):
+            return 'run'
+        
+        def finish_run(self, run_id, status='completed'):
+            pass
+        
+        def save_page(self, run_id, url, results):
+            pass
+    
+    with pytest.raises(TypeError):
+        WriteOnlyStore()
@@ -0,0 +1,30 @@
+import json
+import numpy as np
+from unittest.mock import patch
+from src.components import serialization
+from src.components.serialization import dumps_json, dumps_json_bytes
+
+def test_dumps_json_compact_and_pretty():
+    data = {'title': 'Café', 'box': (1, 2), 'values': [1.5, None]}
+    
+    compact = dumps_json(data)
+    assert '\n' not in compact
+    assert json.loads(compact) == {'title': 'Café', 'box': [1, 2], 'values': [1.5, None]}
+    
+    pretty = dumps_json(data, pretty=True)
+    assert '\n  "title"' in pretty
+
+def test_dumps_json_numpy_values():
+    data = {'count': np.int64(3), 'boxes': np.array([[1, 2], [3, 4]], dtype=np.int32)}
+    assert json.loads(dumps_json_bytes(data)) == {'count': 3, 'boxes': [[1, 2], [3, 4]]}
+
+def test_dumps_json_without_orjson():
+    data = {'count': np.int64(3), 'title': 'Café'}
+    with patch.object(serialization, 'orjson', None):
+        encoded = dumps_json_bytes(data)
+        assert dumps_json_bytes({'b': 1, 'a': 2}, sort_keys=True) == b'{"a":2,"b":1}'
+    assert json.loads(encoded.decode('utf-8')) == {'count': 3, 'title': 'Café'}
+
+def test_dumps_json_sort_keys():
+    assert dumps_json_bytes({'b': 1, 'a': {'d': 2, 'c': 3}}, sort_keys=True) == b'{"a":{"c":3,"d":2},"b":1}'
+    assert dumps_json_bytes({'b': 1, 'a': 2}, sort_keys=True) == dumps_json_bytes({'a': 2, 'b': 1}, sort_keys=True)
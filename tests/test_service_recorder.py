@@ -0,0 +1,96 @@
+import pytest
+import time
+from unittest.mock import patch, MagicMock
+from google.cloud import vision
+from anthropic.types import Message
+from PIL import Image
+from src.components.service_recorder import ServiceRecorder, create_service_recorder
+from src.components.ocr_extractor import OCRExtractor
+from src.components.llm_integration import LLMIntegration
+
+def identity_call(recorder, request, response=None):
+    return recorder.call('echo', 'get', request, perform=lambda: response,
+                         encode=lambda value: value, decode=lambda value: value)
+
+def test_replay_matches_requests_and_repeats_in_order(tmp_path):
+    recorder = ServiceRecorder(str(tmp_path), mode='record')
+    identity_call(recorder, {'q': 1, 'lang': 'en'}, 'first')
+    identity_call(recorder, {'q': 2}, 'other')
+    identity_call(recorder, {'q': 1, 'lang': 'en'}, 'second')
+
+    replay = ServiceRecorder(str(tmp_path), mode='replay', latency_scale=0)
+    # Key order does not matter
+    assert identity_call(replay, {'lang': 'en', 'q': 1}) == 'first'
+    assert identity_call(replay, {'q': 1, 'lang': 'en'}) == 'second'
+    assert identity_call(replay, {'q': 1, 'lang': 'en'}) == 'first'
+    assert identity_call(replay, {'q': 2}) == 'other'
+    with pytest.raises(RuntimeError):
+        identity_call(replay, {'q': 3})
+
+def test_order_matching_ignores_requests(tmp_path):
+    recorder = ServiceRecorder(str(tmp_path), mode='record')
+    identity_call(recorder, {'image': 'a'}, 'page 1')
+    identity_call(recorder, {'image': 'b'}, 'page 2')
+
+    replay = ServiceRecorder(str(tmp_path), mode='replay', latency_scale=0, match='order')
+    assert [identity_call(replay, {'image': 'new'}) for _ in range(3)] == ['page 1', 'page 2', 'page 1']
+
+def test_replay_at_recorded_speed(tmp_path):
+    recorder = ServiceRecorder(str(tmp_path), mode='record')
+    recorder.call('slow', 'get', {}, perform=lambda: time.sleep(0.2) or 'done',
+                  encode=lambda value: value, decode=lambda value: value)
+    assert recorder.interactions('slow')[0]['latency'] >= 0.2
+
+    for scale, at_least, below in ((1.0, 0.2, None), (0, 0, 0.1)):
+        replay = ServiceRecorder(str(tmp_path), mode='replay', latency_scale=scale)
+        start = time.perf_counter()
+        replay.call('slow', 'get', {}, perform=None, encode=None, decode=lambda value: value)
+        elapsed = time.perf_counter() - start
+        assert elapsed >= at_least and (below is None or elapsed < below)
+
+def test_vision_responses_are_replayed_without_credentials(tmp_path):
+    image_path = str(tmp_path / 'page.png')
+    Image.new('RGB', (40, 20), 'white').save(image_path)
+    response = vision.AnnotateImageResponse(text_annotations=[
+        {'description': 'Hello', 'bounding_poly': {'vertices': [{'x': 0, 'y': 0}, {'x': 30, 'y': 12}]}},
+        {'description': 'Hello', 'bounding_poly': {'vertices': [{'x': 0, 'y': 0}, {'x': 30, 'y': 0},
+                                                                {'x': 30, 'y': 12}, {'x': 0, 'y': 12}]}},
+    ])
+    cassettes = str(tmp_path / 'cassettes')
+
+    with patch('google.cloud.vision.ImageAnnotatorClient') as mock_client:
+        mock_client.return_value.text_detection = MagicMock(return_value=response)
+        recorded = OCRExtractor(languages=['en'], recorder=ServiceRecorder(cassettes, mode='record'))
+        expected = recorded.extract_text(image_path)
+
+    with patch('google.cloud.vision.ImageAnnotatorClient') as mock_client:
+        replayed = OCRExtractor(languages=['en'], recorder=ServiceRecorder(cassettes, latency_scale=0))
+        assert replayed.extract_text(image_path) == expected
+        mock_client.assert_not_called()
+    assert expected['text_blocks'][0]['text'] == 'Hello'
+
+def test_claude_responses_are_replayed_without_api_key(tmp_path):
+    message = Message.model_validate({
+        'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'model': 'claude',
+        'content': [{'type': 'text', 'text': 'Clear hierarchy'}],
+        'stop_reason': 'end_turn', 'stop_sequence': None, 'usage': {'input_tokens': 10, 'output_tokens': 3}
+    })
+    cassettes = str(tmp_path)
+
+    with patch('anthropic.Client') as mock_client:
+        mock_client.return_value.messages.create = MagicMock(return_value=message)
+        LLMIntegration('key', recorder=ServiceRecorder(cassettes, mode='record')).analyze_webpage_description('# Page', 'ux')
+
+    with patch('anthropic.Client') as mock_client:
+        replay = LLMIntegration(None, recorder=ServiceRecorder(cassettes, latency_scale=0))
+        assert replay.analyze_webpage_description('# Page', 'ux')['response'] == 'Clear hierarchy'
+        # A different description was never recorded
+        assert 'error' in replay.analyze_webpage_description('# Other page', 'ux')
+        mock_client.assert_not_called()
+
+def test_create_service_recorder(tmp_path):
+    assert create_service_recorder({}) is None
+    config = {'mode': 'replay', 'cassette_dir': str(tmp_path), 'latency_scale': 0}
+    assert create_service_recorder(config) is create_service_recorder(dict(config))
+    with pytest.raises(ValueError):
+        create_service_recorder({'mode': 'rewind', 'cassette_dir': str(tmp_path)})
@@ -0,0 +1,147 @@
+import pytest
+import time
+import asyncio
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from src.components.site_crawler import SiteCrawler, normalize_url, extract_links
+
+SITE = {
+    'index.html': '<a href="/about.html#team">About</a> <a href="blog/">Blog</a> '
+                  '<a href="https://elsewhere.example/">Away</a> <a href="logo.png">Logo</a> '
+                  '<a href="mailto:me@example.com">Mail</a>',
+    'about.html': '<a href="/index.html">Home</a> <a href="./about.html?utm_source=x">Self</a>',
+    'blog/index.html': '<a href="../about.html">About</a> <a href="post.html">Post</a> '
+                       '<a href="/private/secret.html">Secret</a>',
+    'blog/post.html': '<a href="deep.html">Deeper</a>',
+    'blog/deep.html': 'The end',
+    'private/secret.html': 'Hidden',
+    'robots.txt': 'User-agent: *\nDisallow: /private/\n'
+}
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site(tmp_path):
+    for name, content in SITE.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=str(tmp_path)))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield tmp_path, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+def crawl(crawler, *args, **kwargs):
+    async def collect():
+        return [page async for page in crawler.crawl(*args, **kwargs)]
+    return asyncio.run(collect())
+
+def test_normalize_url():
+    assert normalize_url('HTTP://Example.COM:80/a/./b/../c?b=2&a=1&utm_source=x#top') == 'http://example.com/a/c?a=1&b=2'
+    assert normalize_url('https://example.com') == 'https://example.com/'
+    assert normalize_url('https://example.com:8443/x') == 'https://example.com:8443/x'
+    assert normalize_url('../up', 'https://example.com/a/b/page.html') == 'https://example.com/a/up'
+    assert normalize_url('/a b') is None
+    assert normalize_url('mailto:me@example.com') is None
+    assert normalize_url('javascript:void(0)', 'https://example.com/') is None
+
+def test_extract_links_honors_base_and_nofollow():
+    html = ('<base href="https://example.com/docs/"><a href="intro.html">Intro</a>'
+            '<a rel="nofollow" href="/login">Login</a><area href="/map">')
+    links = extract_links(html, 'https://example.com/index.html')
+    assert links == ['https://example.com/docs/intro.html', 'https://example.com/map']
+
+def test_crawl_follows_links_once_within_limits(site):
+    _, base = site
+    pages = crawl(SiteCrawler(max_depth=2, delay=0), [base + '/index.html'])
+    urls = [page['url'] for page in pages]
+
+    # Fragments and tracking parameters do not create duplicates, robots.txt and other hosts are respected
+    assert sorted(urls) == sorted([base + '/index.html', base + '/about.html', base + '/blog/', base + '/blog/post.html'])
+    assert len(urls) == len(set(urls))
+    post = next(page for page in pages if page['url'].endswith('post.html'))
+    assert post['depth'] == 2 and post['referrer'] == base + '/blog/'
+    assert all(page['status'] == 200 for page in pages)
+
+def test_crawl_keeps_pages_whose_response_url_differs_only_in_form(site):
+    _, base = site
+    crawler = SiteCrawler(max_depth=0, delay=0)
+    get = crawler._get
+
+    def get_with_unnormalized_url(url):
+        status, final_url, content_type, body = get(url)
+        return status, final_url.replace('http://', 'HTTP://') + '#top', content_type, body
+
+    crawler._get = get_with_unnormalized_url
+    pages = crawl(crawler, [base + '/index.html'])
+    assert [page['url'] for page in pages] == [base + '/index.html']
+
+def test_crawl_page_limit_and_robots_opt_out(site):
+    _, base = site
+    assert len(crawl(SiteCrawler(max_depth=5, max_pages=2, delay=0), [base + '/index.html'])) == 2
+
+    urls = [page['url'] for page in crawl(SiteCrawler(max_depth=5, delay=0, respect_robots=False), [base + '/'])]
+    assert base + '/private/secret.html' in urls
+    assert base + '/blog/deep.html' in urls
+
+def test_crawl_from_sitemap_index(site):
+    root, base = site
+    (root / 'sitemap.xml').write_text(
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f'<sitemap><loc>{base}/pages.xml</loc></sitemap></sitemapindex>')
+    (root / 'pages.xml').write_text(
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f'<url><loc>{base}/blog/deep.html</loc></url><url><loc>{base}/missing.html</loc></url></urlset>')
+
+    pages = crawl(SiteCrawler(max_depth=0, delay=0), sitemap=base + '/sitemap.xml')
+    assert [page['url'] for page in pages] == [base + '/blog/deep.html']
+
+def test_crawl_collects_errors_instead_of_printing(site, capsys):
+    _, base = site
+    crawler = SiteCrawler(max_depth=0, delay=0, timeout=1, respect_robots=False)
+    pages = crawl(crawler, ['http://127.0.0.1:1/'], sitemap=base + '/missing.xml')
+    
+    assert pages == []
+    assert [error['url'] for error in crawler.errors] == [base + '/missing.xml', 'http://127.0.0.1:1/']
+    assert crawler.errors[0]['error'] == 'Could not fetch sitemap'
+    assert crawler.errors[1]['error'].startswith('Request failed')
+    assert capsys.readouterr().out == ''
+
+def test_crawl_spaces_requests_to_a_host(site):
+    _, base = site
+    start = time.monotonic()
+    pages = crawl(SiteCrawler(max_depth=1, delay=0.2, concurrency=4), [base + '/blog/'])
+    # robots.txt, /blog/, then about.html and post.html, one at a time
+    assert len(pages) == 3
+    assert time.monotonic() - start >= 0.6
+
+def test_pages_applies_backpressure(site):
+    _, base = site
+    crawler = SiteCrawler(max_depth=5, delay=0, queue_size=1, concurrency=1, respect_robots=False)
+    iterator = crawler.pages([base + '/index.html'])
+
+    first = next(iterator)
+    time.sleep(0.3)
+    # While the pipeline is busy: one page queued and one worker waiting to queue the next
+    assert crawler._emitted == 3
+    assert first['url'] == base + '/index.html'
+    assert len(list(iterator)) == 5
+
+def test_pages_stops_the_crawl_when_closed(site):
+    _, base = site
+    iterator = SiteCrawler(max_depth=5, delay=0, queue_size=1, respect_robots=False).pages([base + '/'])
+    next(iterator)
+    iterator.close()
+    assert not any(thread.name == 'site-crawler' for thread in threading.enumerate())
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        SiteCrawler(concurrency=0)
+    with pytest.raises(ValueError):
+        SiteCrawler(queue_size=0)
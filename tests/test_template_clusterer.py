@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+from PIL import Image
+from src.components.template_clusterer import TemplateClusterer, simhash
+
+HEADER = ['0:body', '1:header.site', '2:nav.menu'] + ['3:a.link'] * 6
+
+def product_page(specs, reviews):
+    lines = HEADER + ['1:main.product', '2:div.gallery', '3:img', '2:ul.specs'] + ['3:li.spec'] * specs
+    lines += ['2:div.reviews'] + ['3:div.review', '4:p', '4:span.stars'] * reviews
+    return '\n'.join(lines + ['1:footer.site', '2:p'])
+
+def blog_post(paragraphs):
+    lines = HEADER + ['1:article.post', '2:h1', '2:div.meta', '3:span.author', '3:time'] + ['2:p'] * paragraphs
+    lines += ['2:figure', '3:img', '3:figcaption', '1:aside.related', '2:ul', '3:li']
+    return '\n'.join(lines + ['1:footer.site', '2:p'])
+
+def screenshot(path, header_color, height, seed):
+    rng = np.random.default_rng(seed)
+    pixels = np.full((height, 400, 3), 255, dtype=np.uint8)
+    pixels[:80] = header_color
+    pixels[120:400, 20:180] = rng.integers(0, 255, 3)
+    pixels[400:] = rng.integers(200, 255, (height - 400, 400, 3))
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+def test_simhash_of_similar_sets_is_close():
+    base = [f'feature {i}' for i in range(100)]
+    near = base[:95] + ['other 1', 'other 2']
+    far = [f'unrelated {i}' for i in range(100)]
+
+    assert simhash([]) == 0
+    assert simhash(base) == simhash(list(reversed(base)))
+    assert bin(simhash(base) ^ simhash(near)).count('1') < bin(simhash(base) ^ simhash(far)).count('1')
+
+def test_dom_simhash_ignores_repetition():
+    clusterer = TemplateClusterer()
+    product = clusterer.dom_simhash(product_page(3, 2))
+
+    assert clusterer.dom_simhash(product_page(12, 2)) == product
+    assert bin(clusterer.dom_simhash(blog_post(4)) ^ product).count('1') > clusterer.dom_threshold
+
+def test_pages_cluster_by_template(tmp_path):
+    clusterer = TemplateClusterer()
+    pages = [
+        ('/product/1', screenshot(tmp_path / 'p1.png', (20, 40, 90), 1600, 1), product_page(3, 2)),
+        ('/blog/1', screenshot(tmp_path / 'b1.png', (250, 250, 250), 2400, 2), blog_post(5)),
+        ('/product/2', screenshot(tmp_path / 'p2.png', (20, 40, 90), 1200, 3), product_page(8, 2)),
+        ('/blog/2', screenshot(tmp_path / 'b2.png', (250, 250, 250), 900, 4), blog_post(9)),
+    ]
+
+    assignments = [clusterer.assign(url, clusterer.fingerprint(path, dom)) for url, path, dom in pages]
+    assert [assignment['cluster'] for assignment in assignments] == [0, 1, 0, 1]
+    assert [assignment['is_representative'] for assignment in assignments] == [True, True, False, False]
+    assert assignments[2]['representative'] == '/product/1'
+
+    summary = clusterer.summary()
+    assert summary['clusters'] == 2 and summary['pages'] == 4
+    assert summary['templates'][0]['pages'] == ['/product/1', '/product/2']
+
+def test_remembered_results_are_reused():
+    clusterer = TemplateClusterer()
+    fingerprint = {'image_hash': 'ff00ff00ff00ff00', 'dom_hash': '0123456789abcdef'}
+    near = {'image_hash': 'ff00ff00ff00ff01', 'dom_hash': '0123456789abcdee'}
+
+    first = clusterer.assign('/a', fingerprint)
+    # The representative failed before its results were remembered
+    assert clusterer.assign('/b', near)['results'] is None
+    clusterer.remember(first['cluster'], {'gui_results': 'b'})
+    clusterer.remember(first['cluster'], {'gui_results': 'ignored'})
+
+    assert clusterer.assign('/c', near)['results'] == {'gui_results': 'b'}
+    assert clusterer.summary()['reused'] == 1
+
+def test_lsh_lookup_matches_linear_scan():
+    rng = np.random.default_rng(0)
+    hashes = [int(value) for value in rng.integers(0, 2 ** 63, 200, dtype=np.int64)]
+    probes = [value ^ (1 << int(bit)) ^ (1 << int(other))
+              for value, bit, other in zip(hashes[:50], rng.integers(0, 64, 50), rng.integers(0, 64, 50))]
+
+    banded = TemplateClusterer(image_threshold=64, dom_threshold=6)
+    linear = TemplateClusterer(image_threshold=64, dom_threshold=6)
+    # Without buckets, every cluster is compared
+    linear._buckets = []
+    for index, value in enumerate(hashes):
+        fingerprint = {'image_hash': '0', 'dom_hash': f'{value:016x}'}
+        assert banded.assign(str(index), fingerprint)['cluster'] == linear.assign(str(index), fingerprint)['cluster']
+    for value in probes:
+        fingerprint = {'image_hash': '0', 'dom_hash': f'{value:016x}'}
+        assert banded.assign('probe', fingerprint)['cluster'] == linear.assign('probe', fingerprint)['cluster']
@@ -0,0 +1,75 @@
+import pytest
+import numpy as np
+from src.components.text_grouping import TextGrouper
+
+def word(text, left, top, right, bottom):
+    return {'text': text, 'bounding_box': [(left, top), (right, top), (right, bottom), (left, bottom)]}
+
+@pytest.fixture
+def two_column_words():
+    """Words of a heading, a two-column body and a footer line, in scrambled API order."""
+    words = [
+        word('Right', 300, 160, 350, 180), word('one', 355, 161, 390, 181),
+        word('Page', 10, 10, 60, 30), word('Title', 70, 12, 130, 32),
+        word('Left', 10, 60, 50, 80), word('two', 55, 85, 90, 105),
+        word('Left', 10, 85, 50, 105), word('one', 55, 61, 90, 81),
+        word('Right', 300, 185, 350, 205), word('two', 355, 185, 390, 205),
+        word('Next', 10, 140, 50, 160), word('para', 55, 141, 95, 161)
+    ]
+    return words
+
+def test_group_empty():
+    assert TextGrouper().group([]) == {'lines': [], 'paragraphs': [], 'columns': []}
+
+def test_group_lines_and_paragraphs(two_column_words):
+    groups = TextGrouper().group(two_column_words)
+    
+    assert [line['text'] for line in groups['lines']] == [
+        'Page Title', 'Left one', 'Left two', 'Next para', 'Right one', 'Right two'
+    ]
+    assert [paragraph['text'] for paragraph in groups['paragraphs']] == [
+        'Page Title', 'Left one Left two', 'Next para', 'Right one Right two'
+    ]
+    
+    paragraph = groups['paragraphs'][1]
+    assert paragraph['lines'] == [1, 2]
+    assert paragraph['bounding_box'] == [(10, 60), (90, 60), (90, 105), (10, 105)]
+    assert all(groups['lines'][i]['paragraph'] == 1 for i in paragraph['lines'])
+
+def test_group_columns(two_column_words):
+    groups = TextGrouper().group(two_column_words)
+    
+    assert len(groups['columns']) == 2
+    assert groups['columns'][0]['paragraphs'] == [0, 1, 2]
+    assert groups['columns'][1]['paragraphs'] == [3]
+    assert groups['columns'][1]['bounding_box'] == [(300, 160), (390, 160), (390, 205), (300, 205)]
+    assert [p['column'] for p in groups['paragraphs']] == [0, 0, 0, 1]
+
+def test_lines_split_at_wide_gaps():
+    # Same baseline, but far apart: two lines, not one
+    groups = TextGrouper().group([word('Menu', 10, 10, 60, 30), word('Login', 500, 10, 560, 30)])
+    assert [line['text'] for line in groups['lines']] == ['Menu', 'Login']
+
+def test_reading_order_matches_grouped_lines(two_column_words):
+    grouper = TextGrouper()
+    boxes = np.array([[w['bounding_box'][0][0], w['bounding_box'][0][1],
+                       w['bounding_box'][2][0], w['bounding_box'][2][1]] for w in two_column_words])
+    
+    order = grouper.reading_order(boxes)
+    text = ' '.join(two_column_words[i]['text'] for i in order)
+    
+    assert text == ' '.join(line['text'] for line in grouper.group(two_column_words)['lines'])
+    assert grouper.reading_order(boxes[:1]).tolist() == [0]
+
+def test_group_large_page():
+    rng = np.random.default_rng(1)
+    words = []
+    for line in range(500):
+        for position in range(20):
+            left = position * 70 + int(rng.integers(0, 5))
+            top = line * 30 + int(rng.integers(0, 3))
+            words.append(word(f'w{line}-{position}', left, top, left + 60, top + 20))
+    
+    groups = TextGrouper().group(words)
+    assert len(groups['lines']) == 500
+    assert groups['lines'][0]['text'].startswith('w0-0 w0-1')
@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+from PIL import Image
+from src.components.visual_diff import VisualDiff
+
+@pytest.fixture
+def captures():
+    """A striped page, and the same page with a banner inserted and two edits further down."""
+    before = np.full((800, 320, 3), 255, dtype=np.uint8)
+    for top in range(0, 800, 40):
+        before[top + 10:top + 24, 20:40 + (top * 3) % 260] = (top // 4) % 200
+    after = np.concatenate([before[:200], np.full((50, 320, 3), (200, 30, 30), dtype=np.uint8), before[200:]])
+    after[500:514, 40:120] = 0
+    after[500:514, 260:300] = 0
+    return before, after
+
+def _element(element_type, box, text=''):
+    return {'type': element_type, 'bounding_box': dict(zip(('left', 'top', 'right', 'bottom'), box)), 'text_content': text}
+
+def test_diff_aligns_inserted_content(captures):
+    before, after = captures
+    
+    report = VisualDiff().diff(before, after)
+    
+    assert report['dimensions']['after'] == {'width': 320, 'height': 850}
+    # Everything below the banner is found again 50 rows lower
+    assert [(span['before_top'], span['after_top'], span['offset']) for span in report['alignment']][:2] == [
+        (0, 0, 0), (200, 250, 50)]
+    
+    added = [region for region in report['changed_regions'] if region['change'] == 'added']
+    assert added == [{'change': 'added', 'before': None,
+                      'after': {'left': 0, 'top': 200, 'right': 320, 'bottom': 250}}]
+    
+    # Two separate edits on the same rows, localized to their blocks
+    modified = [region for region in report['changed_regions'] if region['change'] == 'modified']
+    assert [region['after'] for region in modified] == [
+        {'left': 32, 'top': 500, 'right': 128, 'bottom': 514},
+        {'left': 256, 'top': 500, 'right': 304, 'bottom': 514}]
+    assert modified[0]['before']['top'] == 450
+    assert report['summary'].startswith("3 changed regions")
+
+def test_diff_identical_captures(captures, tmp_path):
+    before, _ = captures
+    path = str(tmp_path / "page.png")
+    Image.fromarray(before).save(path)
+    
+    report = VisualDiff().diff(path, before.copy(), [], [])
+    
+    assert report['changed_regions'] == []
+    assert report['changed_fraction'] == 0
+    assert report['summary'] == "No visual changes; elements: 0 added, 0 removed, 0 changed, 0 unchanged"
+
+def test_diff_matches_elements(captures):
+    before, after = captures
+    before_elements = [
+        _element('header', (0, 0, 320, 100)),
+        _element('button', (20, 450, 120, 480), 'Buy now'),
+        _element('card', (20, 600, 300, 700), 'Old offer'),
+        _element('button', (200, 700, 300, 740), 'Contact')
+    ]
+    after_elements = [
+        _element('header', (0, 0, 320, 100)),
+        _element('image', (0, 200, 320, 250)),
+        _element('button', (20, 500, 120, 530), 'Buy now'),
+        _element('card', (20, 650, 300, 750), 'New offer'),
+        _element('button', (20, 100, 120, 140), 'Contact')
+    ]
+    
+    elements = VisualDiff().diff(before, after, before_elements, after_elements)['elements']
+    
+    # The header and the button below the banner did not change
+    assert elements['unchanged'] == 2
+    assert [element['type'] for element in elements['added']] == ['image']
+    assert elements['removed'] == []
+    changes = {element['text_after']: element['changes'] for element in elements['changed']}
+    # Matched by position despite the new text, and by text despite the new position
+    assert changes == {'New offer': ['text'], 'Contact': ['moved']}
+
+def test_match_elements_requires_same_type():
+    elements = VisualDiff().match_elements(
+        [_element('button', (0, 0, 100, 40), 'Go')],
+        [_element('link', (0, 0, 100, 40), 'Go')]
+    )
+    
+    assert len(elements['added']) == 1
+    assert len(elements['removed']) == 1
+    assert elements['unchanged'] == 0
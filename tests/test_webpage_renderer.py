@@ -16,6 +16,8 @@ def mock_browser():
     page_mock.setViewport = AsyncMock()
     page_mock.screenshot = AsyncMock()
     page_mock.title = AsyncMock(return_value="Test Page")
+    page_mock.setRequestInterception = AsyncMock()
+    page_mock.on = MagicMock()
     
     # Metadata evaluation mock
     metadata_mock = AsyncMock(return_value={
@@ -23,8 +25,12 @@ def mock_browser():
         'keywords': 'test, keywords'
     })
     page_mock.evaluate.side_effect = [
-        {'width': 1000, 'height': 800},  # First call for page dimensions
-        metadata_mock.return_value       # Second call for metadata
+        {'signal': 'dom_quiescence', 'elapsed': 640},  # Readiness wait
+        {'width': 1000, 'height': 800},  # Page dimensions
+        metadata_mock.return_value,      # Metadata
+        {'domain': 'example.com', 'url': 'https://example.com/'},  # Page info
+        '0:body\n1:div.content',        # DOM signature
+        {'height': 800, 'nodes': [[10, 30, 'Welcome']]}  # Text layout
     ]
     
     # Setup browser mock methods
@@ -43,11 +49,10 @@ def tmp_output_dir(tmp_path):
     output_dir.mkdir()
     return str(output_dir)
 
-@patch('pyppeteer.launch')
+@patch('src.components.webpage_renderer.launch', new_callable=AsyncMock)
 def test_render_webpage(mock_launch, mock_browser, tmp_output_dir):
     # Configure the mock
-    mock_launch.return_value = asyncio.Future()
-    mock_launch.return_value.set_result(mock_browser['browser'])
+    mock_launch.return_value = mock_browser['browser']
     
     # Create a screenshot path in the temporary directory
     screenshot_path = os.path.join(tmp_output_dir, 'screenshot.png')
@@ -68,14 +73,14 @@ def test_render_webpage(mock_launch, mock_browser, tmp_output_dir):
     page = mock_browser['page']
     page.goto.assert_called_once_with(
         'https://example.com', 
-        {'waitUntil': 'networkidle0', 'timeout': 60000}
+        {'waitUntil': 'domcontentloaded', 'timeout': 60000}
     )
     
-    # Verify page.evaluate was called to get dimensions
-    assert page.evaluate.call_count == 2
+    # Verify page.evaluate was called for readiness, dimensions, metadata, page info, DOM signature and text layout
+    assert page.evaluate.call_count == 6
     
-    # Verify page.setViewport was called with the dimensions
-    page.setViewport.assert_called_once_with({
+    # Verify page.setViewport was last called with the dimensions
+    page.setViewport.assert_called_with({
         'width': 1000,
         'height': 800
     })
@@ -99,13 +104,60 @@ def test_render_webpage(mock_launch, mock_browser, tmp_output_dir):
         'description': 'Test description',
         'keywords': 'test, keywords'
     }
+    assert result['readiness']['signal'] == 'dom_quiescence'
+    assert result['readiness']['strategy'] == 'adaptive'
+    assert result['dom_signature'] == '0:body\n1:div.content'
+    assert result['text_layout']['nodes'] == [[10, 30, 'Welcome']]
+    
+    # Verify request interception was enabled and stats were reported
+    page.setRequestInterception.assert_called_once_with(True)
+    assert 'request_stats' in result
+    assert result['request_stats']['enabled'] == True
+
+@patch('src.components.webpage_renderer.asyncio.sleep', new_callable=AsyncMock)
+def test_wait_for_page_ready_fixed_strategy(mock_sleep, mock_browser):
+    page = mock_browser['page']
+    renderer = WebpageRenderer()
+    
+    readiness = asyncio.run(renderer._wait_for_page_ready(
+        page, 'https://example.com', {'wait_strategy': 'fixed', 'wait_time': 3}
+    ))
+    
+    page.goto.assert_called_once_with(
+        'https://example.com',
+        {'waitUntil': 'networkidle0', 'timeout': 60000}
+    )
+    mock_sleep.assert_called_once_with(3)
+    page.evaluate.assert_not_called()
+    assert readiness['signal'] == 'fixed_delay'
+
+def test_wait_for_page_ready_passes_options(mock_browser):
+    page = mock_browser['page']
+    renderer = WebpageRenderer()
+    
+    readiness = asyncio.run(renderer._wait_for_page_ready(
+        page, 'https://example.com', {'max_wait': 5, 'quiet_window': 250}
+    ))
+    
+    options = page.evaluate.call_args[0][1]
+    assert 0 < options['maxWait'] <= 5000
+    assert options['quietWindow'] == 250
+    assert readiness['signal'] == 'dom_quiescence'
+    assert 'elapsed' in readiness
+
+def test_wait_for_page_ready_unknown_strategy(mock_browser):
+    renderer = WebpageRenderer()
+    
+    with pytest.raises(ValueError):
+        asyncio.run(renderer._wait_for_page_ready(
+            mock_browser['page'], 'https://example.com', {'wait_strategy': 'bogus'}
+        ))
 
 @patch('asyncio.get_event_loop')
-@patch('pyppeteer.launch')
+@patch('src.components.webpage_renderer.launch', new_callable=AsyncMock)
 def test_capture_screenshot_exception(mock_launch, mock_get_event_loop, mock_browser):
     # Configure the mocks
-    mock_launch.return_value = asyncio.Future()
-    mock_launch.return_value.set_result(mock_browser['browser'])
+    mock_launch.return_value = mock_browser['browser']
     
     # Make page.goto raise an exception
     page = mock_browser['page']
@@ -125,4 +177,107 @@ def test_capture_screenshot_exception(mock_launch, mock_get_event_loop, mock_bro
         renderer.render_webpage('https://example.com')
     
     # Verify browser.close was still called (cleanup)
-    mock_browser['browser'].close.assert_called_once()
\ No newline at end of file
+    mock_browser['browser'].close.assert_called_once()
+
+@pytest.fixture
+def tiled_browser():
+    """Mock browser for a 250px tall page captured with a 200x100 viewport"""
+    from PIL import Image
+    from src.components import webpage_renderer as renderer_module
+    
+    page_height, viewport_height = 250, 100
+    browser_mock = AsyncMock()
+    page_mock = AsyncMock()
+    page_mock.on = MagicMock()
+    page_mock.title = AsyncMock(return_value="Long Page")
+    
+    def evaluate(script, *args):
+        if script == renderer_module.READINESS_SCRIPT:
+            return {'signal': 'images', 'elapsed': 10}
+        if script == renderer_module.SCROLL_SCRIPT:
+            return {'scroll_y': min(args[0], page_height - viewport_height), 'height': page_height}
+        if script == renderer_module.HIDE_FIXED_ELEMENTS_SCRIPT:
+            return None
+        if 'scrollHeight' in script:
+            return {'width': 200, 'height': page_height}
+        return {}
+    page_mock.evaluate = AsyncMock(side_effect=evaluate)
+    
+    shades = iter([50, 100, 150])
+    def screenshot(options):
+        Image.new('RGB', (200, viewport_height), color=(next(shades), 0, 0)).save(options['path'])
+    page_mock.screenshot = AsyncMock(side_effect=screenshot)
+    
+    browser_mock.newPage = AsyncMock(return_value=page_mock)
+    return {'browser': browser_mock, 'page': page_mock}
+
+@patch('src.components.webpage_renderer.launch', new_callable=AsyncMock)
+def test_render_webpage_tiled(mock_launch, tiled_browser, tmp_output_dir):
+    from PIL import Image
+    mock_launch.return_value = tiled_browser['browser']
+    screenshot_path = os.path.join(tmp_output_dir, 'long.png')
+    received = []
+    
+    renderer = WebpageRenderer()
+    result = renderer.render_webpage(
+        'https://example.com',
+        output_path=screenshot_path,
+        config={'capture_mode': 'tiled', 'viewport': {'width': 200, 'height': 100}, 'stitch': True},
+        on_tile=received.append
+    )
+    
+    # Tiles are streamed as they are captured and are exactly adjacent
+    assert [tile['top'] for tile in received] == [0, 100, 200]
+    assert [tile['height'] for tile in received] == [100, 100, 50]
+    assert result['tiles'] == received
+    assert result['page_dimensions'] == {'width': 200, 'height': 250}
+    
+    # The last tile was cropped to the rows not covered by the previous one
+    with Image.open(received[-1]['path']) as last_tile:
+        assert last_tile.size == (200, 50)
+    
+    # The stitched screenshot covers the whole page
+    assert result['screenshot_path'] == screenshot_path
+    with Image.open(screenshot_path) as stitched:
+        assert stitched.size == (200, 250)
+        assert stitched.getpixel((0, 0)) == (50, 0, 0)
+        assert stitched.getpixel((0, 249)) == (150, 0, 0)
+
+@patch('src.components.webpage_renderer.launch', new_callable=AsyncMock)
+def test_render_webpage_tiled_max_height_unstitched_by_default(mock_launch, tiled_browser, tmp_output_dir):
+    mock_launch.return_value = tiled_browser['browser']
+    screenshot_path = os.path.join(tmp_output_dir, 'long.png')
+    
+    renderer = WebpageRenderer()
+    result = renderer.render_webpage(
+        'https://example.com',
+        output_path=screenshot_path,
+        config={
+            'capture_mode': 'tiled',
+            'viewport': {'width': 200, 'height': 100},
+            'max_height': 150
+        }
+    )
+    
+    assert [tile['height'] for tile in result['tiles']] == [100, 50]
+    assert result['screenshot_path'] is None
+    assert not os.path.exists(screenshot_path)
+
+def test_stitch_tiles_streams_strips(tmp_path):
+    import numpy as np
+    from PIL import Image
+    rng = np.random.default_rng(3)
+    tiles, strips, top = [], [], 0
+    for index, (height, mode) in enumerate([(40, 'RGB'), (40, 'RGBA'), (13, 'RGB')]):
+        pixels = rng.integers(0, 256, (height, 30, 3), dtype=np.uint8)
+        path = str(tmp_path / f"tile_{index}.png")
+        Image.fromarray(pixels).convert(mode).save(path)
+        tiles.append({'index': index, 'path': path, 'top': top, 'height': height})
+        strips.append(pixels)
+        top += height
+    
+    output_path = WebpageRenderer().stitch_tiles(tiles, str(tmp_path / "stitched.png"))
+    
+    with Image.open(output_path) as stitched:
+        assert stitched.mode == 'RGB'
+        assert np.array_equal(np.asarray(stitched), np.vstack(strips))
@@ -0,0 +1,125 @@
+import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.components.work_queue import WorkQueue, SQLiteWorkQueue, QueueWorker, create_work_queue
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    yield queue
+    queue.close()
+
+def test_jobs_are_claimed_once_in_order(tmp_path, queue):
+    assert queue.enqueue(['/a', '/b', '/a'], {'use_llm': True}) == 2
+    # URLs still waiting are not enqueued twice
+    assert queue.enqueue(['/b', '/c']) == 1
+
+    # Workers with their own connections, as in separate processes
+    def drain(name):
+        worker_queue = SQLiteWorkQueue(queue.db_path)
+        claimed = []
+        while True:
+            job = worker_queue.claim(name, 60)
+            if job is None:
+                worker_queue.close()
+                return claimed
+            claimed.append(job['url'])
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        claimed = [url for urls in executor.map(drain, ['w1', 'w2', 'w3']) for url in urls]
+    assert sorted(claimed) == ['/a', '/b', '/c']
+    assert queue.stats() == {'queued': 0, 'leased': 3, 'done': 0, 'failed': 0}
+    assert queue.jobs()[0]['url'] == '/a'
+
+def test_expired_lease_is_taken_over(queue):
+    queue.enqueue(['/page'])
+    first = queue.claim('dead-worker', lease_seconds=0.05)
+    assert first['payload'] == {} and first['attempt'] == 1
+    assert queue.claim('other', 60) is None
+
+    time.sleep(0.1)
+    second = queue.claim('other', 60)
+    assert second['url'] == '/page' and second['attempt'] == 2
+
+    # The first worker's lease is gone; its outcome does not count
+    assert not queue.heartbeat(first, 60)
+    assert not queue.complete(first, {'from': 'dead-worker'})
+    assert queue.complete(second, {'from': 'other'})
+    assert queue.jobs('done')[0]['result'] == {'from': 'other'}
+
+def test_failures_are_retried_within_attempts(queue):
+    queue.enqueue(['/flaky', '/abandoned'])
+    job = queue.claim('w', 60)
+    assert queue.fail(job, 'timeout')
+    assert queue.stats()['queued'] == 2
+
+    # Retries wait behind fresh work
+    assert queue.claim('w', 0)['url'] == '/abandoned'
+    job = queue.claim('w', 60)
+    assert job['url'] == '/flaky' and job['attempt'] == 2
+    assert queue.fail(job, 'timeout again')
+
+    # Abandoned on its last attempt
+    assert queue.claim('w', 0)['url'] == '/abandoned'
+    time.sleep(0.01)
+    assert queue.claim('w', 60) is None
+    failed = {job['url']: job['error'] for job in queue.jobs('failed')}
+    assert failed == {'/flaky': 'timeout again', '/abandoned': 'Lease expired'}
+
+def test_released_job_keeps_its_attempts(queue):
+    queue.enqueue(['/page'])
+    assert queue.release(queue.claim('w', 60))
+    assert queue.claim('w', 60)['attempt'] == 1
+
+def test_worker_processes_and_heartbeats(queue):
+    queue.enqueue(['/ok', '/broken', '/error'])
+    processed = []
+    def process(job):
+        processed.append(job['url'])
+        # Outlives the lease unless the heartbeat renews it
+        time.sleep(0.3)
+        if job['url'] == '/broken':
+            raise RuntimeError("renderer crashed")
+        if job['url'] == '/error':
+            return {'error': 'bad page'}
+        return {'saved': job['url']}
+
+    worker = QueueWorker(queue, process, worker_id='w', lease_seconds=0.2, heartbeat_interval=0.05, poll_interval=0.01)
+    counts = worker.run(idle_timeout=0.1)
+
+    assert counts == {'completed': 1, 'failed': 4, 'lost': 0}
+    assert processed == ['/ok', '/broken', '/error', '/broken', '/error']
+    assert queue.stats() == {'queued': 0, 'leased': 0, 'done': 1, 'failed': 2}
+    assert {job['url']: job['error'] for job in queue.jobs('failed')} == {
+        '/broken': 'renderer crashed', '/error': 'bad page'}
+
+def test_worker_drops_result_of_lost_lease(queue, capsys):
+    queue.enqueue(['/slow'])
+    def process(job):
+        # Another worker takes over while this one is stuck
+        time.sleep(0.15)
+        return {'saved': True}
+
+    worker = QueueWorker(queue, process, lease_seconds=0.05, heartbeat_interval=0.04)
+    job = queue.claim(worker.worker_id, 0.05)
+    time.sleep(0.06)
+    other = queue.claim('other', 60)
+    assert worker.run_job(job) == 'lost'
+    assert queue.complete(other)
+    # The loss is reported through the counts of run(), not printed
+    assert capsys.readouterr().out == ''
+
+def test_incomplete_queue_backend_fails_at_construction():
+    class EnqueueOnlyQueue(WorkQueue):
+        def enqueue(self, urls, payload=None):
+            return 0
+
+    with pytest.raises(TypeError):
+        EnqueueOnlyQueue()
+
+def test_create_work_queue(tmp_path):
+    queue = create_work_queue({'path': str(tmp_path / 'q.db'), 'max_attempts': 5})
+    assert queue.max_attempts == 5
+    queue.close()
+    with pytest.raises(ValueError):
+        create_work_queue({'backend': 'carrier-pigeon'})